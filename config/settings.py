@@ -31,6 +31,11 @@ class AgentSettings(BaseSettings):
     task_timeout_seconds: int = Field(default=300, description="Task execution timeout")
     memory_retention_days: int = Field(default=30, description="Memory retention period")
     
+    # Inter-agent messaging
+    message_queue_size: int = Field(default=1000, description="Maximum pending messages per agent mailbox")
+    message_overflow_policy: str = Field(default="block", description="Full mailbox policy (block, drop_oldest, reject)")
+    message_batch_size: int = Field(default=50, description="Maximum messages handled per delivery batch")
+    
     # Agent capabilities
     threat_hunter_enabled: bool = Field(default=True, description="Enable threat hunter agent")
     incident_response_enabled: bool = Field(default=True, description="Enable incident response agent")
@@ -14,7 +14,7 @@ from ..shared.models import (
     AgentState, AgentType, AgentStatus, Task, TaskStatus, 
     AgentMessage, AgentMemory
 )
-from ..shared.communication import AgentCommunicationManager
+from ..shared.communication import AgentCommunicationManager, OverflowPolicy
 from ..shared.aws_integration import (
     bedrock_client, cloudwatch_logger, cloudwatch_metrics,
     iam_security, kms_encryption
@@ -37,7 +37,12 @@ class BaseAgent(AgentInterface):
         self.bedrock_session_id: Optional[str] = None
         
         # Communication
-        self.comm_manager = AgentCommunicationManager(agent_id)
+        self.comm_manager = AgentCommunicationManager(
+            agent_id,
+            max_queue_size=settings.agents.message_queue_size,
+            overflow_policy=OverflowPolicy(settings.agents.message_overflow_policy),
+            batch_size=settings.agents.message_batch_size
+        )
         
         # Logging
         self.logger = logging.getLogger(f"acso.agent.{agent_id}")
@@ -96,6 +101,10 @@ class BaseAgent(AgentInterface):
             # Log shutdown
             await self._log_activity("shutdown", {"status": "success"})
             
+            # Ship buffered CloudWatch events and metrics
+            await cloudwatch_logger.flush()
+            await cloudwatch_metrics.flush()
+            
             self.logger.info(f"Agent {self.agent_id} shutdown complete")
             
         except Exception as e:
@@ -321,8 +321,11 @@ class SupervisorAgent(BaseAgent, SupervisorInterface):
             assigned_agent = await system_coordinator.delegate_task(task, agent_id)
             
             if assigned_agent:
+                # Track the task before sending so a fast result is not missed
+                self.task_coordinator.track_task(task.task_id, agent_id, task.dict())
+                
                 # Send task assignment message
-                await self.comm_manager.send_message(
+                sent = await self.comm_manager.send_message(
                     recipient_id=agent_id,
                     message_type="task_assignment",
                     payload={
@@ -330,6 +333,9 @@ class SupervisorAgent(BaseAgent, SupervisorInterface):
                         "task_data": task.dict()
                     }
                 )
+                if not sent:
+                    self.task_coordinator.cancel_task(task.task_id)
+                    return False
                 
                 # Track delegation
                 await self._store_memory(f"delegated_task_{task.task_id}", {
@@ -505,6 +511,9 @@ class SupervisorAgent(BaseAgent, SupervisorInterface):
             
             self.logger.info(f"Received task result for {task_id}: success={success}")
             
+            # Resolve the completion handle of any workflow waiting on this task
+            await self.task_coordinator.handle_task_result(message)
+            
             # Store result
             await self._store_memory(f"task_result_{task_id}", {
                 "result": result,
@@ -526,8 +535,10 @@ class SupervisorAgent(BaseAgent, SupervisorInterface):
         try:
             self.logger.info(f"Executing workflow {workflow_id} with {len(tasks)} tasks")
             
-            workflow_results = []
+            workflow_results: List[Optional[Dict[str, Any]]] = []
+            delegated: Dict[str, int] = {}
             
+            # Fan out every task first, then wait on all completion handles at once
             for task in tasks:
                 # Find appropriate agent for task
                 agent_id = await self._select_agent_for_task(task)
@@ -537,17 +548,8 @@ class SupervisorAgent(BaseAgent, SupervisorInterface):
                     success = await self.delegate_task(task, agent_id)
                     
                     if success:
-                        # Wait for result (simplified for prototype)
-                        result = await self.task_coordinator.get_task_result(task.task_id, timeout=30.0)
-                        
-                        if result:
-                            workflow_results.append(result)
-                        else:
-                            workflow_results.append({
-                                "task_id": task.task_id,
-                                "success": False,
-                                "error": "Task timeout"
-                            })
+                        delegated[task.task_id] = len(workflow_results)
+                        workflow_results.append(None)
                     else:
                         workflow_results.append({
                             "task_id": task.task_id,
@@ -561,6 +563,16 @@ class SupervisorAgent(BaseAgent, SupervisorInterface):
                         "error": "No suitable agent found"
                     })
                     
+            if delegated:
+                results = await self.task_coordinator.wait_all(list(delegated), timeout=30.0)
+                for task_id, index in delegated.items():
+                    result = results.get(task_id)
+                    workflow_results[index] = result or {
+                        "task_id": task_id,
+                        "success": False,
+                        "error": "Task timeout"
+                    }
+                    
             # Aggregate results
             final_result = await self.aggregate_results(workflow_results)
             
@@ -685,8 +697,9 @@ class SupervisorAgent(BaseAgent, SupervisorInterface):
             "goal_type": "generic",
             "workflow_results": results,
             "task_id": task.task_id
-        }    a
-sync def request_human_approval(self, 
+        }
+        
+    async def request_human_approval(self, 
                                    action: str, 
                                    context: Dict[str, Any],
                                    approval_type: ApprovalType = ApprovalType.HIGH_RISK_ACTION) -> bool:
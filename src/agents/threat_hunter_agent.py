@@ -5,11 +5,15 @@ Proactively hunts for security threats and anomalies.
 
 import asyncio
 import json
+import logging
+import time
 import uuid
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Tuple
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Any, Sequence, Tuple, Union
 from enum import Enum
 
+import numpy as np
+
 from .base_agent import BaseAgent
 from ..shared.interfaces import ThreatHunterInterface
 from ..shared.models import (
@@ -17,6 +21,8 @@ from ..shared.models import (
     Incident, IncidentSeverity, IncidentType, IncidentStatus
 )
 from ..shared.coordination import system_coordinator
+from ..shared.pattern_matching import AhoCorasickMatcher, IPNetworkSet
+from ..shared.windowing import SlidingWindowAggregator
 from ..shared.aws_integration import bedrock_client, cloudwatch_logger
 from config.settings import settings
 
@@ -75,14 +81,282 @@ class ThreatIndicator:
         }
 
 
+# Known-bad source addresses used until threat intelligence feeds are wired in
+DEFAULT_MALICIOUS_IPS = [
+    "192.168.1.100",  # Example malicious IP for testing
+    "10.0.0.50"
+]
+
+# Substring patterns matched against the lower-cased CloudTrail event name
+BUILTIN_PATTERN_ACTIONS = [
+    {
+        "pattern": "failed_login",
+        "actions": ["signin", "login"],
+        "requires_error": True,
+        "severity": ThreatSeverity.MEDIUM,
+        "description": "Failed login attempt from {source_ip}",
+        "indicators": ["source_ip", "user_name"]
+    },
+    {
+        "pattern": "privilege_escalation",
+        "actions": ["attachuserpolicy", "putuserpolicy", "createrole"],
+        "severity": ThreatSeverity.HIGH,
+        "description": "Privilege escalation activity: {event_name}",
+        "indicators": ["user_name"]
+    },
+    {
+        "pattern": "data_access",
+        "actions": ["getobject", "listobjects", "downloadfile"],
+        "severity": ThreatSeverity.LOW,
+        "description": "Data access activity: {event_name}",
+        "indicators": ["source_ip"]
+    }
+]
+
+
+class CompiledRuleSet:
+    """Detection rules and threat patterns compiled into lookup indexes."""
+    
+    def __init__(self, rules_by_event: Dict[str, List[Tuple[int, Dict[str, Any], bool]]],
+                 wildcard_rules: List[Tuple[int, Dict[str, Any], bool]],
+                 pattern_specs: List[Dict[str, Any]],
+                 action_matcher: AhoCorasickMatcher,
+                 malicious_ips: IPNetworkSet):
+        # event name -> [(rule order, rule, requires malicious source IP)]
+        self.rules_by_event = rules_by_event
+        self.wildcard_rules = wildcard_rules
+        self.pattern_specs = pattern_specs
+        self.action_matcher = action_matcher
+        self.malicious_ips = malicious_ips
+        
+    def candidate_rules(self, event_name: str) -> List[Tuple[int, Dict[str, Any], bool]]:
+        """Rules that can match an event, in their original declaration order."""
+        indexed = self.rules_by_event.get(event_name)
+        if not indexed:
+            return self.wildcard_rules
+        if not self.wildcard_rules:
+            return indexed
+        return sorted(indexed + self.wildcard_rules, key=lambda entry: entry[0])
+        
+    def matched_patterns(self, event_name: str) -> List[Dict[str, Any]]:
+        """Pattern specs whose actions occur in the event name, in declaration order."""
+        matches = self.action_matcher.find(event_name)
+        return [self.pattern_specs[index] for index in sorted(matches)]
+
+
+class DetectionRuleCompiler:
+    """Compiles detection rules, threat patterns and IP indicators into a CompiledRuleSet."""
+    
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        
+    def compile(self, detection_rules: List[Dict[str, Any]],
+                threat_patterns: Dict[str, Dict[str, Any]],
+                threat_indicators: List[ThreatIndicator]) -> CompiledRuleSet:
+        """Build the event-name rule index, action automaton and IP reputation set."""
+        rules_by_event: Dict[str, List[Tuple[int, Dict[str, Any], bool]]] = {}
+        wildcard_rules: List[Tuple[int, Dict[str, Any], bool]] = []
+        
+        for order, rule in enumerate(detection_rules):
+            if not rule.get("enabled", True):
+                continue
+            conditions = rule.get("conditions", {})
+            requires_malicious_ip = conditions.get("source_ip_reputation") == "malicious"
+            entry = (order, rule, requires_malicious_ip)
+            
+            if "event_type" in conditions:
+                rules_by_event.setdefault(conditions["event_type"], []).append(entry)
+            else:
+                wildcard_rules.append(entry)
+                
+        pattern_specs = list(BUILTIN_PATTERN_ACTIONS)
+        for name, definition in threat_patterns.items():
+            # Only pattern definitions that list event actions take part in matching
+            actions = definition.get("actions") if isinstance(definition, dict) else None
+            if not actions:
+                continue
+            description = str(definition.get("description", f"Threat pattern {name}"))
+            pattern_specs.append({
+                "pattern": name,
+                "actions": [action.lower() for action in actions],
+                "requires_error": definition.get("requires_error", False),
+                "severity": definition.get("severity", ThreatSeverity.MEDIUM),
+                "description": description.replace("{", "{{").replace("}", "}}") + ": {event_name}",
+                "indicators": definition.get("indicators", ["source_ip"])
+            })
+            
+        action_matcher = AhoCorasickMatcher(
+            (action, index)
+            for index, spec in enumerate(pattern_specs)
+            for action in spec["actions"]
+        )
+        
+        malicious_ips = IPNetworkSet(DEFAULT_MALICIOUS_IPS)
+        for indicator in threat_indicators:
+            if indicator.indicator_type in ("ip", "cidr"):
+                try:
+                    malicious_ips.add(indicator.value)
+                except ValueError:
+                    self.logger.warning(f"Ignoring invalid IP indicator: {indicator.value}")
+                    
+        return CompiledRuleSet(
+            rules_by_event=rules_by_event,
+            wildcard_rules=wildcard_rules,
+            pattern_specs=pattern_specs,
+            action_matcher=action_matcher,
+            malicious_ips=malicious_ips
+        )
+
+
+class LogBatch:
+    """Columnar page of log entries for batch threat analysis.
+    
+    Built from a list of CloudTrail-style entries or from a dict of columns
+    keyed by the same field names (eventName, sourceIPAddress, eventTime,
+    userIdentity, errorCode, errorMessage).
+    """
+    
+    def __init__(self, size: int, rows: Optional[Sequence[Dict[str, Any]]] = None,
+                 columns: Optional[Dict[str, Sequence[Any]]] = None):
+        self.size = size
+        self._rows = rows
+        self._columns = columns
+        
+        if rows is not None:
+            event_names = [entry.get("eventName", "") for entry in rows]
+            source_ips = [entry.get("sourceIPAddress", "") for entry in rows]
+            event_times = [entry.get("eventTime") for entry in rows]
+            user_identities = [entry.get("userIdentity", {}) for entry in rows]
+            error_codes = [entry.get("errorCode") for entry in rows]
+            error_messages = [entry.get("errorMessage") for entry in rows]
+        else:
+            def column(name: str, default: Any) -> Sequence[Any]:
+                return columns[name] if name in columns else [default] * size
+            event_names = column("eventName", "")
+            source_ips = column("sourceIPAddress", "")
+            event_times = column("eventTime", None)
+            user_identities = column("userIdentity", {})
+            error_codes = column("errorCode", None)
+            error_messages = column("errorMessage", None)
+            
+        # Rows whose field types need the per-entry path
+        self.irregular: List[bool] = [
+            not (isinstance(name, str) and isinstance(ip, str) and isinstance(identity, dict))
+            for name, ip, identity in zip(event_names, source_ips, user_identities)
+        ]
+        self.event_names: List[str] = [name.lower() if isinstance(name, str) else "" for name in event_names]
+        self.source_ips: List[str] = [ip if isinstance(ip, str) else "" for ip in source_ips]
+        self.event_times: List[Optional[str]] = [text if isinstance(text, str) else None for text in event_times]
+        self.has_error: List[bool] = [bool(code or message) for code, message in zip(error_codes, error_messages)]
+            
+    def __len__(self) -> int:
+        return self.size
+        
+    @classmethod
+    def from_entries(cls, entries: Sequence[Dict[str, Any]]) -> "LogBatch":
+        """Build a batch from row-oriented log entries."""
+        return cls(len(entries), rows=entries)
+        
+    @classmethod
+    def from_columns(cls, columns: Dict[str, Sequence[Any]]) -> "LogBatch":
+        """Build a batch from equal-length columns keyed by field name."""
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("All log columns must have the same length")
+        return cls(lengths.pop() if lengths else 0, columns=columns)
+        
+    @classmethod
+    def from_page(cls, page: Union[Sequence[Dict[str, Any]], Dict[str, Any]]) -> "LogBatch":
+        """Build a batch from a CloudTrail page, a log_data dict or a list of entries."""
+        if isinstance(page, dict):
+            if "columns" in page:
+                return cls.from_columns(page["columns"])
+            return cls.from_entries(page.get("Records", page.get("entries", [])))
+        return cls.from_entries(page)
+        
+    def entry(self, index: int) -> Dict[str, Any]:
+        """Row-oriented log entry at index."""
+        if self._rows is not None:
+            return self._rows[index]
+        return {key: values[index] for key, values in self._columns.items()}
+
+
 class ThreatDetectionEngine:
     """Core engine for threat detection and analysis."""
     
-    def __init__(self):
-        self.threat_patterns = self._initialize_threat_patterns()
+    def __init__(self, max_aggregation_keys: int = 100000):
+        self._threat_patterns = self._initialize_threat_patterns()
         self.baseline_behaviors = {}
-        self.threat_indicators = []
-        self.detection_rules = self._initialize_detection_rules()
+        self._threat_indicators: List[ThreatIndicator] = []
+        self._detection_rules = self._initialize_detection_rules()
+        
+        # Compiled indexes over the rules above. Assigning the rule sources or
+        # going through update_detection_rule recompiles them; code that edits
+        # the sources in place must call compile_rules() itself.
+        self.rule_compiler = DetectionRuleCompiler()
+        self.compiled_rules: Optional[CompiledRuleSet] = None
+        self.compile_rules()
+        
+        # Windowed counters for rules with count_threshold/time_window conditions
+        self.rule_aggregator = SlidingWindowAggregator(max_keys=max_aggregation_keys)
+        
+    def compile_rules(self) -> CompiledRuleSet:
+        """Recompile detection rules, threat patterns and IP indicators."""
+        self.compiled_rules = self.rule_compiler.compile(
+            self.detection_rules, self.threat_patterns, self.threat_indicators
+        )
+        return self.compiled_rules
+        
+    def _get_compiled_rules(self) -> CompiledRuleSet:
+        """Return the compiled rule set."""
+        if self.compiled_rules is None:
+            return self.compile_rules()
+        return self.compiled_rules
+        
+    @property
+    def detection_rules(self) -> List[Dict[str, Any]]:
+        return self._detection_rules
+        
+    @detection_rules.setter
+    def detection_rules(self, detection_rules: List[Dict[str, Any]]) -> None:
+        self._detection_rules = detection_rules
+        self.compile_rules()
+        
+    @property
+    def threat_patterns(self) -> Dict[str, Dict[str, Any]]:
+        return self._threat_patterns
+        
+    @threat_patterns.setter
+    def threat_patterns(self, threat_patterns: Dict[str, Dict[str, Any]]) -> None:
+        self._threat_patterns = threat_patterns
+        self.compile_rules()
+        
+    @property
+    def threat_indicators(self) -> List[ThreatIndicator]:
+        return self._threat_indicators
+        
+    @threat_indicators.setter
+    def threat_indicators(self, threat_indicators: List[ThreatIndicator]) -> None:
+        self._threat_indicators = threat_indicators
+        self.compile_rules()
+        
+    def update_detection_rule(self, rule_id: str, **changes: Any) -> bool:
+        """
+        Update a detection rule's fields and recompile the rules.
+        
+        A `conditions` change is merged into the rule's existing conditions.
+        Returns False if no rule has the given id.
+        """
+        for rule in self._detection_rules:
+            if rule.get("rule_id") != rule_id:
+                continue
+            conditions = changes.pop("conditions", None)
+            if conditions is not None:
+                rule.setdefault("conditions", {}).update(conditions)
+            rule.update(changes)
+            self.compile_rules()
+            return True
+        return False
         
     def _initialize_threat_patterns(self) -> Dict[str, Dict[str, Any]]:
         """Initialize known threat patterns."""
@@ -163,21 +437,18 @@ class ThreatDetectionEngine:
         threats = []
         
         try:
-            # Apply detection rules
-            for rule in self.detection_rules:
-                if not rule.get("enabled", True):
-                    continue
-                    
-                threat = await self._apply_detection_rule(log_entry, rule)
-                if threat:
-                    threats.append(threat)
+            compiled = self._get_compiled_rules()
+            event_time = self._parse_event_time(log_entry)
+            
+            # Apply detection rules indexed by event name
+            threats.extend(self._apply_detection_rules(log_entry, compiled, event_time))
                     
             # Check against known threat patterns
-            pattern_threats = await self._check_threat_patterns(log_entry)
+            pattern_threats = await self._check_threat_patterns(log_entry, compiled)
             threats.extend(pattern_threats)
             
             # Perform behavioral analysis
-            behavioral_threats = await self._analyze_behavioral_anomalies(log_entry)
+            behavioral_threats = await self._analyze_behavioral_anomalies(log_entry, event_time)
             threats.extend(behavioral_threats)
             
         except Exception as e:
@@ -185,125 +456,286 @@ class ThreatDetectionEngine:
             
         return threats
         
-    async def _apply_detection_rule(self, log_entry: Dict[str, Any], rule: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Apply a detection rule to a log entry."""
+    def _parse_event_time(self, log_entry: Dict[str, Any]) -> Optional[datetime]:
+        """Parse the entry's eventTime, or return None if it is missing or invalid."""
+        event_time = log_entry.get("eventTime")
+        if event_time is None:
+            return None
         try:
-            conditions = rule.get("conditions", {})
+            return datetime.fromisoformat(event_time.replace('Z', '+00:00'))
+        except (AttributeError, TypeError, ValueError):
+            return None
             
-            # Simple rule matching (in a real implementation, this would be more sophisticated)
-            matches = True
-            
-            for condition_key, condition_value in conditions.items():
-                if condition_key == "event_type":
-                    if log_entry.get("eventName", "").lower() != condition_value:
-                        matches = False
-                        break
-                elif condition_key == "source_ip_reputation":
-                    # Check IP reputation (simplified)
-                    source_ip = log_entry.get("sourceIPAddress", "")
-                    if condition_value == "malicious" and not self._is_malicious_ip(source_ip):
-                        matches = False
-                        break
-                        
-            if matches:
-                return {
-                    "rule_id": rule["rule_id"],
-                    "rule_name": rule["name"],
-                    "severity": rule["severity"],
-                    "description": rule["description"],
-                    "log_entry": log_entry,
-                    "detected_at": datetime.utcnow().isoformat()
-                }
+    async def analyze_log_batch(self, batch: Union[LogBatch, Sequence[Dict[str, Any]], Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Analyze a page of log entries in one pass.
+        
+        Timestamps, business-hours and IP checks are evaluated column-wise and
+        per distinct value. Threats are returned in input order and match what
+        analyze_log_entry returns for each entry in turn.
+        """
+        if not isinstance(batch, LogBatch):
+            batch = LogBatch.from_page(batch)
+        if not len(batch):
+            return []
+            
+        compiled = self._get_compiled_rules()
+        
+        # Bulk timestamp parsing for the canonical CloudTrail form YYYY-MM-DDTHH:MM:SSZ
+        times = np.array([text or "" for text in batch.event_times], dtype=str)
+        fast_time = (
+            (np.char.str_len(times) == 20)
+            & np.char.endswith(times, "Z")
+            & (np.char.find(times, "T") == 10)
+        )
+        epoch_seconds = np.zeros(len(batch), dtype=np.int64)
+        if fast_time.any():
+            try:
+                parsed = np.array([text[:19] for text in times[fast_time]], dtype="datetime64[s]")
+                epoch_seconds[fast_time] = parsed.astype(np.int64)
+            except ValueError:
+                fast_time[:] = False
+        hours = (epoch_seconds // 3600) % 24
+        weekdays = (epoch_seconds // 86400 + 3) % 7  # 1970-01-01 was a Thursday
+        off_hours = fast_time & ((hours < 8) | (hours > 18) | (weekdays > 4))
+        
+        # IP checks evaluated once per distinct address
+        unique_ips, ip_index = np.unique(np.array(batch.source_ips, dtype=str), return_inverse=True)
+        malicious = np.array([ip in compiled.malicious_ips for ip in unique_ips], dtype=bool)[ip_index]
+        unusual_geo = np.array(
+            [self._is_unusual_geographic_location(ip) for ip in unique_ips], dtype=bool
+        )[ip_index]
+        
+        candidate_cache: Dict[str, List[Tuple[int, Dict[str, Any], bool]]] = {}
+        pattern_cache: Dict[str, List[Dict[str, Any]]] = {}
+        detected_at = datetime.utcnow().isoformat()
+        threats = []
+        
+        for index in range(len(batch)):
+            log_entry = batch.entry(index)
+            if batch.irregular[index]:
+                threats.extend(await self.analyze_log_entry(log_entry))
+                continue
                 
-        except Exception as e:
-            print(f"Rule application error: {e}")
+            # Failures are isolated per row, as in analyze_log_entry
+            row_threats = []
+            try:
+                event_name = batch.event_names[index]
+                source_ip = batch.source_ips[index]
+                if fast_time[index]:
+                    event_time = None
+                    timestamp = float(epoch_seconds[index])
+                else:
+                    event_time = self._parse_event_time(log_entry)
+                    timestamp = self._event_timestamp(event_time)
+                    
+                candidates = candidate_cache.get(event_name)
+                if candidates is None:
+                    candidates = candidate_cache[event_name] = compiled.candidate_rules(event_name)
+                if candidates:
+                    row_threats.extend(self._apply_detection_rules(
+                        log_entry, compiled, event_time,
+                        candidates=candidates,
+                        is_malicious_source=bool(malicious[index]),
+                        timestamp=timestamp,
+                        detected_at=detected_at
+                    ))
+                    
+                try:
+                    matched = pattern_cache.get(event_name)
+                    if matched is None:
+                        matched = pattern_cache[event_name] = compiled.matched_patterns(event_name)
+                    if matched:
+                        row_threats.extend(self._build_pattern_threats(
+                            matched, log_entry, event_name, source_ip, batch.has_error[index]
+                        ))
+                except Exception as e:
+                    print(f"Pattern checking error: {e}")
+                    
+                if fast_time[index]:
+                    if off_hours[index]:
+                        text = batch.event_times[index]
+                        row_threats.append(self._off_hours_anomaly(f"{text[:10]} {text[11:19]}+00:00"))
+                    if unusual_geo[index]:
+                        row_threats.append(self._geographic_anomaly(source_ip))
+                else:
+                    row_threats.extend(await self._analyze_behavioral_anomalies(log_entry, event_time))
+                    
+            except Exception as e:
+                print(f"Log analysis error: {e}")
+            threats.extend(row_threats)
+                
+        return threats
+        
+    def _apply_detection_rules(self, log_entry: Dict[str, Any], compiled: CompiledRuleSet,
+                               event_time: Optional[datetime] = None,
+                               candidates: Optional[List[Tuple[int, Dict[str, Any], bool]]] = None,
+                               is_malicious_source: Optional[bool] = None,
+                               timestamp: Optional[float] = None,
+                               detected_at: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Apply every compiled detection rule that can match the entry's event name.
+        
+        Batch callers pass precomputed candidates, IP reputation, timestamp and
+        detection time.
+        """
+        threats = []
+        if candidates is None:
+            candidates = compiled.candidate_rules(log_entry.get("eventName", "").lower())
+        if not candidates:
+            return threats
             
-        return None
+        for _, rule, requires_malicious_ip in candidates:
+            if requires_malicious_ip:
+                if is_malicious_source is None:
+                    is_malicious_source = log_entry.get("sourceIPAddress", "") in compiled.malicious_ips
+                if not is_malicious_source:
+                    continue
+                    
+            conditions = rule.get("conditions", {})
+            threshold = conditions.get("count_threshold", 1)
+            time_window = conditions.get("time_window")
+            if threshold > 1 and time_window:
+                # Only fire once threshold matching events fall inside the window
+                if timestamp is None:
+                    timestamp = self._event_timestamp(event_time)
+                event_count = self.rule_aggregator.record(
+                    (rule["rule_id"], self._aggregation_subject(log_entry, conditions)),
+                    timestamp,
+                    time_window,
+                    threshold
+                )
+                if event_count is None:
+                    continue
+                threat = self._build_rule_threat(log_entry, rule, detected_at)
+                threat["event_count"] = event_count
+                threat["time_window"] = time_window
+                threats.append(threat)
+            else:
+                threats.append(self._build_rule_threat(log_entry, rule, detected_at))
+        return threats
+        
+    def _aggregation_subject(self, log_entry: Dict[str, Any], conditions: Dict[str, Any]) -> str:
+        """Source IP or user name that a windowed rule counts events for."""
+        source_ip = log_entry.get("sourceIPAddress") or ""
+        user_name = (log_entry.get("userIdentity") or {}).get("userName") or ""
+        if conditions.get("group_by") == "user":
+            return user_name or source_ip or "unknown"
+        return source_ip or user_name or "unknown"
+        
+    def _event_timestamp(self, event_time: Optional[datetime]) -> float:
+        """Epoch seconds for an event, treating naive times as UTC.
+        
+        Undated events take the latest event time already counted, so one
+        undated entry in a backfilled batch does not move the windows to
+        wall-clock time and evict every counter in progress.
+        """
+        if event_time is None:
+            watermark = self.rule_aggregator.watermark
+            return watermark if watermark is not None else time.time()
+        if event_time.tzinfo is None:
+            event_time = event_time.replace(tzinfo=timezone.utc)
+        return event_time.timestamp()
+        
+    def _build_rule_threat(self, log_entry: Dict[str, Any], rule: Dict[str, Any],
+                           detected_at: Optional[str] = None) -> Dict[str, Any]:
+        """Build the threat record for a matched detection rule."""
+        return {
+            "rule_id": rule["rule_id"],
+            "rule_name": rule["name"],
+            "severity": rule["severity"],
+            "description": rule["description"],
+            "log_entry": log_entry,
+            "detected_at": detected_at or datetime.utcnow().isoformat()
+        }
         
-    async def _check_threat_patterns(self, log_entry: Dict[str, Any]) -> List[Dict[str, Any]]:
+    async def _check_threat_patterns(self, log_entry: Dict[str, Any],
+                                     compiled: Optional[CompiledRuleSet] = None) -> List[Dict[str, Any]]:
         """Check log entry against known threat patterns."""
         threats = []
         
         try:
             event_name = log_entry.get("eventName", "").lower()
-            source_ip = log_entry.get("sourceIPAddress", "")
-            user_identity = log_entry.get("userIdentity", {})
-            
-            # Check for suspicious login patterns
-            if "signin" in event_name or "login" in event_name:
-                if log_entry.get("errorCode") or log_entry.get("errorMessage"):
-                    threats.append({
-                        "pattern": "failed_login",
-                        "severity": ThreatSeverity.MEDIUM,
-                        "description": f"Failed login attempt from {source_ip}",
-                        "indicators": [source_ip, user_identity.get("userName", "unknown")]
-                    })
-                    
-            # Check for privilege escalation
-            if any(action in event_name for action in ["attachuserpolicy", "putuserpolicy", "createrole"]):
-                threats.append({
-                    "pattern": "privilege_escalation",
-                    "severity": ThreatSeverity.HIGH,
-                    "description": f"Privilege escalation activity: {event_name}",
-                    "indicators": [user_identity.get("userName", "unknown")]
-                })
+            matched = (compiled or self._get_compiled_rules()).matched_patterns(event_name)
+            if not matched:
+                return threats
                 
-            # Check for data access patterns
-            if any(action in event_name for action in ["getobject", "listobjects", "downloadfile"]):
-                # Simplified data access analysis
-                threats.append({
-                    "pattern": "data_access",
-                    "severity": ThreatSeverity.LOW,
-                    "description": f"Data access activity: {event_name}",
-                    "indicators": [source_ip]
-                })
+            has_error = log_entry.get("errorCode") or log_entry.get("errorMessage")
+            threats = self._build_pattern_threats(
+                matched, log_entry, event_name, log_entry.get("sourceIPAddress", ""), has_error
+            )
                 
         except Exception as e:
             print(f"Pattern checking error: {e}")
             
         return threats
         
-    async def _analyze_behavioral_anomalies(self, log_entry: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _build_pattern_threats(self, matched: List[Dict[str, Any]], log_entry: Dict[str, Any],
+                               event_name: str, source_ip: str, has_error: Any) -> List[Dict[str, Any]]:
+        """Build threat records for the pattern specs matched by an event name."""
+        threats = []
+        user_identity = log_entry.get("userIdentity", {})
+        values = {
+            "source_ip": source_ip,
+            "user_name": user_identity.get("userName", "unknown"),
+            "event_name": event_name
+        }
+        
+        for spec in matched:
+            if spec.get("requires_error") and not has_error:
+                continue
+            threats.append({
+                "pattern": spec["pattern"],
+                "severity": spec["severity"],
+                "description": spec["description"].format(**values),
+                "indicators": [values.get(key, key) for key in spec["indicators"]]
+            })
+        return threats
+        
+    async def _analyze_behavioral_anomalies(self, log_entry: Dict[str, Any],
+                                            event_time: Optional[datetime] = None) -> List[Dict[str, Any]]:
         """Analyze log entry for behavioral anomalies."""
         anomalies = []
         
         try:
             # Time-based anomaly detection
-            event_time = datetime.fromisoformat(log_entry.get("eventTime", datetime.utcnow().isoformat()).replace('Z', '+00:00'))
+            if event_time is None:
+                event_time = datetime.fromisoformat(log_entry.get("eventTime", datetime.utcnow().isoformat()).replace('Z', '+00:00'))
             
             # Check if activity is outside business hours
             if event_time.hour < 8 or event_time.hour > 18 or event_time.weekday() > 4:
-                anomalies.append({
-                    "anomaly_type": "off_hours_activity",
-                    "severity": ThreatSeverity.MEDIUM,
-                    "description": f"Activity detected outside business hours at {event_time}",
-                    "confidence": 0.6
-                })
+                anomalies.append(self._off_hours_anomaly(event_time))
                 
             # Geographic anomaly detection (simplified)
             source_ip = log_entry.get("sourceIPAddress", "")
             if self._is_unusual_geographic_location(source_ip):
-                anomalies.append({
-                    "anomaly_type": "geographic_anomaly",
-                    "severity": ThreatSeverity.HIGH,
-                    "description": f"Activity from unusual geographic location: {source_ip}",
-                    "confidence": 0.8
-                })
+                anomalies.append(self._geographic_anomaly(source_ip))
                 
         except Exception as e:
             print(f"Behavioral analysis error: {e}")
             
         return anomalies
         
+    def _off_hours_anomaly(self, event_time: Any) -> Dict[str, Any]:
+        """Anomaly record for activity outside business hours."""
+        return {
+            "anomaly_type": "off_hours_activity",
+            "severity": ThreatSeverity.MEDIUM,
+            "description": f"Activity detected outside business hours at {event_time}",
+            "confidence": 0.6
+        }
+        
+    def _geographic_anomaly(self, source_ip: str) -> Dict[str, Any]:
+        """Anomaly record for activity from an unusual location."""
+        return {
+            "anomaly_type": "geographic_anomaly",
+            "severity": ThreatSeverity.HIGH,
+            "description": f"Activity from unusual geographic location: {source_ip}",
+            "confidence": 0.8
+        }
+        
     def _is_malicious_ip(self, ip_address: str) -> bool:
         """Check if IP address is known to be malicious."""
-        # Simplified malicious IP check
-        # In a real implementation, this would check against threat intelligence feeds
-        malicious_ips = [
-            "192.168.1.100",  # Example malicious IP for testing
-            "10.0.0.50"
-        ]
-        return ip_address in malicious_ips
+        # Built-in examples plus any ip/cidr indicators from threat intelligence
+        return ip_address in self._get_compiled_rules().malicious_ips
         
     def _is_unusual_geographic_location(self, ip_address: str) -> bool:
         """Check if IP address is from an unusual geographic location."""
@@ -438,23 +870,17 @@ class ThreatHunterAgent(BaseAgent, ThreatHunterInterface):
         try:
             self.logger.debug(f"Analyzing log data from source: {log_data.get('source', 'unknown')}")
             
-            threats = []
-            log_entries = log_data.get("entries", [])
+            # Analyze the whole page at once; accepts entries, CloudTrail Records or columns
+            batch = LogBatch.from_page(log_data)
+            threats = await self.detection_engine.analyze_log_batch(batch)
             
-            for entry in log_entries:
-                # Analyze individual log entry
-                entry_threats = await self.detection_engine.analyze_log_entry(entry)
-                threats.extend(entry_threats)
-                
-                # Update statistics
-                self.logs_analyzed += 1
-                
-            # Update threat count
+            # Update statistics
+            self.logs_analyzed += len(batch)
             self.threats_detected += len(threats)
             
             # Log analysis results
             await self._log_activity("log_analysis", {
-                "entries_analyzed": len(log_entries),
+                "entries_analyzed": len(batch),
                 "threats_detected": len(threats),
                 "source": log_data.get("source", "unknown")
             })
@@ -543,6 +969,9 @@ class ThreatHunterAgent(BaseAgent, ThreatHunterInterface):
                     pattern_name = pattern["name"]
                     self.detection_engine.threat_patterns[pattern_name] = pattern["definition"]
                     
+            # Rebuild the rule index, action matcher and IP reputation set
+            self.detection_engine.compile_rules()
+                    
             # Store updated knowledge base in memory
             await self._store_memory("knowledge_base_update", {
                 "patterns_added": len(threat_patterns),
@@ -885,10 +1314,14 @@ class ThreatHunterAgent(BaseAgent, ThreatHunterInterface):
                 "analysis_id": message.payload.get("analysis_id")
             }
         )
-clas
-s ThreatLearningEngine:
+
+
+class ThreatLearningEngine:
     """Engine for learning from threat detection patterns and improving accuracy."""
     
+    # Resources tracked per user behavioral baseline
+    MAX_TRACKED_RESOURCES = 256
+    
     def __init__(self, threat_hunter_agent):
         self.agent = threat_hunter_agent
         self.learning_data = {
@@ -900,6 +1333,26 @@ s ThreatLearningEngine:
         }
         self.learning_enabled = True
         
+    def _count_resource(self, freq: Dict[str, int], resource: str) -> None:
+        """Count a resource access, keeping at most MAX_TRACKED_RESOURCES entries.
+        
+        Space-Saving: once the table is full a new resource replaces the least
+        accessed one and inherits its count, so frequently accessed resources
+        always stay tracked while memory per user stays fixed.
+        """
+        if resource in freq:
+            freq[resource] += 1
+            return
+        inherited = 0
+        excess = len(freq) - self.MAX_TRACKED_RESOURCES + 1
+        if excess == 1:
+            inherited = freq.pop(min(freq, key=freq.__getitem__))
+        elif excess > 1:
+            # Baselines stored before the bound existed can be larger
+            for evicted in sorted(freq, key=freq.__getitem__)[:excess]:
+                inherited = freq.pop(evicted)
+        freq[resource] = inherited + 1
+        
     async def learn_from_detection(self, threat_data: Dict[str, Any], 
                                  feedback: Dict[str, Any]) -> None:
         """Learn from threat detection and human feedback."""
@@ -1000,6 +1453,7 @@ s ThreatLearningEngine:
                         # Slightly lower threshold to catch similar patterns
                         new_threshold = max(1, int(current_threshold * 0.9))
                         conditions["count_threshold"] = new_threshold
+                        self.agent.detection_engine.compile_rules()
                         
                     # Add pattern refinements
                     pattern_key = f"{rule_id}_strengthened"
@@ -1042,6 +1496,7 @@ s ThreatLearningEngine:
                         exclusions.append({"source_ip_range": "internal"})
                         
                     rule["exclusions"] = exclusions
+                    self.agent.detection_engine.compile_rules()
                     
                     # Record refinement
                     pattern_key = f"{rule_id}_refined"
@@ -1136,13 +1591,12 @@ s ThreatLearningEngine:
                         
             # Update access patterns
             if "accessed_resources" in activity_data:
-                resources = activity_data["accessed_resources"]
-                baseline["access_patterns"]["typical_resources"].extend(resources)
-                
-                # Update access frequency
-                for resource in resources:
-                    freq = baseline["access_patterns"]["access_frequency"]
-                    freq[resource] = freq.get(resource, 0) + 1
+                freq = baseline["access_patterns"]["access_frequency"]
+                for resource in activity_data["accessed_resources"]:
+                    self._count_resource(freq, resource)
+                    
+                # Typical resources are the ones still tracked in the bounded frequency table
+                baseline["access_patterns"]["typical_resources"] = list(freq)
                     
             # Update data volume patterns
             if "data_volume" in activity_data:
@@ -67,6 +67,7 @@ class SecuritySettings(BaseSettings):
     # Rate limiting
     rate_limit_calls: int = Field(default=100, description="Rate limit calls per period")
     rate_limit_period: int = Field(default=60, description="Rate limit period in seconds")
+    rate_limit_backend: str = Field(default="memory", description="Rate limit state backend (memory, redis)")
     
     # Trusted hosts
     allowed_hosts: List[str] = Field(
@@ -91,6 +92,11 @@ class WebSocketSettings(BaseSettings):
     connection_timeout: int = Field(default=60, description="Connection timeout in seconds")
     message_queue_size: int = Field(default=100, description="Message queue size per connection")
     broadcast_buffer_size: int = Field(default=1000, description="Broadcast buffer size")
+    slow_consumer_policy: str = Field(
+        default="disconnect",
+        description="Full outbound queue policy (disconnect, drop_oldest, drop_newest)"
+    )
+    send_timeout: float = Field(default=5.0, description="Per-message send timeout in seconds")
     
     class Config:
         env_prefix = "WEBSOCKET_"
@@ -2,11 +2,12 @@
 Enhanced middleware for ACSO API Gateway.
 """
 
+import math
 import time
 import uuid
 import json
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 from fastapi import Request, Response, HTTPException
 from fastapi.middleware.base import BaseHTTPMiddleware
 from fastapi.responses import JSONResponse
@@ -14,6 +15,7 @@ from starlette.middleware.base import RequestResponseEndpoint
 from starlette.status import HTTP_429_TOO_MANY_REQUESTS, HTTP_500_INTERNAL_SERVER_ERROR
 
 from .config import settings
+from .rate_limiting import RateLimitDecision, RateLimiter, create_rate_limiter
 
 logger = logging.getLogger(__name__)
 
@@ -275,13 +277,15 @@ class LoggingMiddleware(BaseHTTPMiddleware):
         return sanitized
 
 class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Enhanced rate limiting middleware with sliding window and user-based limits."""
+    """Rate limiting middleware with per-client, per-route GCRA limits.
     
-    def __init__(self, app):
+    State lives in the configured backend (in-memory or Redis), so each
+    check is constant time and Redis-backed limits hold across workers.
+    """
+    
+    def __init__(self, app, limiter: Optional[RateLimiter] = None):
         super().__init__(app)
-        self.clients: Dict[str, Dict[str, Any]] = {}
-        self.cleanup_interval = 300  # 5 minutes
-        self.last_cleanup = time.time()
+        self.limiter = limiter or create_rate_limiter(settings)
         
         # Different limits for different endpoints
         self.endpoint_limits = {
@@ -301,20 +305,22 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         client_id = self._get_client_identifier(request)
         
         # Get rate limit for this endpoint
-        limit_config = self._get_limit_config(request.url.path)
+        endpoint, limit_config = self._get_limit_config(request.url.path)
         
         # Check rate limit
-        if not await self._check_rate_limit(client_id, limit_config):
-            return self._create_rate_limit_response(client_id, limit_config)
+        decision = await self._check_rate_limit(f"{client_id}:{endpoint}", limit_config)
+        if not decision.allowed:
+            logger.warning(
+                f"Rate limit exceeded for client {client_id} on {endpoint}: "
+                f"{limit_config['calls']} calls per {limit_config['period']}s"
+            )
+            return self._create_rate_limit_response(decision)
         
         # Process request
         response = await call_next(request)
         
         # Add rate limit headers
-        self._add_rate_limit_headers(response, client_id, limit_config)
-        
-        # Periodic cleanup
-        await self._cleanup_old_entries()
+        self._add_rate_limit_headers(response, decision)
         
         return response
     
@@ -335,59 +341,20 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         
         return f"ip:{request.client.host if request.client else 'unknown'}"
     
-    def _get_limit_config(self, path: str) -> Dict[str, int]:
-        """Get rate limit configuration for the given path."""
+    def _get_limit_config(self, path: str) -> Tuple[str, Dict[str, int]]:
+        """Get the matching endpoint and its rate limit configuration."""
         for endpoint, config in self.endpoint_limits.items():
             if endpoint != "default" and path.startswith(endpoint):
-                return config
-        return self.endpoint_limits["default"]
+                return endpoint, config
+        return "default", self.endpoint_limits["default"]
     
-    async def _check_rate_limit(self, client_id: str, limit_config: Dict[str, int]) -> bool:
-        """Check if the client has exceeded the rate limit."""
-        current_time = time.time()
-        calls_limit = limit_config["calls"]
-        period = limit_config["period"]
-        
-        if client_id not in self.clients:
-            self.clients[client_id] = {
-                "calls": [],
-                "blocked_until": 0
-            }
-        
-        client_data = self.clients[client_id]
-        
-        # Check if client is temporarily blocked
-        if current_time < client_data["blocked_until"]:
-            return False
-        
-        # Remove old calls outside the time window
-        client_data["calls"] = [
-            call_time for call_time in client_data["calls"]
-            if current_time - call_time < period
-        ]
-        
-        # Check if limit exceeded
-        if len(client_data["calls"]) >= calls_limit:
-            # Block client for the remaining period
-            oldest_call = min(client_data["calls"])
-            client_data["blocked_until"] = oldest_call + period
-            
-            logger.warning(
-                f"Rate limit exceeded for client {client_id}: "
-                f"{len(client_data['calls'])} calls in {period}s"
-            )
-            return False
-        
-        # Add current call
-        client_data["calls"].append(current_time)
-        return True
+    async def _check_rate_limit(self, key: str, limit_config: Dict[str, int]) -> RateLimitDecision:
+        """Count the request against the limit for key."""
+        return await self.limiter.hit(key, limit_config["calls"], limit_config["period"])
     
-    def _create_rate_limit_response(self, client_id: str, limit_config: Dict[str, int]) -> JSONResponse:
+    def _create_rate_limit_response(self, decision: RateLimitDecision) -> JSONResponse:
         """Create rate limit exceeded response."""
-        current_time = time.time()
-        client_data = self.clients[client_id]
-        
-        retry_after = max(0, client_data["blocked_until"] - current_time)
+        retry_after = int(math.ceil(decision.retry_after))
         
         return JSONResponse(
             status_code=HTTP_429_TOO_MANY_REQUESTS,
@@ -396,54 +363,23 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
                 "error": {
                     "code": "RATE_LIMIT_EXCEEDED",
                     "message": "Too many requests. Please try again later.",
-                    "retry_after": int(retry_after),
-                    "timestamp": current_time
+                    "retry_after": retry_after,
+                    "timestamp": time.time()
                 }
             },
             headers={
-                "X-RateLimit-Limit": str(limit_config["calls"]),
+                "X-RateLimit-Limit": str(decision.limit),
                 "X-RateLimit-Remaining": "0",
-                "X-RateLimit-Reset": str(int(client_data["blocked_until"])),
-                "Retry-After": str(int(retry_after))
+                "X-RateLimit-Reset": str(int(decision.reset_at)),
+                "Retry-After": str(retry_after)
             }
         )
     
-    def _add_rate_limit_headers(self, response: Response, client_id: str, limit_config: Dict[str, int]):
+    def _add_rate_limit_headers(self, response: Response, decision: RateLimitDecision):
         """Add rate limit headers to response."""
-        if client_id in self.clients:
-            client_data = self.clients[client_id]
-            remaining = max(0, limit_config["calls"] - len(client_data["calls"]))
-            
-            response.headers["X-RateLimit-Limit"] = str(limit_config["calls"])
-            response.headers["X-RateLimit-Remaining"] = str(remaining)
-            
-            if client_data["calls"]:
-                oldest_call = min(client_data["calls"])
-                reset_time = oldest_call + limit_config["period"]
-                response.headers["X-RateLimit-Reset"] = str(int(reset_time))
-    
-    async def _cleanup_old_entries(self):
-        """Clean up old rate limit entries."""
-        current_time = time.time()
-        
-        if current_time - self.last_cleanup < self.cleanup_interval:
-            return
-        
-        # Remove entries that are no longer needed
-        clients_to_remove = []
-        for client_id, client_data in self.clients.items():
-            # Remove if no recent calls and not blocked
-            if (not client_data["calls"] and 
-                current_time > client_data["blocked_until"]):
-                clients_to_remove.append(client_id)
-        
-        for client_id in clients_to_remove:
-            del self.clients[client_id]
-        
-        self.last_cleanup = current_time
-        
-        if clients_to_remove:
-            logger.debug(f"Cleaned up {len(clients_to_remove)} old rate limit entries")
+        response.headers["X-RateLimit-Limit"] = str(decision.limit)
+        response.headers["X-RateLimit-Remaining"] = str(decision.remaining)
+        response.headers["X-RateLimit-Reset"] = str(int(decision.reset_at))
 
 class CacheMiddleware(BaseHTTPMiddleware):
     """Caching middleware for API responses."""
@@ -0,0 +1,171 @@
+"""
+Rate limiting backends for ACSO API Gateway.
+
+Limits use GCRA (the generic cell rate algorithm), an equivalent of a token
+bucket that stores a single timestamp per client and route. Each check is
+constant time in both the in-memory and the Redis backend, and the Redis
+backend shares limits across worker processes.
+"""
+
+import logging
+import math
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .config import APISettings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RateLimitDecision:
+    """Outcome of one rate limit check."""
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_at: float
+    retry_after: float = 0.0
+
+
+def gcra_step(tat: Optional[float], now: float, calls: int, period: float) -> Tuple[bool, float]:
+    """Apply one request to a GCRA state.
+
+    tat is the theoretical arrival time stored for the key (None if unseen).
+    Returns whether the request is allowed and the TAT to keep.
+    """
+    emission_interval = period / calls
+    tat = now if tat is None or tat < now else tat
+    new_tat = tat + emission_interval
+    if now < new_tat - period:
+        return False, tat
+    return True, new_tat
+
+
+def build_decision(allowed: bool, tat: float, now: float, calls: int, period: float) -> RateLimitDecision:
+    """Turn a GCRA state into remaining-call and reset figures."""
+    emission_interval = period / calls
+    if not allowed:
+        retry_after = tat + emission_interval - period - now
+        return RateLimitDecision(False, calls, 0, tat, max(0.0, retry_after))
+
+    # Small epsilon keeps float rounding from costing a whole call
+    remaining = int(math.floor((period - (tat - now)) / emission_interval + 1e-9))
+    return RateLimitDecision(True, calls, max(0, min(calls, remaining)), tat)
+
+
+class InMemoryRateLimitBackend:
+    """Per-process GCRA state in a dict keyed by client and route."""
+
+    def __init__(self, cleanup_interval: float = 300.0):
+        self.cleanup_interval = cleanup_interval
+        self._tats: Dict[str, float] = {}
+        self._last_cleanup = time.time()
+
+    async def acquire(self, key: str, calls: int, period: float) -> RateLimitDecision:
+        now = time.time()
+        self._cleanup(now)
+
+        allowed, tat = gcra_step(self._tats.get(key), now, calls, period)
+        if allowed:
+            self._tats[key] = tat
+        return build_decision(allowed, tat, now, calls, period)
+
+    def _cleanup(self, now: float) -> None:
+        """Drop keys whose bucket has fully refilled."""
+        if now - self._last_cleanup < self.cleanup_interval:
+            return
+        expired = [key for key, tat in self._tats.items() if tat <= now]
+        for key in expired:
+            del self._tats[key]
+        self._last_cleanup = now
+        if expired:
+            logger.debug(f"Cleaned up {len(expired)} rate limit entries")
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+
+# Same algorithm as gcra_step, run atomically on the Redis server with its clock
+GCRA_SCRIPT = """
+local emission_interval = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local tat = tonumber(redis.call('GET', KEYS[1]))
+if not tat or tat < now then
+    tat = now
+end
+local new_tat = tat + emission_interval
+if now < new_tat - period then
+    return {0, tostring(tat), tostring(now)}
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+return {1, tostring(new_tat), tostring(now)}
+"""
+
+
+class RedisRateLimitBackend:
+    """GCRA state in Redis, so limits hold across uvicorn workers.
+
+    Works with any client exposing an async ``eval(script, numkeys, *args)``,
+    such as ``redis.asyncio.Redis``.
+    """
+
+    def __init__(self, client: Any, key_prefix: str = "acso:ratelimit:"):
+        self.client = client
+        self.key_prefix = key_prefix
+
+    async def acquire(self, key: str, calls: int, period: float) -> RateLimitDecision:
+        allowed, tat, now = await self.client.eval(
+            GCRA_SCRIPT, 1, self.key_prefix + key, repr(period / calls), repr(float(period))
+        )
+        return build_decision(bool(int(allowed)), float(tat), float(now), calls, period)
+
+
+class RateLimiter:
+    """Rate limiter over a pluggable backend.
+
+    If the primary backend fails (e.g. Redis is unreachable) checks fall back
+    to a per-process in-memory backend rather than rejecting traffic.
+    """
+
+    def __init__(self, backend: Any, fallback: Optional[InMemoryRateLimitBackend] = None):
+        self.backend = backend
+        self.fallback = fallback
+        self.backend_errors = 0
+
+    async def hit(self, key: str, calls: int, period: float) -> RateLimitDecision:
+        """Count one request for key against calls per period."""
+        try:
+            return await self.backend.acquire(key, calls, period)
+        except Exception as e:
+            if self.fallback is None:
+                raise
+            self.backend_errors += 1
+            logger.warning(f"Rate limit backend failed, using in-memory fallback: {e}")
+            return await self.fallback.acquire(key, calls, period)
+
+
+def create_rate_limiter(api_settings: "APISettings") -> RateLimiter:
+    """Build the rate limiter selected by SECURITY_RATE_LIMIT_BACKEND."""
+    backend_name = api_settings.security.rate_limit_backend.lower()
+
+    if backend_name == "redis":
+        import redis.asyncio as redis_asyncio
+
+        redis_settings = api_settings.redis
+        client = redis_asyncio.from_url(
+            redis_settings.url,
+            max_connections=redis_settings.max_connections,
+            socket_timeout=redis_settings.socket_timeout,
+            socket_connect_timeout=redis_settings.socket_connect_timeout,
+            retry_on_timeout=redis_settings.retry_on_timeout,
+            health_check_interval=redis_settings.health_check_interval
+        )
+        return RateLimiter(RedisRateLimitBackend(client), fallback=InMemoryRateLimitBackend())
+
+    if backend_name != "memory":
+        raise ValueError(f"Unsupported rate limit backend: {backend_name}")
+    return RateLimiter(InMemoryRateLimitBackend())
@@ -0,0 +1,270 @@
+"""
+Sequence-numbered log ring buffer with an incremental search index.
+"""
+
+import re
+from bisect import bisect_left, insort
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterator, List, Optional, Set, Tuple
+
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+class LogFilter:
+    """Log filters parsed once and applied per entry."""
+
+    def __init__(self, filters: Optional[Dict[str, Any]] = None):
+        filters = filters or {}
+        self.level = filters["level"].upper() if "level" in filters else None
+        self.has_component = "component" in filters
+        self.component = filters.get("component")
+        self.has_task_id = "task_id" in filters
+        self.task_id = filters.get("task_id")
+        self.start_time = self._parse_time(filters.get("start_time"))
+        self.end_time = self._parse_time(filters.get("end_time"))
+        self.is_empty = not filters
+
+    @staticmethod
+    def _parse_time(value: Any) -> Optional[datetime]:
+        if isinstance(value, str):
+            return datetime.fromisoformat(value)
+        return value
+
+    def matches(self, log_entry: Dict[str, Any]) -> bool:
+        if self.is_empty:
+            return True
+        if self.level is not None and log_entry["level"] != self.level:
+            return False
+        if self.has_component and log_entry["component"] != self.component:
+            return False
+        if self.has_task_id and log_entry["task_id"] != self.task_id:
+            return False
+        if self.start_time is not None and log_entry["timestamp"] < self.start_time:
+            return False
+        if self.end_time is not None and log_entry["timestamp"] > self.end_time:
+            return False
+        return True
+
+
+class AgentLogBuffer:
+    """Fixed-capacity ring of log entries for one agent.
+
+    Every entry gets a monotonically increasing sequence number, kept beside
+    the entry rather than in it, so readers can resume from a cursor with
+    ``since``. Message and component tokens are indexed as entries arrive;
+    ``search`` narrows candidates through the index and confirms them with
+    the same substring test as a full scan.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._entries: List[Optional[Dict[str, Any]]] = [None] * capacity
+        self._search_text: List[Tuple[str, str]] = [("", "")] * capacity
+        # Sequence numbers held are [first_seq, next_seq)
+        self.first_seq = 1
+        self.next_seq = 1
+
+        # token -> ascending sequence numbers; stale heads are pruned lazily
+        self._postings: Dict[str, Deque[int]] = {}
+        self._evicted_since_compact = 0
+
+        # Indexed tokens sorted forwards and reversed for prefix and suffix
+        # seeks, and by trigram for tokens matched anywhere inside
+        self._vocabulary: List[str] = []
+        self._reversed_vocabulary: List[str] = []
+        self._trigrams: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return self.next_seq - self.first_seq
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for seq in range(self.first_seq, self.next_seq):
+            yield self._entries[seq % self.capacity]
+
+    @property
+    def last_seq(self) -> int:
+        return self.next_seq - 1
+
+    def append(self, log_entry: Dict[str, Any]) -> int:
+        """Store an entry, evicting the oldest when full. Returns its sequence number."""
+        seq = self.next_seq
+        if len(self) == self.capacity:
+            self._evict_oldest()
+
+        slot = seq % self.capacity
+        search_text = log_entry["message"].lower()
+        component = (log_entry.get("component") or "").lower()
+        self._entries[slot] = log_entry
+        self._search_text[slot] = (search_text, component)
+        self.next_seq = seq + 1
+
+        for token in set(_TOKEN_RE.findall(search_text)) | set(_TOKEN_RE.findall(component)):
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = deque()
+                self._add_to_vocabulary(token)
+            while postings and postings[0] < self.first_seq:
+                postings.popleft()
+            postings.append(seq)
+
+        if self._evicted_since_compact >= self.capacity:
+            self.compact()
+        return seq
+
+    def _evict_oldest(self) -> None:
+        slot = self.first_seq % self.capacity
+        self._entries[slot] = None
+        self._search_text[slot] = ("", "")
+        self.first_seq += 1
+        self._evicted_since_compact += 1
+
+    def evict_before(self, cutoff: datetime) -> int:
+        """Drop entries older than cutoff from the head of the ring."""
+        evicted = 0
+        while len(self) and self._entries[self.first_seq % self.capacity]["timestamp"] < cutoff:
+            self._evict_oldest()
+            evicted += 1
+        if evicted:
+            self.compact()
+        return evicted
+
+    def compact(self) -> None:
+        """Remove evicted sequence numbers from every posting list."""
+        first_seq = self.first_seq
+        removed = set()
+        for token in list(self._postings):
+            postings = self._postings[token]
+            while postings and postings[0] < first_seq:
+                postings.popleft()
+            if not postings:
+                del self._postings[token]
+                removed.add(token)
+        self._evicted_since_compact = 0
+
+        if removed:
+            self._vocabulary = [token for token in self._vocabulary if token not in removed]
+            self._reversed_vocabulary = [
+                reversed_token for reversed_token in self._reversed_vocabulary
+                if reversed_token[::-1] not in removed
+            ]
+            for token in removed:
+                for trigram in self._token_trigrams(token):
+                    tokens = self._trigrams[trigram]
+                    tokens.discard(token)
+                    if not tokens:
+                        del self._trigrams[trigram]
+
+    def _add_to_vocabulary(self, token: str) -> None:
+        insort(self._vocabulary, token)
+        insort(self._reversed_vocabulary, token[::-1])
+        for trigram in self._token_trigrams(token):
+            self._trigrams.setdefault(trigram, set()).add(token)
+
+    @staticmethod
+    def _token_trigrams(token: str) -> Set[str]:
+        return {token[i:i + 3] for i in range(len(token) - 2)}
+
+    def since(self, cursor: int, limit: Optional[int] = None) -> List[Tuple[int, Dict[str, Any]]]:
+        """(seq, entry) pairs with a sequence number greater than cursor, oldest first."""
+        start = max(cursor + 1, self.first_seq)
+        if limit is not None:
+            start = max(start, self.next_seq - limit)
+        return [(seq, self._entries[seq % self.capacity]) for seq in range(start, self.next_seq)]
+
+    def search(self, query: str) -> List[Dict[str, Any]]:
+        """Entries whose message or component contains query (case-insensitive)."""
+        query_lower = query.lower()
+        candidates = self._candidate_seqs(query_lower)
+
+        if candidates is None:
+            seqs = range(self.first_seq, self.next_seq)
+        else:
+            seqs = sorted(seq for seq in candidates if seq >= self.first_seq)
+
+        capacity = self.capacity
+        results = []
+        for seq in seqs:
+            slot = seq % capacity
+            message_text, component_text = self._search_text[slot]
+            if query_lower in message_text or (component_text and query_lower in component_text):
+                results.append(self._entries[slot])
+        return results
+
+    def _candidate_seqs(self, query_lower: str) -> Optional[Set[int]]:
+        """Sequence numbers that may match, or None when the index cannot help.
+
+        Query tokens away from the edges of the query must occur as whole
+        tokens. The first may be cut off at its start, so it matches indexed
+        tokens ending with it; the last may be cut off at its end, so it
+        matches indexed tokens starting with it. A query made of one token
+        matches indexed tokens containing it, found through trigrams.
+        """
+        matches = list(_TOKEN_RE.finditer(query_lower))
+        if not matches:
+            return None
+
+        candidates: Optional[Set[int]] = None
+        for match in matches:
+            token = match.group()
+            cut_start = match.start() == 0
+            cut_end = match.end() == len(query_lower)
+            if not cut_start and not cut_end:
+                seqs = set(self._postings.get(token, ()))
+            else:
+                if cut_start and cut_end:
+                    indexed_tokens = self._tokens_containing(token)
+                    if indexed_tokens is None:
+                        return None
+                elif cut_start:
+                    indexed_tokens = [
+                        reversed_token[::-1] for reversed_token
+                        in self._prefixed(self._reversed_vocabulary, token[::-1])
+                    ]
+                else:
+                    indexed_tokens = self._prefixed(self._vocabulary, token)
+                seqs = set()
+                for indexed_token in indexed_tokens:
+                    seqs.update(self._postings[indexed_token])
+            candidates = seqs if candidates is None else candidates & seqs
+            if not candidates:
+                return candidates
+        return candidates
+
+    @staticmethod
+    def _prefixed(sorted_tokens: List[str], prefix: str) -> List[str]:
+        """Tokens of a sorted list that start with prefix."""
+        matches = []
+        for index in range(bisect_left(sorted_tokens, prefix), len(sorted_tokens)):
+            if not sorted_tokens[index].startswith(prefix):
+                break
+            matches.append(sorted_tokens[index])
+        return matches
+
+    def _tokens_containing(self, token: str) -> Optional[List[str]]:
+        """Indexed tokens containing token, or None when it is too short for trigrams."""
+        trigrams = self._token_trigrams(token)
+        if not trigrams:
+            return None
+        indexed_tokens: Optional[Set[str]] = None
+        for trigram in sorted(trigrams, key=lambda trigram: len(self._trigrams.get(trigram, ()))):
+            tokens = self._trigrams.get(trigram)
+            if not tokens:
+                return []
+            indexed_tokens = set(tokens) if indexed_tokens is None else indexed_tokens & tokens
+            if not indexed_tokens:
+                return []
+        return [indexed_token for indexed_token in indexed_tokens if token in indexed_token]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get buffer and index sizes."""
+        return {
+            "entries": len(self),
+            "capacity": self.capacity,
+            "first_seq": self.first_seq,
+            "last_seq": self.last_seq,
+            "indexed_tokens": len(self._postings)
+        }
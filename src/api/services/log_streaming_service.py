@@ -8,14 +8,17 @@ import logging
 from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any, AsyncGenerator, Set
 from uuid import uuid4
-from collections import deque
 
 from ..models.agent import AgentLogEntry
 from ..websocket.router import notify_agents_update
 from ..utils.errors import ResourceNotFoundException
+from .log_buffer import AgentLogBuffer, LogFilter
 
 logger = logging.getLogger(__name__)
 
+# How often an idle stream wakes up to refresh its activity timestamp
+STREAM_IDLE_TIMEOUT = 30.0
+
 
 class LogStreamingService:
     """Service for streaming agent logs in real-time."""
@@ -24,14 +27,15 @@ class LogStreamingService:
         # Active log streams
         self.active_streams: Dict[str, Dict[str, Any]] = {}
         
-        # Log buffers for each agent
-        self.log_buffers: Dict[str, deque] = {}
+        # Sequence-numbered, indexed log buffers for each agent
+        self.log_buffers: Dict[str, AgentLogBuffer] = {}
         
         # Stream subscribers
         self.stream_subscribers: Dict[str, Set[str]] = {}  # agent_id -> set of stream_ids
         
-        # Log filters
-        self.log_filters: Dict[str, Dict[str, Any]] = {}
+        # Compiled log filters and pending entries per stream
+        self.log_filters: Dict[str, LogFilter] = {}
+        self.stream_queues: Dict[str, asyncio.Queue] = {}
         
         # Maximum buffer size per agent
         self.max_buffer_size = 10000
@@ -52,8 +56,7 @@ class LogStreamingService:
         stream_id = str(uuid4())
         
         # Initialize log buffer if needed
-        if agent_id not in self.log_buffers:
-            self.log_buffers[agent_id] = deque(maxlen=self.max_buffer_size)
+        self._get_log_buffer(agent_id)
         
         # Create stream configuration
         stream_config = {
@@ -63,7 +66,8 @@ class LogStreamingService:
             "filters": filters or {},
             "buffer_size": min(buffer_size, self.max_buffer_size),
             "active": True,
-            "last_activity": datetime.utcnow()
+            "last_activity": datetime.utcnow(),
+            "dropped_entries": 0
         }
         
         self.active_streams[stream_id] = stream_config
@@ -73,8 +77,9 @@ class LogStreamingService:
             self.stream_subscribers[agent_id] = set()
         self.stream_subscribers[agent_id].add(stream_id)
         
-        # Store filters for this stream
-        self.log_filters[stream_id] = filters or {}
+        # Compile filters once and give the stream its own queue
+        self.log_filters[stream_id] = LogFilter(filters)
+        self.stream_queues[stream_id] = asyncio.Queue(maxsize=stream_config["buffer_size"])
         
         logger.info(f"Created log stream {stream_id} for agent {agent_id}")
         return stream_id
@@ -98,29 +103,32 @@ class LogStreamingService:
         if stream_id in self.log_filters:
             del self.log_filters[stream_id]
         
+        # Wake the stream generator so it can finish
+        queue = self.stream_queues.pop(stream_id, None)
+        if queue is not None:
+            self._offer(queue, None)
+        
         logger.info(f"Closed log stream {stream_id}")
     
     async def add_log_entry(self, agent_id: str, log_entry: AgentLogEntry):
         """Add a log entry to the buffer and notify subscribers."""
-        # Initialize buffer if needed
-        if agent_id not in self.log_buffers:
-            self.log_buffers[agent_id] = deque(maxlen=self.max_buffer_size)
-        
-        # Add to buffer
-        self.log_buffers[agent_id].append({
+        log_data = {
             "timestamp": log_entry.timestamp,
             "level": log_entry.level,
             "message": log_entry.message,
             "component": log_entry.component,
             "task_id": log_entry.task_id,
             "metadata": log_entry.metadata
-        })
+        }
+        
+        # Add to buffer; this assigns the entry's sequence number
+        seq = self._get_log_buffer(agent_id).append(log_data)
+        
+        # Push to active streams
+        await self._notify_stream_subscribers(agent_id, seq, log_data)
         
         # Notify WebSocket subscribers
         await self._broadcast_log_entry(agent_id, log_entry)
-        
-        # Notify active streams
-        await self._notify_stream_subscribers(agent_id, log_entry)
     
     async def get_buffered_logs(
         self,
@@ -136,7 +144,8 @@ class LogStreamingService:
         
         # Apply filters
         if filters:
-            logs = self._apply_log_filters(logs, filters)
+            log_filter = LogFilter(filters)
+            logs = [log for log in logs if log_filter.matches(log)]
         
         # Apply limit
         if limit:
@@ -147,59 +156,71 @@ class LogStreamingService:
     async def stream_logs(
         self,
         stream_id: str,
-        include_buffered: bool = True
+        include_buffered: bool = True,
+        cursor: Optional[int] = None
     ) -> AsyncGenerator[Dict[str, Any], None]:
-        """Stream logs for a specific stream."""
+        """Stream logs for a specific stream.
+        
+        New entries are pushed to the stream's queue by add_log_entry. Each
+        message carries the entry's ``seq``; pass the last one received as
+        cursor to resume after it. Entries that have already left the
+        agent's ring buffer are skipped.
+        """
         if stream_id not in self.active_streams:
             raise ResourceNotFoundException("Log stream", stream_id)
         
         stream_config = self.active_streams[stream_id]
         agent_id = stream_config["agent_id"]
-        filters = stream_config["filters"]
-        
-        # Yield buffered logs first if requested
-        if include_buffered:
-            buffered_logs = await self.get_buffered_logs(
-                agent_id, filters, stream_config["buffer_size"]
-            )
-            for log_entry in buffered_logs:
-                if self._matches_filters(log_entry, filters):
-                    yield {
-                        "type": "log_entry",
-                        "stream_id": stream_id,
-                        "agent_id": agent_id,
-                        "data": log_entry
-                    }
+        log_filter = self.log_filters[stream_id]
+        queue = self.stream_queues[stream_id]
+        log_buffer = self._get_log_buffer(agent_id)
+        
+        # Entries up to here come from the buffer; later ones from the queue
+        last_seq = log_buffer.last_seq
+        
+        if cursor is not None:
+            backlog = [(seq, log) for seq, log in log_buffer.since(cursor) if log_filter.matches(log)]
+        elif include_buffered:
+            backlog = [(seq, log) for seq, log in log_buffer.since(0) if log_filter.matches(log)]
+            backlog = backlog[-stream_config["buffer_size"]:]
+        else:
+            backlog = []
+        
+        for seq, log_entry in backlog:
+            yield {
+                "type": "log_entry",
+                "stream_id": stream_id,
+                "agent_id": agent_id,
+                "seq": seq,
+                "data": log_entry
+            }
         
         # Stream new logs
-        last_check = datetime.utcnow()
-        
         while stream_id in self.active_streams:
             try:
-                # Check for new logs since last check
-                if agent_id in self.log_buffers:
-                    buffer = self.log_buffers[agent_id]
-                    new_logs = [
-                        log for log in buffer
-                        if log["timestamp"] > last_check
-                    ]
-                    
-                    for log_entry in new_logs:
-                        if self._matches_filters(log_entry, filters):
-                            yield {
-                                "type": "log_entry",
-                                "stream_id": stream_id,
-                                "agent_id": agent_id,
-                                "data": log_entry
-                            }
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=STREAM_IDLE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    item = False
                 
-                last_check = datetime.utcnow()
+                if item is None:
+                    break
                 
                 # Update stream activity
-                self.active_streams[stream_id]["last_activity"] = last_check
+                if stream_id in self.active_streams:
+                    self.active_streams[stream_id]["last_activity"] = datetime.utcnow()
+                
+                if not item or item[0] <= last_seq:
+                    continue
+                last_seq, log_entry = item
                 
-                # Wait before next check
-                await asyncio.sleep(0.1)
+                yield {
+                    "type": "log_entry",
+                    "stream_id": stream_id,
+                    "agent_id": agent_id,
+                    "seq": last_seq,
+                    "data": log_entry
+                }
                 
             except Exception as e:
                 logger.error(f"Error in log stream {stream_id}: {e}")
@@ -222,19 +243,13 @@ class LogStreamingService:
         if agent_id not in self.log_buffers:
             return []
         
-        logs = list(self.log_buffers[agent_id])
-        
-        # Apply text search
-        query_lower = query.lower()
-        matching_logs = [
-            log for log in logs
-            if query_lower in log["message"].lower() or
-               (log["component"] and query_lower in log["component"].lower())
-        ]
+        # Apply text search through the token index
+        matching_logs = self.log_buffers[agent_id].search(query)
         
         # Apply additional filters
         if filters:
-            matching_logs = self._apply_log_filters(matching_logs, filters)
+            log_filter = LogFilter(filters)
+            matching_logs = [log for log in matching_logs if log_filter.matches(log)]
         
         # Sort by timestamp (newest first) and limit
         matching_logs.sort(key=lambda x: x["timestamp"], reverse=True)
@@ -252,17 +267,14 @@ class LogStreamingService:
         if agent_id not in self.log_buffers:
             return ""
         
-        logs = list(self.log_buffers[agent_id])
-        
-        # Apply time filters
-        if start_time:
-            logs = [log for log in logs if log["timestamp"] >= start_time]
-        if end_time:
-            logs = [log for log in logs if log["timestamp"] <= end_time]
-        
-        # Apply additional filters
-        if filters:
-            logs = self._apply_log_filters(logs, filters)
+        # Apply time and additional filters in one pass
+        log_filter = LogFilter(filters)
+        logs = [
+            log for log in self.log_buffers[agent_id]
+            if (not start_time or log["timestamp"] >= start_time)
+            and (not end_time or log["timestamp"] <= end_time)
+            and log_filter.matches(log)
+        ]
         
         # Sort by timestamp
         logs.sort(key=lambda x: x["timestamp"])
@@ -323,60 +335,36 @@ class LogStreamingService:
             "oldest_log": oldest_log.isoformat() if oldest_log else None,
             "newest_log": newest_log.isoformat() if newest_log else None,
             "buffer_size": len(logs),
-            "max_buffer_size": self.max_buffer_size
+            "max_buffer_size": self.max_buffer_size,
+            "last_seq": self.log_buffers[agent_id].last_seq
         }
     
     # Helper methods
     
+    def _get_log_buffer(self, agent_id: str) -> AgentLogBuffer:
+        """Get or create the log buffer for an agent."""
+        log_buffer = self.log_buffers.get(agent_id)
+        if log_buffer is None:
+            log_buffer = self.log_buffers[agent_id] = AgentLogBuffer(self.max_buffer_size)
+        return log_buffer
+    
+    def _offer(self, queue: asyncio.Queue, item: Any) -> bool:
+        """Put an item on a stream queue, dropping the oldest entry when full."""
+        dropped = False
+        if queue.full():
+            queue.get_nowait()
+            dropped = True
+        queue.put_nowait(item)
+        return dropped
+    
     def _apply_log_filters(
         self,
         logs: List[Dict[str, Any]],
         filters: Dict[str, Any]
     ) -> List[Dict[str, Any]]:
         """Apply filters to a list of logs."""
-        filtered_logs = logs
-        
-        # Level filter
-        if "level" in filters:
-            level = filters["level"].upper()
-            filtered_logs = [log for log in filtered_logs if log["level"] == level]
-        
-        # Component filter
-        if "component" in filters:
-            component = filters["component"]
-            filtered_logs = [
-                log for log in filtered_logs
-                if log["component"] == component
-            ]
-        
-        # Task ID filter
-        if "task_id" in filters:
-            task_id = filters["task_id"]
-            filtered_logs = [
-                log for log in filtered_logs
-                if log["task_id"] == task_id
-            ]
-        
-        # Time range filters
-        if "start_time" in filters:
-            start_time = filters["start_time"]
-            if isinstance(start_time, str):
-                start_time = datetime.fromisoformat(start_time)
-            filtered_logs = [
-                log for log in filtered_logs
-                if log["timestamp"] >= start_time
-            ]
-        
-        if "end_time" in filters:
-            end_time = filters["end_time"]
-            if isinstance(end_time, str):
-                end_time = datetime.fromisoformat(end_time)
-            filtered_logs = [
-                log for log in filtered_logs
-                if log["timestamp"] <= end_time
-            ]
-        
-        return filtered_logs
+        log_filter = LogFilter(filters)
+        return [log for log in logs if log_filter.matches(log)]
     
     def _matches_filters(
         self,
@@ -384,37 +372,7 @@ class LogStreamingService:
         filters: Dict[str, Any]
     ) -> bool:
         """Check if a log entry matches the given filters."""
-        if not filters:
-            return True
-        
-        # Level filter
-        if "level" in filters and log_entry["level"] != filters["level"].upper():
-            return False
-        
-        # Component filter
-        if "component" in filters and log_entry["component"] != filters["component"]:
-            return False
-        
-        # Task ID filter
-        if "task_id" in filters and log_entry["task_id"] != filters["task_id"]:
-            return False
-        
-        # Time range filters
-        if "start_time" in filters:
-            start_time = filters["start_time"]
-            if isinstance(start_time, str):
-                start_time = datetime.fromisoformat(start_time)
-            if log_entry["timestamp"] < start_time:
-                return False
-        
-        if "end_time" in filters:
-            end_time = filters["end_time"]
-            if isinstance(end_time, str):
-                end_time = datetime.fromisoformat(end_time)
-            if log_entry["timestamp"] > end_time:
-                return False
-        
-        return True
+        return LogFilter(filters).matches(log_entry)
     
     def _format_logs_as_csv(self, logs: List[Dict[str, Any]]) -> str:
         """Format logs as CSV."""
@@ -470,27 +428,19 @@ class LogStreamingService:
         
         await notify_agents_update(log_data)
     
-    async def _notify_stream_subscribers(self, agent_id: str, log_entry: AgentLogEntry):
-        """Notify active stream subscribers of new log entry."""
+    async def _notify_stream_subscribers(self, agent_id: str, seq: int, log_data: Dict[str, Any]):
+        """Push a new log entry and its sequence number to the queues of matching streams."""
         if agent_id not in self.stream_subscribers:
             return
         
-        log_data = {
-            "timestamp": log_entry.timestamp,
-            "level": log_entry.level,
-            "message": log_entry.message,
-            "component": log_entry.component,
-            "task_id": log_entry.task_id,
-            "metadata": log_entry.metadata
-        }
-        
-        # Check each subscriber's filters
-        for stream_id in list(self.stream_subscribers[agent_id]):
-            if stream_id in self.log_filters:
-                filters = self.log_filters[stream_id]
-                if self._matches_filters(log_data, filters):
-                    # This would trigger the stream generator to yield the new log
-                    pass
+        for stream_id in self.stream_subscribers[agent_id]:
+            queue = self.stream_queues.get(stream_id)
+            log_filter = self.log_filters.get(stream_id)
+            if queue is None or log_filter is None or not log_filter.matches(log_data):
+                continue
+            
+            if self._offer(queue, (seq, log_data)):
+                self.active_streams[stream_id]["dropped_entries"] += 1
     
     async def _cleanup_old_logs(self):
         """Background task to clean up old logs."""
@@ -502,8 +452,7 @@ class LogStreamingService:
                 
                 for agent_id, buffer in self.log_buffers.items():
                     # Remove old logs
-                    while buffer and buffer[0]["timestamp"] < cutoff_time:
-                        buffer.popleft()
+                    buffer.evict_before(cutoff_time)
                 
                 # Clean up inactive streams
                 inactive_streams = []
@@ -0,0 +1,166 @@
+"""
+Dependency-counting DAG scheduler for workflow executions.
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from ..models.workflow import WorkflowDefinition, WorkflowNode
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONCURRENT_NODES = 100
+DEFAULT_MAX_CONCURRENT_NODES_PER_EXECUTION = 10
+
+# Result of running one node: True completed, False failed, None waiting (e.g. approval)
+NodeRunner = Callable[[WorkflowNode], Awaitable[Optional[bool]]]
+
+
+class WorkflowGraph:
+    """Adjacency and in-degree maps precomputed once per workflow."""
+
+    def __init__(self, workflow: WorkflowDefinition):
+        self.nodes: Dict[str, WorkflowNode] = {node.id: node for node in workflow.nodes}
+        self.successors: Dict[str, List[str]] = {node_id: [] for node_id in self.nodes}
+        self.in_degree: Dict[str, int] = {node_id: 0 for node_id in self.nodes}
+
+        for edge in workflow.edges:
+            if edge.source_node_id not in self.nodes or edge.target_node_id not in self.nodes:
+                continue
+            self.successors[edge.source_node_id].append(edge.target_node_id)
+            self.in_degree[edge.target_node_id] += 1
+
+        self.start_node_ids: List[str] = [
+            node.id for node in workflow.nodes if node.type.value == "start"
+        ]
+
+
+class _ExecutionState:
+    """Scheduling state of one execution, kept while nodes are paused or waiting."""
+
+    def __init__(self, graph: WorkflowGraph, max_concurrent_nodes: int):
+        self.graph = graph
+        # Parents that still have to complete before each node becomes ready
+        self.remaining: Dict[str, int] = dict(graph.in_degree)
+        self.deferred: List[str] = list(graph.start_node_ids)
+        self.waiting: Set[str] = set()
+        self.active = 0
+        self.semaphore = asyncio.Semaphore(max_concurrent_nodes)
+
+    @property
+    def finished(self) -> bool:
+        return not self.active and not self.waiting and not self.deferred
+
+
+class WorkflowDAGScheduler:
+    """Runs workflow nodes in topological order with bounded concurrency.
+
+    A node becomes ready once every parent has completed, so join nodes run
+    exactly once and independent branches run side by side. Concurrency is
+    capped per execution and across all executions. Failed nodes do not
+    release their successors; nodes waiting on an approval release them when
+    ``resume_after`` is called.
+    """
+
+    def __init__(self, max_concurrent_nodes: int = DEFAULT_MAX_CONCURRENT_NODES,
+                 max_concurrent_nodes_per_execution: int = DEFAULT_MAX_CONCURRENT_NODES_PER_EXECUTION):
+        if max_concurrent_nodes <= 0 or max_concurrent_nodes_per_execution <= 0:
+            raise ValueError("Concurrency limits must be positive")
+        self.max_concurrent_nodes = max_concurrent_nodes
+        self.max_concurrent_nodes_per_execution = max_concurrent_nodes_per_execution
+        self._global_semaphore: Optional[asyncio.Semaphore] = None
+        self._states: Dict[str, _ExecutionState] = {}
+
+    def has_state(self, execution_id: str) -> bool:
+        return execution_id in self._states
+
+    def waiting_nodes(self, execution_id: str) -> Set[str]:
+        """Nodes of an execution that are waiting to be resumed."""
+        state = self._states.get(execution_id)
+        return set(state.waiting) if state else set()
+
+    def release(self, execution_id: str) -> None:
+        """Drop the scheduling state of an execution."""
+        self._states.pop(execution_id, None)
+
+    async def run(self, execution_id: str, workflow: WorkflowDefinition,
+                  run_node: NodeRunner, should_continue: Callable[[], bool]) -> bool:
+        """Run an execution from its start nodes, or from where it was paused.
+
+        Returns True when nothing is left to run or resume; the state is then
+        released. Ready nodes are deferred instead of started while
+        should_continue() is False.
+        """
+        state = self._states.get(execution_id)
+        if state is None:
+            state = _ExecutionState(WorkflowGraph(workflow), self.max_concurrent_nodes_per_execution)
+            self._states[execution_id] = state
+
+        ready, state.deferred = state.deferred, []
+        return await self._drive(execution_id, state, ready, run_node, should_continue)
+
+    async def resume_after(self, execution_id: str, node_id: str,
+                           run_node: NodeRunner, should_continue: Callable[[], bool]) -> bool:
+        """Mark a waiting node completed and run the successors it unblocks.
+
+        Returns True when the execution has nothing left to run or resume.
+        """
+        state = self._states.get(execution_id)
+        if state is None or node_id not in state.waiting:
+            return False
+
+        state.waiting.discard(node_id)
+        ready = self._release_successors(state, node_id)
+        return await self._drive(execution_id, state, ready, run_node, should_continue)
+
+    async def _drive(self, execution_id: str, state: _ExecutionState, ready: List[str],
+                     run_node: NodeRunner, should_continue: Callable[[], bool]) -> bool:
+        pending: Set[asyncio.Task] = set()
+
+        def launch(node_ids: List[str]) -> None:
+            for node_id in node_ids:
+                if not should_continue():
+                    state.deferred.append(node_id)
+                    continue
+                state.active += 1
+                pending.add(asyncio.create_task(self._run_one(state, node_id, run_node)))
+
+        launch(ready)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                state.active -= 1
+                node_id, outcome = task.result()
+                if outcome is None:
+                    state.waiting.add(node_id)
+                elif outcome:
+                    launch(self._release_successors(state, node_id))
+
+        if state.finished and self._states.get(execution_id) is state:
+            self.release(execution_id)
+            return True
+        return False
+
+    def _release_successors(self, state: _ExecutionState, node_id: str) -> List[str]:
+        ready = []
+        for successor in state.graph.successors[node_id]:
+            state.remaining[successor] -= 1
+            if state.remaining[successor] == 0:
+                ready.append(successor)
+        return ready
+
+    async def _run_one(self, state: _ExecutionState, node_id: str, run_node: NodeRunner):
+        if self._global_semaphore is None:
+            self._global_semaphore = asyncio.Semaphore(self.max_concurrent_nodes)
+
+        # Queue on the execution's own limit first so its backlog never holds
+        # global slots that other executions could use
+        async with state.semaphore:
+            async with self._global_semaphore:
+                try:
+                    return node_id, await run_node(state.graph.nodes[node_id])
+                except Exception as e:
+                    logger.error(f"Workflow node {node_id} raised an unhandled error: {e}")
+                    return node_id, False
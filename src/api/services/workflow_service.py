@@ -17,6 +17,7 @@ from ..models.workflow import (
     WorkflowNode, WorkflowEdge, WorkflowNodeExecution
 )
 from ..websocket.manager import websocket_manager
+from .workflow_scheduler import WorkflowDAGScheduler
 from ...shared.coordination import system_coordinator
 
 
@@ -29,6 +30,7 @@ class WorkflowService:
         self.templates: Dict[str, WorkflowTemplate] = {}
         self.approvals: Dict[str, WorkflowApproval] = {}
         self.collaborators: Dict[str, List[str]] = {}  # workflow_id -> user_ids
+        self.scheduler = WorkflowDAGScheduler()
         
     async def get_workflows(
         self,
@@ -336,45 +338,23 @@ class WorkflowService:
             
             workflow = self.workflows[execution.workflow_id]
             
-            # Find start nodes
-            start_nodes = [n for n in workflow.nodes if n.type.value == "start"]
-            
-            # Execute nodes starting from start nodes
-            for start_node in start_nodes:
-                await self._execute_node(execution, start_node, workflow)
-            
-            # Check if execution completed successfully
-            failed_nodes = [
-                ne for ne in execution.node_executions
-                if ne.status == WorkflowExecutionStatus.FAILED
-            ]
-            
-            if failed_nodes:
-                execution.status = WorkflowExecutionStatus.FAILED
-                execution.error_message = f"Failed nodes: {', '.join([ne.node_id for ne in failed_nodes])}"
-            else:
-                execution.status = WorkflowExecutionStatus.COMPLETED
-                execution.progress_percentage = 100.0
-            
-            execution.completed_at = datetime.utcnow()
-            execution.duration_seconds = (execution.completed_at - execution.started_at).total_seconds()
-            
-            # Stop monitoring
-            from .workflow_execution_monitor import execution_monitor
-            await execution_monitor.stop_monitoring_execution(execution.id)
-            
-            # Notify clients about execution completion
-            await websocket_manager.broadcast_to_topic(
-                f"workflow_execution_{execution.id}",
-                {
-                    "type": "execution_completed",
-                    "execution_id": execution.id,
-                    "status": execution.status.value,
-                    "duration": execution.duration_seconds
-                }
+            # Run ready nodes concurrently, starting from the start nodes
+            finished = await self.scheduler.run(
+                execution.id,
+                workflow,
+                lambda node: self._execute_node(execution, node, workflow),
+                lambda: execution.status == WorkflowExecutionStatus.RUNNING
             )
             
+            if finished:
+                await self._finalize_execution(execution)
+            elif execution.status == WorkflowExecutionStatus.CANCELLED:
+                self.scheduler.release(execution.id)
+            # Otherwise the execution is paused or waiting on approvals and
+            # resume_execution / respond_to_approval pick it up from here
+            
         except Exception as e:
+            self.scheduler.release(execution.id)
             execution.status = WorkflowExecutionStatus.FAILED
             execution.error_message = str(e)
             execution.completed_at = datetime.utcnow()
@@ -394,13 +374,56 @@ class WorkflowService:
                 }
             )
     
+    async def _finalize_execution(self, execution: WorkflowExecution):
+        """Record the outcome of an execution once no nodes are left to run."""
+        if execution.status == WorkflowExecutionStatus.CANCELLED:
+            from .workflow_execution_monitor import execution_monitor
+            await execution_monitor.stop_monitoring_execution(execution.id)
+            return
+        
+        # Check if execution completed successfully
+        failed_nodes = [
+            ne for ne in execution.node_executions
+            if ne.status == WorkflowExecutionStatus.FAILED
+        ]
+        
+        if failed_nodes:
+            execution.status = WorkflowExecutionStatus.FAILED
+            execution.error_message = f"Failed nodes: {', '.join([ne.node_id for ne in failed_nodes])}"
+        else:
+            execution.status = WorkflowExecutionStatus.COMPLETED
+            execution.progress_percentage = 100.0
+        
+        execution.completed_at = datetime.utcnow()
+        execution.duration_seconds = (execution.completed_at - execution.started_at).total_seconds()
+        
+        # Stop monitoring
+        from .workflow_execution_monitor import execution_monitor
+        await execution_monitor.stop_monitoring_execution(execution.id)
+        
+        # Notify clients about execution completion
+        await websocket_manager.broadcast_to_topic(
+            f"workflow_execution_{execution.id}",
+            {
+                "type": "execution_completed",
+                "execution_id": execution.id,
+                "status": execution.status.value,
+                "duration": execution.duration_seconds
+            }
+        )
+    
     async def _execute_node(
         self,
         execution: WorkflowExecution,
         node: WorkflowNode,
         workflow: WorkflowDefinition
-    ):
-        """Execute a single workflow node."""
+    ) -> Optional[bool]:
+        """Execute a single workflow node.
+        
+        Returns True when the node completed, False when it failed and None
+        when it is waiting for an approval. Successors are scheduled by
+        the caller.
+        """
         node_execution = WorkflowNodeExecution(
             node_id=node.id,
             status=WorkflowExecutionStatus.RUNNING,
@@ -454,8 +477,8 @@ class WorkflowService:
                         }
                     )
                 
-                # Wait for approval (simplified - in real implementation, this would be event-driven)
-                return  # Node will be completed when approval is received
+                # Node will be completed when approval is received
+                return None
             
             elif node.type.value == "delay":
                 # Delay execution
@@ -492,11 +515,7 @@ class WorkflowService:
                 }
             )
             
-            # Execute next nodes
-            next_edges = [e for e in workflow.edges if e.source_node_id == node.id]
-            for edge in next_edges:
-                next_node = next(n for n in workflow.nodes if n.id == edge.target_node_id)
-                await self._execute_node(execution, next_node, workflow)
+            return True
             
         except Exception as e:
             node_execution.status = WorkflowExecutionStatus.FAILED
@@ -516,6 +535,7 @@ class WorkflowService:
                     "error": node_execution.error_message
                 }
             )
+            return False
     
     async def get_workflow_executions(
         self,
@@ -636,6 +656,7 @@ class WorkflowService:
         
         if execution.status in [WorkflowExecutionStatus.RUNNING, WorkflowExecutionStatus.PAUSED]:
             execution.status = WorkflowExecutionStatus.CANCELLED
+            self.scheduler.release(execution_id)
             execution.completed_at = datetime.utcnow()
             execution.duration_seconds = (execution.completed_at - execution.started_at).total_seconds()
         
@@ -803,9 +824,9 @@ class WorkflowService:
             total_executions_today=total_executions_today,
             average_execution_time=average_execution_time,
             success_rate=success_rate
-        )    
-    a
-sync def get_workflow_analytics(
+        )
+    
+    async def get_workflow_analytics(
         self,
         workflow_id: str,
         days: int,
@@ -961,6 +982,7 @@ sync def get_workflow_analytics(
                 ).total_seconds()
                 
                 # Fail the entire execution
+                self.scheduler.release(execution.id)
                 execution.status = WorkflowExecutionStatus.FAILED
                 execution.error_message = f"Approval denied for node {approval_node.name}"
                 execution.completed_at = datetime.utcnow()
@@ -976,11 +998,16 @@ sync def get_workflow_analytics(
         """Continue workflow execution after approval."""
         workflow = self.workflows[execution.workflow_id]
         
-        # Find and execute next nodes
-        next_edges = [e for e in workflow.edges if e.source_node_id == approved_node.id]
-        for edge in next_edges:
-            next_node = next(n for n in workflow.nodes if n.id == edge.target_node_id)
-            await self._execute_node(execution, next_node, workflow)
+        # Run the successors unblocked by the approved node
+        finished = await self.scheduler.resume_after(
+            execution.id,
+            approved_node.id,
+            lambda node: self._execute_node(execution, node, workflow),
+            lambda: execution.status == WorkflowExecutionStatus.RUNNING
+        )
+        
+        if finished:
+            await self._finalize_execution(execution)
     
     async def import_workflows(
         self,
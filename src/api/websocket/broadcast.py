@@ -0,0 +1,227 @@
+"""
+Broadcast engine for WebSocket fan-out.
+
+Messages are serialized once per broadcast and placed on bounded
+per-connection outbound queues. Each connection has its own writer task, so a
+slow client only delays itself. When a queue is full the slow consumer
+policy decides whether to drop messages or disconnect the client.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from enum import Enum
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 100
+DEFAULT_SEND_TIMEOUT = 5.0
+LATENCY_SAMPLE_SIZE = 1000
+
+
+class SlowConsumerPolicy(str, Enum):
+    """What to do when a connection's outbound queue is full."""
+    DISCONNECT = "disconnect"
+    DROP_OLDEST = "drop_oldest"
+    DROP_NEWEST = "drop_newest"
+
+
+class _Fanout:
+    """Tracks one broadcast until every recipient has sent or dropped it."""
+
+    __slots__ = ("engine", "started_at", "remaining")
+
+    def __init__(self, engine: "BroadcastEngine", started_at: float):
+        self.engine = engine
+        self.started_at = started_at
+        self.remaining = 0
+
+    def done(self) -> None:
+        self.remaining -= 1
+        if self.remaining == 0:
+            self.engine._record_fanout(time.monotonic() - self.started_at)
+
+
+class OutboundQueue:
+    """Bounded outbound queue drained by a dedicated writer task."""
+
+    def __init__(self, connection_id: str, send: Callable[[str], Awaitable[Any]],
+                 engine: "BroadcastEngine"):
+        self.connection_id = connection_id
+        self._send = send
+        self._engine = engine
+        self._items: Deque[Tuple[str, Optional[_Fanout]]] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._writer: Optional[asyncio.Task] = None
+        self.closed = False
+        self.sent = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def put(self, text: str, fanout: Optional[_Fanout] = None) -> bool:
+        """Queue pre-serialized text. Returns False if it was not queued."""
+        if self.closed:
+            return False
+
+        if len(self._items) >= self._engine.max_queue_size:
+            policy = self._engine.policy
+            if policy == SlowConsumerPolicy.DROP_NEWEST:
+                self._drop()
+                return False
+            if policy == SlowConsumerPolicy.DROP_OLDEST:
+                _, oldest_fanout = self._items.popleft()
+                self._drop(oldest_fanout)
+            else:
+                self._engine._slow_consumer(self, "outbound queue full")
+                return False
+
+        if fanout is not None:
+            fanout.remaining += 1
+        self._items.append((text, fanout))
+        self._ensure_writer()
+        self._wakeup.set()
+        return True
+
+    def _drop(self, fanout: Optional[_Fanout] = None) -> None:
+        self.dropped += 1
+        self._engine.dropped_messages += 1
+        if fanout is not None:
+            fanout.done()
+
+    def _ensure_writer(self) -> None:
+        if self._writer is None:
+            self._wakeup = asyncio.Event()
+            self._writer = asyncio.create_task(self._write_loop())
+
+    async def _write_loop(self) -> None:
+        while not self.closed:
+            if not self._items:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            text, fanout = self._items.popleft()
+            try:
+                await asyncio.wait_for(self._send(text), timeout=self._engine.send_timeout)
+                self.sent += 1
+            except asyncio.TimeoutError:
+                self._engine._slow_consumer(self, "send timed out")
+            except Exception as e:
+                self._engine._slow_consumer(self, f"send failed: {e}")
+            finally:
+                if fanout is not None:
+                    fanout.done()
+
+    async def close(self) -> None:
+        """Stop the writer and release anything still queued."""
+        self.closed = True
+        while self._items:
+            _, fanout = self._items.popleft()
+            if fanout is not None:
+                fanout.done()
+
+        writer, self._writer = self._writer, None
+        if writer is not None and writer is not asyncio.current_task():
+            writer.cancel()
+            try:
+                await writer
+            except asyncio.CancelledError:
+                pass
+
+
+class BroadcastEngine:
+    """Serialize-once fan-out over per-connection outbound queues."""
+
+    def __init__(self, max_queue_size: int = DEFAULT_QUEUE_SIZE,
+                 policy: SlowConsumerPolicy = SlowConsumerPolicy.DISCONNECT,
+                 send_timeout: float = DEFAULT_SEND_TIMEOUT,
+                 on_slow_consumer: Optional[Callable[[str], Awaitable[Any]]] = None):
+        if max_queue_size <= 0:
+            raise ValueError("max_queue_size must be positive")
+        self.max_queue_size = max_queue_size
+        self.policy = SlowConsumerPolicy(policy)
+        self.send_timeout = send_timeout
+        self.on_slow_consumer = on_slow_consumer
+
+        self.queues: Dict[str, OutboundQueue] = {}
+
+        self.broadcasts = 0
+        self.queued_messages = 0
+        self.dropped_messages = 0
+        self.slow_consumer_disconnects = 0
+        self._fanout_latencies: Deque[float] = deque(maxlen=LATENCY_SAMPLE_SIZE)
+
+    def attach(self, connection_id: str, send: Callable[[str], Awaitable[Any]]) -> OutboundQueue:
+        """Create the outbound queue for a connection."""
+        queue = OutboundQueue(connection_id, send, self)
+        self.queues[connection_id] = queue
+        return queue
+
+    async def detach(self, connection_id: str) -> None:
+        """Close and forget a connection's outbound queue."""
+        queue = self.queues.pop(connection_id, None)
+        if queue is not None:
+            await queue.close()
+
+    def publish(self, text: str, connection_ids: Iterable[str]) -> int:
+        """Queue one serialized message for many connections.
+
+        Returns the number of connections it was queued for. Delivery happens
+        on the writer tasks; fan-out latency is recorded once the last
+        recipient has sent or dropped the message.
+        """
+        self.broadcasts += 1
+        fanout = _Fanout(self, time.monotonic())
+        # Hold the fan-out open until every recipient has been offered the message
+        fanout.remaining += 1
+
+        queued = 0
+        for connection_id in connection_ids:
+            queue = self.queues.get(connection_id)
+            if queue is not None and queue.put(text, fanout):
+                queued += 1
+
+        self.queued_messages += queued
+        fanout.done()
+        return queued
+
+    def _slow_consumer(self, queue: OutboundQueue, reason: str) -> None:
+        if queue.closed:
+            return
+        queue.closed = True
+        self.slow_consumer_disconnects += 1
+        logger.warning(f"Disconnecting slow WebSocket consumer {queue.connection_id}: {reason}")
+
+        if self.on_slow_consumer is not None:
+            asyncio.create_task(self.on_slow_consumer(queue.connection_id))
+        else:
+            asyncio.create_task(self.detach(queue.connection_id))
+
+    def _record_fanout(self, seconds: float) -> None:
+        self._fanout_latencies.append(seconds)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue, drop and fan-out latency statistics."""
+        latencies = sorted(self._fanout_latencies)
+
+        def percentile(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+        return {
+            "policy": self.policy.value,
+            "connections": len(self.queues),
+            "queued_now": sum(len(queue) for queue in self.queues.values()),
+            "broadcasts": self.broadcasts,
+            "queued_messages": self.queued_messages,
+            "dropped_messages": self.dropped_messages,
+            "slow_consumer_disconnects": self.slow_consumer_disconnects,
+            "fanout_latency_p50_ms": percentile(0.5) * 1000,
+            "fanout_latency_p95_ms": percentile(0.95) * 1000,
+            "fanout_latency_max_ms": (latencies[-1] * 1000) if latencies else 0.0
+        }
@@ -11,9 +11,11 @@ from uuid import uuid4
 from fastapi import WebSocket, WebSocketDisconnect
 from pydantic import BaseModel, ValidationError
 
+from ..config import settings
 from ..models.auth import User, Permission
 from ..services.auth_service import AuthService
 from ..utils.errors import AuthenticationException, AuthorizationException
+from .broadcast import BroadcastEngine, OutboundQueue, SlowConsumerPolicy
 
 logger = logging.getLogger(__name__)
 
@@ -47,20 +49,23 @@ class WebSocketConnection:
         self.last_activity = datetime.utcnow()
         self.message_count = 0
         self.is_active = True
+        self.outbound: Optional[OutboundQueue] = None
     
     async def send_message(self, message: WebSocketMessage):
         """Send message to client."""
+        if not self.is_active:
+            return False
+        
+        # Add timestamp if not present
+        if not message.timestamp:
+            message.timestamp = datetime.utcnow()
+        
+        if self.outbound is not None:
+            # Keep ordering with broadcasts by going through the outbound queue
+            return self.outbound.put(message.json())
+        
         try:
-            if not self.is_active:
-                return False
-            
-            # Add timestamp if not present
-            if not message.timestamp:
-                message.timestamp = datetime.utcnow()
-            
-            await self.websocket.send_text(message.json())
-            self.last_activity = datetime.utcnow()
-            self.message_count += 1
+            await self._write(message.json())
             return True
             
         except Exception as e:
@@ -68,6 +73,12 @@ class WebSocketConnection:
             self.is_active = False
             return False
     
+    async def _write(self, text: str):
+        """Write serialized text to the socket; used by the outbound writer."""
+        await self.websocket.send_text(text)
+        self.last_activity = datetime.utcnow()
+        self.message_count += 1
+    
     async def send_error(self, error_message: str, error_code: str = "WEBSOCKET_ERROR"):
         """Send error message to client."""
         error_msg = WebSocketMessage(
@@ -115,6 +126,14 @@ class WebSocketManager:
         self.heartbeat_interval = 30  # seconds
         self.max_connections_per_user = 10
         
+        # Serialize-once fan-out with bounded per-connection queues
+        self.broadcast_engine = BroadcastEngine(
+            max_queue_size=settings.websocket.message_queue_size,
+            policy=SlowConsumerPolicy(settings.websocket.slow_consumer_policy),
+            send_timeout=settings.websocket.send_timeout,
+            on_slow_consumer=self.disconnect
+        )
+        
         # Register default message handlers
         self._register_default_handlers()
         
@@ -155,6 +174,7 @@ class WebSocketManager:
             # Create connection
             connection_id = str(uuid4())
             connection = WebSocketConnection(websocket, user, connection_id)
+            connection.outbound = self.broadcast_engine.attach(connection_id, connection._write)
             
             # Store connection
             self.connections[connection_id] = connection
@@ -187,10 +207,13 @@ class WebSocketManager:
     
     async def disconnect(self, connection_id: str):
         """Disconnect WebSocket connection."""
+        await self.broadcast_engine.detach(connection_id)
+        
         if connection_id not in self.connections:
             return
         
         connection = self.connections[connection_id]
+        connection.is_active = False
         
         # Remove from topic subscriptions
         for topic in list(connection.subscriptions.keys()):
@@ -243,31 +266,32 @@ class WebSocketManager:
         message_data: Dict[str, Any],
         required_permission: Optional[Permission] = None,
         filters: Optional[Dict[str, Any]] = None
-    ):
-        """Broadcast message to all subscribers of a topic."""
+    ) -> int:
+        """Broadcast message to all subscribers of a topic.
+        
+        The message is serialized once and queued for each matching
+        subscriber; returns the number of connections it was queued for.
+        """
         if topic not in self.topic_subscribers:
-            return
+            return 0
         
         message = WebSocketMessage(
             type="broadcast",
             data={
                 "topic": topic,
                 "payload": message_data,
-                **filters if filters else {}
+                **(filters or {})
             },
+            timestamp=datetime.utcnow(),
             source="server"
         )
         
-        # Get subscribers
-        subscriber_ids = self.topic_subscribers[topic].copy()
-        
-        # Send to each subscriber
-        for connection_id in subscriber_ids:
-            if connection_id not in self.connections:
+        recipients = []
+        for connection_id in self.topic_subscribers[topic]:
+            connection = self.connections.get(connection_id)
+            if connection is None or not connection.is_active:
                 continue
             
-            connection = self.connections[connection_id]
-            
             # Check permissions
             if required_permission and not connection.has_permission(required_permission):
                 continue
@@ -276,7 +300,11 @@ class WebSocketManager:
             if not connection.matches_filters(topic, message_data):
                 continue
             
-            await connection.send_message(message)
+            recipients.append(connection_id)
+        
+        if not recipients:
+            return 0
+        return self.broadcast_engine.publish(message.json(), recipients)
     
     async def send_to_user(self, user_id: str, message_data: Dict[str, Any]):
         """Send message to all connections of a specific user."""
@@ -286,15 +314,12 @@ class WebSocketManager:
         message = WebSocketMessage(
             type="user_message",
             data=message_data,
+            timestamp=datetime.utcnow(),
             target=user_id,
             source="server"
         )
         
-        connection_ids = self.user_connections[user_id].copy()
-        
-        for connection_id in connection_ids:
-            if connection_id in self.connections:
-                await self.connections[connection_id].send_message(message)
+        self.broadcast_engine.publish(message.json(), self.user_connections[user_id].copy())
     
     async def send_to_connection(self, connection_id: str, message_data: Dict[str, Any]):
         """Send message to specific connection."""
@@ -472,13 +497,15 @@ class WebSocketManager:
                     data={
                         "timestamp": datetime.utcnow().isoformat(),
                         "server_time": datetime.utcnow().isoformat()
-                    }
+                    },
+                    timestamp=datetime.utcnow()
                 )
                 
                 # Send heartbeat to all connections
-                for connection in list(self.connections.values()):
-                    if connection.is_active:
-                        await connection.send_message(heartbeat_msg)
+                self.broadcast_engine.publish(
+                    heartbeat_msg.json(),
+                    [cid for cid, c in self.connections.items() if c.is_active]
+                )
                         
             except Exception as e:
                 logger.error(f"Heartbeat task error: {e}")
@@ -519,7 +546,8 @@ class WebSocketManager:
             "subscribers_by_topic": {
                 topic: len(conn_ids) 
                 for topic, conn_ids in self.topic_subscribers.items()
-            }
+            },
+            "broadcast": self.broadcast_engine.get_stats()
         }
     
     def register_message_handler(self, message_type: str, handler: Callable):
@@ -0,0 +1,317 @@
+"""
+Usage Rollups for ACSO Enterprise.
+Pre-aggregated, time-bucketed usage totals per tenant and event type.
+"""
+
+import json
+import logging
+import os
+from array import array
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+EPOCH = datetime(1970, 1, 1)
+
+MINUTE = 60
+HOUR = 3600
+DAY = 86400
+
+# Default (bucket seconds, buckets kept) per resolution, coarsest first
+DEFAULT_RESOLUTIONS: Tuple[Tuple[int, int], ...] = (
+    (DAY, 3 * 366),
+    (HOUR, 92 * 24),
+    (MINUTE, 6 * 60),
+)
+
+
+def to_epoch_seconds(timestamp: datetime) -> float:
+    """Seconds since the epoch for a naive UTC datetime."""
+    return (timestamp - EPOCH).total_seconds()
+
+
+@dataclass
+class UsageTotals:
+    """Summed usage for one event type over a period."""
+    count: int = 0
+    quantity: float = 0.0
+    cost: float = 0.0
+
+    def add(self, count: int, quantity: float, cost: float) -> None:
+        self.count += count
+        self.quantity += quantity
+        self.cost += cost
+
+
+class RollupSeries:
+    """Ring of fixed-width time buckets backed by typed arrays.
+
+    Holds the most recent `capacity` buckets up to the newest one written;
+    older buckets are overwritten as time advances. Slots count from the
+    first bucket written, so the arrays grow with the time span seen and only
+    reach `capacity` entries once the ring wraps or an event arrives from
+    before the first bucket.
+    """
+
+    __slots__ = ('resolution', 'capacity', 'origin', 'newest', 'counts', 'quantities', 'costs')
+
+    def __init__(self, resolution: int, capacity: int):
+        self.resolution = resolution
+        self.capacity = capacity
+        self.origin = 0
+        self.newest: Optional[int] = None
+        self.counts = array('q')
+        self.quantities = array('d')
+        self.costs = array('d')
+
+    def covers(self, bucket: int) -> bool:
+        """Whether a bucket is still held (or has not been written yet)."""
+        return self.newest is None or bucket > self.newest - self.capacity
+
+    def oldest_second(self) -> float:
+        """Start of the oldest held bucket, in epoch seconds."""
+        if self.newest is None:
+            return float('-inf')
+        return (self.newest - self.capacity + 1) * self.resolution
+
+    def _slot(self, bucket: int) -> int:
+        return (bucket - self.origin) % self.capacity
+
+    def add(self, bucket: int, count: int, quantity: float, cost: float) -> bool:
+        if self.newest is None:
+            self.newest = self.origin = bucket
+        elif bucket > self.newest:
+            self._advance(bucket)
+        elif not self.covers(bucket):
+            return False
+
+        slot = self._slot(bucket)
+        if slot >= len(self.counts):
+            grow = slot + 1 - len(self.counts)
+            self.counts.extend([0] * grow)
+            self.quantities.extend([0.0] * grow)
+            self.costs.extend([0.0] * grow)
+        self.counts[slot] += count
+        self.quantities[slot] += quantity
+        self.costs[slot] += cost
+        return True
+
+    def _advance(self, bucket: int) -> None:
+        """Clear the slots between the old newest bucket and the new one."""
+        for skipped in range(self.newest + 1, min(bucket, self.newest + self.capacity) + 1):
+            slot = self._slot(skipped)
+            if slot < len(self.counts):
+                self.counts[slot] = 0
+                self.quantities[slot] = 0.0
+                self.costs[slot] = 0.0
+        self.newest = bucket
+
+    def buckets(self, first: int, last: int) -> Iterator[Tuple[int, int, float, float]]:
+        """(bucket, count, quantity, cost) for non-empty held buckets in [first, last]."""
+        if self.newest is None:
+            return
+        first = max(first, self.newest - self.capacity + 1)
+        last = min(last, self.newest)
+        size = len(self.counts)
+        for bucket in range(first, last + 1):
+            slot = self._slot(bucket)
+            if slot < size and self.counts[slot]:
+                yield bucket, self.counts[slot], self.quantities[slot], self.costs[slot]
+
+    def total(self, first: int, last: int, into: UsageTotals) -> None:
+        for _, count, quantity, cost in self.buckets(first, last):
+            into.add(count, quantity, cost)
+
+
+class UsageRollupStore:
+    """
+    Usage totals per (tenant, event type) at several resolutions.
+
+    Every write updates one bucket per resolution. A range query sums whole
+    coarse buckets and uses finer ones only at the edges of the range; where
+    the fine buckets have aged out it rounds outward to the coarser bucket.
+    Queries are exact to the finest resolution.
+    """
+
+    def __init__(self, resolutions: Iterable[Tuple[int, int]] = DEFAULT_RESOLUTIONS):
+        self.resolutions = sorted(resolutions, reverse=True)
+        self.series: Dict[str, Dict[str, List[RollupSeries]]] = {}
+        self.late_events = 0
+
+    def record(self, tenant_id: str, event_type: str, timestamp: datetime,
+               quantity: float, cost: float) -> None:
+        """Add one event to every resolution."""
+        levels = self._levels(tenant_id, event_type)
+        seconds = int(to_epoch_seconds(timestamp))
+        for series in levels:
+            if not series.add(seconds // series.resolution, 1, quantity, cost):
+                self.late_events += 1
+
+    def _levels(self, tenant_id: str, event_type: str) -> List[RollupSeries]:
+        tenant_series = self.series.setdefault(tenant_id, {})
+        levels = tenant_series.get(event_type)
+        if levels is None:
+            levels = [RollupSeries(resolution, capacity) for resolution, capacity in self.resolutions]
+            tenant_series[event_type] = levels
+        return levels
+
+    def tenants(self) -> List[str]:
+        return list(self.series.keys())
+
+    def query(self, tenant_id: str, start: datetime, end: datetime) -> Dict[str, UsageTotals]:
+        """Totals per event type for start <= timestamp <= end."""
+        finest = self.resolutions[-1][0]
+        low = int(to_epoch_seconds(start)) // finest * finest
+        high = (int(to_epoch_seconds(end)) // finest + 1) * finest
+
+        results = {}
+        for event_type, levels in self.series.get(tenant_id, {}).items():
+            totals = UsageTotals()
+            self._sum(levels, 0, low, high, totals)
+            if totals.count:
+                results[event_type] = totals
+        return results
+
+    def _sum(self, levels: List[RollupSeries], level: int, low: int, high: int, into: UsageTotals) -> None:
+        """Sum [low, high) seconds using whole buckets of this level and finer ones at the edges."""
+        if low >= high:
+            return
+        series = levels[level]
+        resolution = series.resolution
+        finer = levels[level + 1] if level + 1 < len(levels) else None
+
+        if finer is None:
+            series.total(low // resolution, -(-high // resolution) - 1, into)
+            return
+
+        held_from = finer.oldest_second()
+        if low < held_from:
+            # The finer level has aged out here, so round outward to whole buckets
+            head_end = min(high, -(-held_from // resolution) * resolution)
+            series.total(low // resolution, -(-head_end // resolution) - 1, into)
+            self._sum(levels, level, head_end, high, into)
+            return
+
+        first_full = -(-low // resolution)
+        end_full = high // resolution
+        if first_full >= end_full:
+            self._sum(levels, level + 1, low, high, into)
+            return
+
+        series.total(first_full, end_full - 1, into)
+        self._sum(levels, level + 1, low, first_full * resolution, into)
+        self._sum(levels, level + 1, end_full * resolution, high, into)
+
+    def daily(self, tenant_id: str, start: datetime, end: datetime) -> Dict[str, Dict[str, UsageTotals]]:
+        """Totals per UTC day (ISO date) and event type, clipped to [start, end]."""
+        results = {}
+        day = start.date()
+        while day <= end.date():
+            day_start = max(start, datetime.combine(day, datetime.min.time()))
+            day_end = min(end, datetime.combine(day, datetime.max.time()))
+            totals = self.query(tenant_id, day_start, day_end)
+            if totals:
+                results[day.isoformat()] = totals
+            day += timedelta(days=1)
+        return results
+
+    def cost_by_hour_of_day(self, tenant_id: str, start: datetime, end: datetime) -> Dict[int, float]:
+        """Cost per hour of day (0-23) from hourly buckets overlapping [start, end]."""
+        hourly = self._resolution_index(HOUR)
+        first = int(to_epoch_seconds(start)) // HOUR
+        last = int(to_epoch_seconds(end)) // HOUR
+
+        distribution: Dict[int, float] = {}
+        for levels in self.series.get(tenant_id, {}).values():
+            for bucket, _, _, cost in levels[hourly].buckets(first, last):
+                hour = bucket % 24
+                distribution[hour] = distribution.get(hour, 0) + cost
+        return distribution
+
+    def _resolution_index(self, resolution: int) -> int:
+        for index, (bucket_seconds, _) in enumerate(self.resolutions):
+            if bucket_seconds == resolution:
+                return index
+        raise ValueError(f"No rollup at {resolution}s resolution")
+
+    def get_stats(self) -> Dict[str, Any]:
+        series_count = sum(len(types) for types in self.series.values())
+        buckets = sum(
+            len(series.counts)
+            for types in self.series.values() for levels in types.values() for series in levels
+        )
+        return {
+            'tenants': len(self.series),
+            'series': series_count,
+            'buckets': buckets,
+            'approximate_bytes': buckets * 24,
+            'late_events': self.late_events
+        }
+
+
+class UsageEventLog:
+    """
+    Append-only spill of raw usage events to daily JSON lines files.
+
+    Raw events are only needed for audits and re-rating, so they are kept
+    on disk instead of in memory.
+    """
+
+    def __init__(self, directory: str, retention_days: int = 90):
+        self.logger = logging.getLogger(__name__)
+        self.directory = directory
+        self.retention_days = retention_days
+        self._day: Optional[date] = None
+        self._file = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, day: date) -> str:
+        return os.path.join(self.directory, f"usage-{day.isoformat()}.jsonl")
+
+    def write(self, record: Dict[str, Any], timestamp: datetime) -> None:
+        day = timestamp.date()
+        if day != self._day:
+            self.close()
+            self._file = open(self._path(day), 'a')
+            self._day = day
+        self._file.write(json.dumps(record, default=str) + "\n")
+
+    def flush(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._day = None
+
+    def read(self, start: datetime, end: datetime) -> Iterator[Dict[str, Any]]:
+        """Raw records of the days overlapping [start, end]."""
+        self.flush()
+        day = start.date()
+        while day <= end.date():
+            path = self._path(day)
+            if os.path.exists(path):
+                with open(path) as f:
+                    for line in f:
+                        yield json.loads(line)
+            day += timedelta(days=1)
+
+    def cleanup(self, now: datetime) -> int:
+        """Delete files older than the retention period."""
+        cutoff = (now - timedelta(days=self.retention_days)).date()
+        removed = 0
+        for name in os.listdir(self.directory):
+            if not (name.startswith("usage-") and name.endswith(".jsonl")):
+                continue
+            try:
+                day = date.fromisoformat(name[len("usage-"):-len(".jsonl")])
+            except ValueError:
+                continue
+            if day < cutoff:
+                os.remove(os.path.join(self.directory, name))
+                removed += 1
+        if removed:
+            self.logger.info(f"Removed {removed} expired usage event files")
+        return removed
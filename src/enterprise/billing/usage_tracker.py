@@ -13,6 +13,7 @@ import json
 
 import prometheus_client
 from ..models.tenancy import TenantTier
+from .usage_rollups import UsageEventLog, UsageRollupStore
 
 
 class UsageEventType(str, Enum):
@@ -49,18 +50,31 @@ class UsageSummary:
     tenant_id: str
     period_start: datetime
     period_end: datetime
-    events: List[UsageEvent]
+    events: List[UsageEvent] = field(default_factory=list)
+    usage_by_type: Dict[str, float] = field(default_factory=dict)
+    cost_by_type: Dict[str, float] = field(default_factory=dict)
+    count_by_type: Dict[str, int] = field(default_factory=dict)
     
     @property
     def total_cost(self) -> float:
+        if self.cost_by_type:
+            return sum(self.cost_by_type.values())
         return sum(event.total_cost for event in self.events)
     
     @property
     def event_counts(self) -> Dict[str, int]:
+        if self.count_by_type:
+            return dict(self.count_by_type)
         counts = {}
         for event in self.events:
             counts[event.event_type.value] = counts.get(event.event_type.value, 0) + 1
         return counts
+    
+    @property
+    def total_events(self) -> int:
+        if self.count_by_type:
+            return sum(self.count_by_type.values())
+        return len(self.events)
 
 
 class UsageTracker:
@@ -74,10 +88,13 @@ class UsageTracker:
     - Cost optimization insights
     """
     
-    def __init__(self):
+    def __init__(self, keep_raw_events: bool = False, raw_event_dir: Optional[str] = None):
         self.logger = logging.getLogger(__name__)
         
-        # Usage storage
+        # Usage storage; totals come from the rollups, raw events are optional
+        self.rollups = UsageRollupStore()
+        self.keep_raw_events = keep_raw_events
+        self.event_log = UsageEventLog(raw_event_dir) if raw_event_dir else None
         self.usage_events: Dict[str, List[UsageEvent]] = {}
         self.usage_summaries: Dict[str, List[UsageSummary]] = {}
         
@@ -135,6 +152,9 @@ class UsageTracker:
                     except asyncio.CancelledError:
                         pass
                         
+            if self.event_log:
+                self.event_log.close()
+                
             self.logger.info("Usage Tracker shutdown complete")
             
         except Exception as e:
@@ -165,11 +185,25 @@ class UsageTracker:
                 metadata=metadata or {}
             )
             
-            # Store event
-            if tenant_id not in self.usage_events:
-                self.usage_events[tenant_id] = []
+            # Update rollups
+            self.rollups.record(tenant_id, event_type.value, event.timestamp, quantity, event.total_cost)
             
-            self.usage_events[tenant_id].append(event)
+            # Store raw event
+            if self.keep_raw_events:
+                if tenant_id not in self.usage_events:
+                    self.usage_events[tenant_id] = []
+                
+                self.usage_events[tenant_id].append(event)
+            
+            if self.event_log:
+                self.event_log.write({
+                    'tenant_id': tenant_id,
+                    'event_type': event_type.value,
+                    'quantity': quantity,
+                    'unit_cost': unit_cost,
+                    'timestamp': event.timestamp.isoformat(),
+                    'metadata': event.metadata
+                }, event.timestamp)
             
             # Update Prometheus metrics
             self.usage_events_counter.labels(
@@ -196,25 +230,22 @@ class UsageTracker:
             Usage summary
         """
         try:
-            if tenant_id not in self.usage_events:
-                return UsageSummary(
-                    tenant_id=tenant_id,
-                    period_start=start_date,
-                    period_end=end_date,
-                    events=[]
-                )
+            totals = self.rollups.query(tenant_id, start_date, end_date)
             
-            # Filter events by date range
-            filtered_events = [
-                event for event in self.usage_events[tenant_id]
+            # Raw events are only listed when they are kept in memory
+            events = [
+                event for event in self.usage_events.get(tenant_id, [])
                 if start_date <= event.timestamp <= end_date
-            ]
+            ] if self.keep_raw_events else []
             
             return UsageSummary(
                 tenant_id=tenant_id,
                 period_start=start_date,
                 period_end=end_date,
-                events=filtered_events
+                events=events,
+                usage_by_type={t: v.quantity for t, v in totals.items()},
+                cost_by_type={t: v.cost for t, v in totals.items()},
+                count_by_type={t: v.count for t, v in totals.items()}
             )
             
         except Exception as e:
@@ -234,25 +265,16 @@ class UsageTracker:
             
             summary = await self.get_usage_summary(tenant_id, start_of_month, now)
             
-            # Aggregate by event type
-            usage_by_type = {}
-            cost_by_type = {}
-            
-            for event in summary.events:
-                event_type = event.event_type.value
-                usage_by_type[event_type] = usage_by_type.get(event_type, 0) + event.quantity
-                cost_by_type[event_type] = cost_by_type.get(event_type, 0) + event.total_cost
-            
             return {
                 'tenant_id': tenant_id,
                 'period': {
                     'start': start_of_month.isoformat(),
                     'end': now.isoformat()
                 },
-                'usage_by_type': usage_by_type,
-                'cost_by_type': cost_by_type,
+                'usage_by_type': summary.usage_by_type,
+                'cost_by_type': summary.cost_by_type,
                 'total_cost': summary.total_cost,
-                'total_events': len(summary.events)
+                'total_events': summary.total_events
             }
             
         except Exception as e:
@@ -280,20 +302,15 @@ class UsageTracker:
             daily_usage = {}
             daily_costs = {}
             
-            for event in summary.events:
-                day_key = event.timestamp.date().isoformat()
-                
-                if day_key not in daily_usage:
-                    daily_usage[day_key] = {}
-                    daily_costs[day_key] = 0
-                
-                event_type = event.event_type.value
-                daily_usage[day_key][event_type] = daily_usage[day_key].get(event_type, 0) + event.quantity
-                daily_costs[day_key] += event.total_cost
+            for day_key, totals in self.rollups.daily(tenant_id, start_date, end_date).items():
+                daily_usage[day_key] = {t: v.quantity for t, v in totals.items()}
+                daily_costs[day_key] = sum(v.cost for v in totals.values())
             
             # Calculate trends
             cost_trend = self._calculate_cost_trend(daily_costs)
-            usage_patterns = self._analyze_usage_patterns(summary.events)
+            usage_patterns = self._analyze_usage_patterns(
+                summary, self.rollups.cost_by_hour_of_day(tenant_id, start_date, end_date)
+            )
             
             return {
                 'tenant_id': tenant_id,
@@ -444,18 +461,13 @@ class UsageTracker:
             self.logger.error(f"Failed to calculate cost trend: {e}")
             return {'trend': 'error', 'error': str(e)}
             
-    def _analyze_usage_patterns(self, events: List[UsageEvent]) -> Dict[str, Any]:
+    def _analyze_usage_patterns(self, summary: UsageSummary,
+                                hourly_usage: Dict[int, float]) -> Dict[str, Any]:
         """Analyze usage patterns."""
         try:
-            if not events:
+            if not summary.total_events:
                 return {'pattern': 'no_data'}
             
-            # Analyze by hour of day
-            hourly_usage = {}
-            for event in events:
-                hour = event.timestamp.hour
-                hourly_usage[hour] = hourly_usage.get(hour, 0) + event.total_cost
-            
             # Find peak usage hours
             if hourly_usage:
                 peak_hour = max(hourly_usage, key=hourly_usage.get)
@@ -463,18 +475,12 @@ class UsageTracker:
             else:
                 peak_hour = low_hour = 0
             
-            # Analyze by event type
-            type_distribution = {}
-            for event in events:
-                event_type = event.event_type.value
-                type_distribution[event_type] = type_distribution.get(event_type, 0) + event.total_cost
-            
             return {
                 'peak_usage_hour': peak_hour,
                 'low_usage_hour': low_hour,
                 'hourly_distribution': hourly_usage,
-                'cost_by_type': type_distribution,
-                'total_events': len(events)
+                'cost_by_type': dict(summary.cost_by_type),
+                'total_events': summary.total_events
             }
             
         except Exception as e:
@@ -487,15 +493,10 @@ class UsageTracker:
         try:
             recommendations = []
             
-            if not summary.events:
+            if not summary.total_events:
                 return recommendations
             
-            # Analyze cost by event type
-            cost_by_type = {}
-            for event in summary.events:
-                event_type = event.event_type.value
-                cost_by_type[event_type] = cost_by_type.get(event_type, 0) + event.total_cost
-            
+            cost_by_type = summary.cost_by_type
             total_cost = summary.total_cost
             
             # High API usage recommendation
@@ -564,7 +565,8 @@ class UsageTracker:
         """Background task to clean up old usage events."""
         while self.tracking_active:
             try:
-                cutoff_date = datetime.utcnow() - timedelta(days=90)
+                now = datetime.utcnow()
+                cutoff_date = now - timedelta(days=90)
                 
                 for tenant_id in self.usage_events.keys():
                     # Keep only events from last 90 days
@@ -573,6 +575,10 @@ class UsageTracker:
                         if event.timestamp > cutoff_date
                     ]
                 
+                if self.event_log:
+                    self.event_log.flush()
+                    self.event_log.cleanup(now)
+                
                 await asyncio.sleep(86400)  # Run daily
                 
             except Exception as e:
@@ -585,8 +591,11 @@ class UsageTracker:
             current_hour = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
             previous_hour = current_hour - timedelta(hours=1)
             
-            for tenant_id in self.usage_events.keys():
-                summary = await self.get_usage_summary(tenant_id, previous_hour, current_hour)
+            for tenant_id in self.rollups.tenants():
+                # Rollup queries are inclusive to the minute, so stop short of the current hour
+                summary = await self.get_usage_summary(
+                    tenant_id, previous_hour, current_hour - timedelta(seconds=1)
+                )
                 
                 if tenant_id not in self.usage_summaries:
                     self.usage_summaries[tenant_id] = []
@@ -606,7 +615,7 @@ class UsageTracker:
     async def _update_usage_metrics(self) -> None:
         """Update Prometheus usage metrics."""
         try:
-            for tenant_id in self.usage_events.keys():
+            for tenant_id in self.rollups.tenants():
                 # Get current month usage
                 current_month = await self.get_current_month_usage(tenant_id)
                 
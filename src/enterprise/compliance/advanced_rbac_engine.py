@@ -16,7 +16,7 @@ Key Features:
 import asyncio
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Union, Set, Tuple
+from typing import Callable, Dict, Iterable, List, Optional, Any, Union, Set, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 from abc import ABC, abstractmethod
@@ -27,6 +27,8 @@ from concurrent.futures import ThreadPoolExecutor
 import boto3
 from botocore.exceptions import ClientError
 
+from .role_closure import RoleClosure
+
 logger = logging.getLogger(__name__)
 
 class PermissionType(Enum):
@@ -174,10 +176,13 @@ class ComplianceViolation:
 class PolicyEngine:
     """Evaluates policies and makes access control decisions."""
     
-    def __init__(self):
+    def __init__(self, permission_resolver: Optional[Callable[[str, Dict[str, Any]], Set[str]]] = None):
         """Initialize policy engine."""
+        self.permission_resolver = permission_resolver
         self.policy_cache = {}
         self.evaluation_cache = {}
+        # user_id -> evaluation_cache keys of that user's decisions
+        self.user_cache_keys: Dict[str, Set[str]] = {}
         self.cache_ttl = timedelta(minutes=5)
     
     async def evaluate_access(
@@ -238,6 +243,7 @@ class PolicyEngine:
                 'result': result,
                 'timestamp': datetime.now()
             }
+            self.user_cache_keys.setdefault(user_id, set()).add(eval_key)
             
             return result
             
@@ -249,10 +255,18 @@ class PolicyEngine:
                 'evaluated_at': datetime.now().isoformat()
             }
     
+    def invalidate_users(self, user_ids: Iterable[str]) -> None:
+        """Drop cached decisions of users whose roles or assignments changed."""
+        for user_id in user_ids:
+            for eval_key in self.user_cache_keys.pop(user_id, ()):
+                self.evaluation_cache.pop(eval_key, None)
+    
     async def _get_user_permissions(self, user_id: str, context: Dict[str, Any]) -> Set[str]:
         """Get all permissions for a user based on their roles."""
-        # This would integrate with the role management system
-        # For now, return mock permissions
+        if self.permission_resolver is not None:
+            return self.permission_resolver(user_id, context)
+        
+        # Without a role management system, return mock permissions
         return {
             'read_agent', 'write_agent', 'read_tenant', 'configure_workflow'
         }
@@ -708,7 +722,7 @@ class AdvancedRBACEngine:
     def __init__(self, config: Dict[str, Any]):
         """Initialize advanced RBAC engine."""
         self.config = config
-        self.policy_engine = PolicyEngine()
+        self.policy_engine = PolicyEngine(permission_resolver=self._resolve_user_permissions)
         self.approval_engine = ApprovalWorkflowEngine(config)
         self.compliance_monitor = ComplianceMonitor(config)
         
@@ -718,6 +732,9 @@ class AdvancedRBACEngine:
         self.policies: Dict[str, Policy] = {}
         self.user_assignments: Dict[str, List[UserRoleAssignment]] = {}
         
+        # Materialized role inheritance, updated incrementally on changes
+        self.role_closure = RoleClosure()
+        
         logger.info("Advanced RBAC engine initialized")
     
     async def check_access(
@@ -789,6 +806,7 @@ class AdvancedRBACEngine:
                     self.roles[parent_id].child_roles.add(role_id)
             
             self.roles[role_id] = role
+            self.role_closure.set_role(role_id, role.permissions, role.parent_roles, role.is_active)
             
             logger.info(f"Created role: {role_id}")
             
@@ -804,6 +822,58 @@ class AdvancedRBACEngine:
                 'error': str(e)
             }
     
+    async def update_role(
+        self,
+        role_id: str,
+        permissions: List[str] = None,
+        parent_roles: List[str] = None,
+        is_active: bool = None
+    ) -> Dict[str, Any]:
+        """Update a role; only roles inheriting from it are recomputed."""
+        try:
+            role = self.roles.get(role_id)
+            if not role:
+                return {
+                    'success': False,
+                    'error': 'Role not found'
+                }
+            
+            if permissions is not None:
+                role.permissions = set(permissions)
+            if parent_roles is not None:
+                for parent_id in role.parent_roles - set(parent_roles):
+                    if parent_id in self.roles:
+                        self.roles[parent_id].child_roles.discard(role_id)
+                for parent_id in parent_roles:
+                    if parent_id in self.roles:
+                        self.roles[parent_id].child_roles.add(role_id)
+                role.parent_roles = set(parent_roles)
+            if is_active is not None:
+                role.is_active = is_active
+            role.updated_at = datetime.now()
+            
+            self.role_closure.set_role(role_id, role.permissions, role.parent_roles, role.is_active)
+            affected_roles = self.role_closure.descendants(role_id)
+            self.policy_engine.invalidate_users(
+                user_id for user_id, assignments in self.user_assignments.items()
+                if any(assignment.role_id in affected_roles for assignment in assignments)
+            )
+            
+            logger.info(f"Updated role: {role_id}")
+            
+            return {
+                'success': True,
+                'role_id': role_id,
+                'affected_roles': len(affected_roles)
+            }
+            
+        except Exception as e:
+            logger.error(f"Failed to update role: {e}")
+            return {
+                'success': False,
+                'error': str(e)
+            }
+    
     async def assign_role_to_user(
         self,
         user_id: str,
@@ -835,6 +905,7 @@ class AdvancedRBACEngine:
                 self.user_assignments[user_id] = []
             
             self.user_assignments[user_id].append(assignment)
+            self.policy_engine.invalidate_users([user_id])
             
             logger.info(f"Assigned role {role_id} to user {user_id}")
             
@@ -900,38 +971,13 @@ class AdvancedRBACEngine:
     async def get_user_permissions(self, user_id: str, tenant_id: str = None) -> Dict[str, Any]:
         """Get all effective permissions for a user."""
         try:
-            effective_permissions = set()
-            user_roles = []
-            
-            # Get user role assignments
-            assignments = self.user_assignments.get(user_id, [])
-            
-            for assignment in assignments:
-                if not assignment.is_active:
-                    continue
-                
-                # Check validity period
-                if assignment.valid_until and datetime.now() > assignment.valid_until:
-                    continue
-                
-                # Check tenant scope
-                if tenant_id and assignment.tenant_id and assignment.tenant_id != tenant_id:
-                    continue
-                
-                role = self.roles.get(assignment.role_id)
-                if role and role.is_active:
-                    user_roles.append(role.name)
-                    effective_permissions.update(role.permissions)
-                    
-                    # Add inherited permissions from parent roles
-                    inherited_permissions = await self._get_inherited_permissions(role)
-                    effective_permissions.update(inherited_permissions)
+            role_ids = self._active_role_ids(user_id, tenant_id)
             
             return {
                 'success': True,
                 'user_id': user_id,
-                'roles': user_roles,
-                'permissions': list(effective_permissions),
+                'roles': [self.roles[role_id].name for role_id in role_ids],
+                'permissions': list(self.role_closure.combined_permissions(role_ids)),
                 'tenant_id': tenant_id
             }
             
@@ -942,19 +988,33 @@ class AdvancedRBACEngine:
                 'error': str(e)
             }
     
-    async def _get_inherited_permissions(self, role: Role) -> Set[str]:
-        """Get permissions inherited from parent roles."""
-        inherited_permissions = set()
+    def _active_role_ids(self, user_id: str, tenant_id: Optional[str] = None) -> List[str]:
+        """Roles from the user's assignments that are active, current and in tenant scope."""
+        role_ids = []
+        now = datetime.now()
         
-        for parent_role_id in role.parent_roles:
-            parent_role = self.roles.get(parent_role_id)
-            if parent_role and parent_role.is_active:
-                inherited_permissions.update(parent_role.permissions)
-                # Recursively get permissions from grandparent roles
-                grandparent_permissions = await self._get_inherited_permissions(parent_role)
-                inherited_permissions.update(grandparent_permissions)
+        for assignment in self.user_assignments.get(user_id, []):
+            if not assignment.is_active:
+                continue
+            
+            # Check validity period
+            if assignment.valid_until and now > assignment.valid_until:
+                continue
+            
+            # Check tenant scope
+            if tenant_id and assignment.tenant_id and assignment.tenant_id != tenant_id:
+                continue
+            
+            role = self.roles.get(assignment.role_id)
+            if role and role.is_active:
+                role_ids.append(assignment.role_id)
         
-        return inherited_permissions
+        return role_ids
+    
+    def _resolve_user_permissions(self, user_id: str, context: Dict[str, Any]) -> Set[str]:
+        """Effective permissions for policy evaluation, from the materialized role closure."""
+        role_ids = self._active_role_ids(user_id, context.get('tenant_id'))
+        return self.role_closure.combined_permissions(role_ids)
     
     async def get_compliance_violations(
         self,
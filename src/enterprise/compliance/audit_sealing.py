@@ -0,0 +1,401 @@
+"""
+ACSO Enterprise Framework - Audit Block Sealing
+
+Merkle, hashing and sealing primitives for the immutable audit trail, plus a
+pipeline that seals batches of events into chained blocks in a worker pool so
+the event loop never runs proof-of-work or bulk hashing itself.
+"""
+
+import asyncio
+import functools
+import hashlib
+import hmac
+import json
+import logging
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from enum import Enum
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+GENESIS_HASH = "0" * 64
+_NONCE_PLACEHOLDER = "__nonce__"
+
+# Block fields covered by the block hash, besides the nonce
+HEADER_FIELDS = ('block_id', 'block_number', 'timestamp', 'previous_hash', 'merkle_root', 'sealing_mode', 'difficulty')
+
+
+class AuditSealingError(RuntimeError):
+    """Raised when sealed blocks cannot be stored."""
+
+
+class SealingMode(Enum):
+    """How audit blocks are sealed."""
+    PROOF_OF_WORK = "proof_of_work"
+    HMAC = "hmac"
+    SIGNATURE = "signature"
+
+
+def event_hash(event_dict: Dict[str, Any]) -> str:
+    """SHA-256 of an event's dictionary form, as AuditEvent.calculate_hash."""
+    return hashlib.sha256(json.dumps(event_dict, sort_keys=True).encode()).hexdigest()
+
+
+def merkle_root(hashes: List[str]) -> str:
+    """Merkle root over hex digests, duplicating the last node of odd levels."""
+    if not hashes:
+        return hashlib.sha256(b"").hexdigest()
+
+    level = list(hashes)
+    while len(level) > 1:
+        next_level = []
+        for i in range(0, len(level), 2):
+            right = level[i + 1] if i + 1 < len(level) else level[i]
+            next_level.append(hashlib.sha256((level[i] + right).encode()).hexdigest())
+        level = next_level
+    return level[0]
+
+
+def event_merkle_root(event_dicts: List[Dict[str, Any]]) -> str:
+    """Merkle root of a batch of serialized events."""
+    return merkle_root([event_hash(event_dict) for event_dict in event_dicts])
+
+
+def _header_parts(header: Dict[str, Any]) -> Tuple[str, str]:
+    """Split the canonical header JSON around the nonce value."""
+    data = dict(header, nonce=_NONCE_PLACEHOLDER)
+    prefix, suffix = json.dumps(data, sort_keys=True).split(f'"{_NONCE_PLACEHOLDER}"')
+    return prefix, suffix
+
+
+def block_header_hash(header: Dict[str, Any], nonce: int) -> str:
+    """Block hash over the header fields and nonce, as AuditBlock.calculate_hash."""
+    return hashlib.sha256(json.dumps(dict(header, nonce=nonce), sort_keys=True).encode()).hexdigest()
+
+
+def mine_header(header: Dict[str, Any], difficulty: int, start_nonce: int = 0) -> Tuple[int, str]:
+    """Find the first nonce after start_nonce whose hash has `difficulty` leading zeros.
+
+    The JSON around the nonce is serialized once and the hash state of the
+    prefix is reused, so each attempt only hashes the nonce and the suffix.
+    """
+    target = "0" * difficulty
+    prefix, suffix = _header_parts(header)
+    prefix_hash = hashlib.sha256(prefix.encode())
+    suffix_bytes = suffix.encode()
+
+    nonce = start_nonce
+    while True:
+        nonce += 1
+        attempt = prefix_hash.copy()
+        attempt.update(str(nonce).encode())
+        attempt.update(suffix_bytes)
+        digest = attempt.hexdigest()
+        if digest.startswith(target):
+            return nonce, digest
+
+
+@functools.lru_cache(maxsize=4)
+def _load_signing_key(private_key_pem: bytes):
+    from cryptography.hazmat.primitives import serialization
+    return serialization.load_pem_private_key(private_key_pem, password=None)
+
+
+def _pss_padding():
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import padding
+    return padding.PSS(mgf=padding.MGF1(hashes.SHA256()), salt_length=padding.PSS.MAX_LENGTH)
+
+
+def hmac_seal(block_hash: str, key: bytes) -> str:
+    """HMAC-SHA256 of a block hash."""
+    return hmac.new(key, block_hash.encode(), hashlib.sha256).hexdigest()
+
+
+def seal_header(header: Dict[str, Any], mode: str, difficulty: int = 4,
+                hmac_key: Optional[bytes] = None,
+                signing_key_pem: Optional[bytes] = None) -> Tuple[int, str, str]:
+    """Compute (nonce, hash, seal) for a block header.
+
+    Proof-of-work mines the nonce and has no separate seal. HMAC and
+    signature modes hash the header with nonce 0 and seal that hash; the
+    chain is carried by previous_hash being part of every header.
+    """
+    if mode == SealingMode.PROOF_OF_WORK.value:
+        nonce, block_hash = mine_header(header, difficulty)
+        return nonce, block_hash, ""
+
+    block_hash = block_header_hash(header, 0)
+    if mode == SealingMode.HMAC.value:
+        return 0, block_hash, hmac_seal(block_hash, hmac_key)
+    if mode == SealingMode.SIGNATURE.value:
+        from cryptography.hazmat.primitives import hashes
+        signature = _load_signing_key(signing_key_pem).sign(block_hash.encode(), _pss_padding(), hashes.SHA256())
+        return 0, block_hash, signature.hex()
+    raise ValueError(f"Unsupported sealing mode: {mode}")
+
+
+def verify_seal(block_hash: str, seal: str, mode: str,
+                hmac_key: Optional[bytes] = None, public_key: Any = None,
+                difficulty: int = 4) -> bool:
+    """Check a block's seal, or its proof of work, against its hash."""
+    if mode == SealingMode.PROOF_OF_WORK.value:
+        return block_hash.startswith("0" * difficulty)
+    if mode == SealingMode.HMAC.value:
+        return hmac_key is not None and hmac.compare_digest(hmac_seal(block_hash, hmac_key), seal)
+    if mode == SealingMode.SIGNATURE.value:
+        if public_key is None:
+            return False
+        from cryptography.hazmat.primitives import hashes
+        try:
+            public_key.verify(bytes.fromhex(seal), block_hash.encode(), _pss_padding(), hashes.SHA256())
+            return True
+        except Exception:
+            return False
+    return False
+
+
+class AuditBlockSealer:
+    """Seals batches of audit events into chained blocks off the event loop.
+
+    Merkle roots for queued batches are computed in parallel in the executor;
+    headers are then sealed one at a time in chain order against a chain tip
+    kept in memory, so storage is only asked for the latest block once. A
+    batch whose block fails to store is retried with backoff before any
+    later batch, keeping block numbers contiguous.
+
+    At most max_queued_batches wait to be sealed; submit waits for room. Once
+    max_store_failures stores in a row have failed the sealer reports itself
+    unhealthy, and submit and drain raise AuditSealingError instead of
+    waiting, while the worker keeps retrying in the background.
+    """
+
+    def __init__(self,
+                 storage: Any,
+                 block_factory: Callable[[List[Any], Dict[str, Any], int, str, str], Any],
+                 mode: SealingMode = SealingMode.PROOF_OF_WORK,
+                 difficulty: int = 4,
+                 hmac_key: Optional[bytes] = None,
+                 signing_key_pem: Optional[bytes] = None,
+                 executor_kind: str = "process",
+                 max_workers: Optional[int] = None,
+                 on_sealed: Optional[Callable[[Any], Awaitable[None]]] = None,
+                 max_retry_delay: float = 30.0,
+                 max_queued_batches: int = 64,
+                 max_store_failures: int = 5):
+        self.storage = storage
+        self.block_factory = block_factory
+        self.mode = SealingMode(mode)
+        self.difficulty = difficulty
+        self.hmac_key = hmac_key
+        self.signing_key_pem = signing_key_pem
+        self.on_sealed = on_sealed
+        self.max_retry_delay = max_retry_delay
+        self.max_queued_batches = max_queued_batches
+        self.max_store_failures = max_store_failures
+
+        if self.mode == SealingMode.HMAC and not hmac_key:
+            raise ValueError("HMAC sealing requires a key")
+        if self.mode == SealingMode.SIGNATURE and not signing_key_pem:
+            raise ValueError("Signature sealing requires a private key")
+        if max_queued_batches <= 0 or max_store_failures <= 0:
+            raise ValueError("max_queued_batches and max_store_failures must be positive")
+
+        self._executor: Optional[Executor] = None
+        self._executor_kind = executor_kind
+        self._max_workers = max_workers
+
+        # (events, merkle root future) in chain order
+        self._batches: Deque[Tuple[List[Any], "asyncio.Future[str]"]] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        # Set whenever a batch is stored or a store fails
+        self._progress: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self._tip: Optional[Tuple[int, str]] = None
+        self._tip_loaded = False
+
+        self.blocks_sealed = 0
+        self.events_sealed = 0
+        self.store_failures = 0
+        self.consecutive_store_failures = 0
+        self.last_store_error: Optional[str] = None
+        self.last_seal_seconds = 0.0
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = create_executor(self._executor_kind, self._max_workers)
+        return self._executor
+
+    @property
+    def queued_batches(self) -> int:
+        return len(self._batches)
+
+    @property
+    def healthy(self) -> bool:
+        """False while the last max_store_failures stores have all failed."""
+        return self.consecutive_store_failures < self.max_store_failures
+
+    @property
+    def chain_tip(self) -> Optional[Tuple[int, str]]:
+        """(block number, hash) of the last sealed block, if known."""
+        return self._tip
+
+    async def submit(self, events: List[Any]) -> None:
+        """Queue a batch of events to be sealed into the next block.
+
+        Waits while max_queued_batches are already queued, and raises
+        AuditSealingError if blocks cannot currently be stored.
+        """
+        if not events:
+            return
+        while len(self._batches) >= self.max_queued_batches:
+            await self._wait_for_progress()
+
+        loop = asyncio.get_running_loop()
+        event_dicts = [event.to_dict() for event in events]
+        merkle_future = loop.run_in_executor(self.executor, event_merkle_root, event_dicts)
+        self._batches.append((events, merkle_future))
+
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._progress = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+        self._wakeup.set()
+
+    async def drain(self) -> None:
+        """Wait until every submitted batch has been sealed and stored.
+
+        Raises AuditSealingError if blocks cannot currently be stored.
+        """
+        if self._task is None or self._task.done():
+            return
+        while self._batches:
+            await self._wait_for_progress()
+
+    async def _wait_for_progress(self) -> None:
+        if not self.healthy:
+            raise AuditSealingError(
+                f"{self.consecutive_store_failures} audit block stores failed in a row: {self.last_store_error}"
+            )
+        self._progress.clear()
+        await self._progress.wait()
+
+    async def close(self) -> None:
+        """Seal what is queued, then stop the worker task and pool."""
+        try:
+            await self.drain()
+        finally:
+            if self._task is not None:
+                self._task.cancel()
+                try:
+                    await self._task
+                except asyncio.CancelledError:
+                    pass
+                self._task = None
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    async def _load_tip(self) -> None:
+        if self._tip_loaded:
+            return
+        latest_block = await self.storage.get_latest_block()
+        if latest_block:
+            self._tip = (latest_block.block_number, latest_block.hash)
+        self._tip_loaded = True
+
+    async def _run(self) -> None:
+        retry_delay = 1.0
+        while True:
+            if not self._batches:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            events, merkle_future = self._batches[0]
+            error = "storage rejected the block"
+            try:
+                block = await self._seal(events, await merkle_future)
+                stored = await self.storage.store_block(block)
+            except Exception as e:
+                logger.error(f"Failed to seal audit block: {e}")
+                error = str(e)
+                stored = False
+                if merkle_future.done() and merkle_future.exception() is not None:
+                    # Recompute the Merkle root on the next attempt
+                    self._batches[0] = (events, asyncio.get_running_loop().run_in_executor(
+                        self.executor, event_merkle_root, [event.to_dict() for event in events]
+                    ))
+
+            if not stored:
+                self.store_failures += 1
+                self.consecutive_store_failures += 1
+                self.last_store_error = error
+                self._progress.set()
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, self.max_retry_delay)
+                continue
+
+            retry_delay = 1.0
+            self._batches.popleft()
+            self._tip = (block.block_number, block.hash)
+            self.blocks_sealed += 1
+            self.events_sealed += len(events)
+            self.consecutive_store_failures = 0
+            self.last_store_error = None
+            self._progress.set()
+            if self.on_sealed is not None:
+                await self.on_sealed(block)
+
+    async def _seal(self, events: List[Any], root: str) -> Any:
+        await self._load_tip()
+        block_number = self._tip[0] + 1 if self._tip else 0
+        previous_hash = self._tip[1] if self._tip else GENESIS_HASH
+
+        header = {
+            'block_id': str(uuid.uuid4()),
+            'block_number': block_number,
+            'timestamp': datetime.now().isoformat(),
+            'previous_hash': previous_hash,
+            'merkle_root': root,
+            'sealing_mode': self.mode.value,
+            'difficulty': self.difficulty if self.mode == SealingMode.PROOF_OF_WORK else 0
+        }
+
+        started = time.perf_counter()
+        nonce, block_hash, seal = await asyncio.get_running_loop().run_in_executor(
+            self.executor, seal_header, header, self.mode.value,
+            self.difficulty, self.hmac_key, self.signing_key_pem
+        )
+        self.last_seal_seconds = time.perf_counter() - started
+        return self.block_factory(events, header, nonce, block_hash, seal)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get sealing counters."""
+        return {
+            'sealing_mode': self.mode.value,
+            'queued_batches': len(self._batches),
+            'blocks_sealed': self.blocks_sealed,
+            'events_sealed': self.events_sealed,
+            'store_failures': self.store_failures,
+            'consecutive_store_failures': self.consecutive_store_failures,
+            'last_store_error': self.last_store_error,
+            'healthy': self.healthy,
+            'last_seal_seconds': self.last_seal_seconds,
+            'chain_tip': self._tip[0] if self._tip else None
+        }
+
+
+def create_executor(kind: str = "process", max_workers: Optional[int] = None) -> Executor:
+    """Executor for sealing work: a process pool, or threads where fork is unavailable."""
+    if kind == "process":
+        return ProcessPoolExecutor(max_workers=max_workers)
+    if kind == "thread":
+        return ThreadPoolExecutor(max_workers=max_workers)
+    raise ValueError(f"Unsupported sealing executor: {kind}")
@@ -0,0 +1,313 @@
+"""
+ACSO Enterprise Framework - Audit Segment Store
+
+Append-only, memory-mapped segment files for audit blocks, with sidecar
+indexes on block number, block id, event time and selected event fields so
+searches only read the blocks that can match.
+
+Each record in a segment is framed as ``<length:u32><crc32:u32><payload>``.
+The sidecar ``index.jsonl`` holds one line per record and is replayed on
+open; records written after the last index line (e.g. after a crash between
+the two writes) are re-indexed from the segment, and a torn tail is cut off.
+"""
+
+import bisect
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import zlib
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+_RECORD_HEADER = struct.Struct("<II")
+_SEGMENT_PREFIX = "segment-"
+_SEGMENT_SUFFIX = ".log"
+INDEX_FILE = "index.jsonl"
+
+
+@dataclass
+class SegmentEntry:
+    """Index entry for one record."""
+    number: int
+    record_id: str
+    min_time: float
+    max_time: float
+    keys: Dict[str, List[str]] = field(default_factory=dict)
+    segment: int = 0
+    offset: int = 0
+    length: int = 0
+
+    def to_json(self) -> str:
+        return json.dumps({
+            'n': self.number, 'id': self.record_id, 't0': self.min_time, 't1': self.max_time,
+            'keys': self.keys, 'seg': self.segment, 'off': self.offset, 'len': self.length
+        }, separators=(',', ':'))
+
+    @classmethod
+    def from_json(cls, line: str) -> "SegmentEntry":
+        data = json.loads(line)
+        return cls(data['n'], data['id'], data['t0'], data['t1'], data['keys'],
+                   data['seg'], data['off'], data['len'])
+
+
+class SegmentStore:
+    """Append-only record log split into size-capped, memory-mapped segments.
+
+    Records are numbered densely from 0 in append order. Reads go through a
+    read-only mmap per segment; batched reads are grouped by segment and
+    sorted by offset so a range read walks each file forwards once.
+    """
+
+    def __init__(self,
+                 directory: str,
+                 describe: Callable[[bytes], SegmentEntry],
+                 segment_max_bytes: int = 64 * 1024 * 1024,
+                 fsync: bool = True):
+        self.directory = directory
+        self.describe = describe
+        self.segment_max_bytes = segment_max_bytes
+        self.fsync = fsync
+
+        self._lock = threading.Lock()
+        self._entries: List[SegmentEntry] = []
+        self._ids: Dict[str, int] = {}
+        self._postings: Dict[str, Dict[str, List[int]]] = {}
+
+        # Per record time bounds; the running maximum of max_time is sorted,
+        # and min_time usually is when events are logged in time order
+        self._max_time_prefix: List[float] = []
+        self._min_times: List[float] = []
+        self._min_times_sorted = True
+
+        self._maps: Dict[int, mmap.mmap] = {}
+        self._active_segment = 0
+        self._active_file = None
+        self._index_file = None
+
+        os.makedirs(directory, exist_ok=True)
+        self._open()
+
+    # Opening and recovery
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"{_SEGMENT_PREFIX}{segment:08d}{_SEGMENT_SUFFIX}")
+
+    def _segments_on_disk(self) -> List[int]:
+        segments = []
+        for name in os.listdir(self.directory):
+            if name.startswith(_SEGMENT_PREFIX) and name.endswith(_SEGMENT_SUFFIX):
+                segments.append(int(name[len(_SEGMENT_PREFIX):-len(_SEGMENT_SUFFIX)]))
+        return sorted(segments)
+
+    def _open(self) -> None:
+        index_path = os.path.join(self.directory, INDEX_FILE)
+        valid_bytes = 0
+        if os.path.exists(index_path):
+            with open(index_path, 'rb') as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        entry = SegmentEntry.from_json(line.decode())
+                    except ValueError:
+                        break
+                    if entry.number != len(self._entries):
+                        break
+                    self._add_to_indexes(entry)
+                    valid_bytes += len(line)
+            if valid_bytes != os.path.getsize(index_path):
+                logger.warning(f"Truncating torn audit index at byte {valid_bytes}")
+                os.truncate(index_path, valid_bytes)
+
+        self._index_file = open(index_path, 'ab')
+
+        segments = self._segments_on_disk()
+        if segments:
+            self._active_segment = segments[-1]
+        self._recover_tail()
+        self._active_file = open(self._segment_path(self._active_segment), 'ab')
+
+    def _recover_tail(self) -> None:
+        """Index records past the last index line and cut off a torn record."""
+        first = self._entries[-1].segment if self._entries else 0
+        segments = [s for s in self._segments_on_disk() if s >= first]
+        for i, segment in enumerate(segments):
+            if not self._recover_segment(segment):
+                # Segments are written in order, so nothing after a torn record is valid
+                for orphan in segments[i + 1:]:
+                    os.remove(self._segment_path(orphan))
+                break
+
+    def _recover_segment(self, segment: int) -> bool:
+        """Recover one segment; returns False if it ended in a torn record."""
+        path = self._segment_path(segment)
+        position = 0
+        if self._entries and self._entries[-1].segment == segment:
+            last = self._entries[-1]
+            position = last.offset + _RECORD_HEADER.size + last.length
+
+        size = os.path.getsize(path)
+        with open(path, 'rb') as f:
+            f.seek(position)
+            while position + _RECORD_HEADER.size <= size:
+                length, checksum = _RECORD_HEADER.unpack(f.read(_RECORD_HEADER.size))
+                payload = f.read(length)
+                if len(payload) != length or zlib.crc32(payload) != checksum:
+                    break
+                entry = self.describe(payload)
+                if entry.number != len(self._entries):
+                    break
+                entry.segment, entry.offset, entry.length = segment, position, length
+                self._write_index_line(entry)
+                self._add_to_indexes(entry)
+                position += _RECORD_HEADER.size + length
+
+        if position != size:
+            logger.warning(f"Truncating torn audit segment {path} at byte {position}")
+            os.truncate(path, position)
+            self._active_segment = segment
+            return False
+        return True
+
+    # Indexes
+
+    def _add_to_indexes(self, entry: SegmentEntry) -> None:
+        self._entries.append(entry)
+        self._ids[entry.record_id] = entry.number
+        for name, values in entry.keys.items():
+            postings = self._postings.setdefault(name, {})
+            for value in values:
+                postings.setdefault(value, []).append(entry.number)
+
+        previous_max = self._max_time_prefix[-1] if self._max_time_prefix else entry.max_time
+        self._max_time_prefix.append(max(previous_max, entry.max_time))
+        if self._min_times and entry.min_time < self._min_times[-1]:
+            self._min_times_sorted = False
+        self._min_times.append(entry.min_time)
+
+    def _write_index_line(self, entry: SegmentEntry) -> None:
+        self._index_file.write(entry.to_json().encode() + b"\n")
+        self._index_file.flush()
+        if self.fsync:
+            os.fsync(self._index_file.fileno())
+
+    # Writing
+
+    def append(self, payload: bytes, entry: SegmentEntry) -> None:
+        """Append a record; entry.number must be the next record number."""
+        with self._lock:
+            if entry.number != len(self._entries):
+                raise ValueError(f"Expected record {len(self._entries)}, got {entry.number}")
+
+            record_size = _RECORD_HEADER.size + len(payload)
+            offset = self._active_file.tell()
+            if offset and offset + record_size > self.segment_max_bytes:
+                self._roll_segment()
+                offset = 0
+
+            self._active_file.write(_RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+            self._active_file.flush()
+            if self.fsync:
+                os.fsync(self._active_file.fileno())
+
+            entry.segment, entry.offset, entry.length = self._active_segment, offset, len(payload)
+            self._write_index_line(entry)
+            self._add_to_indexes(entry)
+
+    def _roll_segment(self) -> None:
+        self._active_file.close()
+        self._active_segment += 1
+        self._active_file = open(self._segment_path(self._active_segment), 'ab')
+
+    # Reading
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def number_for_id(self, record_id: str) -> Optional[int]:
+        return self._ids.get(record_id)
+
+    def _map(self, segment: int, end: int) -> mmap.mmap:
+        mapped = self._maps.get(segment)
+        if mapped is None or len(mapped) < end:
+            # The active segment grows, so its map is refreshed on demand
+            if mapped is not None:
+                mapped.close()
+            with open(self._segment_path(segment), 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[segment] = mapped
+        return mapped
+
+    def read_many(self, numbers: Iterable[int]) -> List[bytes]:
+        """Read records in ascending record order, skipping unknown numbers."""
+        with self._lock:
+            entries = [self._entries[n] for n in sorted(set(numbers)) if 0 <= n < len(self._entries)]
+            # Entries are numbered in append order, so this is segment/offset order
+            payloads = []
+            for entry in entries:
+                start = entry.offset + _RECORD_HEADER.size
+                mapped = self._map(entry.segment, start + entry.length)
+                payloads.append(bytes(mapped[start:start + entry.length]))
+            return payloads
+
+    def read(self, number: int) -> Optional[bytes]:
+        payloads = self.read_many([number])
+        return payloads[0] if payloads else None
+
+    def find(self,
+             keys: Optional[Dict[str, str]] = None,
+             start_time: Optional[float] = None,
+             end_time: Optional[float] = None) -> List[int]:
+        """Record numbers whose keys include every given value and whose time bounds overlap the range."""
+        with self._lock:
+            count = len(self._entries)
+            low = 0
+            if start_time is not None:
+                low = bisect.bisect_left(self._max_time_prefix, start_time)
+            high = count
+            if end_time is not None and self._min_times_sorted:
+                high = bisect.bisect_right(self._min_times, end_time)
+            if low >= high:
+                return []
+
+            candidates: Optional[Set[int]] = None
+            for name, value in (keys or {}).items():
+                postings = self._postings.get(name, {}).get(value, [])
+                if not postings:
+                    return []
+                # Postings are sorted, so clip them to the time window first
+                window = postings[bisect.bisect_left(postings, low):bisect.bisect_left(postings, high)]
+                candidates = set(window) if candidates is None else candidates.intersection(window)
+                if not candidates:
+                    return []
+
+            numbers = range(low, high) if candidates is None else sorted(candidates)
+            return [
+                n for n in numbers
+                if (start_time is None or self._entries[n].max_time >= start_time)
+                and (end_time is None or self._entries[n].min_time <= end_time)
+            ]
+
+    def close(self) -> None:
+        with self._lock:
+            for mapped in self._maps.values():
+                mapped.close()
+            self._maps.clear()
+            if self._active_file is not None:
+                self._active_file.close()
+                self._active_file = None
+            if self._index_file is not None:
+                self._index_file.close()
+                self._index_file = None
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            'records': len(self._entries),
+            'segments': self._active_segment + 1 if self._entries else 0,
+            'indexed_keys': sum(len(postings) for postings in self._postings.values())
+        }
@@ -0,0 +1,251 @@
+"""
+ACSO Enterprise Framework - Audit Chain Verification
+
+Incremental, parallel verification of the audit block chain. Blocks are
+streamed from storage in ranges and linked against the previous block
+already in memory, while hash and Merkle recomputation runs in a worker
+pool. Each clean run records a signed checkpoint so the next run only
+verifies blocks added since.
+"""
+
+import asyncio
+import hmac
+import json
+import logging
+import os
+from collections import deque
+from concurrent.futures import Executor
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from .audit_sealing import (
+    GENESIS_HASH, HEADER_FIELDS, block_header_hash, create_executor, event_merkle_root, hmac_seal
+)
+
+logger = logging.getLogger(__name__)
+
+
+def verify_block_batch(block_dicts: List[Dict[str, Any]]) -> List[Tuple[int, List[str]]]:
+    """Recompute the hash and Merkle root of serialized blocks.
+
+    Runs in a worker process; returns (block number, issues) per block.
+    """
+    results = []
+    for data in block_dicts:
+        block_number = data['block_number']
+        issues = []
+        header = {key: data[key] for key in HEADER_FIELDS}
+        if block_header_hash(header, data['nonce']) != data['hash']:
+            issues.append(f"Block {block_number} hash mismatch")
+        if event_merkle_root(data['events']) != data['merkle_root']:
+            issues.append(f"Block {block_number} Merkle root mismatch")
+        results.append((block_number, issues))
+    return results
+
+
+@dataclass
+class VerificationCheckpoint:
+    """Last block of a clean verification run, signed with an HMAC key."""
+    block_number: int
+    block_hash: str
+    verified_at: str
+    signature: str = ""
+
+    def payload(self) -> str:
+        return json.dumps({
+            'block_number': self.block_number,
+            'block_hash': self.block_hash,
+            'verified_at': self.verified_at
+        }, sort_keys=True)
+
+    def sign(self, key: bytes) -> None:
+        self.signature = hmac_seal(self.payload(), key)
+
+    def is_signed_by(self, key: bytes) -> bool:
+        return hmac.compare_digest(hmac_seal(self.payload(), key), self.signature)
+
+
+class CheckpointStore:
+    """Keeps the latest verification checkpoint in a JSON file, or in memory without a path."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._checkpoint: Optional[VerificationCheckpoint] = None
+
+    def load(self) -> Optional[VerificationCheckpoint]:
+        if self._checkpoint is None and self.path and os.path.exists(self.path):
+            try:
+                with open(self.path) as f:
+                    self._checkpoint = VerificationCheckpoint(**json.load(f))
+            except (OSError, ValueError, TypeError) as e:
+                logger.warning(f"Ignoring unreadable verification checkpoint {self.path}: {e}")
+        return self._checkpoint
+
+    def save(self, checkpoint: VerificationCheckpoint) -> None:
+        if self.path:
+            # Write then rename, so a crash never leaves a partial checkpoint
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(asdict(checkpoint), f)
+            os.replace(tmp_path, self.path)
+        self._checkpoint = checkpoint
+
+
+class ChainVerifier:
+    """Verifies the audit chain from the last checkpoint to the tip.
+
+    Linkage, numbering and seals are checked in order as ranges arrive from
+    storage; batches of serialized blocks are recomputed in the executor
+    with a bounded number of batches in flight.
+    """
+
+    def __init__(self,
+                 storage: Any,
+                 checkpoint_key: bytes,
+                 checkpoints: Optional[CheckpointStore] = None,
+                 verify_seal: Optional[Callable[[Any], bool]] = None,
+                 batch_size: int = 200,
+                 max_pending_batches: Optional[int] = None,
+                 executor_kind: str = "process",
+                 max_workers: Optional[int] = None):
+        self.storage = storage
+        self.checkpoint_key = checkpoint_key
+        self.checkpoints = checkpoints or CheckpointStore()
+        self.verify_seal = verify_seal
+        self.batch_size = batch_size
+        self.max_pending_batches = max_pending_batches or 2 * (max_workers or os.cpu_count() or 1)
+
+        self._executor: Optional[Executor] = None
+        self._executor_kind = executor_kind
+        self._max_workers = max_workers
+        self._lock: Optional[asyncio.Lock] = None
+
+        self.runs = 0
+        self.blocks_verified = 0
+        self.last_run_seconds = 0.0
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = create_executor(self._executor_kind, self._max_workers)
+        return self._executor
+
+    async def verify(self, full: bool = False) -> Dict[str, Any]:
+        """Verify blocks added since the last checkpoint, or the whole chain if full."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            return await self._verify(full)
+
+    async def _verify(self, full: bool) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        self.runs += 1
+
+        latest_block = await self.storage.get_latest_block()
+        if not latest_block:
+            return {'valid': True, 'blocks_verified': 0, 'issues': [], 'resumed_from': None}
+        tip = latest_block.block_number
+
+        issues: List[str] = []
+        checkpoint = None if full else self._load_checkpoint(issues)
+
+        # The checkpointed block is re-read as the linkage anchor but not re-verified
+        next_number = 0
+        previous_hash = GENESIS_HASH
+        anchor_seen = False
+        if checkpoint is not None:
+            if checkpoint.block_number > tip:
+                issues.append(f"Checkpoint block {checkpoint.block_number} is beyond the chain tip {tip}")
+                checkpoint = None
+            else:
+                next_number = checkpoint.block_number + 1
+                previous_hash = checkpoint.block_hash
+
+        pending: Deque["asyncio.Future[List[Tuple[int, List[str]]]]"] = deque()
+        blocks_verified = 0
+        first = checkpoint.block_number if checkpoint else 0
+
+        for start in range(first, tip + 1, self.batch_size):
+            end = min(start + self.batch_size - 1, tip)
+            blocks = await self.storage.get_blocks_by_range(start, end)
+
+            block_dicts = []
+            for block in blocks:
+                if block.block_number < next_number:
+                    if checkpoint is not None and block.block_number == checkpoint.block_number:
+                        anchor_seen = True
+                        if block.hash != checkpoint.block_hash:
+                            issues.append(f"Checkpoint block {checkpoint.block_number} was modified")
+                    continue
+                while next_number < block.block_number:
+                    issues.append(f"Missing block {next_number}")
+                    next_number += 1
+
+                if block.previous_hash != previous_hash:
+                    issues.append(f"Block {block.block_number} previous hash mismatch")
+                if self.verify_seal is not None and not self.verify_seal(block):
+                    issues.append(f"Block {block.block_number} seal mismatch")
+
+                block_dicts.append(block.to_dict())
+                previous_hash = block.hash
+                next_number = block.block_number + 1
+
+            if block_dicts:
+                pending.append(loop.run_in_executor(self.executor, verify_block_batch, block_dicts))
+                blocks_verified += len(block_dicts)
+            while len(pending) >= self.max_pending_batches:
+                issues.extend(self._collect(await pending.popleft()))
+
+        if checkpoint is not None and not anchor_seen:
+            issues.append(f"Checkpoint block {checkpoint.block_number} is missing")
+        while next_number <= tip:
+            issues.append(f"Missing block {next_number}")
+            next_number += 1
+        while pending:
+            issues.extend(self._collect(await pending.popleft()))
+
+        result = {
+            'valid': not issues,
+            'blocks_verified': blocks_verified,
+            'issues': issues,
+            'resumed_from': checkpoint.block_number if checkpoint else None,
+            'verification_timestamp': datetime.now().isoformat()
+        }
+
+        if not issues:
+            new_checkpoint = VerificationCheckpoint(tip, previous_hash, result['verification_timestamp'])
+            new_checkpoint.sign(self.checkpoint_key)
+            self.checkpoints.save(new_checkpoint)
+            result['checkpoint'] = asdict(new_checkpoint)
+
+        self.blocks_verified += blocks_verified
+        self.last_run_seconds = loop.time() - started
+        return result
+
+    def _load_checkpoint(self, issues: List[str]) -> Optional[VerificationCheckpoint]:
+        checkpoint = self.checkpoints.load()
+        if checkpoint is not None and not checkpoint.is_signed_by(self.checkpoint_key):
+            issues.append("Verification checkpoint signature mismatch")
+            return None
+        return checkpoint
+
+    @staticmethod
+    def _collect(results: List[Tuple[int, List[str]]]) -> List[str]:
+        return [issue for _, block_issues in results for issue in block_issues]
+
+    async def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get verification counters."""
+        checkpoint = self.checkpoints.load()
+        return {
+            'runs': self.runs,
+            'blocks_verified': self.blocks_verified,
+            'last_run_seconds': self.last_run_seconds,
+            'checkpoint_block': checkpoint.block_number if checkpoint else None
+        }
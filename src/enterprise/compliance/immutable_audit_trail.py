@@ -8,11 +8,12 @@ and tamper-proof evidence collection for compliance and governance.
 import asyncio
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Union
+from typing import AsyncIterator, Dict, List, Optional, Any, Union
 from dataclasses import dataclass, field
 from enum import Enum
 import json
 import hashlib
+import secrets
 import uuid
 from abc import ABC, abstractmethod
 import boto3
@@ -20,6 +21,13 @@ from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.asymmetric import rsa, padding
 from cryptography.hazmat.backends import default_backend
 
+from .audit_sealing import (
+    AuditBlockSealer, SealingMode, block_header_hash, event_hash, merkle_root,
+    mine_header, verify_seal
+)
+from .audit_segments import SegmentEntry, SegmentStore
+from .audit_verification import ChainVerifier, CheckpointStore
+
 logger = logging.getLogger(__name__)
 
 class AuditEventType(Enum):
@@ -94,10 +102,31 @@ class AuditEvent:
             'risk_score': self.risk_score
         }
     
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'AuditEvent':
+        """Reconstruct an audit event from its dictionary form."""
+        return cls(
+            event_id=data['event_id'],
+            event_type=AuditEventType(data['event_type']),
+            timestamp=datetime.fromisoformat(data['timestamp']),
+            user_id=data['user_id'],
+            session_id=data['session_id'],
+            tenant_id=data['tenant_id'],
+            resource_type=data['resource_type'],
+            resource_id=data['resource_id'],
+            action=data['action'],
+            outcome=data['outcome'],
+            severity=AuditSeverity(data['severity']),
+            source_ip=data['source_ip'],
+            user_agent=data['user_agent'],
+            details=data['details'],
+            compliance_tags=[ComplianceFramework(tag) for tag in data['compliance_tags']],
+            risk_score=data['risk_score']
+        )
+    
     def calculate_hash(self) -> str:
         """Calculate cryptographic hash of the event."""
-        event_data = json.dumps(self.to_dict(), sort_keys=True)
-        return hashlib.sha256(event_data.encode()).hexdigest()
+        return event_hash(self.to_dict())
 
 @dataclass
 class AuditBlock:
@@ -110,46 +139,36 @@ class AuditBlock:
     merkle_root: str
     nonce: int = 0
     hash: str = ""
+    sealing_mode: str = SealingMode.PROOF_OF_WORK.value
+    seal: str = ""
+    difficulty: int = 0
     
     def calculate_merkle_root(self) -> str:
         """Calculate Merkle root of all events in the block."""
-        if not self.events:
-            return hashlib.sha256(b"").hexdigest()
-        
-        hashes = [event.calculate_hash() for event in self.events]
-        
-        while len(hashes) > 1:
-            next_level = []
-            for i in range(0, len(hashes), 2):
-                if i + 1 < len(hashes):
-                    combined = hashes[i] + hashes[i + 1]
-                else:
-                    combined = hashes[i] + hashes[i]
-                next_level.append(hashlib.sha256(combined.encode()).hexdigest())
-            hashes = next_level
-        
-        return hashes[0]
+        return merkle_root([event.calculate_hash() for event in self.events])
     
-    def calculate_hash(self) -> str:
-        """Calculate block hash."""
-        block_data = {
+    def header(self) -> Dict[str, Any]:
+        """Header fields covered by the block hash, excluding the nonce."""
+        return {
             'block_id': self.block_id,
             'block_number': self.block_number,
             'timestamp': self.timestamp.isoformat(),
             'previous_hash': self.previous_hash,
             'merkle_root': self.merkle_root,
-            'nonce': self.nonce
+            'sealing_mode': self.sealing_mode,
+            'difficulty': self.difficulty
         }
-        block_string = json.dumps(block_data, sort_keys=True)
-        return hashlib.sha256(block_string.encode()).hexdigest()
+    
+    def calculate_hash(self) -> str:
+        """Calculate block hash."""
+        return block_header_hash(self.header(), self.nonce)
     
     def mine_block(self, difficulty: int = 4) -> None:
         """Mine the block with proof of work."""
-        target = "0" * difficulty
-        
-        while not self.hash.startswith(target):
-            self.nonce += 1
-            self.hash = self.calculate_hash()
+        self.sealing_mode = SealingMode.PROOF_OF_WORK.value
+        self.difficulty = difficulty
+        if not self.hash.startswith("0" * difficulty) or self.hash != self.calculate_hash():
+            self.nonce, self.hash = mine_header(self.header(), difficulty, self.nonce)
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert block to dictionary."""
@@ -161,17 +180,43 @@ class AuditBlock:
             'merkle_root': self.merkle_root,
             'nonce': self.nonce,
             'hash': self.hash,
+            'sealing_mode': self.sealing_mode,
+            'seal': self.seal,
+            'difficulty': self.difficulty,
             'events': [event.to_dict() for event in self.events]
         }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'AuditBlock':
+        """Reconstruct a block from its dictionary form."""
+        return cls(
+            block_id=data['block_id'],
+            block_number=data['block_number'],
+            timestamp=datetime.fromisoformat(data['timestamp']),
+            previous_hash=data['previous_hash'],
+            events=[AuditEvent.from_dict(e) for e in data['events']],
+            merkle_root=data['merkle_root'],
+            nonce=data['nonce'],
+            hash=data['hash'],
+            sealing_mode=data.get('sealing_mode', SealingMode.PROOF_OF_WORK.value),
+            seal=data.get('seal', ''),
+            difficulty=data.get('difficulty', 0)
+        )
 
 class CryptographicSigner:
     """Handles cryptographic signing of audit events."""
     
-    def __init__(self):
-        """Initialize cryptographic signer."""
+    def __init__(self, private_key_pem: Optional[bytes] = None):
+        """Initialize cryptographic signer from a PEM private key, or a fresh key pair."""
         self.private_key = None
         self.public_key = None
-        self._generate_key_pair()
+        if private_key_pem:
+            self.private_key = serialization.load_pem_private_key(
+                private_key_pem, password=None, backend=default_backend()
+            )
+            self.public_key = self.private_key.public_key()
+        else:
+            self._generate_key_pair()
     
     def _generate_key_pair(self) -> None:
         """Generate RSA key pair for signing."""
@@ -212,6 +257,14 @@ class CryptographicSigner:
         except Exception:
             return False
     
+    def get_private_key_pem(self) -> bytes:
+        """Get the unencrypted private key in PEM format, for sealing workers."""
+        return self.private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption()
+        )
+    
     def get_public_key_pem(self) -> str:
         """Get public key in PEM format."""
         pem = self.public_key.serialize(
@@ -242,6 +295,30 @@ class AuditStorage(ABC):
     async def get_blocks_by_range(self, start_block: int, end_block: int) -> List[AuditBlock]:
         """Get blocks in a range."""
         pass
+    
+    async def scan_blocks(self,
+                          criteria: Dict[str, Any],
+                          start_time: Optional[datetime] = None,
+                          end_time: Optional[datetime] = None,
+                          batch_size: int = 100) -> AsyncIterator[List[AuditBlock]]:
+        """Yield batches of blocks that may hold events matching the criteria.
+        
+        By default the whole chain is read in ranges of batch_size blocks;
+        storages with indexes only yield candidate blocks.
+        """
+        latest_block = await self.get_latest_block()
+        if not latest_block:
+            return
+        
+        for start in range(0, latest_block.block_number + 1, batch_size):
+            end = min(start + batch_size - 1, latest_block.block_number)
+            blocks = await self.get_blocks_by_range(start, end)
+            if blocks:
+                yield blocks
+    
+    async def close(self) -> None:
+        """Release storage resources."""
+        pass
 
 class DynamoDBAuditStorage(AuditStorage):
     """DynamoDB-based audit storage."""
@@ -279,44 +356,7 @@ class DynamoDBAuditStorage(AuditStorage):
             if 'Item' not in response:
                 return None
             
-            item = response['Item']
-            block_data = json.loads(item['block_data'])
-            
-            # Reconstruct block
-            events = [
-                AuditEvent(
-                    event_id=e['event_id'],
-                    event_type=AuditEventType(e['event_type']),
-                    timestamp=datetime.fromisoformat(e['timestamp']),
-                    user_id=e['user_id'],
-                    session_id=e['session_id'],
-                    tenant_id=e['tenant_id'],
-                    resource_type=e['resource_type'],
-                    resource_id=e['resource_id'],
-                    action=e['action'],
-                    outcome=e['outcome'],
-                    severity=AuditSeverity(e['severity']),
-                    source_ip=e['source_ip'],
-                    user_agent=e['user_agent'],
-                    details=e['details'],
-                    compliance_tags=[ComplianceFramework(tag) for tag in e['compliance_tags']],
-                    risk_score=e['risk_score']
-                )
-                for e in block_data['events']
-            ]
-            
-            block = AuditBlock(
-                block_id=block_data['block_id'],
-                block_number=block_data['block_number'],
-                timestamp=datetime.fromisoformat(block_data['timestamp']),
-                previous_hash=block_data['previous_hash'],
-                events=events,
-                merkle_root=block_data['merkle_root'],
-                nonce=block_data['nonce'],
-                hash=block_data['hash']
-            )
-            
-            return block
+            return AuditBlock.from_dict(json.loads(response['Item']['block_data']))
             
         except Exception as e:
             logger.error(f"Failed to get block from DynamoDB: {e}")
@@ -352,18 +392,122 @@ class DynamoDBAuditStorage(AuditStorage):
                 }
             )
             
-            blocks = []
-            for item in response['Items']:
-                block = await self.get_block(item['block_id'])
-                if block:
-                    blocks.append(block)
-            
+            # Items carry the serialized block, so no per-block read is needed
+            blocks = [AuditBlock.from_dict(json.loads(item['block_data'])) for item in response['Items']]
             return sorted(blocks, key=lambda x: x.block_number)
             
         except Exception as e:
             logger.error(f"Failed to get blocks by range: {e}")
             return []
 
+class FileAuditStorage(AuditStorage):
+    """Local audit storage in append-only, memory-mapped segment files.
+    
+    Sidecar indexes on event time, user, tenant, event type and compliance
+    tag let searches read only candidate blocks. Needs no cloud services, so
+    it suits on-prem deployments and tests.
+    """
+    
+    # Search criteria served by an index, mapped to the index name
+    INDEXED_CRITERIA = {
+        'user_id': 'user_id',
+        'tenant_id': 'tenant_id',
+        'event_type': 'event_type',
+        'compliance_framework': 'compliance_tag'
+    }
+    
+    def __init__(self, path: str, segment_max_bytes: int = 64 * 1024 * 1024, fsync: bool = True):
+        """Open (or create) the segment store under path."""
+        self.path = path
+        self.segments = SegmentStore(path, self._describe, segment_max_bytes=segment_max_bytes, fsync=fsync)
+    
+    @staticmethod
+    def _index_entry(block_data: Dict[str, Any]) -> SegmentEntry:
+        """Build the index entry for a serialized block."""
+        events = block_data['events']
+        times = [datetime.fromisoformat(e['timestamp']).timestamp() for e in events]
+        if not times:
+            times = [datetime.fromisoformat(block_data['timestamp']).timestamp()]
+        
+        return SegmentEntry(
+            number=block_data['block_number'],
+            record_id=block_data['block_id'],
+            min_time=min(times),
+            max_time=max(times),
+            keys={
+                'user_id': sorted({e['user_id'] for e in events}),
+                'tenant_id': sorted({e['tenant_id'] for e in events}),
+                'event_type': sorted({e['event_type'] for e in events}),
+                'compliance_tag': sorted({tag for e in events for tag in e['compliance_tags']})
+            }
+        )
+    
+    def _describe(self, payload: bytes) -> SegmentEntry:
+        return self._index_entry(json.loads(payload))
+    
+    def _load_blocks(self, block_numbers: List[int]) -> List[AuditBlock]:
+        return [AuditBlock.from_dict(json.loads(payload)) for payload in self.segments.read_many(block_numbers)]
+    
+    async def _read(self, block_numbers: List[int]) -> List[AuditBlock]:
+        if not block_numbers:
+            return []
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._load_blocks, block_numbers)
+    
+    async def store_block(self, block: AuditBlock) -> bool:
+        """Append audit block to the current segment."""
+        try:
+            block_data = block.to_dict()
+            payload = json.dumps(block_data).encode()
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self.segments.append, payload, self._index_entry(block_data))
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to store block in segment store: {e}")
+            return False
+    
+    async def get_block(self, block_id: str) -> Optional[AuditBlock]:
+        """Get audit block by ID."""
+        block_number = self.segments.number_for_id(block_id)
+        if block_number is None:
+            return None
+        blocks = await self._read([block_number])
+        return blocks[0] if blocks else None
+    
+    async def get_latest_block(self) -> Optional[AuditBlock]:
+        """Get the latest block."""
+        blocks = await self._read([len(self.segments) - 1])
+        return blocks[0] if blocks else None
+    
+    async def get_blocks_by_range(self, start_block: int, end_block: int) -> List[AuditBlock]:
+        """Get blocks in a range with one batched read."""
+        end_block = min(end_block, len(self.segments) - 1)
+        return await self._read(list(range(max(0, start_block), end_block + 1)))
+    
+    async def scan_blocks(self,
+                          criteria: Dict[str, Any],
+                          start_time: Optional[datetime] = None,
+                          end_time: Optional[datetime] = None,
+                          batch_size: int = 100) -> AsyncIterator[List[AuditBlock]]:
+        """Yield batches of the blocks the indexes select."""
+        keys = {
+            self.INDEXED_CRITERIA[key]: value
+            for key, value in criteria.items() if key in self.INDEXED_CRITERIA
+        }
+        block_numbers = self.segments.find(
+            keys,
+            start_time.timestamp() if start_time else None,
+            end_time.timestamp() if end_time else None
+        )
+        
+        for i in range(0, len(block_numbers), batch_size):
+            yield await self._read(block_numbers[i:i + batch_size])
+    
+    async def close(self) -> None:
+        """Close segment files and maps."""
+        self.segments.close()
+
 class ImmutableAuditTrail:
     """
     Main immutable audit trail system using blockchain technology.
@@ -375,17 +519,49 @@ class ImmutableAuditTrail:
     def __init__(self, config: Dict[str, Any]):
         """Initialize immutable audit trail."""
         self.config = config
-        self.storage = self._create_storage()
-        self.signer = CryptographicSigner()
         
         # Blockchain parameters
         self.block_size = config.get('block_size', 100)
         self.mining_difficulty = config.get('mining_difficulty', 4)
+        self.sealing_mode = SealingMode(config.get('sealing_mode', SealingMode.PROOF_OF_WORK.value))
+        self.sealing_key = self._load_sealing_key()
+        self.signer = CryptographicSigner(self._load_signing_key())
+        self.storage = self._create_storage()
         
         # Current block being built
         self.current_block: Optional[AuditBlock] = None
         self.pending_events: List[AuditEvent] = []
         
+        # Full batches are sealed in a worker pool, in chain order
+        self.sealer = AuditBlockSealer(
+            storage=self.storage,
+            block_factory=self._build_block,
+            mode=self.sealing_mode,
+            difficulty=self.mining_difficulty,
+            hmac_key=self.sealing_key,
+            signing_key_pem=(
+                self.signer.get_private_key_pem()
+                if self.sealing_mode == SealingMode.SIGNATURE else None
+            ),
+            executor_kind=config.get('sealing_executor', 'process'),
+            max_workers=config.get('sealing_workers'),
+            on_sealed=self._on_block_sealed,
+            max_queued_batches=config.get('sealing_queue_size', 64),
+            max_store_failures=config.get('sealing_max_store_failures', 5)
+        )
+        
+        # Verification resumes from the last signed checkpoint
+        verification_config = config.get('verification', {})
+        self.verifier = ChainVerifier(
+            storage=self.storage,
+            checkpoint_key=self._load_checkpoint_key(),
+            checkpoints=CheckpointStore(verification_config.get('checkpoint_path')),
+            verify_seal=self._verify_block_seal,
+            batch_size=verification_config.get('batch_size', 200),
+            executor_kind=verification_config.get('executor', config.get('sealing_executor', 'process')),
+            max_workers=verification_config.get('workers')
+        )
+        
         # Metrics
         self.metrics = {
             'events_logged': 0,
@@ -405,9 +581,50 @@ class ImmutableAuditTrail:
                 table_name=self.config['storage']['table_name'],
                 region=self.config['storage'].get('region', 'us-east-1')
             )
+        elif storage_type == 'file':
+            return FileAuditStorage(
+                path=self.config['storage']['path'],
+                segment_max_bytes=self.config['storage'].get('segment_max_bytes', 64 * 1024 * 1024),
+                fsync=self.config['storage'].get('fsync', True)
+            )
         else:
             raise ValueError(f"Unsupported storage type: {storage_type}")
     
+    def _load_sealing_key(self) -> Optional[bytes]:
+        """Get the HMAC sealing key from configuration."""
+        if self.sealing_mode != SealingMode.HMAC:
+            return None
+        
+        key = self.config.get('sealing_key')
+        if not key:
+            # A per-process key would make every seal unverifiable after a restart
+            raise ValueError("HMAC sealing requires sealing_key in the audit trail configuration")
+        return key.encode() if isinstance(key, str) else key
+    
+    def _load_signing_key(self) -> Optional[bytes]:
+        """Read the PEM private key at signing_key_path, required for signature sealing."""
+        key_path = self.config.get('signing_key_path')
+        if not key_path:
+            if self.sealing_mode == SealingMode.SIGNATURE:
+                raise ValueError("Signature sealing requires signing_key_path in the audit trail configuration")
+            return None
+        
+        with open(key_path, 'rb') as key_file:
+            return key_file.read()
+    
+    def _load_checkpoint_key(self) -> bytes:
+        """Get the key that signs verification checkpoints."""
+        verification_config = self.config.get('verification', {})
+        key = verification_config.get('checkpoint_key') or self.sealing_key
+        if not key:
+            if verification_config.get('checkpoint_path'):
+                # A per-process key would reject the saved checkpoint after every restart
+                raise ValueError("verification.checkpoint_path requires verification.checkpoint_key "
+                                 "in the audit trail configuration")
+            # Checkpoints are only kept in memory, so a per-process key is enough
+            return secrets.token_bytes(32)
+        return key.encode() if isinstance(key, str) else key
+    
     async def log_event(self, event: AuditEvent) -> str:
         """Log an audit event to the immutable trail."""
         try:
@@ -415,9 +632,10 @@ class ImmutableAuditTrail:
             self.pending_events.append(event)
             self.metrics['events_logged'] += 1
             
-            # Check if we need to create a new block
+            # Hand full batches to the sealing pipeline without waiting
             if len(self.pending_events) >= self.block_size:
-                await self._create_block()
+                batch, self.pending_events = self.pending_events, []
+                await self.sealer.submit(batch)
             
             logger.debug(f"Logged audit event: {event.event_id}")
             return event.event_id
@@ -427,96 +645,67 @@ class ImmutableAuditTrail:
             raise
     
     async def _create_block(self) -> None:
-        """Create a new block from pending events."""
-        if not self.pending_events:
-            return
-        
-        try:
-            # Get previous block hash
-            latest_block = await self.storage.get_latest_block()
-            previous_hash = latest_block.hash if latest_block else "0" * 64
-            block_number = latest_block.block_number + 1 if latest_block else 0
-            
-            # Create new block
-            block = AuditBlock(
-                block_id=str(uuid.uuid4()),
-                block_number=block_number,
-                timestamp=datetime.now(),
-                previous_hash=previous_hash,
-                events=self.pending_events.copy(),
-                merkle_root=""
-            )
-            
-            # Calculate Merkle root
-            block.merkle_root = block.calculate_merkle_root()
-            
-            # Mine the block
-            block.mine_block(self.mining_difficulty)
-            
-            # Store the block
-            success = await self.storage.store_block(block)
-            
-            if success:
-                self.pending_events.clear()
-                self.metrics['blocks_created'] += 1
-                logger.info(f"Created audit block: {block.block_id}")
-            else:
-                logger.error(f"Failed to store audit block: {block.block_id}")
-                
-        except Exception as e:
-            logger.error(f"Failed to create audit block: {e}")
-            raise
+        """Seal pending events into a block and wait for queued blocks to be stored."""
+        if self.pending_events:
+            batch, self.pending_events = self.pending_events, []
+            await self.sealer.submit(batch)
+        await self.sealer.drain()
+    
+    async def flush(self) -> None:
+        """Seal and store every logged event."""
+        await self._create_block()
+    
+    async def close(self) -> None:
+        """Flush pending events and stop the sealing workers."""
+        await self.flush()
+        await self.sealer.close()
+        await self.verifier.close()
+        await self.storage.close()
+    
+    def _build_block(self, events: List[AuditEvent], header: Dict[str, Any],
+                     nonce: int, block_hash: str, seal: str) -> AuditBlock:
+        """Assemble a block from a header sealed by the worker pool."""
+        return AuditBlock(
+            block_id=header['block_id'],
+            block_number=header['block_number'],
+            timestamp=datetime.fromisoformat(header['timestamp']),
+            previous_hash=header['previous_hash'],
+            events=events,
+            merkle_root=header['merkle_root'],
+            nonce=nonce,
+            hash=block_hash,
+            sealing_mode=header['sealing_mode'],
+            seal=seal,
+            difficulty=header['difficulty']
+        )
     
-    async def verify_chain_integrity(self) -> Dict[str, Any]:
-        """Verify the integrity of the entire audit chain."""
+    async def _on_block_sealed(self, block: AuditBlock) -> None:
+        self.metrics['blocks_created'] += 1
+        logger.info(f"Created audit block: {block.block_id}")
+    
+    def _verify_block_seal(self, block: AuditBlock) -> bool:
+        """Check a block's seal under this trail's sealing mode.
+
+        The mode stored in the block is not trusted: a block claiming any
+        other mode is rejected, so a keyed chain cannot be rewritten as
+        proof-of-work without the key.
+        """
+        if block.sealing_mode != self.sealing_mode.value:
+            return False
+        return verify_seal(
+            block.hash, block.seal, self.sealing_mode.value,
+            hmac_key=self.sealing_key, public_key=self.signer.public_key,
+            difficulty=self.mining_difficulty
+        )
+    
+    async def verify_chain_integrity(self, full: bool = False) -> Dict[str, Any]:
+        """Verify the audit chain since the last checkpoint, or entirely if full."""
         try:
             self.metrics['verification_checks'] += 1
             
-            # Get latest block to determine chain length
-            latest_block = await self.storage.get_latest_block()
-            if not latest_block:
-                return {'valid': True, 'blocks_verified': 0, 'issues': []}
-            
-            # Verify all blocks
-            issues = []
-            blocks_verified = 0
-            
-            for block_num in range(latest_block.block_number + 1):
-                blocks = await self.storage.get_blocks_by_range(block_num, block_num)
-                
-                if not blocks:
-                    issues.append(f"Missing block {block_num}")
-                    continue
-                
-                block = blocks[0]
-                
-                # Verify block hash
-                calculated_hash = block.calculate_hash()
-                if calculated_hash != block.hash:
-                    issues.append(f"Block {block_num} hash mismatch")
-                    self.metrics['integrity_violations'] += 1
-                
-                # Verify Merkle root
-                calculated_merkle = block.calculate_merkle_root()
-                if calculated_merkle != block.merkle_root:
-                    issues.append(f"Block {block_num} Merkle root mismatch")
-                    self.metrics['integrity_violations'] += 1
-                
-                # Verify previous hash linkage
-                if block_num > 0:
-                    prev_blocks = await self.storage.get_blocks_by_range(block_num - 1, block_num - 1)
-                    if prev_blocks and prev_blocks[0].hash != block.previous_hash:
-                        issues.append(f"Block {block_num} previous hash mismatch")
-                        self.metrics['integrity_violations'] += 1
-                
-                blocks_verified += 1
-            
-            return {
-                'valid': len(issues) == 0,
-                'blocks_verified': blocks_verified,
-                'issues': issues,
-                'verification_timestamp': datetime.now().isoformat()
-            }
+            result = await self.verifier.verify(full=full)
+            self.metrics['integrity_violations'] += len(result['issues'])
+            return result
             
         except Exception as e:
             logger.error(f"Failed to verify chain integrity: {e}")
@@ -528,32 +717,21 @@ class ImmutableAuditTrail:
                           end_time: Optional[datetime] = None) -> List[AuditEvent]:
         """Search audit events based on criteria."""
         try:
-            # Get latest block to determine search range
-            latest_block = await self.storage.get_latest_block()
-            if not latest_block:
-                return []
-            
-            # Search through all blocks
             matching_events = []
             
-            for block_num in range(latest_block.block_number + 1):
-                blocks = await self.storage.get_blocks_by_range(block_num, block_num)
-                
-                if not blocks:
-                    continue
-                
-                block = blocks[0]
-                
-                for event in block.events:
-                    # Time range filter
-                    if start_time and event.timestamp < start_time:
-                        continue
-                    if end_time and event.timestamp > end_time:
-                        continue
-                    
-                    # Criteria matching
-                    if self._event_matches_criteria(event, criteria):
-                        matching_events.append(event)
+            # Only candidate blocks are read, in batches
+            async for blocks in self.storage.scan_blocks(criteria, start_time, end_time):
+                for block in blocks:
+                    for event in block.events:
+                        # Time range filter
+                        if start_time and event.timestamp < start_time:
+                            continue
+                        if end_time and event.timestamp > end_time:
+                            continue
+                        
+                        # Criteria matching
+                        if self._event_matches_criteria(event, criteria):
+                            matching_events.append(event)
             
             return matching_events
             
@@ -564,7 +742,9 @@ class ImmutableAuditTrail:
     def _event_matches_criteria(self, event: AuditEvent, criteria: Dict[str, Any]) -> bool:
         """Check if event matches search criteria."""
         for key, value in criteria.items():
-            if key == 'event_type' and event.event_type.value != value:
+            if key == 'event_id' and event.event_id != value:
+                return False
+            elif key == 'event_type' and event.event_type.value != value:
                 return False
             elif key == 'user_id' and event.user_id != value:
                 return False
@@ -699,5 +879,7 @@ class ImmutableAuditTrail:
             **self.metrics,
             'pending_events': len(self.pending_events),
             'block_size_limit': self.block_size,
-            'mining_difficulty': self.mining_difficulty
+            'mining_difficulty': self.mining_difficulty,
+            'sealing': self.sealer.get_stats(),
+            'verification': self.verifier.get_stats()
         }
\ No newline at end of file
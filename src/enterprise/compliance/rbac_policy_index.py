@@ -0,0 +1,233 @@
+"""
+ACSO Enterprise Framework - Compiled RBAC Policy Index
+
+Compiles access policy rules into per (resource type, permission type)
+lists in priority order, with condition lists turned into sets and CIDR
+prefix tables, and provides a bounded LRU/TTL cache for access decisions.
+"""
+
+import ipaddress
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, FrozenSet, Hashable, Iterable, List, Optional, Set, Tuple
+
+# Context attributes a compiled policy can read; 'hour' is the local hour of day
+POLICY_ATTRIBUTES = ('hour', 'source_ip', 'user_id', 'user_roles', 'tenant_id')
+
+# Attributes that are not read straight from the context dict
+_DERIVED_ATTRIBUTES: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+    'hour': lambda context: time.localtime().tm_hour,
+    'user_roles': lambda context: frozenset(context.get('user_roles') or ())
+}
+
+
+class AddressMatcher:
+    """Matches IP addresses against exact addresses and CIDR networks.
+
+    Networks are kept as a prefix table per IP version: one set of network
+    prefixes per distinct prefix length, so a lookup costs one shift and
+    one set probe per length in use rather than a walk down a bit trie.
+    """
+
+    def __init__(self, entries: Iterable[str]):
+        self.exact: Set[str] = set()
+        self.prefixes: Dict[int, Dict[int, Set[int]]] = {4: {}, 6: {}}
+
+        for entry in entries:
+            entry = str(entry)
+            if '/' not in entry:
+                self.exact.add(entry)
+                continue
+            try:
+                network = ipaddress.ip_network(entry, strict=False)
+            except ValueError:
+                self.exact.add(entry)
+                continue
+            host_bits = network.max_prefixlen - network.prefixlen
+            table = self.prefixes[network.version].setdefault(host_bits, set())
+            table.add(int(network.network_address) >> host_bits)
+
+        # Longest prefixes first, so the common single-host case is probed first
+        self._lengths = {
+            version: sorted(table) for version, table in self.prefixes.items()
+        }
+        self.has_networks = any(self._lengths.values())
+
+    def __contains__(self, address: str) -> bool:
+        if address in self.exact:
+            return True
+        if not self.has_networks or not address:
+            return False
+        try:
+            ip = ipaddress.ip_address(address)
+        except ValueError:
+            return False
+        value = int(ip)
+        table = self.prefixes[ip.version]
+        return any(value >> host_bits in table[host_bits] for host_bits in self._lengths[ip.version])
+
+
+class CompiledPolicy:
+    """A policy rule with its conditions compiled into set lookups."""
+
+    __slots__ = ('rule_id', 'effect', 'priority', 'reads', '_checks')
+
+    def __init__(self, rule_id: str, effect: str, priority: int, conditions: Dict[str, Any]):
+        self.rule_id = rule_id
+        self.effect = effect
+        self.priority = priority
+
+        checks: List[Callable[[Dict[str, Any]], bool]] = []
+        reads: Set[str] = set()
+
+        if 'time_range' in conditions:
+            start, end = conditions['time_range']['start'], conditions['time_range']['end']
+            checks.append(lambda values: start <= values['hour'] <= end)
+            reads.add('hour')
+
+        if 'allowed_ips' in conditions:
+            addresses = AddressMatcher(conditions['allowed_ips'])
+            checks.append(lambda values: values['source_ip'] in addresses)
+            reads.add('source_ip')
+
+        if 'users' in conditions:
+            users = frozenset(conditions['users'])
+            checks.append(lambda values: values['user_id'] in users)
+            reads.add('user_id')
+
+        if 'roles' in conditions:
+            roles = frozenset(conditions['roles'])
+            checks.append(lambda values: not roles.isdisjoint(values['user_roles']))
+            reads.add('user_roles')
+
+        if 'tenants' in conditions:
+            tenants = frozenset(conditions['tenants'])
+            checks.append(lambda values: values['tenant_id'] in tenants)
+            reads.add('tenant_id')
+
+        self.reads: FrozenSet[str] = frozenset(reads)
+        self._checks = tuple(checks)
+
+    def matches(self, values: Dict[str, Any]) -> bool:
+        for check in self._checks:
+            if not check(values):
+                return False
+        return True
+
+
+class PolicyBucket:
+    """Active policies for one (resource type, permission type), in priority order."""
+
+    __slots__ = ('policies', 'reads', '_readers', '_plain')
+
+    def __init__(self, policies: List[CompiledPolicy]):
+        self.policies = policies
+        reads: Set[str] = set()
+        for policy in policies:
+            reads |= policy.reads
+        # Fixed order, so cache keys are positional tuples
+        self.reads: Tuple[str, ...] = tuple(a for a in POLICY_ATTRIBUTES if a in reads)
+        self._plain = not any(attribute in _DERIVED_ATTRIBUTES for attribute in self.reads)
+        self._readers = tuple(
+            _DERIVED_ATTRIBUTES.get(attribute) or (lambda context, attribute=attribute: context.get(attribute))
+            for attribute in self.reads
+        )
+
+    def context_key(self, context: Dict[str, Any]) -> Tuple[Any, ...]:
+        """Values of the attributes this bucket's policies read, in `reads` order."""
+        if self._plain:
+            return tuple(map(context.get, self.reads))
+        return tuple([read(context) for read in self._readers])
+
+    def evaluate(self, key: Tuple[Any, ...]) -> Tuple[str, Tuple[str, ...]]:
+        """Return (decision, applied rule ids) for a context key; the first matching DENY wins."""
+        # Missing attributes read as empty strings
+        values = {attribute: '' if value is None else value for attribute, value in zip(self.reads, key)}
+        decision = "DENY"
+        applied = []
+        for policy in self.policies:
+            if policy.matches(values):
+                applied.append(policy.rule_id)
+                if policy.effect == "ALLOW":
+                    decision = "ALLOW"
+                elif policy.effect == "DENY":
+                    decision = "DENY"
+                    break
+        return decision, tuple(applied)
+
+
+EMPTY_BUCKET = PolicyBucket([])
+
+
+class PolicyIndex:
+    """Policy rules compiled into buckets keyed by (resource type, permission type) values."""
+
+    def __init__(self, policies: Iterable[Any], resource_types: Iterable[str], permission_types: Iterable[str]):
+        resource_types = list(resource_types)
+        permission_types = list(permission_types)
+        grouped: Dict[Tuple[str, str], List[CompiledPolicy]] = {}
+
+        # sorted() is stable, so equal priorities keep insertion order
+        for policy in sorted(policies, key=lambda p: p.priority):
+            if not policy.is_active:
+                continue
+            conditions = policy.conditions
+            compiled = CompiledPolicy(policy.rule_id, policy.effect, policy.priority, conditions)
+            for resource_type in dict.fromkeys(conditions.get('resource_types', resource_types)):
+                for permission_type in dict.fromkeys(conditions.get('permission_types', permission_types)):
+                    grouped.setdefault((resource_type, permission_type), []).append(compiled)
+
+        self.buckets: Dict[Tuple[str, str], PolicyBucket] = {
+            key: PolicyBucket(compiled) for key, compiled in grouped.items()
+        }
+
+    def bucket(self, resource_type: str, permission_type: str) -> PolicyBucket:
+        return self.buckets.get((resource_type, permission_type), EMPTY_BUCKET)
+
+
+class DecisionCache:
+    """
+    Bounded LRU cache whose entries expire after a TTL.
+
+    get returns the cached value itself, so values should be immutable.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
@@ -15,6 +15,9 @@ from abc import ABC, abstractmethod
 import json
 import uuid
 
+from .rbac_policy_index import DecisionCache, PolicyIndex
+from .role_closure import RoleClosure
+
 logger = logging.getLogger(__name__)
 
 class PermissionType(Enum):
@@ -117,11 +120,12 @@ class PolicyRule:
 class PolicyEngine:
     """Policy engine for evaluating access control rules."""
     
-    def __init__(self):
+    def __init__(self, cache_ttl: float = 300, max_cache_entries: int = 10000):
         """Initialize policy engine."""
         self.policies: Dict[str, PolicyRule] = {}
-        self.evaluation_cache: Dict[str, Dict[str, Any]] = {}
-        self.cache_ttl = 300  # 5 minutes
+        self.cache_ttl = cache_ttl  # 5 minutes by default
+        self.evaluation_cache = DecisionCache(max_entries=max_cache_entries, ttl=cache_ttl)
+        self._index: Optional[PolicyIndex] = None
     
     def add_policy(self, policy: PolicyRule) -> None:
         """Add a policy rule."""
@@ -138,6 +142,17 @@ class PolicyEngine:
             return True
         return False
     
+    @property
+    def index(self) -> PolicyIndex:
+        """Policies compiled by resource and permission type, rebuilt after changes."""
+        if self._index is None:
+            self._index = PolicyIndex(
+                self.policies.values(),
+                [resource_type.value for resource_type in ResourceType],
+                [permission_type.value for permission_type in PermissionType]
+            )
+        return self._index
+    
     async def evaluate_access(self, 
                             user_id: str,
                             resource_type: ResourceType,
@@ -146,116 +161,35 @@ class PolicyEngine:
                             context: Dict[str, Any]) -> Dict[str, Any]:
         """Evaluate access based on policies."""
         try:
-            # Check cache first
-            cache_key = f"{user_id}:{resource_type.value}:{resource_id}:{permission_type.value}"
-            
-            if cache_key in self.evaluation_cache:
-                cached_result = self.evaluation_cache[cache_key]
-                if datetime.now() - datetime.fromisoformat(cached_result['cached_at']) < timedelta(seconds=self.cache_ttl):
-                    return cached_result['result']
-            
-            # Evaluate policies
-            applicable_policies = self._get_applicable_policies(resource_type, permission_type)
-            
-            # Sort by priority (lower number = higher priority)
-            applicable_policies.sort(key=lambda p: p.priority)
-            
-            # Default to DENY
-            decision = "DENY"
-            applied_policies = []
-            
-            for policy in applicable_policies:
-                if not policy.is_active:
-                    continue
-                
-                if self._evaluate_policy_conditions(policy, context):
-                    applied_policies.append(policy.rule_id)
-                    
-                    if policy.effect == "ALLOW":
-                        decision = "ALLOW"
-                    elif policy.effect == "DENY":
-                        decision = "DENY"
-                        break  # DENY takes precedence
-            
-            result = {
+            bucket = self.index.bucket(resource_type.value, permission_type.value)
+            
+            # Decisions only depend on the attributes the bucket's policies read
+            context_key = bucket.context_key(context)
+            cache_key = (resource_type.value, permission_type.value, context_key)
+            
+            # The cache holds immutable tuples, shared by every context with this key;
+            # each caller gets its own result dict
+            cached = self.evaluation_cache.get(cache_key)
+            if cached is None:
+                decision, applied_policies = bucket.evaluate(context_key)
+                cached = (decision, applied_policies, datetime.now().isoformat())
+                self.evaluation_cache.put(cache_key, cached)
+            
+            decision, applied_policies, evaluation_time = cached
+            return {
                 'decision': decision,
-                'applied_policies': applied_policies,
-                'evaluation_time': datetime.now().isoformat(),
+                'applied_policies': list(applied_policies),
+                'evaluation_time': evaluation_time,
                 'context': context
             }
             
-            # Cache result
-            self.evaluation_cache[cache_key] = {
-                'result': result,
-                'cached_at': datetime.now().isoformat()
-            }
-            
-            return result
-            
         except Exception as e:
             logger.error(f"Failed to evaluate access: {e}")
             return {'decision': 'DENY', 'error': str(e)}
     
-    def _get_applicable_policies(self, resource_type: ResourceType, permission_type: PermissionType) -> List[PolicyRule]:
-        """Get policies applicable to the resource and permission type."""
-        applicable = []
-        
-        for policy in self.policies.values():
-            conditions = policy.conditions
-            
-            # Check if policy applies to this resource type
-            if 'resource_types' in conditions:
-                if resource_type.value not in conditions['resource_types']:
-                    continue
-            
-            # Check if policy applies to this permission type
-            if 'permission_types' in conditions:
-                if permission_type.value not in conditions['permission_types']:
-                    continue
-            
-            applicable.append(policy)
-        
-        return applicable
-    
-    def _evaluate_policy_conditions(self, policy: PolicyRule, context: Dict[str, Any]) -> bool:
-        """Evaluate if policy conditions are met."""
-        conditions = policy.conditions
-        
-        # Time-based conditions
-        if 'time_range' in conditions:
-            current_hour = datetime.now().hour
-            time_range = conditions['time_range']
-            if not (time_range['start'] <= current_hour <= time_range['end']):
-                return False
-        
-        # IP-based conditions
-        if 'allowed_ips' in conditions:
-            source_ip = context.get('source_ip', '')
-            if source_ip not in conditions['allowed_ips']:
-                return False
-        
-        # User-based conditions
-        if 'users' in conditions:
-            user_id = context.get('user_id', '')
-            if user_id not in conditions['users']:
-                return False
-        
-        # Role-based conditions
-        if 'roles' in conditions:
-            user_roles = context.get('user_roles', [])
-            if not any(role in conditions['roles'] for role in user_roles):
-                return False
-        
-        # Tenant-based conditions
-        if 'tenants' in conditions:
-            tenant_id = context.get('tenant_id', '')
-            if tenant_id not in conditions['tenants']:
-                return False
-        
-        return True
-    
     def _clear_cache(self) -> None:
-        """Clear evaluation cache."""
+        """Drop compiled policies and cached decisions."""
+        self._index = None
         self.evaluation_cache.clear()
 
 class ApprovalWorkflow:
@@ -390,12 +324,14 @@ class RBACSystem:
         self.permissions: Dict[str, Permission] = {}
         self.roles: Dict[str, Role] = {}
         self.users: Dict[str, User] = {}
-        self.policy_engine = PolicyEngine()
+        self.policy_engine = PolicyEngine(
+            cache_ttl=config.get('policy_cache_ttl', 300),
+            max_cache_entries=config.get('policy_cache_size', 10000)
+        )
         self.approval_workflow = ApprovalWorkflow(config.get('approval', {}))
         
-        # Caching
-        self.permission_cache: Dict[str, Set[str]] = {}
-        self.cache_ttl = 300  # 5 minutes
+        # Materialized role inheritance, updated incrementally on changes
+        self.role_closure = RoleClosure()
         
         # Metrics
         self.metrics = {
@@ -498,6 +434,32 @@ class RBACSystem:
         
         for role in default_roles:
             self.roles[role.role_id] = role
+            self.role_closure.set_role(role.role_id, role.permissions, role.parent_roles)
+    
+    async def update_role(self, role: Role) -> bool:
+        """Create or replace a role, refreshing only the roles and users that inherit from it."""
+        try:
+            role.updated_at = datetime.now()
+            self.roles[role.role_id] = role
+            affected_users = self.role_closure.set_role(role.role_id, role.permissions, role.parent_roles)
+            
+            logger.info(f"Updated role {role.role_id}; refreshed {len(affected_users)} users")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to update role: {e}")
+            return False
+    
+    async def delete_role(self, role_id: str) -> bool:
+        """Delete a non-system role."""
+        role = self.roles.get(role_id)
+        if not role or role.is_system_role:
+            return False
+        
+        del self.roles[role_id]
+        self.role_closure.remove_role(role_id)
+        logger.info(f"Deleted role: {role_id}")
+        return True
     
     async def create_user(self, user: User) -> str:
         """Create a new user."""
@@ -508,7 +470,7 @@ class RBACSystem:
                     raise ValueError(f"Role {role_id} does not exist")
             
             self.users[user.user_id] = user
-            self._clear_user_cache(user.user_id)
+            self._sync_user(user)
             
             logger.info(f"Created user: {user.username}")
             return user.user_id
@@ -528,7 +490,7 @@ class RBACSystem:
             
             if role_id not in user.roles:
                 user.roles.append(role_id)
-                self._clear_user_cache(user_id)
+                self._sync_user(user)
                 
                 logger.info(f"Assigned role {role_id} to user {user_id}")
             
@@ -548,7 +510,7 @@ class RBACSystem:
             
             if role_id in user.roles:
                 user.roles.remove(role_id)
-                self._clear_user_cache(user_id)
+                self._sync_user(user)
                 
                 logger.info(f"Revoked role {role_id} from user {user_id}")
             
@@ -615,56 +577,15 @@ class RBACSystem:
     
     async def _get_user_permissions(self, user_id: str) -> Set[str]:
         """Get all permissions for a user (including inherited from roles)."""
-        # Check cache first
-        if user_id in self.permission_cache:
-            return self.permission_cache[user_id]
-        
-        user = self.users.get(user_id)
-        if not user:
-            return set()
-        
-        permissions = set()
-        
-        # Add direct permissions
-        permissions.update(user.direct_permissions)
-        
-        # Add permissions from roles (including inheritance)
-        for role_id in user.roles:
-            role_permissions = await self._get_role_permissions(role_id)
-            permissions.update(role_permissions)
-        
-        # Cache permissions
-        self.permission_cache[user_id] = permissions
-        
-        return permissions
+        return self.role_closure.user_permissions(user_id)
     
-    async def _get_role_permissions(self, role_id: str, visited: Optional[Set[str]] = None) -> Set[str]:
+    async def _get_role_permissions(self, role_id: str) -> Set[str]:
         """Get all permissions for a role (including inherited)."""
-        if visited is None:
-            visited = set()
-        
-        if role_id in visited:
-            return set()  # Prevent circular inheritance
-        
-        visited.add(role_id)
-        
-        role = self.roles.get(role_id)
-        if not role:
-            return set()
-        
-        permissions = set(role.permissions)
-        
-        # Add permissions from parent roles
-        for parent_role_id in role.parent_roles:
-            parent_permissions = await self._get_role_permissions(parent_role_id, visited)
-            permissions.update(parent_permissions)
-        
-        return permissions
+        return self.role_closure.role_permissions(role_id)
     
-    def _clear_user_cache(self, user_id: str) -> None:
-        """Clear cached permissions for a user."""
-        if user_id in self.permission_cache:
-            del self.permission_cache[user_id]
+    def _sync_user(self, user: User) -> None:
+        """Recompute a user's effective permissions after an assignment change."""
+        self.role_closure.set_user(user.user_id, user.roles, user.direct_permissions)
     
     async def request_sensitive_operation(self, 
                                         user_id: str,
@@ -697,6 +618,7 @@ class RBACSystem:
             'total_roles': len(self.roles),
             'total_permissions': len(self.permissions),
             'active_users': len([u for u in self.users.values() if u.is_active]),
-            'cached_permissions': len(self.permission_cache),
+            'role_closure': self.role_closure.get_stats(),
+            'policy_cache': self.policy_engine.evaluation_cache.get_stats(),
             'pending_approvals': len([r for r in self.approval_workflow.requests.values() if r.status == ApprovalStatus.PENDING])
         }
\ No newline at end of file
@@ -0,0 +1,194 @@
+"""
+ACSO Enterprise Framework - Materialized Role Closure
+
+Keeps the transitive closure of a role hierarchy materialized: for every
+role, the set of roles it inherits from and the permissions that grants,
+and for every user, their effective permissions. Reverse edges from roles
+to child roles and to users let a role or assignment change recompute only
+the roles and users that depend on it.
+"""
+
+import logging
+from typing import Dict, FrozenSet, Iterable, Set
+
+logger = logging.getLogger(__name__)
+
+_EMPTY: FrozenSet[str] = frozenset()
+
+
+class RoleClosure:
+    """Incrementally maintained role inheritance closure.
+
+    An inactive or undefined role grants nothing and does not pass on the
+    permissions of its own parents. Inheritance cycles are tolerated; every
+    role on a cycle inherits from every other.
+    """
+
+    def __init__(self):
+        # Role definitions
+        self._direct: Dict[str, FrozenSet[str]] = {}
+        self._parents: Dict[str, FrozenSet[str]] = {}
+        self._active: Dict[str, bool] = {}
+
+        # Reverse edges; kept for undefined parents too, so defining them later propagates
+        self._children: Dict[str, Set[str]] = {}
+        self._role_users: Dict[str, Set[str]] = {}
+
+        # Materialized closure
+        self._ancestors: Dict[str, FrozenSet[str]] = {}
+        self._role_permissions: Dict[str, FrozenSet[str]] = {}
+
+        # Users
+        self._user_roles: Dict[str, FrozenSet[str]] = {}
+        self._user_direct: Dict[str, FrozenSet[str]] = {}
+        self._user_permissions: Dict[str, FrozenSet[str]] = {}
+
+        self.roles_recomputed = 0
+        self.users_recomputed = 0
+
+    # Roles
+
+    def set_role(self,
+                 role_id: str,
+                 permissions: Iterable[str],
+                 parent_roles: Iterable[str] = (),
+                 is_active: bool = True) -> Set[str]:
+        """Create or replace a role; returns the users whose permissions were recomputed."""
+        parents = frozenset(parent_roles)
+        for parent_id in self._parents.get(role_id, _EMPTY) - parents:
+            self._children.get(parent_id, set()).discard(role_id)
+        for parent_id in parents:
+            self._children.setdefault(parent_id, set()).add(role_id)
+
+        self._direct[role_id] = frozenset(permissions)
+        self._parents[role_id] = parents
+        self._active[role_id] = is_active
+        return self._propagate(role_id)
+
+    def remove_role(self, role_id: str) -> Set[str]:
+        """Delete a role; dependants keep their edge to it but inherit nothing through it."""
+        for parent_id in self._parents.pop(role_id, _EMPTY):
+            self._children.get(parent_id, set()).discard(role_id)
+        self._direct.pop(role_id, None)
+        self._active.pop(role_id, None)
+        return self._propagate(role_id)
+
+    def has_role(self, role_id: str) -> bool:
+        return role_id in self._direct
+
+    def role_permissions(self, role_id: str) -> FrozenSet[str]:
+        """Permissions a role grants, including inherited ones."""
+        return self._role_permissions.get(role_id, _EMPTY)
+
+    def role_ancestors(self, role_id: str) -> FrozenSet[str]:
+        """Active roles a role inherits from, including itself if active."""
+        return self._ancestors.get(role_id, _EMPTY)
+
+    def descendants(self, role_id: str) -> Set[str]:
+        """Roles that inherit from role_id, directly or transitively, plus the role itself."""
+        seen = {role_id}
+        stack = [role_id]
+        while stack:
+            for child_id in self._children.get(stack.pop(), ()):
+                if child_id not in seen:
+                    seen.add(child_id)
+                    stack.append(child_id)
+        return seen
+
+    def _propagate(self, role_id: str) -> Set[str]:
+        """Recompute the closure of role_id and everything that inherits from it."""
+        affected = self.descendants(role_id)
+        for affected_id in affected:
+            self._recompute_role(affected_id, affected)
+        self.roles_recomputed += len(affected)
+
+        users: Set[str] = set()
+        for affected_id in affected:
+            users.update(self._role_users.get(affected_id, ()))
+        for user_id in users:
+            self._recompute_user(user_id)
+        return users
+
+    def _recompute_role(self, role_id: str, affected: Set[str]) -> None:
+        """Walk parent edges from role_id, reusing the closure of unaffected roles.
+
+        Unaffected roles do not inherit from the changed role, so their
+        materialized closure is still correct and the walk stops there.
+        """
+        ancestors: Set[str] = set()
+        permissions: Set[str] = set()
+        visited: Set[str] = set()
+        stack = [role_id]
+        while stack:
+            current = stack.pop()
+            if current in visited:
+                continue
+            visited.add(current)
+            if current not in affected:
+                ancestors |= self._ancestors.get(current, _EMPTY)
+                permissions |= self._role_permissions.get(current, _EMPTY)
+                continue
+            if not self._active.get(current, False):
+                continue
+            ancestors.add(current)
+            permissions |= self._direct[current]
+            stack.extend(self._parents[current])
+
+        if ancestors:
+            self._ancestors[role_id] = frozenset(ancestors)
+            self._role_permissions[role_id] = frozenset(permissions)
+        else:
+            self._ancestors.pop(role_id, None)
+            self._role_permissions.pop(role_id, None)
+
+    # Users
+
+    def set_user(self, user_id: str, roles: Iterable[str], direct_permissions: Iterable[str] = ()) -> FrozenSet[str]:
+        """Create or replace a user's role assignments; returns their effective permissions."""
+        roles = frozenset(roles)
+        for role_id in self._user_roles.get(user_id, _EMPTY) - roles:
+            self._role_users.get(role_id, set()).discard(user_id)
+        for role_id in roles:
+            self._role_users.setdefault(role_id, set()).add(user_id)
+
+        self._user_roles[user_id] = roles
+        self._user_direct[user_id] = frozenset(direct_permissions)
+        return self._recompute_user(user_id)
+
+    def remove_user(self, user_id: str) -> None:
+        for role_id in self._user_roles.pop(user_id, _EMPTY):
+            self._role_users.get(role_id, set()).discard(user_id)
+        self._user_direct.pop(user_id, None)
+        self._user_permissions.pop(user_id, None)
+
+    def user_permissions(self, user_id: str) -> FrozenSet[str]:
+        """Effective permissions of a user: direct grants plus their roles' closures."""
+        return self._user_permissions.get(user_id, _EMPTY)
+
+    def users_with_role(self, role_id: str) -> Set[str]:
+        """Users assigned role_id directly."""
+        return set(self._role_users.get(role_id, ()))
+
+    def _recompute_user(self, user_id: str) -> FrozenSet[str]:
+        permissions = set(self._user_direct.get(user_id, _EMPTY))
+        for role_id in self._user_roles.get(user_id, _EMPTY):
+            permissions |= self._role_permissions.get(role_id, _EMPTY)
+        result = frozenset(permissions)
+        self._user_permissions[user_id] = result
+        self.users_recomputed += 1
+        return result
+
+    def combined_permissions(self, role_ids: Iterable[str]) -> FrozenSet[str]:
+        """Union of the closures of several roles."""
+        permissions: Set[str] = set()
+        for role_id in role_ids:
+            permissions |= self._role_permissions.get(role_id, _EMPTY)
+        return frozenset(permissions)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            'roles': len(self._direct),
+            'users': len(self._user_roles),
+            'roles_recomputed': self.roles_recomputed,
+            'users_recomputed': self.users_recomputed
+        }
@@ -0,0 +1,156 @@
+"""
+ACSO Enterprise Framework - Aggregate Snapshots
+
+Snapshots of event-sourced aggregate state, so an aggregate can be loaded
+from its latest snapshot plus the events raised after it instead of from
+its full history.
+
+Snapshot stores:
+- InMemorySnapshotStore: bounded LRU, per process
+- FileSnapshotStore: one JSON file per aggregate in a local directory
+"""
+
+import asyncio
+import json
+import logging
+import os
+import urllib.parse
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class AggregateSnapshot:
+    """Aggregate state after its first `version` events."""
+    aggregate_id: str
+    aggregate_type: str
+    version: int
+    state: Dict[str, Any]
+    created_at: datetime = field(default_factory=datetime.now)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'aggregate_id': self.aggregate_id,
+            'aggregate_type': self.aggregate_type,
+            'version': self.version,
+            'state': self.state,
+            'created_at': self.created_at.isoformat()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'AggregateSnapshot':
+        return cls(
+            aggregate_id=data['aggregate_id'],
+            aggregate_type=data['aggregate_type'],
+            version=data['version'],
+            state=data['state'],
+            created_at=datetime.fromisoformat(data['created_at'])
+        )
+
+
+class SnapshotStore(ABC):
+    """Abstract snapshot store interface; keeps the latest snapshot per aggregate."""
+
+    @abstractmethod
+    async def get(self, aggregate_id: str) -> Optional[AggregateSnapshot]:
+        """Get the latest snapshot of an aggregate."""
+        pass
+
+    @abstractmethod
+    async def save(self, snapshot: AggregateSnapshot) -> None:
+        """Store a snapshot, replacing any older one."""
+        pass
+
+    @abstractmethod
+    async def delete(self, aggregate_id: str) -> None:
+        """Delete an aggregate's snapshot."""
+        pass
+
+
+class InMemorySnapshotStore(SnapshotStore):
+    """Snapshot store holding the most recently used `max_entries` aggregates."""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._snapshots: "OrderedDict[str, AggregateSnapshot]" = OrderedDict()
+
+    async def get(self, aggregate_id: str) -> Optional[AggregateSnapshot]:
+        snapshot = self._snapshots.get(aggregate_id)
+        if snapshot is not None:
+            self._snapshots.move_to_end(aggregate_id)
+        return snapshot
+
+    async def save(self, snapshot: AggregateSnapshot) -> None:
+        self._snapshots[snapshot.aggregate_id] = snapshot
+        self._snapshots.move_to_end(snapshot.aggregate_id)
+        if len(self._snapshots) > self.max_entries:
+            self._snapshots.popitem(last=False)
+
+    async def delete(self, aggregate_id: str) -> None:
+        self._snapshots.pop(aggregate_id, None)
+
+    def __len__(self) -> int:
+        return len(self._snapshots)
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    raise TypeError(f"Snapshot state value of type {type(value).__name__} is not JSON serializable")
+
+
+def _decode_object(data: Dict[str, Any]) -> Any:
+    if len(data) == 1 and '__datetime__' in data:
+        return datetime.fromisoformat(data['__datetime__'])
+    return data
+
+
+class FileSnapshotStore(SnapshotStore):
+    """
+    Snapshot store writing one JSON file per aggregate.
+
+    State must be JSON serializable apart from datetimes, which are tagged
+    and restored. Files are replaced atomically, and file I/O runs in the
+    default executor.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, aggregate_id: str) -> str:
+        return os.path.join(self.directory, urllib.parse.quote(aggregate_id, safe='') + '.json')
+
+    async def get(self, aggregate_id: str) -> Optional[AggregateSnapshot]:
+        return await asyncio.get_running_loop().run_in_executor(None, self._read, aggregate_id)
+
+    def _read(self, aggregate_id: str) -> Optional[AggregateSnapshot]:
+        try:
+            with open(self._path(aggregate_id)) as f:
+                return AggregateSnapshot.from_dict(json.load(f, object_hook=_decode_object))
+        except FileNotFoundError:
+            return None
+
+    async def save(self, snapshot: AggregateSnapshot) -> None:
+        # Serialize on the caller's side, so the state cannot change underneath
+        data = json.dumps(snapshot.to_dict(), default=_encode_value)
+        await asyncio.get_running_loop().run_in_executor(None, self._write, snapshot.aggregate_id, data)
+
+    def _write(self, aggregate_id: str, data: str) -> None:
+        path = self._path(aggregate_id)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    async def delete(self, aggregate_id: str) -> None:
+        try:
+            os.remove(self._path(aggregate_id))
+        except FileNotFoundError:
+            pass
+
@@ -14,6 +14,7 @@ Key Features:
 """
 
 import asyncio
+import copy
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Type, Generic, TypeVar
@@ -23,6 +24,7 @@ from enum import Enum
 import json
 import uuid
 
+from .aggregate_snapshots import AggregateSnapshot, SnapshotStore
 from .event_driven_architecture import Event, EventMetadata, EventType, EventPriority
 
 logger = logging.getLogger(__name__)
@@ -84,6 +86,9 @@ class QueryResponse(Generic[T]):
 class AggregateRoot(ABC):
     """Base aggregate root for domain entities."""
     
+    # Attributes that are not part of the snapshotted state
+    _SNAPSHOT_EXCLUDED = frozenset({'aggregate_id', 'aggregate_type', 'version', 'uncommitted_events'})
+    
     def __init__(self, aggregate_id: str, aggregate_type: str):
         """Initialize aggregate root."""
         self.aggregate_id = aggregate_id
@@ -148,6 +153,32 @@ class AggregateRoot(ABC):
         """Load aggregate state from event history."""
         for event in events:
             self.apply_event(event)
+    
+    def snapshot_state(self) -> Dict[str, Any]:
+        """State captured in snapshots; override when attributes need custom handling."""
+        return copy.deepcopy({
+            name: value for name, value in vars(self).items()
+            if name not in self._SNAPSHOT_EXCLUDED
+        })
+    
+    def restore_snapshot_state(self, state: Dict[str, Any]) -> None:
+        """Restore state captured by snapshot_state."""
+        for name, value in copy.deepcopy(state).items():
+            setattr(self, name, value)
+    
+    def to_snapshot(self) -> AggregateSnapshot:
+        """Create a snapshot of the aggregate at its current version."""
+        return AggregateSnapshot(
+            aggregate_id=self.aggregate_id,
+            aggregate_type=self.aggregate_type,
+            version=self.version,
+            state=self.snapshot_state()
+        )
+    
+    def load_from_snapshot(self, snapshot: AggregateSnapshot) -> None:
+        """Load aggregate state from a snapshot; apply later events with load_from_history."""
+        self.restore_snapshot_state(snapshot.state)
+        self.version = snapshot.version
 
 class CommandHandler(ABC):
     """Base command handler."""
@@ -194,31 +225,55 @@ class Repository(ABC, Generic[T]):
         pass
 
 class EventSourcedRepository(Repository[AggregateRoot]):
-    """Event-sourced repository implementation."""
+    """
+    Event-sourced repository implementation.
     
-    def __init__(self, event_store, event_bus, aggregate_factory: callable):
+    With a snapshot store, a snapshot is taken whenever an aggregate is
+    `snapshot_every` events past its last one, and loads start from the
+    latest snapshot and read only the later events, `page_size` at a time.
+    """
+    
+    def __init__(self,
+                 event_store,
+                 event_bus,
+                 aggregate_factory: callable,
+                 snapshot_store: Optional[SnapshotStore] = None,
+                 snapshot_every: int = 100,
+                 page_size: int = 500):
         """Initialize event-sourced repository."""
         self.event_store = event_store
         self.event_bus = event_bus
         self.aggregate_factory = aggregate_factory
         self.aggregate_cache: Dict[str, AggregateRoot] = {}
+        self.snapshot_store = snapshot_store
+        self.snapshot_every = snapshot_every
+        self.page_size = page_size
+        self.snapshot_versions: Dict[str, int] = {}
     
     async def get_by_id(self, aggregate_id: str) -> Optional[AggregateRoot]:
-        """Get aggregate by ID from event store."""
+        """Get aggregate by ID from its latest snapshot and the event store."""
         try:
             # Check cache first
             if aggregate_id in self.aggregate_cache:
                 return self.aggregate_cache[aggregate_id]
             
-            # Load events from store
-            events = await self.event_store.get_events(aggregate_id)
+            aggregate = self.aggregate_factory(aggregate_id)
+            
+            # Start from the latest snapshot, if any
+            snapshot = await self._load_snapshot(aggregate_id)
+            if snapshot:
+                aggregate.load_from_snapshot(snapshot)
+            
+            # Apply the events after it
+            async for events in self.event_store.get_event_pages(
+                aggregate_id, from_version=aggregate.version + 1, page_size=self.page_size
+            ):
+                aggregate.load_from_history(events)
             
-            if not events:
+            if aggregate.version == 0:
                 return None
             
-            # Create aggregate and load from history
-            aggregate = self.aggregate_factory(aggregate_id)
-            aggregate.load_from_history(events)
+            await self._maybe_snapshot(aggregate)
             
             # Cache the aggregate
             self.aggregate_cache[aggregate_id] = aggregate
@@ -244,12 +299,14 @@ class EventSourcedRepository(Repository[AggregateRoot]):
                     logger.error(f"Failed to save event {event.metadata.event_id}")
                     return False
                 
-                # Publish event to bus
-                await self.event_bus.publish_event(event)
+                # Publish event to bus; it is already stored
+                await self.event_bus.publish_event(event, store=False)
             
             # Mark events as committed
             aggregate.mark_events_as_committed()
             
+            await self._maybe_snapshot(aggregate)
+            
             # Update cache
             self.aggregate_cache[aggregate.aggregate_id] = aggregate
             
@@ -280,11 +337,40 @@ class EventSourcedRepository(Repository[AggregateRoot]):
             if aggregate_id in self.aggregate_cache:
                 del self.aggregate_cache[aggregate_id]
             
+            if self.snapshot_store is not None:
+                await self.snapshot_store.delete(aggregate_id)
+                self.snapshot_versions.pop(aggregate_id, None)
+            
             return success
             
         except Exception as e:
             logger.error(f"Failed to delete aggregate {aggregate_id}: {e}")
             return False
+    
+    async def _load_snapshot(self, aggregate_id: str) -> Optional[AggregateSnapshot]:
+        """Get the latest snapshot; a missing or unreadable snapshot means a full replay."""
+        if self.snapshot_store is None:
+            return None
+        try:
+            snapshot = await self.snapshot_store.get(aggregate_id)
+        except Exception as e:
+            logger.warning(f"Failed to load snapshot for {aggregate_id}, replaying all events: {e}")
+            return None
+        self.snapshot_versions[aggregate_id] = snapshot.version if snapshot else 0
+        return snapshot
+    
+    async def _maybe_snapshot(self, aggregate: AggregateRoot) -> None:
+        """Snapshot the aggregate once it is snapshot_every events past its last snapshot."""
+        if self.snapshot_store is None or aggregate.uncommitted_events:
+            return
+        last_version = self.snapshot_versions.get(aggregate.aggregate_id, 0)
+        if aggregate.version - last_version < self.snapshot_every:
+            return
+        try:
+            await self.snapshot_store.save(aggregate.to_snapshot())
+            self.snapshot_versions[aggregate.aggregate_id] = aggregate.version
+        except Exception as e:
+            logger.warning(f"Failed to snapshot aggregate {aggregate.aggregate_id}: {e}")
 
 class ReadModel(ABC):
     """Base read model for queries."""
@@ -323,9 +409,10 @@ class CQRSMediator:
     error handling, and performance monitoring.
     """
     
-    def __init__(self, event_bus):
+    def __init__(self, event_bus, event_store=None):
         """Initialize CQRS mediator."""
         self.event_bus = event_bus
+        self.event_store = event_store or getattr(event_bus, 'event_store', None)
         self.command_handlers: Dict[str, CommandHandler] = {}
         self.query_handlers: Dict[str, QueryHandler] = {}
         self.repositories: Dict[str, Repository] = {}
@@ -566,13 +653,21 @@ class CQRSMediator:
     
     async def rebuild_projections(self, 
                                 projection_names: Optional[List[str]] = None,
-                                from_timestamp: Optional[datetime] = None) -> Dict[str, bool]:
+                                from_timestamp: Optional[datetime] = None,
+                                page_size: int = 1000) -> Dict[str, bool]:
         """
         Rebuild projections from event store.
         
+        Events are streamed from the event store in pages, in a single pass
+        for all projections, and each event is handed straight to every
+        projection that handles its event name, without going through the
+        live event bus. A projection that fails stops receiving events; the
+        others carry on.
+        
         Args:
             projection_names: Specific projections to rebuild (None for all)
             from_timestamp: Rebuild from specific timestamp
+            page_size: Events read from the store per page
             
         Returns:
             Dictionary of projection rebuild results
@@ -580,33 +675,57 @@ class CQRSMediator:
         results = {}
         
         projections_to_rebuild = (
-            [self.projections[name] for name in projection_names if name in self.projections]
+            {name: self.projections[name] for name in projection_names if name in self.projections}
             if projection_names
-            else list(self.projections.values())
+            else dict(self.projections)
         )
+        if not projections_to_rebuild:
+            return results
+        if self.event_store is None:
+            logger.error("No event store to rebuild projections from")
+            return {name: False for name in projections_to_rebuild}
         
-        for projection in projections_to_rebuild:
+        # event name -> projections handling it
+        routes: Dict[str, List[str]] = {}
+        replayed: Dict[str, int] = {}
+        for projection_name, projection in projections_to_rebuild.items():
             try:
-                projection_name = projection.__class__.__name__
                 logger.info(f"Rebuilding projection: {projection_name}")
                 
-                # Get all events that this projection handles
-                # This is a simplified approach - in practice, you'd need more sophisticated event querying
-                # For now, we'll assume we can get events by type
-                
                 # Reset projection state (implementation-specific)
                 if hasattr(projection, 'reset'):
                     await projection.reset()
                 
-                # Replay events (this would need to be implemented based on your event store)
-                # await self._replay_events_for_projection(projection, from_timestamp)
-                
+                for event_type in set(projection.get_event_types()):
+                    routes.setdefault(event_type, []).append(projection_name)
+                replayed[projection_name] = 0
                 results[projection_name] = True
-                logger.info(f"Successfully rebuilt projection: {projection_name}")
                 
             except Exception as e:
-                projection_name = projection.__class__.__name__
                 logger.error(f"Failed to rebuild projection {projection_name}: {e}")
                 results[projection_name] = False
         
-        return results
\ No newline at end of file
+        try:
+            async for events in self.event_store.get_all_event_pages(from_timestamp=from_timestamp,
+                                                                     page_size=page_size):
+                for event in events:
+                    for projection_name in routes.get(event.event_name, ()):
+                        if not results[projection_name]:
+                            continue
+                        try:
+                            await projections_to_rebuild[projection_name].handle_event(event)
+                            replayed[projection_name] += 1
+                        except Exception as e:
+                            logger.error(f"Failed to rebuild projection {projection_name}: {e}")
+                            results[projection_name] = False
+                            
+        except Exception as e:
+            logger.error(f"Failed to read events to rebuild projections: {e}")
+            for projection_name in replayed:
+                results[projection_name] = False
+        
+        for projection_name, count in replayed.items():
+            if results[projection_name]:
+                logger.info(f"Successfully rebuilt projection: {projection_name} ({count} events)")
+        
+        return results
@@ -0,0 +1,304 @@
+"""
+ACSO Enterprise Framework - Event Dispatch Engine
+
+Dispatch machinery for the EnterpriseEventBus:
+
+- HandlerIndex resolves event name patterns to handlers once per
+  (event name, tenant) and caches the result.
+- ShardedDispatcher runs N worker tasks with bounded queues; events are
+  sharded by aggregate_id so events of one aggregate are handled in order
+  while other aggregates proceed.
+- LatencyHistogram records per-handler execution latency.
+- RedisPublishBatcher batches real-time publishes into pipelined round
+  trips on an async Redis client.
+"""
+
+import asyncio
+import bisect
+import fnmatch
+import logging
+import os
+import re
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_WILDCARD_CHARS = re.compile(r'[*?\[]')
+
+# Upper bounds of the latency buckets, in seconds; the last bucket is open-ended
+DEFAULT_LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class HandlerIndex:
+    """Maps (event name, tenant) to matching handlers and subscriptions.
+
+    Exact patterns are looked up in a dict and wildcard patterns are compiled
+    to regular expressions once. Resolved matches are cached in a bounded LRU
+    until a handler or subscription is added or removed. Subscription filter
+    conditions and is_active depend on the event and can change at any time,
+    so callers still apply them per event.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[Tuple[str, str], Tuple[Tuple[Any, ...], Tuple[Any, ...]]]" = OrderedDict()
+        self._compiled: List[Tuple[Any, bool, Dict[str, None], List[re.Pattern]]] = []
+        self.hits = 0
+        self.misses = 0
+
+    def set_handlers(self, handlers: Dict[str, Any], subscriptions: Dict[str, Any]) -> None:
+        """Rebuild from the current handlers and subscriptions."""
+        self._compiled = (
+            [self._compile(handler, False) for handler in handlers.values()] +
+            [self._compile(subscription, True) for subscription in subscriptions.values()]
+        )
+        self._cache.clear()
+
+    @staticmethod
+    def _compile(item: Any, is_subscription: bool) -> Tuple[Any, bool, Dict[str, None], List[re.Pattern]]:
+        # Same semantics as fnmatch.fnmatch, which normalizes case the way paths do
+        exact: Dict[str, None] = {}
+        wildcards = []
+        for pattern in item.event_patterns:
+            pattern = os.path.normcase(pattern)
+            if _WILDCARD_CHARS.search(pattern):
+                wildcards.append(re.compile(fnmatch.translate(pattern)))
+            else:
+                exact[pattern] = None
+        return item, is_subscription, exact, wildcards
+
+    def match(self, event_name: str, tenant_id: str) -> Tuple[Tuple[Any, ...], Tuple[Any, ...]]:
+        """Return (handlers, subscriptions) whose patterns match, in registration order."""
+        key = (event_name, tenant_id)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        name = os.path.normcase(event_name)
+        handlers = []
+        subscriptions = []
+        for item, is_subscription, exact, wildcards in self._compiled:
+            if is_subscription and item.tenant_id != tenant_id:
+                continue
+            if name in exact or any(regex.match(name) for regex in wildcards):
+                (subscriptions if is_subscription else handlers).append(item)
+
+        result = (tuple(handlers), tuple(subscriptions))
+        self._cache[key] = result
+        if len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'entries': len(self._cache),
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram."""
+
+    __slots__ = ('bounds', 'counts', 'count', 'total', 'max')
+
+    def __init__(self, bounds: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (max for the open bucket)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                return self.bounds[index] if index < len(self.bounds) else self.max
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'avg_ms': (self.total / self.count * 1000) if self.count else 0.0,
+            'p50_ms': self.quantile(0.5) * 1000,
+            'p99_ms': self.quantile(0.99) * 1000,
+            'max_ms': self.max * 1000,
+            'buckets': {
+                (f"le_{bound}" if index < len(self.bounds) else "inf"): bucket_count
+                for index, (bound, bucket_count) in enumerate(zip(self.bounds + (None,), self.counts))
+            }
+        }
+
+
+class ShardedDispatcher:
+    """Runs an async process function over events on N sharded worker tasks.
+
+    Each worker owns a bounded queue. An event always goes to the shard
+    chosen by its key, so events with the same key are processed one at a
+    time in submission order. submit() waits while that shard's queue is
+    full, which pushes back on publishers instead of buffering without limit.
+    """
+
+    def __init__(self,
+                 process: Callable[[Any], Awaitable[None]],
+                 key: Callable[[Any], str],
+                 workers: int = 8,
+                 queue_size: int = 1000):
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.process = process
+        self.key = key
+        self.queues: List[asyncio.Queue] = [asyncio.Queue(maxsize=queue_size) for _ in range(workers)]
+        self.tasks: List[asyncio.Task] = []
+        self.processed = [0] * workers
+        self.errors = 0
+
+    def shard_for(self, key: str) -> int:
+        # crc32 rather than hash(), which is salted per process
+        return zlib.crc32(key.encode('utf-8')) % len(self.queues)
+
+    async def submit(self, event: Any) -> None:
+        await self.queues[self.shard_for(self.key(event))].put(event)
+
+    def start(self) -> None:
+        if not self.tasks:
+            self.tasks = [asyncio.create_task(self._worker(shard)) for shard in range(len(self.queues))]
+
+    async def _worker(self, shard: int) -> None:
+        queue = self.queues[shard]
+        while True:
+            event = await queue.get()
+            try:
+                await self.process(event)
+                self.processed[shard] += 1
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Error in dispatch worker {shard}: {e}")
+            finally:
+                queue.task_done()
+
+    async def stop(self, drain_timeout: Optional[float] = None) -> None:
+        """Stop the workers, first waiting up to drain_timeout for queued events."""
+        if drain_timeout and self.tasks:
+            try:
+                await asyncio.wait_for(
+                    asyncio.gather(*(queue.join() for queue in self.queues)), timeout=drain_timeout
+                )
+            except asyncio.TimeoutError:
+                logger.warning(f"Stopping dispatcher with {self.pending()} events still queued")
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    def pending(self) -> int:
+        return sum(queue.qsize() for queue in self.queues)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'workers': len(self.queues),
+            'queue_sizes': [queue.qsize() for queue in self.queues],
+            'queue_capacity': self.queues[0].maxsize,
+            'processed': list(self.processed),
+            'errors': self.errors
+        }
+
+
+class RedisPublishBatcher:
+    """Batches Redis PUBLISH commands into pipelined round trips.
+
+    Works with any async client exposing ``pipeline(transaction=False)``
+    whose pipeline has ``publish()`` and an async ``execute()``, such as
+    ``redis.asyncio.Redis``. Publishes are fire-and-forget: a failed batch is
+    logged and counted, not retried.
+    """
+
+    def __init__(self, client: Any, batch_size: int = 100, flush_interval: float = 0.01,
+                 queue_size: int = 10000):
+        self.client = client
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.task: Optional[asyncio.Task] = None
+        self.published = 0
+        self.batches = 0
+        self.failed = 0
+
+    async def publish(self, channel: str, message: str) -> None:
+        """Queue one message; waits while the queue is full."""
+        await self.queue.put((channel, message))
+
+    def start(self) -> None:
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self.queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                if self.queue.empty():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self.queue.get(), timeout=remaining))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    batch.append(self.queue.get_nowait())
+            await self._send(batch)
+
+    async def _send(self, batch: List[Tuple[str, str]]) -> None:
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for channel, message in batch:
+                pipe.publish(channel, message)
+            await pipe.execute()
+            self.published += len(batch)
+            self.batches += 1
+        except Exception as e:
+            self.failed += len(batch)
+            logger.error(f"Failed to publish {len(batch)} messages to Redis: {e}")
+        finally:
+            for _ in batch:
+                self.queue.task_done()
+
+    async def stop(self, drain_timeout: Optional[float] = None) -> None:
+        """Stop the flush task, first waiting up to drain_timeout for queued messages."""
+        if self.task is None:
+            return
+        if drain_timeout:
+            try:
+                await asyncio.wait_for(self.queue.join(), timeout=drain_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Dropping {self.queue.qsize()} unpublished Redis messages")
+        self.task.cancel()
+        await asyncio.gather(self.task, return_exceptions=True)
+        self.task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'queued': self.queue.qsize(),
+            'published': self.published,
+            'batches': self.batches,
+            'failed': self.failed
+        }
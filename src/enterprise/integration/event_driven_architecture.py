@@ -16,19 +16,23 @@ Key Features:
 import asyncio
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Callable, Union
+from typing import AsyncIterator, Dict, List, Optional, Any, Callable, Set, Union
 from dataclasses import dataclass, field
 from enum import Enum
 import json
 import uuid
 from abc import ABC, abstractmethod
+import time
+from functools import partial
 import boto3
 from botocore.exceptions import ClientError
-import redis
+import redis.asyncio as redis_asyncio
 from concurrent.futures import ThreadPoolExecutor
 import threading
 from collections import defaultdict
 
+from .event_dispatch import HandlerIndex, LatencyHistogram, RedisPublishBatcher, ShardedDispatcher
+
 logger = logging.getLogger(__name__)
 
 class EventType(Enum):
@@ -171,7 +175,37 @@ class EventStore(ABC):
                         aggregate_id: str, 
                         from_version: Optional[int] = None,
                         to_version: Optional[int] = None) -> List[Event]:
-        """Get events for an aggregate."""
+        """Get events for an aggregate.
+        
+        Versions are 1-based positions in the aggregate's history and both
+        bounds are inclusive, so from_version=n + 1 returns the events after
+        a snapshot at version n.
+        """
+        pass
+    
+    async def get_event_pages(self,
+                              aggregate_id: str,
+                              from_version: Optional[int] = None,
+                              to_version: Optional[int] = None,
+                              page_size: int = 500) -> AsyncIterator[List[Event]]:
+        """Stream events for an aggregate in pages of at most page_size events.
+        
+        The default implementation pages over get_events; stores that can
+        read incrementally should override it.
+        """
+        events = await self.get_events(aggregate_id, from_version, to_version)
+        for start in range(0, len(events), page_size):
+            yield events[start:start + page_size]
+    
+    @abstractmethod
+    async def get_all_event_pages(self,
+                                  from_timestamp: Optional[datetime] = None,
+                                  page_size: int = 1000) -> AsyncIterator[List[Event]]:
+        """Stream all stored events in pages, for bulk replay.
+        
+        Implementations are async generators. Events of one aggregate come
+        in order; events of different aggregates may interleave in any order.
+        """
         pass
     
     @abstractmethod
@@ -217,24 +251,69 @@ class DynamoDBEventStore(EventStore):
                         to_version: Optional[int] = None) -> List[Event]:
         """Get events for an aggregate from DynamoDB."""
         try:
-            response = self.table.query(
-                KeyConditionExpression='aggregate_id = :aggregate_id',
-                ExpressionAttributeValues={':aggregate_id': aggregate_id},
-                ScanIndexForward=True  # Sort by sort key ascending
-            )
-            
             events = []
-            for item in response['Items']:
-                event_data = json.loads(item['event_data'])
-                event = Event.from_dict(event_data)
-                events.append(event)
-            
+            async for page in self.get_event_pages(aggregate_id, from_version, to_version):
+                events.extend(page)
             return events
             
         except ClientError as e:
             logger.error(f"Failed to get events from DynamoDB: {e}")
             return []
     
+    async def get_event_pages(self,
+                              aggregate_id: str,
+                              from_version: Optional[int] = None,
+                              to_version: Optional[int] = None,
+                              page_size: int = 500) -> AsyncIterator[List[Event]]:
+        """Stream events for an aggregate with paginated queries.
+        
+        Items have no version attribute, so the head of the history before
+        from_version is still read, but it is not deserialized.
+        """
+        query_args = {
+            'KeyConditionExpression': 'aggregate_id = :aggregate_id',
+            'ExpressionAttributeValues': {':aggregate_id': aggregate_id},
+            'ScanIndexForward': True,  # Sort by sort key ascending
+            'Limit': page_size
+        }
+        first = from_version or 1
+        version = 0
+        async for items in self._paginate(self.table.query, query_args):
+            page = []
+            for item in items:
+                version += 1
+                if version < first:
+                    continue
+                if to_version is not None and version > to_version:
+                    break
+                page.append(Event.from_dict(json.loads(item['event_data'])))
+            if page:
+                yield page
+            if to_version is not None and version >= to_version:
+                return
+    
+    async def get_all_event_pages(self,
+                                  from_timestamp: Optional[datetime] = None,
+                                  page_size: int = 1000) -> AsyncIterator[List[Event]]:
+        """Stream all events with a paginated scan."""
+        scan_args: Dict[str, Any] = {'Limit': page_size}
+        if from_timestamp:
+            scan_args['FilterExpression'] = 'created_at >= :from_timestamp'
+            scan_args['ExpressionAttributeValues'] = {':from_timestamp': from_timestamp.isoformat()}
+        async for items in self._paginate(self.table.scan, scan_args):
+            if items:
+                yield [Event.from_dict(json.loads(item['event_data'])) for item in items]
+    
+    async def _paginate(self, operation: Callable, kwargs: Dict[str, Any]) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Run a query or scan page by page off the event loop."""
+        loop = asyncio.get_running_loop()
+        while True:
+            response = await loop.run_in_executor(None, partial(operation, **kwargs))
+            yield response['Items']
+            if 'LastEvaluatedKey' not in response:
+                return
+            kwargs = dict(kwargs, ExclusiveStartKey=response['LastEvaluatedKey'])
+    
     async def get_events_by_correlation_id(self, correlation_id: str) -> List[Event]:
         """Get events by correlation ID from DynamoDB."""
         try:
@@ -262,9 +341,17 @@ class EnterpriseEventBus:
     Features:
     - Guaranteed delivery with retry mechanisms
     - Dead letter queues for failed events
-    - Real-time event processing
+    - Real-time event processing on workers sharded by aggregate
     - Event filtering and routing
     - Metrics and monitoring
+    
+    Events are processed by `dispatch.workers` worker tasks, each with a
+    bounded queue of `dispatch.queue_size` events. Events of one aggregate
+    always go to the same worker, so they are handled in publish order; a
+    slow handler only holds up the aggregates sharing its worker. Retries go
+    back through the same worker after their backoff, so they never run
+    alongside the aggregate's other events, but they are handled after any
+    events of the aggregate published in the meantime.
     """
     
     def __init__(self, config: Dict[str, Any]):
@@ -277,11 +364,29 @@ class EnterpriseEventBus:
         self.handlers: Dict[str, EventHandler] = {}
         self.subscriptions: Dict[str, Subscription] = {}
         
+        dispatch_config = config.get('dispatch', {})
+        self.handler_index = HandlerIndex(max_entries=dispatch_config.get('handler_cache_size', 10000))
+        self.handler_latency: Dict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
+        
         # Processing queues
-        self.event_queue = asyncio.Queue()
+        self.dispatcher = ShardedDispatcher(
+            self._process_event,
+            key=lambda event: event.aggregate_id,
+            workers=dispatch_config.get('workers', 8),
+            queue_size=dispatch_config.get('queue_size', 1000)
+        )
         self.retry_queue = asyncio.Queue()
+        self.pending_retries: Set[asyncio.TimerHandle] = set()
         self.dead_letter_queue = asyncio.Queue()
         
+        redis_config = config.get('redis', {})
+        self.redis_publisher = RedisPublishBatcher(
+            self.redis_client,
+            batch_size=redis_config.get('publish_batch_size', 100),
+            flush_interval=redis_config.get('publish_flush_interval', 0.01),
+            queue_size=redis_config.get('publish_queue_size', 10000)
+        )
+        
         # Processing state
         self.is_running = False
         self.worker_tasks = []
@@ -304,10 +409,10 @@ class EnterpriseEventBus:
         else:
             raise ValueError(f"Unsupported event store type: {store_type}")
     
-    def _create_redis_client(self) -> redis.Redis:
-        """Create Redis client for real-time messaging."""
+    def _create_redis_client(self) -> redis_asyncio.Redis:
+        """Create async Redis client for real-time messaging."""
         redis_config = self.config.get('redis', {})
-        return redis.Redis(
+        return redis_asyncio.Redis(
             host=redis_config.get('host', 'localhost'),
             port=redis_config.get('port', 6379),
             db=redis_config.get('db', 0),
@@ -322,8 +427,9 @@ class EnterpriseEventBus:
         self.is_running = True
         
         # Start worker tasks
+        self.dispatcher.start()
+        self.redis_publisher.start()
         self.worker_tasks = [
-            asyncio.create_task(self._event_processor()),
             asyncio.create_task(self._retry_processor()),
             asyncio.create_task(self._dead_letter_processor()),
             asyncio.create_task(self._metrics_collector())
@@ -335,6 +441,19 @@ class EnterpriseEventBus:
         """Stop the event bus processing."""
         self.is_running = False
         
+        # Let queued events and publishes finish first
+        drain_timeout = self.config.get('dispatch', {}).get('drain_timeout', 10.0)
+        await self.dispatcher.stop(drain_timeout=drain_timeout)
+        await self.redis_publisher.stop(drain_timeout=drain_timeout)
+        
+        # Retries still waiting out their delay, or not yet resubmitted, are abandoned
+        abandoned = len(self.pending_retries) + self.retry_queue.qsize()
+        for handle in self.pending_retries:
+            handle.cancel()
+        self.pending_retries.clear()
+        if abandoned:
+            logger.warning(f"Abandoning {abandoned} pending event retries on shutdown")
+        
         # Cancel worker tasks
         for task in self.worker_tasks:
             task.cancel()
@@ -344,28 +463,31 @@ class EnterpriseEventBus:
         
         # Close thread pool
         self.thread_pool.shutdown(wait=True)
+        await self.redis_client.aclose()
         
         logger.info("Enterprise Event Bus stopped")
     
-    async def publish_event(self, event: Event) -> bool:
+    async def publish_event(self, event: Event, store: bool = True) -> bool:
         """
         Publish an event to the bus.
         
         Args:
             event: Event to publish
+            store: Whether to append the event to the event store first;
+                False for events that are already stored
             
         Returns:
             True if event was successfully queued for processing
         """
         try:
             # Store event in event store
-            stored = await self.event_store.append_event(event)
+            stored = await self.event_store.append_event(event) if store else True
             if not stored:
                 logger.error(f"Failed to store event {event.metadata.event_id}")
                 return False
             
-            # Queue event for processing
-            await self.event_queue.put(event)
+            # Queue event for processing; waits while the aggregate's shard is full
+            await self.dispatcher.submit(event)
             
             # Publish to Redis for real-time subscribers
             await self._publish_to_redis(event)
@@ -380,20 +502,21 @@ class EnterpriseEventBus:
             return False
     
     async def _publish_to_redis(self, event: Event) -> None:
-        """Publish event to Redis for real-time processing."""
+        """Queue event for pipelined publishing to Redis for real-time processing."""
         try:
-            # Publish to general event channel
-            channel = f"events:{event.tenant_id}"
+            tenant_id = event.metadata.tenant_id
             message = json.dumps(event.to_dict())
-            self.redis_client.publish(channel, message)
+            
+            # Publish to general event channel
+            await self.redis_publisher.publish(f"events:{tenant_id}", message)
             
             # Publish to specific event type channel
-            type_channel = f"events:{event.tenant_id}:{event.event_type.value}"
-            self.redis_client.publish(type_channel, message)
+            await self.redis_publisher.publish(f"events:{tenant_id}:{event.event_type.value}", message)
             
             # Publish to aggregate-specific channel
-            aggregate_channel = f"events:{event.tenant_id}:{event.aggregate_type}:{event.aggregate_id}"
-            self.redis_client.publish(aggregate_channel, message)
+            await self.redis_publisher.publish(
+                f"events:{tenant_id}:{event.aggregate_type}:{event.aggregate_id}", message
+            )
             
         except Exception as e:
             logger.error(f"Failed to publish to Redis: {e}")
@@ -401,40 +524,29 @@ class EnterpriseEventBus:
     def register_handler(self, handler: EventHandler) -> None:
         """Register an event handler."""
         self.handlers[handler.handler_id] = handler
+        self.handler_index.set_handlers(self.handlers, self.subscriptions)
         logger.info(f"Registered event handler: {handler.handler_id}")
     
     def unregister_handler(self, handler_id: str) -> None:
         """Unregister an event handler."""
         if handler_id in self.handlers:
             del self.handlers[handler_id]
+            self.handler_index.set_handlers(self.handlers, self.subscriptions)
             logger.info(f"Unregistered event handler: {handler_id}")
     
     def subscribe(self, subscription: Subscription) -> None:
         """Create an event subscription."""
         self.subscriptions[subscription.subscription_id] = subscription
+        self.handler_index.set_handlers(self.handlers, self.subscriptions)
         logger.info(f"Created subscription: {subscription.subscription_id}")
     
     def unsubscribe(self, subscription_id: str) -> None:
         """Remove an event subscription."""
         if subscription_id in self.subscriptions:
             del self.subscriptions[subscription_id]
+            self.handler_index.set_handlers(self.handlers, self.subscriptions)
             logger.info(f"Removed subscription: {subscription_id}")
     
-    async def _event_processor(self) -> None:
-        """Main event processing loop."""
-        while self.is_running:
-            try:
-                # Get event from queue with timeout
-                event = await asyncio.wait_for(self.event_queue.get(), timeout=1.0)
-                
-                # Process event
-                await self._process_event(event)
-                
-            except asyncio.TimeoutError:
-                continue
-            except Exception as e:
-                logger.error(f"Error in event processor: {e}")
-    
     async def _process_event(self, event: Event) -> None:
         """Process a single event."""
         try:
@@ -451,46 +563,42 @@ class EnterpriseEventBus:
                 logger.debug(f"No handlers found for event: {event.event_name}")
                 return
             
-            # Process with each matching handler
-            for handler in matching_handlers:
-                try:
-                    await self._execute_handler(handler, event)
-                    self.metrics['events_processed'] += 1
-                    
-                except Exception as e:
-                    logger.error(f"Handler {handler.handler_id} failed for event {event.metadata.event_id}: {e}")
-                    await self._handle_processing_failure(event, handler, e)
+            # Run matching handlers concurrently
+            if len(matching_handlers) == 1:
+                await self._run_handler(matching_handlers[0], event)
+            else:
+                await asyncio.gather(*(self._run_handler(handler, event) for handler in matching_handlers))
             
         except Exception as e:
             logger.error(f"Failed to process event {event.metadata.event_id}: {e}")
     
+    async def _run_handler(self, handler: EventHandler, event: Event) -> None:
+        """Execute one handler, recording its latency and handling failure."""
+        started = time.perf_counter()
+        try:
+            await self._execute_handler(handler, event)
+            self.metrics['events_processed'] += 1
+            
+        except Exception as e:
+            logger.error(f"Handler {handler.handler_id} failed for event {event.metadata.event_id}: {e}")
+            await self._handle_processing_failure(event, handler, e)
+            
+        finally:
+            self.handler_latency[handler.handler_id].observe(time.perf_counter() - started)
+    
     def _find_matching_handlers(self, event: Event) -> List[EventHandler]:
         """Find handlers that match the event."""
-        matching_handlers = []
-        
-        for handler in self.handlers.values():
-            if self._event_matches_patterns(event, handler.event_patterns):
-                matching_handlers.append(handler)
+        handlers, subscriptions = self.handler_index.match(event.event_name, event.metadata.tenant_id)
+        matching_handlers = list(handlers)
         
         # Also check subscriptions
-        for subscription in self.subscriptions.values():
-            if (subscription.is_active and 
-                subscription.tenant_id == event.metadata.tenant_id and
-                self._event_matches_patterns(event, subscription.event_patterns) and
+        for subscription in subscriptions:
+            if (subscription.is_active and
                 self._event_matches_filters(event, subscription.filter_conditions)):
                 matching_handlers.append(subscription.handler)
         
         return matching_handlers
     
-    def _event_matches_patterns(self, event: Event, patterns: List[str]) -> bool:
-        """Check if event matches any of the patterns."""
-        import fnmatch
-        
-        for pattern in patterns:
-            if fnmatch.fnmatch(event.event_name, pattern):
-                return True
-        return False
-    
     def _event_matches_filters(self, event: Event, filters: Dict[str, Any]) -> bool:
         """Check if event matches filter conditions."""
         for key, expected_value in filters.items():
@@ -535,10 +643,9 @@ class EnterpriseEventBus:
         event.metadata.retry_count += 1
         
         if event.metadata.retry_count <= event.metadata.max_retries:
-            # Schedule for retry
+            # Schedule for retry without holding up the dispatch worker
             retry_delay = self._calculate_retry_delay(event.metadata.retry_count)
-            await asyncio.sleep(retry_delay)
-            await self.retry_queue.put(event)
+            self._schedule_retry(event, retry_delay)
             
             self.metrics['events_retried'] += 1
             logger.info(f"Event {event.metadata.event_id} scheduled for retry {event.metadata.retry_count}")
@@ -550,6 +657,15 @@ class EnterpriseEventBus:
             self.metrics['events_dead_lettered'] += 1
             logger.error(f"Event {event.metadata.event_id} sent to dead letter queue after {event.metadata.retry_count} retries")
     
+    def _schedule_retry(self, event: Event, delay: float) -> None:
+        """Queue an event for the retry processor once delay has passed."""
+        def release() -> None:
+            self.pending_retries.discard(handle)
+            self.retry_queue.put_nowait(event)
+        
+        handle = asyncio.get_running_loop().call_later(delay, release)
+        self.pending_retries.add(handle)
+    
     def _calculate_retry_delay(self, retry_count: int) -> float:
         """Calculate exponential backoff delay for retries."""
         base_delay = 1.0  # 1 second
@@ -559,11 +675,11 @@ class EnterpriseEventBus:
         return delay
     
     async def _retry_processor(self) -> None:
-        """Process retry queue."""
+        """Hand events whose retry delay has passed back to their aggregate's worker."""
         while self.is_running:
             try:
                 event = await asyncio.wait_for(self.retry_queue.get(), timeout=1.0)
-                await self._process_event(event)
+                await self.dispatcher.submit(event)
                 
             except asyncio.TimeoutError:
                 continue
@@ -604,9 +720,9 @@ class EnterpriseEventBus:
             
             # Store in Redis for investigation
             key = f"dead_letters:{event.metadata.tenant_id}:{event.metadata.event_id}"
-            self.redis_client.setex(
+            await self.redis_client.setex(
                 key, 
-                timedelta(days=30).total_seconds(),  # Keep for 30 days
+                int(timedelta(days=30).total_seconds()),  # Keep for 30 days
                 json.dumps(dead_letter_data)
             )
             
@@ -632,7 +748,7 @@ class EnterpriseEventBus:
                 'timestamp': datetime.now().isoformat(),
                 'metrics': dict(self.metrics),
                 'queue_sizes': {
-                    'event_queue': self.event_queue.qsize(),
+                    'event_queue': self.dispatcher.pending(),
                     'retry_queue': self.retry_queue.qsize(),
                     'dead_letter_queue': self.dead_letter_queue.qsize()
                 },
@@ -641,7 +757,7 @@ class EnterpriseEventBus:
             }
             
             # Publish to Redis metrics channel
-            self.redis_client.publish('metrics:event_bus', json.dumps(metrics_data))
+            await self.redis_publisher.publish('metrics:event_bus', json.dumps(metrics_data))
             
         except Exception as e:
             logger.error(f"Failed to publish metrics: {e}")
@@ -662,27 +778,22 @@ class EnterpriseEventBus:
             List of replayed events
         """
         try:
-            # Get events from store
-            events = await self.event_store.get_events(aggregate_id)
+            events = []
             
-            # Filter by timestamp if specified
-            if from_timestamp or to_timestamp:
-                filtered_events = []
-                for event in events:
+            # Stream events from store
+            async for page in self.event_store.get_event_pages(aggregate_id):
+                for event in page:
                     event_time = event.metadata.created_at
                     
+                    # Filter by timestamp if specified
                     if from_timestamp and event_time < from_timestamp:
                         continue
                     if to_timestamp and event_time > to_timestamp:
                         continue
-                        
-                    filtered_events.append(event)
-                
-                events = filtered_events
-            
-            # Replay events
-            for event in events:
-                await self.publish_event(event)
+                    
+                    # Replay event; it is already stored
+                    await self.publish_event(event, store=False)
+                    events.append(event)
             
             logger.info(f"Replayed {len(events)} events for aggregate {aggregate_id}")
             return events
@@ -696,10 +807,16 @@ class EnterpriseEventBus:
         return {
             'metrics': dict(self.metrics),
             'queue_sizes': {
-                'event_queue': self.event_queue.qsize(),
+                'event_queue': self.dispatcher.pending(),
                 'retry_queue': self.retry_queue.qsize(),
                 'dead_letter_queue': self.dead_letter_queue.qsize()
             },
+            'dispatch': self.dispatcher.get_stats(),
+            'handler_index': self.handler_index.get_stats(),
+            'handler_latency': {
+                handler_id: histogram.to_dict() for handler_id, histogram in self.handler_latency.items()
+            },
+            'redis_publisher': self.redis_publisher.get_stats(),
             'handlers_count': len(self.handlers),
             'subscriptions_count': len(self.subscriptions),
             'is_running': self.is_running
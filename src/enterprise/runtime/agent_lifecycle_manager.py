@@ -957,20 +957,21 @@ class AgentLifecycleManager:
             # Load agent states from persistence
             persisted_states = await self.state_persistence.load_all_agent_states()
             
+            # Bulk-load recovery strategies and snapshots rather than per agent
+            agent_ids = list(persisted_states)
+            recovery_data = await self.state_persistence.load_recovery_strategies(agent_ids)
+            snapshots = await self.state_persistence.load_state_snapshots_for_agents(agent_ids)
+            
             for agent_id, state_data in persisted_states.items():
                 try:
                     # Reconstruct AgentLifecycleState from persisted data
                     lifecycle_state = AgentLifecycleState(**state_data)
                     self.agent_states[agent_id] = lifecycle_state
                     
-                    # Load recovery strategies
-                    recovery_data = await self.state_persistence.load_recovery_strategy(agent_id)
-                    if recovery_data:
-                        self.recovery_strategies[agent_id] = RecoveryStrategy(**recovery_data)
+                    if agent_id in recovery_data:
+                        self.recovery_strategies[agent_id] = RecoveryStrategy(**recovery_data[agent_id])
                     
-                    # Load state snapshots
-                    snapshots = await self.state_persistence.load_state_snapshots(agent_id)
-                    self.state_snapshots[agent_id] = snapshots
+                    self.state_snapshots[agent_id] = snapshots.get(agent_id, [])
                     
                 except Exception as e:
                     self.logger.error(f"Failed to load persisted state for agent {agent_id}: {e}")
@@ -1000,8 +1001,11 @@ class AgentLifecycleManager:
     async def _persist_all_states(self):
         """Persist all agent states."""
         try:
-            for agent_id in self.agent_states:
-                await self._persist_agent_state(agent_id)
+            await self.state_persistence.store_agent_states(
+                {agent_id: state.__dict__ for agent_id, state in self.agent_states.items()},
+                {agent_id: strategy.__dict__ for agent_id, strategy in self.recovery_strategies.items()
+                 if agent_id in self.agent_states}
+            )
             
             self.logger.info("Persisted all agent states")
             
@@ -1083,17 +1087,6 @@ class AgentLifecycleManager:
         except Exception as e:
             self.logger.error(f"Failed to get recovery history for {agent_id}: {e}")
             return []
-                tenant_id=lifecycle_state.tenant_id,
-                event_type=event.value
-            ).inc()
-            
-            # Log event
-            self.logger.info(f"Lifecycle event for agent {agent_id}: {event.value}")
-            
-        except Exception as e:
-            self.logger.error(f"Failed to record lifecycle event for {agent_id}: {e}")
-    
-    # Additional helper methods would be implemented here...        
 
     async def _scale_up_fleet(self, fleet_id: str, additional_instances: int) -> Dict[str, Any]:
         """Scale up a fleet by adding instances."""
@@ -1145,16 +1138,6 @@ class AgentLifecycleManager:
             instance for instance in self.agent_instances.values()
             if instance.deployment_spec.fleet_id == fleet_id and instance.state != LifecycleState.TERMINATING
         ])          
-  try:
-                await asyncio.sleep(180)  # Check every 3 minutes
-                
-                # Monitor workload distribution across agents
-                for tenant_id in set(state.tenant_id for state in self.agent_states.values()):
-                    await self._rebalance_tenant_workload(tenant_id)
-                    
-            except Exception as e:
-                self.logger.error(f"Workload rebalancer loop error: {e}")
-                await asyncio.sleep(300)
     
     async def _rebalance_tenant_workload(self, tenant_id: str):
         """Rebalance workload for a specific tenant."""
@@ -1412,16 +1395,14 @@ class AgentLifecycleManager:
             
             # Load states from persistence layer
             persisted_states = await self.state_persistence.load_all_agent_states()
+            snapshots = await self.state_persistence.load_state_snapshots_for_agents(list(persisted_states))
             
             for agent_id, state_data in persisted_states.items():
                 try:
                     # Reconstruct lifecycle state
                     lifecycle_state = AgentLifecycleState(**state_data)
                     self.agent_states[agent_id] = lifecycle_state
-                    
-                    # Load state snapshots
-                    snapshots = await self.state_persistence.load_state_snapshots(agent_id)
-                    self.state_snapshots[agent_id] = snapshots
+                    self.state_snapshots[agent_id] = snapshots.get(agent_id, [])
                     
                 except Exception as e:
                     self.logger.error(f"Failed to load state for agent {agent_id}: {e}")
@@ -1446,8 +1427,9 @@ class AgentLifecycleManager:
     async def _persist_all_states(self):
         """Persist all agent states."""
         try:
-            for agent_id in self.agent_states:
-                await self._persist_agent_state(agent_id)
+            await self.state_persistence.store_agent_states(
+                {agent_id: state.__dict__ for agent_id, state in self.agent_states.items()}
+            )
                 
         except Exception as e:
             self.logger.error(f"Failed to persist all states: {e}")
\ No newline at end of file
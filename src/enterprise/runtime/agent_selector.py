@@ -0,0 +1,171 @@
+"""
+Agent selection engine for the ACSO Enterprise load balancer.
+
+Keeps candidate pools indexed by (tenant, required capabilities) and picks
+an endpoint per request with power-of-two-choices or least-outstanding-
+requests over weights that are refreshed in the background.
+"""
+
+import random
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+PoolKey = Tuple[str, FrozenSet[str]]
+
+
+class AgentSelector:
+    """
+    Per-request endpoint selection without scanning every endpoint.
+
+    Endpoints are indexed by tenant and capability; the endpoints of a tenant
+    having every capability in a set form a pool, built on first use and
+    cached until an endpoint of that tenant is added or removed.
+
+    The cost of an endpoint is (outstanding requests + 1) divided by its
+    effective weight: its configured weight, times its health factor, times
+    the weight last set through set_weights (model or heuristic scores).
+    Unhealthy endpoints, and endpoints at max_connections, are skipped.
+
+    Algorithms:
+    - "p2c": sample two pool members, take the cheaper; O(1) per request
+    - "least_outstanding": take the cheapest pool member; O(pool size)
+    """
+
+    ALGORITHMS = ("p2c", "least_outstanding")
+
+    def __init__(self,
+                 health_factors: Dict[Any, float],
+                 algorithm: str = "p2c",
+                 max_attempts: int = 4,
+                 rng: Optional[random.Random] = None):
+        if algorithm not in self.ALGORITHMS:
+            raise ValueError(f"Unknown selection algorithm: {algorithm}")
+        self.health_factors = health_factors
+        self.algorithm = algorithm
+        self.max_attempts = max_attempts
+        self._random = (rng or random.Random()).random
+
+        self._endpoints: Dict[str, Any] = {}
+        self._by_tenant: Dict[str, Dict[str, Any]] = {}
+        self._capabilities: Dict[str, Dict[str, Set[str]]] = {}
+        self._pools: Dict[PoolKey, List[Any]] = {}
+        self._tenant_pools: Dict[str, Set[PoolKey]] = {}
+        self.weights: Dict[str, float] = {}
+
+        self.selections = 0
+        self.fallback_scans = 0
+        self.pool_builds = 0
+
+    def add(self, endpoint: Any) -> None:
+        """Add or replace an endpoint."""
+        if endpoint.agent_id in self._endpoints:
+            self.remove(endpoint.agent_id)
+
+        self._endpoints[endpoint.agent_id] = endpoint
+        self._by_tenant.setdefault(endpoint.tenant_id, {})[endpoint.agent_id] = endpoint
+        tenant_capabilities = self._capabilities.setdefault(endpoint.tenant_id, {})
+        for capability in endpoint.capabilities:
+            tenant_capabilities.setdefault(capability, set()).add(endpoint.agent_id)
+        self._invalidate(endpoint.tenant_id)
+
+    def remove(self, agent_id: str) -> None:
+        endpoint = self._endpoints.pop(agent_id, None)
+        if endpoint is None:
+            return
+        self._by_tenant[endpoint.tenant_id].pop(agent_id, None)
+        tenant_capabilities = self._capabilities[endpoint.tenant_id]
+        for capability in endpoint.capabilities:
+            holders = tenant_capabilities.get(capability)
+            if holders is not None:
+                holders.discard(agent_id)
+                if not holders:
+                    del tenant_capabilities[capability]
+        self.weights.pop(agent_id, None)
+        self._invalidate(endpoint.tenant_id)
+
+    def _invalidate(self, tenant_id: str) -> None:
+        for key in self._tenant_pools.pop(tenant_id, ()):
+            self._pools.pop(key, None)
+
+    def set_weights(self, weights: Dict[str, float]) -> None:
+        """Replace the refreshed per-endpoint weights; endpoints not listed weigh 1.0."""
+        self.weights = dict(weights)
+
+    def pool(self, tenant_id: str, capabilities: Optional[Iterable[str]] = None) -> List[Any]:
+        """Endpoints of a tenant having every required capability, regardless of health."""
+        key = (tenant_id, frozenset(capabilities or ()))
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = self._build_pool(key)
+            self._pools[key] = pool
+            self._tenant_pools.setdefault(tenant_id, set()).add(key)
+        return pool
+
+    def _build_pool(self, key: PoolKey) -> List[Any]:
+        self.pool_builds += 1
+        tenant_id, capabilities = key
+        endpoints = self._by_tenant.get(tenant_id, {})
+        if not capabilities:
+            return list(endpoints.values())
+
+        tenant_capabilities = self._capabilities.get(tenant_id, {})
+        holders = sorted((tenant_capabilities.get(c, set()) for c in capabilities), key=len)
+        agent_ids = set(holders[0]).intersection(*holders[1:])
+        # Registration order, so selection does not depend on set ordering
+        return [endpoint for agent_id, endpoint in endpoints.items() if agent_id in agent_ids]
+
+    def cost(self, endpoint: Any) -> float:
+        """Selection cost; infinite for endpoints that cannot take a request."""
+        health_factor = self.health_factors.get(endpoint.health_status)
+        if not health_factor or endpoint.current_connections >= endpoint.max_connections:
+            return float('inf')
+        weight = endpoint.weight * health_factor * self.weights.get(endpoint.agent_id, 1.0)
+        if weight <= 0:
+            return float('inf')
+        return (endpoint.current_connections + 1) / weight
+
+    def select(self, tenant_id: str, capabilities: Optional[Iterable[str]] = None) -> Optional[Any]:
+        """Pick an endpoint for one request, or None if none can take it."""
+        pool = self.pool(tenant_id, capabilities)
+        size = len(pool)
+        if not size:
+            return None
+        self.selections += 1
+
+        if self.algorithm == "p2c" and size > 1:
+            cost = self.cost
+            random_value = self._random
+            for _ in range(self.max_attempts):
+                first = int(random_value() * size)
+                second = int(random_value() * (size - 1))
+                if second >= first:
+                    second += 1
+                a, b = pool[first], pool[second]
+                cost_a, cost_b = cost(a), cost(b)
+                if cost_b < cost_a:
+                    a, cost_a = b, cost_b
+                if cost_a != float('inf'):
+                    return a
+            # Most of the pool is unavailable; look at all of it
+            self.fallback_scans += 1
+
+        return self._least_outstanding(pool)
+
+    def _least_outstanding(self, pool: List[Any]) -> Optional[Any]:
+        best = None
+        best_cost = float('inf')
+        for endpoint in pool:
+            endpoint_cost = self.cost(endpoint)
+            if endpoint_cost < best_cost:
+                best, best_cost = endpoint, endpoint_cost
+        return best
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'algorithm': self.algorithm,
+            'endpoints': len(self._endpoints),
+            'cached_pools': len(self._pools),
+            'pool_builds': self.pool_builds,
+            'selections': self.selections,
+            'fallback_scans': self.fallback_scans,
+            'weighted_endpoints': len(self.weights)
+        }
@@ -19,6 +19,7 @@ import prometheus_client
 from ..models.load_balancing import LoadBalancingStrategy, TrafficPattern, ScalingDecision
 from ..monitoring.metrics_collector import MetricsCollector
 from ..ai.predictive_models import TimeSeriesPredictor
+from .agent_selector import AgentSelector
 
 
 class LoadBalancingAlgorithm(str, Enum):
@@ -72,9 +73,15 @@ class LoadMetrics:
 
 
 class IntelligentLoadBalancer:
-    """AI-powered load balancer with predictive scaling capabilities."""
+    """
+    AI-powered load balancer with predictive scaling capabilities.
     
-    def __init__(self, cluster_manager):
+    Requests are routed by an AgentSelector on the hot path. Model (or, until
+    it is trained, heuristic) scores are computed for all endpoints in one
+    batch every weight_refresh_interval seconds and fed to it as weights.
+    """
+    
+    def __init__(self, cluster_manager, selection_algorithm: str = "p2c"):
         self.cluster_manager = cluster_manager
         self.logger = logging.getLogger(__name__)
         self.metrics_collector = MetricsCollector()
@@ -90,7 +97,14 @@ class IntelligentLoadBalancer:
         self.scaler = StandardScaler()
         self.model_trained = False
         
+        # Hot-path selection over background-refreshed weights
+        self.selector = AgentSelector(
+            health_factors={HealthStatus.HEALTHY: 1.0, HealthStatus.DEGRADED: 0.5},
+            algorithm=selection_algorithm
+        )
+        
         # Configuration
+        self.weight_refresh_interval = 30  # seconds
         self.health_check_interval = 10  # seconds
         self.prediction_window = 300  # 5 minutes
         self.scaling_cooldown = 180  # 3 minutes
@@ -119,11 +133,13 @@ class IntelligentLoadBalancer:
         asyncio.create_task(self._health_check_loop())
         asyncio.create_task(self._predictive_scaling_loop())
         asyncio.create_task(self._traffic_pattern_analysis_loop())
+        asyncio.create_task(self._weight_refresh_loop())
     
     async def register_agent_endpoint(self, endpoint: AgentEndpoint) -> bool:
         """Register a new agent endpoint for load balancing."""
         try:
             self.agent_endpoints[endpoint.agent_id] = endpoint
+            self.selector.add(endpoint)
             self.logger.info(f"Registered agent endpoint: {endpoint.agent_id}")
             
             # Initialize metrics for this endpoint
@@ -145,31 +161,36 @@ class IntelligentLoadBalancer:
             self.logger.error(f"Failed to register agent endpoint {endpoint.agent_id}: {e}")
             return False
     
+    async def unregister_agent_endpoint(self, agent_id: str) -> bool:
+        """Stop routing requests to an agent endpoint."""
+        if agent_id not in self.agent_endpoints:
+            return False
+        
+        del self.agent_endpoints[agent_id]
+        self.load_metrics.pop(agent_id, None)
+        self.selector.remove(agent_id)
+        self.logger.info(f"Unregistered agent endpoint: {agent_id}")
+        return True
+    
     async def select_agent_for_request(self, 
                                      request_type: str, 
                                      tenant_id: str,
                                      capabilities_required: List[str] = None) -> Optional[AgentEndpoint]:
-        """Select the best agent endpoint for a request using AI optimization."""
+        """Select the best agent endpoint for a request using AI-refreshed weights."""
         try:
-            # Filter agents by tenant and capabilities
-            candidate_agents = self._filter_candidate_agents(
-                request_type, tenant_id, capabilities_required
-            )
+            # Pick from the (tenant, capabilities) pool
+            selected_agent = self.selector.select(tenant_id, capabilities_required)
             
-            if not candidate_agents:
+            if not selected_agent:
                 self.logger.warning(f"No available agents for request type: {request_type}")
                 return None
             
-            # Select agent based on configured algorithm
-            selected_agent = await self._select_optimal_agent(candidate_agents, request_type)
-            
-            if selected_agent:
-                # Update connection count
-                selected_agent.current_connections += 1
-                self.active_connections_gauge.labels(
-                    agent_type=selected_agent.agent_type,
-                    tenant_id=selected_agent.tenant_id
-                ).set(selected_agent.current_connections)
+            # Update connection count
+            selected_agent.current_connections += 1
+            self.active_connections_gauge.labels(
+                agent_type=selected_agent.agent_type,
+                tenant_id=selected_agent.tenant_id
+            ).set(selected_agent.current_connections)
             
             return selected_agent
             
@@ -222,112 +243,67 @@ class IntelligentLoadBalancer:
         except Exception as e:
             self.logger.error(f"Failed to release agent connection: {e}")
     
-    def _filter_candidate_agents(self, 
-                                request_type: str, 
-                                tenant_id: str,
-                                capabilities_required: List[str] = None) -> List[AgentEndpoint]:
-        """Filter agents based on tenant, capabilities, and health."""
-        candidates = []
-        
-        for agent in self.agent_endpoints.values():
-            # Check tenant isolation
-            if agent.tenant_id != tenant_id:
-                continue
-            
-            # Check health status
-            if agent.health_status not in [HealthStatus.HEALTHY, HealthStatus.DEGRADED]:
-                continue
-            
-            # Check capacity
-            if agent.current_connections >= agent.max_connections:
-                continue
-            
-            # Check capabilities if specified
-            if capabilities_required:
-                if not all(cap in agent.capabilities for cap in capabilities_required):
-                    continue
-            
-            candidates.append(agent)
-        
-        return candidates
+    async def _weight_refresh_loop(self):
+        """Periodically recompute endpoint weights for the selector."""
+        while True:
+            try:
+                await asyncio.sleep(self.weight_refresh_interval)
+                await self._refresh_endpoint_weights()
+                
+            except Exception as e:
+                self.logger.error(f"Weight refresh loop error: {e}")
+                await asyncio.sleep(60)
     
-    async def _select_optimal_agent(self, 
-                                   candidates: List[AgentEndpoint], 
-                                   request_type: str) -> Optional[AgentEndpoint]:
-        """Select optimal agent using AI-based optimization."""
-        if not candidates:
-            return None
-        
-        if len(candidates) == 1:
-            return candidates[0]
+    async def _refresh_endpoint_weights(self):
+        """Score all endpoints in one batch and hand the scores to the selector."""
+        endpoints = list(self.agent_endpoints.values())
+        if not endpoints:
+            return
         
-        # Use AI model if trained, otherwise fall back to heuristics
+        weights = None
         if self.model_trained:
-            return await self._ai_based_selection(candidates, request_type)
-        else:
-            return await self._heuristic_based_selection(candidates)
-    
-    async def _ai_based_selection(self, 
-                                 candidates: List[AgentEndpoint], 
-                                 request_type: str) -> AgentEndpoint:
-        """AI-based agent selection using trained models."""
-        try:
-            # Prepare features for each candidate
-            features = []
-            for agent in candidates:
-                feature_vector = [
-                    agent.current_connections / max(agent.max_connections, 1),
-                    agent.response_time_avg,
-                    agent.cpu_usage,
-                    agent.memory_usage,
-                    agent.weight,
-                    len(agent.capabilities),
-                    1.0 if agent.health_status == HealthStatus.HEALTHY else 0.5
-                ]
-                features.append(feature_vector)
-            
-            # Predict performance scores
-            features_scaled = self.scaler.transform(features)
-            scores = self.scaling_model.predict(features_scaled)
-            
-            # Select agent with best predicted performance
-            best_idx = np.argmax(scores)
-            return candidates[best_idx]
-            
-        except Exception as e:
-            self.logger.error(f"AI-based selection failed, falling back to heuristics: {e}")
-            return await self._heuristic_based_selection(candidates)
+            try:
+                # Batch inference off the event loop
+                loop = asyncio.get_running_loop()
+                weights = await loop.run_in_executor(None, self._model_weights, endpoints)
+            except Exception as e:
+                self.logger.error(f"Model scoring failed, falling back to heuristics: {e}")
+        
+        if weights is None:
+            weights = {agent.agent_id: self._heuristic_weight(agent) for agent in endpoints}
+        
+        self.selector.set_weights(weights)
     
-    async def _heuristic_based_selection(self, candidates: List[AgentEndpoint]) -> AgentEndpoint:
-        """Heuristic-based agent selection."""
-        # Calculate composite score for each agent
-        best_agent = None
-        best_score = float('-inf')
+    def _model_weights(self, endpoints: List[AgentEndpoint]) -> Dict[str, float]:
+        """Weights from predicted response times; faster than the median weighs more."""
+        now = datetime.utcnow()
+        features = []
+        for agent in endpoints:
+            metrics = self.load_metrics.get(agent.agent_id)
+            # Same features the model is trained on in _update_ai_models
+            features.append([
+                metrics.throughput_per_second if metrics else 0.0,
+                metrics.average_response_time if metrics else agent.response_time_avg,
+                metrics.failed_requests / max(metrics.total_requests, 1) if metrics else 0.0,
+                agent.cpu_usage,
+                agent.memory_usage,
+                agent.current_connections,
+                now.hour,
+                now.weekday()
+            ])
         
-        for agent in candidates:
-            # Normalize metrics (lower is better for most metrics)
-            connection_ratio = agent.current_connections / max(agent.max_connections, 1)
-            cpu_penalty = agent.cpu_usage / 100.0
-            memory_penalty = agent.memory_usage / 100.0
-            response_time_penalty = min(agent.response_time_avg / 1000.0, 1.0)  # Cap at 1 second
-            
-            # Health bonus
-            health_bonus = 1.0 if agent.health_status == HealthStatus.HEALTHY else 0.5
-            
-            # Calculate composite score (higher is better)
-            score = (
-                agent.weight * health_bonus * 
-                (1.0 - connection_ratio) * 
-                (1.0 - cpu_penalty) * 
-                (1.0 - memory_penalty) * 
-                (1.0 - response_time_penalty)
-            )
-            
-            if score > best_score:
-                best_score = score
-                best_agent = agent
+        predicted = np.maximum(self.scaling_model.predict(self.scaler.transform(features)), 1e-6)
+        weights = np.clip(np.median(predicted) / predicted, 0.1, 10.0)
+        return {agent.agent_id: float(weight) for agent, weight in zip(endpoints, weights)}
+    
+    def _heuristic_weight(self, agent: AgentEndpoint) -> float:
+        """Resource-based weight; connections and health are accounted for per request."""
+        cpu_penalty = agent.cpu_usage / 100.0
+        memory_penalty = agent.memory_usage / 100.0
+        response_time_penalty = min(agent.response_time_avg / 1000.0, 1.0)  # Cap at 1 second
         
-        return best_agent
+        score = (1.0 - cpu_penalty) * (1.0 - memory_penalty) * (1.0 - response_time_penalty)
+        return max(score, 0.01)
     
     async def _health_check_loop(self):
         """Continuously monitor agent health."""
@@ -581,6 +557,7 @@ class IntelligentLoadBalancer:
                 "average_cpu_usage": np.mean([a.cpu_usage for a in self.agent_endpoints.values()]) if self.agent_endpoints else 0,
                 "average_memory_usage": np.mean([a.memory_usage for a in self.agent_endpoints.values()]) if self.agent_endpoints else 0,
                 "model_trained": self.model_trained,
+                "selector": self.selector.get_stats(),
                 "traffic_patterns_collected": sum(len(patterns) for patterns in self.traffic_patterns.values()),
                 "last_health_check": max([a.last_health_check for a in self.agent_endpoints.values()], default=datetime.min),
                 "agent_distribution": {}
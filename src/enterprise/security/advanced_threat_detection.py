@@ -13,6 +13,7 @@ import uuid
 import numpy as np
 import pandas as pd
 from collections import defaultdict, deque
+import functools
 import hashlib
 import ipaddress
 import re
@@ -26,6 +27,11 @@ import scipy.stats as stats
 from scipy.spatial.distance import cosine
 import networkx as nx
 import warnings
+
+from .batch_inference import BatchInferenceService
+from .detection_correlation import CorrelationGroup, DetectionCorrelator
+from .ioc_index import IOCIndex
+from .streaming_profiles import StreamingUserProfile
 warnings.filterwarnings('ignore')
 
 class ThreatSeverity(str, Enum):
@@ -196,58 +202,48 @@ class ThreatDetection:
 class BehavioralAnalyzer:
     """Behavioral analysis engine for detecting anomalous patterns."""
     
+    # Logins needed before a user's login hours count as a baseline
+    MIN_BASELINE_LOGINS = 10
+    # Events needed before a user's risk scores and failure rate count as a baseline
+    MIN_BASELINE_EVENTS = 10
+    # Floor on the login-hour spread, so a tight baseline does not flag every hour off it
+    MIN_LOGIN_HOUR_STD = 1.0
+    
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-        self.user_profiles = {}
+        self.user_profiles: Dict[str, StreamingUserProfile] = {}
         self.network_baselines = {}
         self.process_baselines = {}
         self.anomaly_detector = IsolationForest(contamination=0.1, random_state=42)
         self.scaler = StandardScaler()
         self.is_trained = False
         
+    def update_user_profile(self, user_event: UserEvent) -> StreamingUserProfile:
+        """Fold one event into its user's streaming profile."""
+        profile = self.user_profiles.get(user_event.user_id)
+        if profile is None:
+            profile = self.user_profiles[user_event.user_id] = StreamingUserProfile()
+        profile.update(user_event)
+        return profile
+    
+    def get_user_profile(self, user_id: str) -> Dict[str, Any]:
+        """Current profile summary for a user, or {} if none has been built yet."""
+        profile = self.user_profiles.get(user_id)
+        return profile.to_dict() if profile is not None else {}
+    
     def build_user_profile(self, user_events: List[UserEvent]) -> Dict[str, Any]:
-        """Build behavioral profile for a user."""
+        """Update the profiles of the users in user_events and return their summaries."""
         try:
             if not user_events:
                 return {}
             
-            # Group events by user
-            user_data = defaultdict(list)
             for event in user_events:
-                user_data[event.user_id].append(event)
-            
-            profiles = {}
-            for user_id, events in user_data.items():
-                # Calculate behavioral metrics
-                login_times = [event.timestamp.hour for event in events if event.action == 'login']
-                access_patterns = defaultdict(int)
-                ip_addresses = set()
-                user_agents = set()
-                
-                for event in events:
-                    access_patterns[event.resource] += 1
-                    ip_addresses.add(event.source_ip)
-                    user_agents.add(event.user_agent)
-                
-                profile = {
-                    'typical_login_hours': login_times,
-                    'avg_login_hour': np.mean(login_times) if login_times else 12,
-                    'std_login_hour': np.std(login_times) if login_times else 4,
-                    'common_resources': dict(access_patterns),
-                    'typical_ip_count': len(ip_addresses),
-                    'typical_user_agents': len(user_agents),
-                    'avg_session_duration': np.mean([
-                        (event.timestamp - events[i-1].timestamp).total_seconds() / 3600
-                        for i, event in enumerate(events[1:], 1)
-                        if event.action == 'logout' and events[i-1].action == 'login'
-                    ]) if len(events) > 1 else 1.0,
-                    'risk_score_baseline': np.mean([event.risk_score for event in events]),
-                    'failure_rate': len([e for e in events if not e.success]) / len(events)
-                }
-                
-                profiles[user_id] = profile
+                self.update_user_profile(event)
             
-            return profiles
+            return {
+                user_id: self.get_user_profile(user_id)
+                for user_id in dict.fromkeys(event.user_id for event in user_events)
+            }
             
         except Exception as e:
             self.logger.error(f"Failed to build user profile: {e}")
@@ -261,18 +257,22 @@ class BehavioralAnalyzer:
             if not user_profile:
                 return anomalies
             
-            # Time-based anomalies
-            login_hour = user_event.timestamp.hour
-            avg_hour = user_profile.get('avg_login_hour', 12)
-            std_hour = user_profile.get('std_login_hour', 4)
-            
-            if abs(login_hour - avg_hour) > 2 * std_hour:
-                anomalies.append({
-                    'type': 'unusual_login_time',
-                    'severity': 'medium',
-                    'description': f'Login at unusual hour: {login_hour}:00 (typical: {avg_hour:.1f}±{std_hour:.1f})',
-                    'score': min(abs(login_hour - avg_hour) / std_hour, 10) / 10
-                })
+            # Time-based anomalies, once the user has enough logins for a baseline
+            if user_profile.get('login_count', self.MIN_BASELINE_LOGINS) >= self.MIN_BASELINE_LOGINS:
+                login_hour = user_event.timestamp.hour
+                avg_hour = user_profile.get('avg_login_hour', 12)
+                std_hour = max(user_profile.get('std_login_hour', 4), self.MIN_LOGIN_HOUR_STD)
+                
+                # Hours wrap around midnight
+                hour_distance = abs(login_hour - avg_hour) % 24
+                hour_distance = min(hour_distance, 24 - hour_distance)
+                if hour_distance > 2 * std_hour:
+                    anomalies.append({
+                        'type': 'unusual_login_time',
+                        'severity': 'medium',
+                        'description': f'Login at unusual hour: {login_hour}:00 (typical: {avg_hour:.1f}±{std_hour:.1f})',
+                        'score': min(hour_distance / std_hour, 10) / 10
+                    })
             
             # Location-based anomalies
             if user_event.geolocation:
@@ -289,26 +289,27 @@ class BehavioralAnalyzer:
                                 'score': 0.9
                             })
             
-            # Risk score anomalies
-            baseline_risk = user_profile.get('risk_score_baseline', 0.5)
-            if user_event.risk_score > baseline_risk + 0.3:
-                anomalies.append({
-                    'type': 'elevated_risk_score',
-                    'severity': 'medium',
-                    'description': f'Risk score {user_event.risk_score:.2f} significantly above baseline {baseline_risk:.2f}',
-                    'score': min((user_event.risk_score - baseline_risk) / 0.5, 1.0)
-                })
-            
-            # Failed authentication patterns
-            if not user_event.success and user_event.action in ['login', 'authenticate']:
-                failure_rate = user_profile.get('failure_rate', 0.1)
-                if failure_rate < 0.05:  # Typically successful user
+            # Risk score and authentication anomalies, once the user has enough events for a baseline
+            if user_profile.get('event_count', self.MIN_BASELINE_EVENTS) >= self.MIN_BASELINE_EVENTS:
+                baseline_risk = user_profile.get('risk_score_baseline', 0.5)
+                if user_event.risk_score > baseline_risk + 0.3:
                     anomalies.append({
-                        'type': 'authentication_failure',
+                        'type': 'elevated_risk_score',
                         'severity': 'medium',
-                        'description': f'Authentication failure for typically successful user (baseline failure rate: {failure_rate:.2%})',
-                        'score': 0.6
+                        'description': f'Risk score {user_event.risk_score:.2f} significantly above baseline {baseline_risk:.2f}',
+                        'score': min((user_event.risk_score - baseline_risk) / 0.5, 1.0)
                     })
+                
+                # Failed authentication patterns
+                if not user_event.success and user_event.action in ['login', 'authenticate']:
+                    failure_rate = user_profile.get('failure_rate', 0.1)
+                    if failure_rate < 0.05:  # Typically successful user
+                        anomalies.append({
+                            'type': 'authentication_failure',
+                            'severity': 'medium',
+                            'description': f'Authentication failure for typically successful user (baseline failure rate: {failure_rate:.2%})',
+                            'score': 0.6
+                        })
             
             return anomalies
             
@@ -389,9 +390,33 @@ class BehavioralAnalyzer:
             self.logger.error(f"Failed to analyze network patterns: {e}")
             return {}
 
+@functools.lru_cache(maxsize=65536)
+def _ip_address_flags(ip: str) -> Optional[Tuple[float, float]]:
+    """(is_private, is_loopback) of an address, or None if it does not parse."""
+    try:
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return None
+    return float(address.is_private), float(address.is_loopback)
+
 class MLThreatDetector:
     """Machine learning-based threat detection engine."""
     
+    FILE_FEATURES = (
+        'file_size', 'file_name_length', 'file_path_depth', 'is_executable',
+        'has_double_extension', 'has_suspicious_chars', 'process_name_length',
+        'command_line_length', 'has_command_args', 'hour_of_day', 'day_of_week',
+        'is_weekend', 'operation_type'
+    )
+    NETWORK_FEATURES = (
+        'bytes_sent', 'bytes_received', 'total_bytes', 'duration', 'packet_count',
+        'payload_size', 'send_receive_ratio', 'bytes_per_second', 'packets_per_second',
+        'source_port', 'destination_port', 'is_common_port', 'is_high_port', 'protocol',
+        'is_private_src', 'is_private_dst', 'is_loopback_src', 'is_loopback_dst',
+        'hour_of_day', 'day_of_week', 'is_business_hours', 'http_method',
+        'response_code', 'is_error_response'
+    )
+    
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         
@@ -414,40 +439,7 @@ class MLThreatDetector:
     def extract_file_features(self, file_event: FileEvent) -> Dict[str, float]:
         """Extract features from file events for ML analysis."""
         try:
-            features = {}
-            
-            # File characteristics
-            features['file_size'] = file_event.file_size
-            features['file_name_length'] = len(file_event.file_name)
-            features['file_path_depth'] = len(file_event.file_path.split('/'))
-            
-            # File extension analysis
-            file_ext = file_event.file_name.split('.')[-1].lower() if '.' in file_event.file_name else ''
-            executable_extensions = {'exe', 'bat', 'cmd', 'scr', 'com', 'pif', 'vbs', 'js', 'jar'}
-            features['is_executable'] = 1.0 if file_ext in executable_extensions else 0.0
-            
-            # Suspicious file characteristics
-            features['has_double_extension'] = 1.0 if file_event.file_name.count('.') > 1 else 0.0
-            features['has_suspicious_chars'] = 1.0 if any(c in file_event.file_name for c in ['%', '$', '&', '!']) else 0.0
-            
-            # Process characteristics
-            features['process_name_length'] = len(file_event.process_name)
-            features['command_line_length'] = len(file_event.command_line)
-            features['has_command_args'] = 1.0 if ' ' in file_event.command_line else 0.0
-            
-            # Temporal features
-            features['hour_of_day'] = file_event.timestamp.hour
-            features['day_of_week'] = file_event.timestamp.weekday()
-            features['is_weekend'] = 1.0 if file_event.timestamp.weekday() >= 5 else 0.0
-            
-            # Operation type encoding
-            operation_encoding = {
-                'create': 1.0, 'modify': 2.0, 'delete': 3.0, 
-                'execute': 4.0, 'access': 5.0
-            }
-            features['operation_type'] = operation_encoding.get(file_event.operation, 0.0)
-            
-            return features
+            return dict(zip(self.FILE_FEATURES, self.file_feature_matrix([file_event])[0].tolist()))
             
         except Exception as e:
             self.logger.error(f"Failed to extract file features: {e}")
@@ -456,79 +448,117 @@ class MLThreatDetector:
     def extract_network_features(self, network_event: NetworkEvent) -> Dict[str, float]:
         """Extract features from network events for ML analysis."""
         try:
-            features = {}
-            
-            # Traffic characteristics
-            features['bytes_sent'] = network_event.bytes_sent
-            features['bytes_received'] = network_event.bytes_received
-            features['total_bytes'] = network_event.bytes_sent + network_event.bytes_received
-            features['duration'] = network_event.duration
-            features['packet_count'] = network_event.packet_count
-            features['payload_size'] = network_event.payload_size
-            
-            # Ratio features
-            if network_event.bytes_received > 0:
-                features['send_receive_ratio'] = network_event.bytes_sent / network_event.bytes_received
-            else:
-                features['send_receive_ratio'] = float('inf') if network_event.bytes_sent > 0 else 0.0
-            
-            if network_event.duration > 0:
-                features['bytes_per_second'] = features['total_bytes'] / network_event.duration
-                features['packets_per_second'] = network_event.packet_count / network_event.duration
-            else:
-                features['bytes_per_second'] = 0.0
-                features['packets_per_second'] = 0.0
-            
-            # Port analysis
-            features['source_port'] = network_event.source_port
-            features['destination_port'] = network_event.destination_port
-            features['is_common_port'] = 1.0 if network_event.destination_port in {80, 443, 22, 21, 25, 53} else 0.0
-            features['is_high_port'] = 1.0 if network_event.destination_port > 1024 else 0.0
-            
-            # Protocol encoding
-            protocol_encoding = {'tcp': 1.0, 'udp': 2.0, 'icmp': 3.0, 'http': 4.0, 'https': 5.0}
-            features['protocol'] = protocol_encoding.get(network_event.protocol.lower(), 0.0)
-            
-            # IP address analysis
-            try:
-                src_ip = ipaddress.ip_address(network_event.source_ip)
-                dst_ip = ipaddress.ip_address(network_event.destination_ip)
-                
-                features['is_private_src'] = 1.0 if src_ip.is_private else 0.0
-                features['is_private_dst'] = 1.0 if dst_ip.is_private else 0.0
-                features['is_loopback_src'] = 1.0 if src_ip.is_loopback else 0.0
-                features['is_loopback_dst'] = 1.0 if dst_ip.is_loopback else 0.0
-            except:
-                features['is_private_src'] = 0.0
-                features['is_private_dst'] = 0.0
-                features['is_loopback_src'] = 0.0
-                features['is_loopback_dst'] = 0.0
-            
-            # Temporal features
-            features['hour_of_day'] = network_event.timestamp.hour
-            features['day_of_week'] = network_event.timestamp.weekday()
-            features['is_business_hours'] = 1.0 if 9 <= network_event.timestamp.hour <= 17 else 0.0
-            
-            # HTTP-specific features
-            if network_event.http_method:
-                method_encoding = {'GET': 1.0, 'POST': 2.0, 'PUT': 3.0, 'DELETE': 4.0, 'HEAD': 5.0}
-                features['http_method'] = method_encoding.get(network_event.http_method, 0.0)
-            else:
-                features['http_method'] = 0.0
-            
-            if network_event.response_code:
-                features['response_code'] = network_event.response_code
-                features['is_error_response'] = 1.0 if network_event.response_code >= 400 else 0.0
-            else:
-                features['response_code'] = 0.0
-                features['is_error_response'] = 0.0
-            
-            return features
+            return dict(zip(self.NETWORK_FEATURES, self.network_feature_matrix([network_event])[0].tolist()))
             
         except Exception as e:
             self.logger.error(f"Failed to extract network features: {e}")
             return {}
     
+    def file_feature_matrix(self, file_events: List[FileEvent]) -> np.ndarray:
+        """Feature matrix of file events, one row per event and columns in FILE_FEATURES order."""
+        file_names = [event.file_name for event in file_events]
+        command_lines = [event.command_line for event in file_events]
+        timestamps = [event.timestamp for event in file_events]
+        
+        # File extension analysis
+        executable_extensions = {'exe', 'bat', 'cmd', 'scr', 'com', 'pif', 'vbs', 'js', 'jar'}
+        extensions = [name.rsplit('.', 1)[-1].lower() if '.' in name else '' for name in file_names]
+        
+        # Operation type encoding
+        operation_encoding = {
+            'create': 1.0, 'modify': 2.0, 'delete': 3.0,
+            'execute': 4.0, 'access': 5.0
+        }
+        weekdays = np.array([timestamp.weekday() for timestamp in timestamps], dtype=float)
+        
+        return np.column_stack([
+            # File characteristics
+            np.array([event.file_size for event in file_events], dtype=float),
+            np.array([len(name) for name in file_names], dtype=float),
+            np.array([event.file_path.count('/') + 1 for event in file_events], dtype=float),
+            np.array([ext in executable_extensions for ext in extensions], dtype=float),
+            # Suspicious file characteristics
+            np.array([name.count('.') > 1 for name in file_names], dtype=float),
+            np.array([any(c in name for c in '%$&!') for name in file_names], dtype=float),
+            # Process characteristics
+            np.array([len(event.process_name) for event in file_events], dtype=float),
+            np.array([len(command_line) for command_line in command_lines], dtype=float),
+            np.array([' ' in command_line for command_line in command_lines], dtype=float),
+            # Temporal features
+            np.array([timestamp.hour for timestamp in timestamps], dtype=float),
+            weekdays,
+            (weekdays >= 5).astype(float),
+            np.array([operation_encoding.get(event.operation, 0.0) for event in file_events], dtype=float)
+        ]).reshape(len(file_events), len(self.FILE_FEATURES))
+    
+    def network_feature_matrix(self, network_events: List[NetworkEvent]) -> np.ndarray:
+        """Feature matrix of network events, one row per event and columns in NETWORK_FEATURES order."""
+        def column(attribute: str) -> np.ndarray:
+            return np.array([getattr(event, attribute) for event in network_events], dtype=float)
+        
+        # Traffic characteristics
+        bytes_sent = column('bytes_sent')
+        bytes_received = column('bytes_received')
+        total_bytes = bytes_sent + bytes_received
+        duration = column('duration')
+        packet_count = column('packet_count')
+        
+        # Ratio features
+        with np.errstate(divide='ignore', invalid='ignore'):
+            send_receive_ratio = np.where(
+                bytes_received > 0, bytes_sent / bytes_received,
+                np.where(bytes_sent > 0, np.inf, 0.0)
+            )
+            bytes_per_second = np.where(duration > 0, total_bytes / duration, 0.0)
+            packets_per_second = np.where(duration > 0, packet_count / duration, 0.0)
+        
+        # Port analysis
+        destination_port = column('destination_port')
+        common_ports = np.array([80, 443, 22, 21, 25, 53], dtype=float)
+        
+        # Protocol encoding
+        protocol_encoding = {'tcp': 1.0, 'udp': 2.0, 'icmp': 3.0, 'http': 4.0, 'https': 5.0}
+        
+        # IP address analysis; all four flags are 0 unless both addresses parse
+        ip_flags = np.zeros((len(network_events), 4))
+        for row, event in enumerate(network_events):
+            source_flags = _ip_address_flags(event.source_ip)
+            destination_flags = _ip_address_flags(event.destination_ip)
+            if source_flags and destination_flags:
+                ip_flags[row] = (source_flags[0], destination_flags[0], source_flags[1], destination_flags[1])
+        
+        # Temporal features
+        hours = np.array([event.timestamp.hour for event in network_events], dtype=float)
+        
+        # HTTP-specific features
+        method_encoding = {'GET': 1.0, 'POST': 2.0, 'PUT': 3.0, 'DELETE': 4.0, 'HEAD': 5.0}
+        response_codes = np.array([event.response_code or 0 for event in network_events], dtype=float)
+        
+        return np.column_stack([
+            bytes_sent,
+            bytes_received,
+            total_bytes,
+            duration,
+            packet_count,
+            column('payload_size'),
+            send_receive_ratio,
+            bytes_per_second,
+            packets_per_second,
+            column('source_port'),
+            destination_port,
+            np.isin(destination_port, common_ports).astype(float),
+            (destination_port > 1024).astype(float),
+            np.array([protocol_encoding.get(event.protocol.lower(), 0.0) for event in network_events]),
+            ip_flags,
+            hours,
+            np.array([event.timestamp.weekday() for event in network_events], dtype=float),
+            ((hours >= 9) & (hours <= 17)).astype(float),
+            np.array([method_encoding.get(event.http_method, 0.0) if event.http_method else 0.0
+                      for event in network_events]),
+            response_codes,
+            (response_codes >= 400).astype(float)
+        ]).reshape(len(network_events), len(self.NETWORK_FEATURES))
+    
     def train_models(self, training_data: Dict[str, List[Any]]) -> bool:
         """Train ML models on historical threat data."""
         try:
@@ -536,13 +566,8 @@ class MLThreatDetector:
             
             # Prepare file-based training data
             if 'file_events' in training_data and 'file_labels' in training_data:
-                file_features = []
-                for event in training_data['file_events']:
-                    features = self.extract_file_features(event)
-                    file_features.append(list(features.values()))
-                
-                if file_features:
-                    X_file = np.array(file_features)
+                if training_data['file_events']:
+                    X_file = self.file_feature_matrix(training_data['file_events'])
                     y_file = np.array(training_data['file_labels'])
                     
                     # Scale features
@@ -566,20 +591,14 @@ class MLThreatDetector:
                     }
                     
                     # Store feature importance
-                    feature_names = list(self.extract_file_features(training_data['file_events'][0]).keys())
                     self.feature_importance['malware_classifier'] = dict(
-                        zip(feature_names, self.malware_classifier.feature_importances_)
+                        zip(self.FILE_FEATURES, self.malware_classifier.feature_importances_)
                     )
             
             # Prepare network-based training data
             if 'network_events' in training_data and 'network_labels' in training_data:
-                network_features = []
-                for event in training_data['network_events']:
-                    features = self.extract_network_features(event)
-                    network_features.append(list(features.values()))
-                
-                if network_features:
-                    X_network = np.array(network_features)
+                if training_data['network_events']:
+                    X_network = self.network_feature_matrix(training_data['network_events'])
                     y_network = np.array(training_data['network_labels'])
                     
                     # Train anomaly detector
@@ -611,62 +630,101 @@ class MLThreatDetector:
     
     def predict_threat(self, event: Union[FileEvent, NetworkEvent]) -> Dict[str, Any]:
         """Predict threat probability for an event."""
-        try:
-            if not self.is_trained:
-                return {'threat_probability': 0.5, 'confidence': 0.0, 'method': 'untrained'}
-            
-            if isinstance(event, FileEvent):
-                features = self.extract_file_features(event)
-                feature_vector = np.array([list(features.values())])
-                
-                # Scale features
-                feature_vector_scaled = self.scaler.transform(feature_vector)
-                
-                # Predict with malware classifier
-                threat_prob = self.malware_classifier.predict_proba(feature_vector_scaled)[0][1]
-                confidence = max(self.malware_classifier.predict_proba(feature_vector_scaled)[0])
-                
-                return {
-                    'threat_probability': threat_prob,
-                    'confidence': confidence,
-                    'method': 'malware_classifier',
-                    'features_used': list(features.keys())
-                }
-                
-            elif isinstance(event, NetworkEvent):
-                features = self.extract_network_features(event)
-                feature_vector = np.array([list(features.values())])
-                
-                # Anomaly detection
-                anomaly_score = self.anomaly_detector.decision_function(feature_vector)[0]
-                is_anomaly = self.anomaly_detector.predict(feature_vector)[0] == -1
-                
-                # Neural classifier prediction
-                neural_prob = 0.5
-                if hasattr(self.neural_classifier, 'predict_proba'):
+        return self.predict_threats([event])[0]
+    
+    def predict_threats(self, events: List[Union[FileEvent, NetworkEvent]]) -> List[Dict[str, Any]]:
+        """
+        Predict threat probabilities for a batch of events, in order.
+        
+        Features are extracted as one matrix per event type and each model
+        is called once per type, rather than once or twice per event.
+        """
+        if not self.is_trained:
+            return [{'threat_probability': 0.5, 'confidence': 0.0, 'method': 'untrained'} for _ in events]
+        
+        results: List[Optional[Dict[str, Any]]] = [None] * len(events)
+        file_rows = [i for i, event in enumerate(events) if isinstance(event, FileEvent)]
+        network_rows = [i for i, event in enumerate(events) if isinstance(event, NetworkEvent)]
+        
+        for rows, predict in ((file_rows, self._predict_file_threats),
+                              (network_rows, self._predict_network_threats)):
+            if not rows:
+                continue
+            batch = [events[i] for i in rows]
+            try:
+                predictions = predict(batch)
+            except Exception as e:
+                if len(batch) == 1:
+                    self.logger.error(f"Failed to predict threat: {e}")
+                    predictions = [{'threat_probability': 0.5, 'confidence': 0.0, 'method': 'error'}]
+                else:
+                    # Isolate the events that cannot be scored
+                    predictions = [self.predict_threats([event])[0] for event in batch]
+            for i, prediction in zip(rows, predictions):
+                results[i] = prediction
+        
+        return [
+            result if result is not None
+            else {'threat_probability': 0.5, 'confidence': 0.0, 'method': 'unknown_event_type'}
+            for result in results
+        ]
+    
+    def _predict_file_threats(self, file_events: List[FileEvent]) -> List[Dict[str, Any]]:
+        feature_matrix = self.scaler.transform(self.file_feature_matrix(file_events))
+        
+        # Predict with malware classifier
+        probabilities = self.malware_classifier.predict_proba(feature_matrix)
+        threat_probs = probabilities[:, 1]
+        confidences = probabilities.max(axis=1)
+        
+        features_used = list(self.FILE_FEATURES)
+        return [
+            {
+                'threat_probability': float(threat_prob),
+                'confidence': float(confidence),
+                'method': 'malware_classifier',
+                'features_used': features_used
+            }
+            for threat_prob, confidence in zip(threat_probs, confidences)
+        ]
+    
+    def _predict_network_threats(self, network_events: List[NetworkEvent]) -> List[Dict[str, Any]]:
+        feature_matrix = self.network_feature_matrix(network_events)
+        
+        # Anomaly detection; IsolationForest.predict is -1 exactly where decision_function < 0
+        anomaly_scores = self.anomaly_detector.decision_function(feature_matrix)
+        is_anomaly = anomaly_scores < 0
+        
+        # Neural classifier prediction; rows it cannot score (e.g. an infinite
+        # send/receive ratio) fall back to 0.5 without failing the rest of the batch
+        neural_probs = np.full(len(network_events), 0.5)
+        finite = np.isfinite(feature_matrix).all(axis=1)
+        if finite.any():
+            try:
+                neural_probs[finite] = self.neural_classifier.predict_proba(feature_matrix[finite])[:, 1]
+            except Exception:
+                for i in np.flatnonzero(finite):
                     try:
-                        neural_prob = self.neural_classifier.predict_proba(feature_vector)[0][1]
-                    except:
-                        neural_prob = 0.5
-                
-                # Combine predictions
-                combined_prob = (neural_prob + (1.0 if is_anomaly else 0.0)) / 2
-                
-                return {
-                    'threat_probability': combined_prob,
-                    'confidence': abs(anomaly_score),
-                    'method': 'combined_network_analysis',
-                    'anomaly_score': anomaly_score,
-                    'is_anomaly': is_anomaly,
-                    'neural_probability': neural_prob,
-                    'features_used': list(features.keys())
-                }
-            
-            return {'threat_probability': 0.5, 'confidence': 0.0, 'method': 'unknown_event_type'}
-            
-        except Exception as e:
-            self.logger.error(f"Failed to predict threat: {e}")
-            return {'threat_probability': 0.5, 'confidence': 0.0, 'method': 'error'}
+                        neural_probs[i] = self.neural_classifier.predict_proba(feature_matrix[i:i + 1])[0, 1]
+                    except Exception:
+                        pass
+        
+        # Combine predictions
+        combined_probs = (neural_probs + is_anomaly) / 2
+        
+        features_used = list(self.NETWORK_FEATURES)
+        return [
+            {
+                'threat_probability': float(combined_probs[i]),
+                'confidence': abs(float(anomaly_scores[i])),
+                'method': 'combined_network_analysis',
+                'anomaly_score': float(anomaly_scores[i]),
+                'is_anomaly': bool(is_anomaly[i]),
+                'neural_probability': float(neural_probs[i]),
+                'features_used': features_used
+            }
+            for i in range(len(network_events))
+        ]
 
 class ZeroDayDetector:
     """Zero-day threat detection using behavioral analysis."""
@@ -886,14 +944,24 @@ class AdvancedThreatDetectionEngine:
         self.ml_detector = MLThreatDetector()
         self.zero_day_detector = ZeroDayDetector()
         
-        # Threat intelligence
+        # Per-event ML predictions are micro-batched and run off the event loop
+        self.ml_inference = BatchInferenceService(
+            self.ml_detector.predict_threats, max_batch_size=256, max_delay_ms=5.0
+        )
+        
+        # Threat intelligence; ioc_index is replaced, never mutated, on updates
         self.threat_indicators: Dict[str, ThreatIndicator] = {}
+        self.ioc_index = IOCIndex()
+        self._ioc_update_lock = asyncio.Lock()
         self.detection_rules = {}
         
         # Detection storage
         self.active_detections: Dict[str, ThreatDetection] = {}
         self.detection_history = deque(maxlen=10000)
         
+        # Correlates detections within a sliding 1-hour window, across analysis batches
+        self.correlator = DetectionCorrelator(window_seconds=3600)
+        
         # Performance metrics
         self.detection_metrics = defaultdict(list)
         self.false_positive_rate = 0.005  # Target: 0.5% false positive rate
@@ -921,6 +989,7 @@ class AdvancedThreatDetectionEngine:
             
             # Start background processing
             self.system_active = True
+            self.ml_inference.start()
             self.processing_tasks = [
                 asyncio.create_task(self._threat_correlation_engine()),
                 asyncio.create_task(self._model_performance_monitor()),
@@ -948,6 +1017,8 @@ class AdvancedThreatDetectionEngine:
                     except asyncio.CancelledError:
                         pass
             
+            await self.ml_inference.stop()
+            
             self.logger.info("Advanced Threat Detection Engine shutdown complete")
             
         except Exception as e:
@@ -978,9 +1049,12 @@ class AdvancedThreatDetectionEngine:
             # Correlate detections for multi-vector attacks
             correlated_detections = await self._correlate_detections(detections)
             
-            # Store detections
+            # Store detections; correlated detections are updated in place as their group grows
             for detection in correlated_detections:
+                is_new = detection.detection_id not in self.active_detections
                 self.active_detections[detection.detection_id] = detection
+                if not is_new:
+                    continue
                 self.detection_history.append({
                     'detection_id': detection.detection_id,
                     'category': detection.threat_category.value,
@@ -1031,9 +1105,8 @@ class AdvancedThreatDetectionEngine:
                     detections.append(detection)
             
             # ML-based analysis
-            for event in network_events:
-                ml_result = self.ml_detector.predict_threat(event)
-                
+            ml_results = await self.ml_inference.submit_many(network_events)
+            for event, ml_result in zip(network_events, ml_results):
                 if ml_result['threat_probability'] > 0.7:
                     detection = ThreatDetection(
                         detection_id=str(uuid.uuid4()),
@@ -1098,10 +1171,9 @@ class AdvancedThreatDetectionEngine:
         try:
             detections = []
             
-            for event in file_events:
-                # ML-based malware detection
-                ml_result = self.ml_detector.predict_threat(event)
-                
+            # ML-based malware detection
+            ml_results = await self.ml_inference.submit_many(file_events)
+            for event, ml_result in zip(file_events, ml_results):
                 if ml_result['threat_probability'] > 0.8:
                     detection = ThreatDetection(
                         detection_id=str(uuid.uuid4()),
@@ -1129,8 +1201,7 @@ class AdvancedThreatDetectionEngine:
                 
                 # Hash-based IOC matching
                 if event.file_hash:
-                    hash_iocs = [ioc for ioc in self.threat_indicators.values() 
-                                if ioc.indicator_type == 'hash' and ioc.value == event.file_hash]
+                    hash_iocs = self.ioc_index.match_hash(event.file_hash)
                     
                     for ioc in hash_iocs:
                         detection = ThreatDetection(
@@ -1195,12 +1266,11 @@ class AdvancedThreatDetectionEngine:
         try:
             detections = []
             
-            # Build user profiles
-            user_profiles = self.behavioral_analyzer.build_user_profile(user_events)
-            
             for event in user_events:
-                user_profile = user_profiles.get(event.user_id, {})
+                # Compare against the baseline before this event, then fold it in
+                user_profile = self.behavioral_analyzer.get_user_profile(event.user_id)
                 anomalies = self.behavioral_analyzer.detect_user_anomalies(event, user_profile)
+                self.behavioral_analyzer.update_user_profile(event)
                 
                 for anomaly in anomalies:
                     if anomaly['score'] > 0.7:
@@ -1368,19 +1438,20 @@ class AdvancedThreatDetectionEngine:
     def _check_network_iocs(self, network_event: NetworkEvent) -> List[ThreatIndicator]:
         """Check network event against threat indicators."""
         try:
+            # One reference per event, so a concurrent index swap cannot mix versions
+            ioc_index = self.ioc_index
             matches = []
             
-            # Check source and destination IPs
+            # Check source and destination IPs, exact or within indicator ranges
             for ip in [network_event.source_ip, network_event.destination_ip]:
-                ip_iocs = [ioc for ioc in self.threat_indicators.values() 
-                          if ioc.indicator_type == 'ip' and ioc.value == ip]
-                matches.extend(ip_iocs)
+                matches.extend(ioc_index.match_ip(ip))
+            
+            # Check the requested domain if the collector recorded one
+            matches.extend(ioc_index.match_domain(network_event.metadata.get('domain')))
             
             # Check URL if available
             if network_event.url_path:
-                url_iocs = [ioc for ioc in self.threat_indicators.values() 
-                           if ioc.indicator_type == 'url' and ioc.value in network_event.url_path]
-                matches.extend(url_iocs)
+                matches.extend(ioc_index.match_substrings(network_event.url_path, 'url'))
             
             return matches
             
@@ -1389,66 +1460,37 @@ class AdvancedThreatDetectionEngine:
             return []
     
     async def _correlate_detections(self, detections: List[ThreatDetection]) -> List[ThreatDetection]:
-        """Correlate individual detections to identify multi-vector attacks."""
+        """
+        Correlate individual detections to identify multi-vector attacks.
+        
+        Detections sharing an affected asset or attack vector within an hour
+        of each other, in this batch or earlier ones, form a group. Each
+        detection in a group of two or more is replaced by the group's
+        correlated detection, which keeps its id and is extended in place
+        as the group grows.
+        """
         try:
-            if len(detections) < 2:
-                return detections
+            groups: List[Optional[CorrelationGroup]] = []
+            for detection in detections:
+                group, merged_group_ids = self.correlator.add(detection)
+                groups.append(group)
+                # Groups merged into another one are superseded by its correlated detection
+                for group_id in merged_group_ids:
+                    self.active_detections.pop(group_id, None)
             
             correlated = []
-            processed = set()
-            
-            for i, detection1 in enumerate(detections):
-                if i in processed:
-                    continue
-                
-                related_detections = [detection1]
-                
-                for j, detection2 in enumerate(detections[i+1:], i+1):
-                    if j in processed:
-                        continue
-                    
-                    # Check for correlation criteria
-                    time_diff = abs((detection1.detected_at - detection2.detected_at).total_seconds())
-                    
-                    # Correlate if within 1 hour and share assets or similar attack vectors
-                    if (time_diff < 3600 and 
-                        (set(detection1.affected_assets) & set(detection2.affected_assets) or
-                         detection1.attack_vector == detection2.attack_vector)):
-                        
-                        related_detections.append(detection2)
-                        processed.add(j)
-                
-                if len(related_detections) > 1:
-                    # Create correlated detection
-                    correlated_detection = ThreatDetection(
-                        detection_id=str(uuid.uuid4()),
-                        threat_category=ThreatCategory.APT,  # Multi-vector suggests APT
-                        severity=ThreatSeverity.CRITICAL,
-                        confidence=min(1.0, sum(d.confidence for d in related_detections) / len(related_detections) + 0.2),
-                        detection_method=DetectionMethod.BEHAVIORAL_ANALYSIS,
-                        title="Multi-Vector Attack Detected",
-                        description=f"Correlated {len(related_detections)} related threat detections indicating coordinated attack",
-                        affected_assets=list(set().union(*[d.affected_assets for d in related_detections])),
-                        indicators=list(set().union(*[d.indicators for d in related_detections])),
-                        timeline=[],
-                        attack_vector="multi_vector",
-                        potential_impact="Advanced persistent threat with multiple attack vectors",
-                        recommended_actions=[
-                            "Activate incident response team",
-                            "Isolate all affected systems",
-                            "Conduct forensic analysis",
-                            "Check for additional compromise indicators"
-                        ],
-                        mitre_tactics=["TA0001", "TA0002", "TA0005"],  # Multiple tactics
-                        mitre_techniques=["T1078", "T1059", "T1055"],  # Multiple techniques
-                        detected_at=datetime.utcnow(),
-                        metadata={'correlated_detections': [d.detection_id for d in related_detections]}
-                    )
-                    correlated.append(correlated_detection)
-                else:
-                    correlated.append(detection1)
-                
-                processed.add(i)
+            emitted_groups = set()
+            for detection, group in zip(detections, groups):
+                group = group.root() if group is not None else None
+                if group is None or len(group) < 2:
+                    correlated.append(detection)
+                elif group.group_id not in emitted_groups:
+                    emitted_groups.add(group.group_id)
+                    existing = self.active_detections.get(group.group_id)
+                    if existing is not None:
+                        correlated.append(self._update_correlated_detection(existing, group))
+                    else:
+                        correlated.append(self._build_correlated_detection(group))
             
             return correlated
             
@@ -1456,6 +1498,50 @@ class AdvancedThreatDetectionEngine:
             self.logger.error(f"Failed to correlate detections: {e}")
             return detections
     
+    def _build_correlated_detection(self, group: CorrelationGroup) -> ThreatDetection:
+        """Correlated detection summarizing a group of related detections."""
+        return ThreatDetection(
+            detection_id=group.group_id,
+            threat_category=ThreatCategory.APT,  # Multi-vector suggests APT
+            severity=ThreatSeverity.CRITICAL,
+            confidence=min(1.0, group.mean_confidence + 0.2),
+            detection_method=DetectionMethod.BEHAVIORAL_ANALYSIS,
+            title="Multi-Vector Attack Detected",
+            description=f"Correlated {len(group)} related threat detections indicating coordinated attack",
+            affected_assets=list(group.assets),
+            indicators=list(group.indicators),
+            timeline=[],
+            attack_vector="multi_vector",
+            potential_impact="Advanced persistent threat with multiple attack vectors",
+            recommended_actions=[
+                "Activate incident response team",
+                "Isolate all affected systems",
+                "Conduct forensic analysis",
+                "Check for additional compromise indicators"
+            ],
+            mitre_tactics=["TA0001", "TA0002", "TA0005"],  # Multiple tactics
+            mitre_techniques=["T1078", "T1059", "T1055"],  # Multiple techniques
+            detected_at=datetime.utcnow(),
+            metadata={
+                'correlated_detections': list(group.detection_ids),
+                'first_seen': group.first_seen.isoformat(),
+                'last_seen': group.last_seen.isoformat()
+            }
+        )
+    
+    def _update_correlated_detection(self, correlated: ThreatDetection, group: CorrelationGroup) -> ThreatDetection:
+        """Extend a group's correlated detection with the members added since it was last built."""
+        # A group's member lists only grow at the end, so only the new tail is copied
+        detection_ids = correlated.metadata['correlated_detections']
+        detection_ids.extend(group.detection_ids[len(detection_ids):])
+        correlated.affected_assets.extend(group.assets[len(correlated.affected_assets):])
+        correlated.indicators.extend(group.indicators[len(correlated.indicators):])
+        correlated.confidence = min(1.0, group.mean_confidence + 0.2)
+        correlated.description = f"Correlated {len(group)} related threat detections indicating coordinated attack"
+        correlated.metadata['first_seen'] = group.first_seen.isoformat()
+        correlated.metadata['last_seen'] = group.last_seen.isoformat()
+        return correlated
+    
     async def get_detection_analytics(self, time_period_days: int = 7) -> Dict[str, Any]:
         """Get threat detection analytics."""
         try:
@@ -1517,6 +1603,10 @@ class AdvancedThreatDetectionEngine:
                     'daily_detections': {str(k): v for k, v in daily_detections.items()}
                 },
                 'model_performance': self.ml_detector.model_metrics,
+                'threat_intelligence': self.ioc_index.get_stats(),
+                'ml_inference': self.ml_inference.get_stats(),
+                'correlation': self.correlator.get_stats(),
+                'profiled_users': len(self.behavioral_analyzer.user_profiles),
                 'false_positive_rate': self.false_positive_rate
             }
             
@@ -1588,8 +1678,7 @@ class AdvancedThreatDetectionEngine:
                 )
             ]
             
-            for indicator in sample_indicators:
-                self.threat_indicators[indicator.indicator_id] = indicator
+            await self.apply_threat_intelligence_update(sample_indicators)
             
             self.logger.info(f"Loaded {len(sample_indicators)} threat indicators")
             
@@ -1650,20 +1739,10 @@ class AdvancedThreatDetectionEngine:
             while self.system_active:
                 await asyncio.sleep(60)  # Run every minute
                 
-                # Get recent detections for correlation
-                recent_detections = [
-                    det for det in self.active_detections.values()
-                    if (datetime.utcnow() - det.detected_at).total_seconds() < 3600  # Last hour
-                ]
-                
-                if len(recent_detections) > 1:
-                    # Look for correlation patterns
-                    correlated = await self._correlate_detections(recent_detections)
-                    
-                    # Update active detections with any new correlations
-                    for detection in correlated:
-                        if detection.detection_id not in self.active_detections:
-                            self.active_detections[detection.detection_id] = detection
+                # Correlation happens as detections arrive; slide the window even when idle
+                expired_groups = self.correlator.evict(datetime.utcnow())
+                if expired_groups:
+                    self.logger.debug(f"Expired {expired_groups} detection correlation groups")
                 
         except asyncio.CancelledError:
             pass
@@ -1700,15 +1779,45 @@ class AdvancedThreatDetectionEngine:
         except Exception as e:
             self.logger.error(f"Model performance monitor error: {e}")
     
+    async def apply_threat_intelligence_update(self, upserts: List[ThreatIndicator],
+                                               removed_ids: Optional[List[str]] = None) -> None:
+        """
+        Add, replace and remove threat indicators.
+        
+        The new IOC index is built in the default executor from the current
+        one and swapped in by a single assignment; updates are serialized so
+        none is lost to a concurrent one.
+        """
+        removed_ids = removed_ids or []
+        async with self._ioc_update_lock:
+            loop = asyncio.get_running_loop()
+            ioc_index = await loop.run_in_executor(None, self.ioc_index.updated, upserts, removed_ids)
+            
+            for indicator_id in removed_ids:
+                self.threat_indicators.pop(indicator_id, None)
+            for indicator in upserts:
+                self.threat_indicators[indicator.indicator_id] = indicator
+            self.ioc_index = ioc_index
+    
+    async def _fetch_threat_intelligence_updates(self) -> Tuple[List[ThreatIndicator], List[str]]:
+        """New or changed indicators, and ids of withdrawn ones, since the last fetch."""
+        # In production, this would fetch from external threat intel feeds
+        return [], []
+    
     async def _threat_intelligence_updater(self) -> None:
         """Background task to update threat intelligence."""
         try:
             while self.system_active:
                 await asyncio.sleep(3600)  # Update every hour
                 
-                # In production, this would fetch from external threat intel feeds
-                # For now, just log the update
-                self.logger.info("Threat intelligence update check completed")
+                upserts, removed_ids = await self._fetch_threat_intelligence_updates()
+                if upserts or removed_ids:
+                    await self.apply_threat_intelligence_update(upserts, removed_ids)
+                
+                self.logger.info(
+                    f"Threat intelligence update check completed: {len(upserts)} updated, "
+                    f"{len(removed_ids)} removed, {len(self.ioc_index)} indexed"
+                )
                 
         except asyncio.CancelledError:
             pass
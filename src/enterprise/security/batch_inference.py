@@ -0,0 +1,169 @@
+"""
+Micro-batching inference service for ACSO Enterprise threat detection.
+
+Collects items submitted from the event loop into batches of up to
+`max_batch_size` items, or whatever arrived within `max_delay_ms` of the
+first one, and runs the batch prediction function on a worker pool so the
+event loop stays responsive while models run.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class BatchInferenceService:
+    """
+    Batches single-item predictions into calls of `predict_batch`.
+
+    `predict_batch` takes a list of items and returns one result per item,
+    in order. It runs on `executor`, by default a thread pool with one
+    thread per concurrent batch; NumPy and scikit-learn release the GIL in
+    their heavy loops. A process pool may be passed instead if
+    `predict_batch` and the items can be pickled.
+    """
+
+    def __init__(self,
+                 predict_batch: Callable[[List[Any]], Sequence[Any]],
+                 max_batch_size: int = 256,
+                 max_delay_ms: float = 5.0,
+                 max_concurrent_batches: int = 2,
+                 executor: Optional[Executor] = None):
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay_ms / 1000.0
+        self.max_concurrent_batches = max_concurrent_batches
+
+        self._owns_executor = executor is None
+        self._executor = executor
+        self._pending: Deque[Tuple[Any, asyncio.Future, float]] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._full: Optional[asyncio.Event] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._in_flight: Set[asyncio.Task] = set()
+        self._running = False
+
+        self.stats: Dict[str, float] = {
+            'items': 0,
+            'batches': 0,
+            'failed_batches': 0,
+            'max_batch_size_seen': 0,
+            'inference_seconds': 0.0,
+            'queue_wait_seconds': 0.0
+        }
+
+    def start(self) -> None:
+        if self._running:
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrent_batches, thread_name_prefix="ml-inference"
+            )
+        self._wakeup = asyncio.Event()
+        self._full = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.max_concurrent_batches)
+        self._running = True
+        self._worker = asyncio.create_task(self._batch_loop())
+
+    async def stop(self) -> None:
+        """Stop batching; items already submitted are still predicted."""
+        if not self._running:
+            return
+        self._running = False
+        self._wakeup.set()
+        self._full.set()
+        await self._worker
+        self._worker = None
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+        if self._owns_executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def submit(self, item: Any) -> Any:
+        """Predict one item as part of the next batch."""
+        if not self._running:
+            self.start()
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future, time.monotonic()))
+        if len(self._pending) == 1:
+            self._wakeup.set()
+        if len(self._pending) >= self.max_batch_size:
+            self._full.set()
+        return await future
+
+    async def submit_many(self, items: Sequence[Any]) -> List[Any]:
+        """Predict several items; they share batches with concurrent submitters."""
+        return list(await asyncio.gather(*(self.submit(item) for item in items)))
+
+    async def _batch_loop(self) -> None:
+        while self._running or self._pending:
+            if not self._pending:
+                self._wakeup.clear()
+                if not self._running:
+                    break
+                await self._wakeup.wait()
+                continue
+
+            # Give a partial batch until its first item is max_delay old to fill up
+            if self._running and len(self._pending) < self.max_batch_size:
+                self._full.clear()
+                remaining = self._pending[0][2] + self.max_delay - time.monotonic()
+                if remaining > 0:
+                    try:
+                        await asyncio.wait_for(self._full.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        pass
+
+            batch = [self._pending.popleft() for _ in range(min(self.max_batch_size, len(self._pending)))]
+            await self._slots.acquire()
+            task = asyncio.create_task(self._run_batch(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _run_batch(self, batch: List[Tuple[Any, asyncio.Future, float]]) -> None:
+        try:
+            started = time.monotonic()
+            items = [item for item, _, _ in batch]
+            try:
+                results = await asyncio.get_running_loop().run_in_executor(
+                    self._executor, self.predict_batch, items
+                )
+                if len(results) != len(items):
+                    raise ValueError(f"predict_batch returned {len(results)} results for {len(items)} items")
+            except Exception as e:
+                self.stats['failed_batches'] += 1
+                logger.error(f"Batch inference failed for {len(items)} items: {e}")
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+            for (_, future, _), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+            self.stats['items'] += len(batch)
+            self.stats['batches'] += 1
+            self.stats['max_batch_size_seen'] = max(self.stats['max_batch_size_seen'], len(batch))
+            self.stats['inference_seconds'] += time.monotonic() - started
+            self.stats['queue_wait_seconds'] += sum(started - enqueued for _, _, enqueued in batch)
+        finally:
+            self._slots.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        items, batches = self.stats['items'], self.stats['batches']
+        return {
+            **self.stats,
+            'pending': len(self._pending),
+            'in_flight_batches': len(self._in_flight),
+            'mean_batch_size': items / batches if batches else 0.0,
+            'mean_queue_wait_ms': 1000 * self.stats['queue_wait_seconds'] / items if items else 0.0,
+            'mean_inference_ms': 1000 * self.stats['inference_seconds'] / batches if batches else 0.0
+        }
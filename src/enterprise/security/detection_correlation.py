@@ -0,0 +1,247 @@
+"""
+Streaming detection correlation for ACSO Enterprise threat detection.
+
+Groups detections that share an affected asset or an attack vector within
+a sliding time window, across analysis batches. Each correlation key
+(asset or attack vector) maps to the group that last saw it, so a new
+detection is merged with its neighbours by looking up its own keys rather
+than by comparing it with every recent detection. A group never spans
+more than one window or grows past a size cap, so a key seen continuously
+starts a new group rather than keeping one alive. Keys are evicted in time
+buckets as the window slides, and groups in creation order.
+"""
+
+import uuid
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Deque, Dict, Hashable, List, Optional, Set, Tuple
+
+
+class CorrelationGroup:
+    """
+    Detections correlated with each other, with running aggregates so a
+    group's summary never requires revisiting its members.
+
+    The member lists of a root group only ever grow at the end, so a
+    summary built from them can be brought up to date from its lengths.
+    """
+
+    def __init__(self, first_seen: datetime):
+        self.group_id = str(uuid.uuid4())
+        self.detection_ids: List[str] = []
+        self.assets: List[str] = []
+        self.indicators: List[Any] = []
+        self._asset_set: Set[str] = set()
+        self._indicator_ids: Set[str] = set()
+        self.confidence_sum = 0.0
+        self.first_seen = first_seen
+        self.last_seen = first_seen
+        # Union-find: groups merged into another point at it
+        self._parent: Optional['CorrelationGroup'] = None
+
+    def __len__(self) -> int:
+        return len(self.detection_ids)
+
+    @property
+    def mean_confidence(self) -> float:
+        return self.confidence_sum / len(self.detection_ids) if self.detection_ids else 0.0
+
+    def root(self) -> 'CorrelationGroup':
+        group = self
+        while group._parent is not None:
+            group = group._parent
+        # Path compression
+        node = self
+        while node._parent is not None and node._parent is not group:
+            node._parent, node = group, node._parent
+        return group
+
+    def _add_assets(self, assets: List[str]) -> None:
+        for asset in assets:
+            if asset not in self._asset_set:
+                self._asset_set.add(asset)
+                self.assets.append(asset)
+
+    def _add_indicators(self, indicators: List[Any]) -> None:
+        for indicator in indicators:
+            if indicator.indicator_id not in self._indicator_ids:
+                self._indicator_ids.add(indicator.indicator_id)
+                self.indicators.append(indicator)
+
+    def _add(self, detection: Any) -> None:
+        self.detection_ids.append(detection.detection_id)
+        self._add_assets(detection.affected_assets)
+        self._add_indicators(detection.indicators)
+        self.confidence_sum += detection.confidence
+        self.first_seen = min(self.first_seen, detection.detected_at)
+        self.last_seen = max(self.last_seen, detection.detected_at)
+
+    def _absorb(self, other: 'CorrelationGroup') -> None:
+        self.detection_ids.extend(other.detection_ids)
+        self._add_assets(other.assets)
+        self._add_indicators(other.indicators)
+        self.confidence_sum += other.confidence_sum
+        self.first_seen = min(self.first_seen, other.first_seen)
+        self.last_seen = max(self.last_seen, other.last_seen)
+        other._parent = self
+        other.detection_ids, other.assets, other.indicators = [], [], []
+        other._asset_set, other._indicator_ids = set(), set()
+
+
+class DetectionCorrelator:
+    """
+    Sliding-window correlation of detections by affected asset and attack vector.
+
+    A detection joins the group that last saw any of its keys, provided
+    the group including it still spans less than `window_seconds` and
+    holds fewer than `max_group_size` detections; otherwise it starts a
+    new group, which takes over its keys. A detection whose keys lead to
+    several such groups merges them as far as the same limits allow.
+    Correlation is transitive: detections related through a chain of
+    shared keys end up in one group. Detections are expected in roughly
+    increasing detected_at order; one older than the window relative to
+    the newest seen is left uncorrelated.
+
+    Adding a detection costs O(number of its assets), amortized over
+    merges, which move the smaller group into the larger.
+    """
+
+    def __init__(self, window_seconds: float = 3600, bucket_seconds: float = 60,
+                 max_group_size: int = 1000):
+        self.window = timedelta(seconds=window_seconds)
+        self.bucket_seconds = bucket_seconds
+        self.max_group_size = max_group_size
+
+        # correlation key -> (group that last saw it, when)
+        self._keys: Dict[Hashable, Tuple[CorrelationGroup, datetime]] = {}
+        # (bucket number, keys touched in the bucket); keys are checked for expiry when their bucket is
+        self._buckets: Deque[Tuple[int, Set[Hashable]]] = deque()
+        self._groups: Dict[str, CorrelationGroup] = {}
+        # Groups in creation order, including merged ones, for eviction
+        self._group_order: Deque[CorrelationGroup] = deque()
+        self.watermark: Optional[datetime] = None
+
+        self.detections_seen = 0
+        self.late_detections = 0
+        self.merges = 0
+
+    @staticmethod
+    def _correlation_keys(detection: Any) -> List[Hashable]:
+        keys: List[Hashable] = [('asset', asset) for asset in detection.affected_assets]
+        if detection.attack_vector:
+            keys.append(('vector', detection.attack_vector))
+        return keys
+
+    def _bucket(self, timestamp: datetime) -> int:
+        return int(timestamp.timestamp() // self.bucket_seconds)
+
+    def _fits(self, detected_at: datetime, *groups: CorrelationGroup) -> bool:
+        """Whether the groups and a detection at detected_at can form one group."""
+        first_seen = min(detected_at, *(group.first_seen for group in groups))
+        last_seen = max(detected_at, *(group.last_seen for group in groups))
+        return (last_seen - first_seen < self.window
+                and sum(len(group) for group in groups) < self.max_group_size)
+
+    def add(self, detection: Any) -> Tuple[Optional[CorrelationGroup], List[str]]:
+        """
+        Correlate a detection.
+
+        Returns the detection's group, or None if it was too late to
+        correlate, and the ids of groups merged into it by this detection.
+        """
+        self.detections_seen += 1
+        detected_at = detection.detected_at
+        if self.watermark is None or detected_at > self.watermark:
+            self.watermark = detected_at
+            self.evict()
+        elif detected_at <= self.watermark - self.window:
+            self.late_detections += 1
+            return None, []
+
+        keys = self._correlation_keys(detection)
+        cutoff = self.watermark - self.window
+        neighbours: Dict[int, CorrelationGroup] = {}
+        for key in keys:
+            entry = self._keys.get(key)
+            # A key outlives its group until its bucket expires; an evicted group stays evicted
+            if entry is None or entry[1] <= cutoff:
+                continue
+            group = entry[0].root()
+            if group.group_id in self._groups and self._fits(detected_at, group):
+                neighbours[id(group)] = group
+
+        merged_ids = []
+        if neighbours:
+            # Merge smaller groups into the largest, as far as the window and size cap allow
+            groups = sorted(neighbours.values(), key=len, reverse=True)
+            group = groups[0]
+            for other in groups[1:]:
+                if not self._fits(detected_at, group, other):
+                    continue
+                group._absorb(other)
+                self._groups.pop(other.group_id, None)
+                merged_ids.append(other.group_id)
+                self.merges += 1
+        else:
+            group = CorrelationGroup(detected_at)
+            self._group_order.append(group)
+        group._add(detection)
+        self._groups[group.group_id] = group
+
+        bucket = self._bucket(detected_at)
+        if not self._buckets or self._buckets[-1][0] < bucket:
+            self._buckets.append((bucket, set()))
+        touched = self._buckets[-1][1]
+        for key in keys:
+            previous = self._keys.get(key)
+            if previous is not None and previous[0].root() is group:
+                self._keys[key] = (group, max(detected_at, previous[1]))
+            else:
+                self._keys[key] = (group, detected_at)
+            touched.add(key)
+
+        return group, merged_ids
+
+    def evict(self, now: Optional[datetime] = None) -> int:
+        """Drop keys and groups not seen within the window; returns the number of groups dropped."""
+        reference = max(filter(None, (now, self.watermark)), default=None)
+        if reference is None:
+            return 0
+        cutoff = reference - self.window
+        last_expired_bucket = self._bucket(cutoff) - 1
+
+        while self._buckets and self._buckets[0][0] <= last_expired_bucket:
+            _, keys = self._buckets.popleft()
+            for key in keys:
+                entry = self._keys.get(key)
+                if entry is not None and entry[1] <= cutoff:
+                    del self._keys[key]
+
+        # A group stops growing one window after its first detection, so the
+        # oldest group holds back eviction of newer ones by at most a window
+        expired_groups = 0
+        while self._group_order:
+            group = self._group_order[0]
+            if group._parent is None and group.last_seen > cutoff:
+                break
+            self._group_order.popleft()
+            if group._parent is None:
+                self._groups.pop(group.group_id, None)
+                expired_groups += 1
+        return expired_groups
+
+    def get_group(self, group_id: str) -> Optional[CorrelationGroup]:
+        return self._groups.get(group_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'window_seconds': self.window.total_seconds(),
+            'max_group_size': self.max_group_size,
+            'active_groups': len(self._groups),
+            'correlated_groups': sum(1 for group in self._groups.values() if len(group) > 1),
+            'indexed_keys': len(self._keys),
+            'buckets': len(self._buckets),
+            'detections_seen': self.detections_seen,
+            'late_detections': self.late_detections,
+            'merges': self.merges
+        }
@@ -0,0 +1,220 @@
+"""
+Indexed indicator store for ACSO Enterprise threat intelligence sharing.
+
+Indicators are partitioned by (sharing level, indicator type, threat
+level), and each partition keeps its indicators ordered by updated_at. A
+tenant's query selects the partitions it may read and the type and threat
+level filters allow, seeks each one to the `since` bound and merges them
+newest-first, stopping after `limit` indicators. Tenant access to the
+community, organization and per-indicator private scopes is kept as a
+per-tenant map, so no indicator is checked for access individually.
+"""
+
+import base64
+import heapq
+import itertools
+import json
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+# Sharing levels, as the values of SharingLevel
+PUBLIC = "public"
+COMMUNITY = "community"
+ORGANIZATION = "organization"
+PRIVATE = "private"
+
+# tenant_permissions scopes that grant a whole sharing level
+MEMBERSHIP_SCOPES = (COMMUNITY, ORGANIZATION)
+
+SortKey = Tuple[datetime, str]
+PartitionKey = Tuple[str, str, str]
+
+
+class IndicatorStore:
+    """
+    Indicators partitioned by sharing level, type and threat level, each
+    partition sorted by (updated_at, indicator_id).
+
+    Indicators must be passed to `upsert` again after their sharing level,
+    type, threat level or updated_at change.
+    """
+
+    def __init__(self):
+        self._partitions: Dict[PartitionKey, List[SortKey]] = {}
+        # indicator_id -> (indicator, partition, sort key it is filed under)
+        self._entries: Dict[str, Tuple[Any, PartitionKey, SortKey]] = {}
+
+        # tenant -> sharing levels it is a member of, and private indicators it was granted
+        self._tenant_levels: Dict[str, Set[str]] = {}
+        self._private_grants: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, indicator_id: str) -> bool:
+        return indicator_id in self._entries
+
+    def get(self, indicator_id: str) -> Optional[Any]:
+        entry = self._entries.get(indicator_id)
+        return entry[0] if entry is not None else None
+
+    # Indicators
+
+    def upsert(self, indicator: Any) -> None:
+        """Add an indicator, or refile it after a change to its indexed fields."""
+        partition_key = (indicator.sharing_level, indicator.indicator_type, indicator.threat_level)
+        sort_key = (indicator.updated_at, indicator.indicator_id)
+
+        entry = self._entries.get(indicator.indicator_id)
+        if entry is not None:
+            if entry[1] == partition_key and entry[2] == sort_key:
+                self._entries[indicator.indicator_id] = (indicator, partition_key, sort_key)
+                return
+            self._unfile(entry[1], entry[2])
+
+        insort(self._partitions.setdefault(partition_key, []), sort_key)
+        self._entries[indicator.indicator_id] = (indicator, partition_key, sort_key)
+
+    def remove(self, indicator_id: str) -> Optional[Any]:
+        entry = self._entries.pop(indicator_id, None)
+        if entry is None:
+            return None
+        self._unfile(entry[1], entry[2])
+        return entry[0]
+
+    def _unfile(self, partition_key: PartitionKey, sort_key: SortKey) -> None:
+        keys = self._partitions[partition_key]
+        position = bisect_left(keys, sort_key)
+        if position < len(keys) and keys[position] == sort_key:
+            del keys[position]
+        if not keys:
+            del self._partitions[partition_key]
+
+    # Tenant access
+
+    def grant(self, tenant_id: str, scope: str) -> None:
+        """Grant a tenant a scope: "community", "organization" or a private indicator id."""
+        if scope in MEMBERSHIP_SCOPES:
+            self._tenant_levels.setdefault(tenant_id, set()).add(scope)
+        else:
+            self._private_grants.setdefault(tenant_id, set()).add(scope)
+
+    def revoke(self, tenant_id: str, scope: str) -> None:
+        grants = self._tenant_levels if scope in MEMBERSHIP_SCOPES else self._private_grants
+        scopes = grants.get(tenant_id)
+        if scopes is not None:
+            scopes.discard(scope)
+            if not scopes:
+                del grants[tenant_id]
+
+    def load_permissions(self, tenant_permissions: Dict[str, Iterable[str]]) -> None:
+        """Rebuild the access map from scope -> tenant ids permissions."""
+        self._tenant_levels.clear()
+        self._private_grants.clear()
+        for scope, tenant_ids in tenant_permissions.items():
+            for tenant_id in tenant_ids:
+                self.grant(tenant_id, scope)
+
+    def readable_levels(self, tenant_id: str) -> Set[str]:
+        """Sharing levels whose indicators are all readable by the tenant."""
+        return {PUBLIC} | self._tenant_levels.get(tenant_id, set())
+
+    def has_access(self, tenant_id: str, indicator: Any) -> bool:
+        if indicator.sharing_level == PRIVATE:
+            return indicator.indicator_id in self._private_grants.get(tenant_id, ())
+        return indicator.sharing_level in self.readable_levels(tenant_id)
+
+    # Queries
+
+    def query(self,
+              tenant_id: str,
+              indicator_types: Optional[Iterable[str]] = None,
+              threat_levels: Optional[Iterable[str]] = None,
+              since: Optional[datetime] = None,
+              before: Optional[SortKey] = None,
+              limit: Optional[int] = None) -> List[Any]:
+        """
+        Indicators readable by the tenant, newest first.
+
+        `since` keeps indicators with updated_at >= since; `before` keeps
+        those whose (updated_at, indicator_id) sorts below it, which is how
+        a page continues from the last indicator of the previous one.
+        """
+        type_filter = set(indicator_types) if indicator_types else None
+        threat_filter = set(threat_levels) if threat_levels else None
+        low = (since,) if since is not None else None
+
+        streams = []
+        levels = self.readable_levels(tenant_id)
+        for (level, indicator_type, threat_level), keys in self._partitions.items():
+            if level not in levels:
+                continue
+            if type_filter is not None and indicator_type not in type_filter:
+                continue
+            if threat_filter is not None and threat_level not in threat_filter:
+                continue
+            start = bisect_left(keys, low) if low is not None else 0
+            stop = bisect_left(keys, before) if before is not None else len(keys)
+            if start < stop:
+                streams.append(self._descending(keys, start, stop))
+
+        private = self._private_keys(tenant_id, type_filter, threat_filter, low, before)
+        if private:
+            streams.append(iter(private))
+
+        merged = heapq.merge(*streams, reverse=True)
+        if limit is not None:
+            merged = itertools.islice(merged, limit)
+        return [self._entries[indicator_id][0] for _, indicator_id in merged]
+
+    @staticmethod
+    def _descending(keys: List[SortKey], start: int, stop: int) -> Iterator[SortKey]:
+        for position in range(stop - 1, start - 1, -1):
+            yield keys[position]
+
+    def _private_keys(self, tenant_id: str, type_filter: Optional[Set[str]],
+                      threat_filter: Optional[Set[str]], low: Optional[Tuple[datetime]],
+                      before: Optional[SortKey]) -> List[SortKey]:
+        keys = []
+        for indicator_id in self._private_grants.get(tenant_id, ()):
+            entry = self._entries.get(indicator_id)
+            if entry is None:
+                continue
+            (level, indicator_type, threat_level), sort_key = entry[1], entry[2]
+            if level != PRIVATE:
+                continue
+            if type_filter is not None and indicator_type not in type_filter:
+                continue
+            if threat_filter is not None and threat_level not in threat_filter:
+                continue
+            if (low is not None and sort_key < low) or (before is not None and sort_key >= before):
+                continue
+            keys.append(sort_key)
+        keys.sort(reverse=True)
+        return keys
+
+    # Pagination cursors
+
+    @staticmethod
+    def encode_cursor(indicator: Any) -> str:
+        """Opaque cursor continuing after `indicator`."""
+        payload = json.dumps([indicator.updated_at.isoformat(), indicator.indicator_id])
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> SortKey:
+        try:
+            updated_at, indicator_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return datetime.fromisoformat(updated_at), str(indicator_id)
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Invalid pagination cursor: {cursor!r}") from e
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'indicators': len(self._entries),
+            'partitions': len(self._partitions),
+            'largest_partition': max(map(len, self._partitions.values()), default=0),
+            'tenants_with_memberships': len(self._tenant_levels),
+            'tenants_with_private_grants': len(self._private_grants)
+        }
@@ -0,0 +1,341 @@
+"""
+IOC index for ACSO Enterprise threat detection.
+
+Matches events against threat indicators without scanning every indicator:
+exact IPs, domains and file hashes are hashed, IP ranges live in a CIDR
+radix trie, and URL and path indicators are matched as substrings by an
+Aho-Corasick automaton.
+
+Indexes are immutable. Updates build a new index that shares every
+structure the update did not touch, so callers swap a single reference
+and readers never observe a half-applied update.
+"""
+
+import ipaddress
+from collections import deque
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple, Union
+
+# Indicator types matched as substrings of URLs and paths
+SUBSTRING_TYPES = ("url", "path")
+
+# Trie node: (zero child, one child, indicator ids of the prefix ending here)
+_TrieNode = Tuple[Optional[tuple], Optional[tuple], FrozenSet[str]]
+_EMPTY_IDS: FrozenSet[str] = frozenset()
+
+
+def _trie_insert(node: Optional[_TrieNode], address: int, prefix_len: int, bits: int,
+                 indicator_id: str, depth: int = 0) -> _TrieNode:
+    """Copy of the trie with an indicator added at a prefix; only the path to it is copied."""
+    zero, one, ids = node or (None, None, _EMPTY_IDS)
+    if depth == prefix_len:
+        return zero, one, ids | {indicator_id}
+    if (address >> (bits - 1 - depth)) & 1:
+        return zero, _trie_insert(one, address, prefix_len, bits, indicator_id, depth + 1), ids
+    return _trie_insert(zero, address, prefix_len, bits, indicator_id, depth + 1), one, ids
+
+
+def _trie_remove(node: Optional[_TrieNode], address: int, prefix_len: int, bits: int,
+                 indicator_id: str, depth: int = 0) -> Optional[_TrieNode]:
+    """Copy of the trie without an indicator at a prefix, pruning emptied branches."""
+    if node is None:
+        return None
+    zero, one, ids = node
+    if depth == prefix_len:
+        ids = ids - {indicator_id}
+    elif (address >> (bits - 1 - depth)) & 1:
+        one = _trie_remove(one, address, prefix_len, bits, indicator_id, depth + 1)
+    else:
+        zero = _trie_remove(zero, address, prefix_len, bits, indicator_id, depth + 1)
+    if zero is None and one is None and not ids:
+        return None
+    return zero, one, ids
+
+
+def _trie_match(node: Optional[_TrieNode], address: int, bits: int) -> Set[str]:
+    """Indicator ids of every prefix in the trie containing an address."""
+    matches: Set[str] = set()
+    depth = 0
+    while node is not None:
+        if node[2]:
+            matches |= node[2]
+        if depth == bits:
+            break
+        node = node[(address >> (bits - 1 - depth)) & 1]
+        depth += 1
+    return matches
+
+
+class SubstringAutomaton:
+    """Aho-Corasick automaton over indicator values; ``find`` returns the values occurring in a text."""
+
+    def __init__(self, patterns: Iterable[str]):
+        # State 0 is the root; each state has goto edges, a fail link and outputs
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[FrozenSet[str]] = [_EMPTY_IDS]
+
+        for pattern in patterns:
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(_EMPTY_IDS)
+                state = next_state
+            self._output[state] = frozenset((pattern,))
+
+        # Failure links, breadth-first
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                if self._output[self._fail[next_state]]:
+                    self._output[next_state] = self._output[next_state] | self._output[self._fail[next_state]]
+
+    def __len__(self) -> int:
+        return len(self._goto)
+
+    def find(self, text: str) -> Set[str]:
+        goto, fail, output = self._goto, self._fail, self._output
+        matches: Set[str] = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                matches |= output[state]
+        return matches
+
+
+def _ip_key(value: str) -> Tuple[Optional[str], Optional[Union[ipaddress.IPv4Network, ipaddress.IPv6Network]]]:
+    """Exact address key, or network, of an IP indicator value; (None, None) if invalid."""
+    value = value.strip()
+    try:
+        if "/" not in value:
+            return str(ipaddress.ip_address(value)), None
+        network = ipaddress.ip_network(value, strict=False)
+    except ValueError:
+        return None, None
+    if network.num_addresses == 1:
+        return str(network.network_address), None
+    return None, network
+
+
+def _normalize(indicator_type: str, value: str) -> str:
+    if indicator_type in ("domain", "hash", "email"):
+        return value.strip().lower().rstrip(".")
+    return value
+
+
+class IOCIndex:
+    """
+    Immutable index of threat indicators by type.
+
+    Indicators are any objects with indicator_id, indicator_type and value
+    attributes. IP indicators may be addresses or CIDR ranges; URL and path
+    indicators match wherever their value occurs in the text; indicators
+    of any other type match on their exact (case-folded for domains,
+    hashes and emails) value.
+    """
+
+    def __init__(self):
+        self._indicators: Dict[str, Any] = {}
+        # indicator type -> normalized value -> indicator ids
+        self._exact: Dict[str, Dict[str, FrozenSet[str]]] = {}
+        # IP version -> CIDR trie root
+        self._networks: Dict[int, Optional[_TrieNode]] = {}
+        self._network_count = 0
+        # substring value -> indicator ids, and the automaton over those values
+        self._substrings: Dict[str, FrozenSet[str]] = {}
+        self._automaton: Optional[SubstringAutomaton] = None
+        self.invalid_indicators = 0
+
+    @classmethod
+    def build(cls, indicators: Iterable[Any]) -> 'IOCIndex':
+        return cls().updated(upserts=indicators)
+
+    def __len__(self) -> int:
+        return len(self._indicators)
+
+    def get(self, indicator_id: str) -> Optional[Any]:
+        return self._indicators.get(indicator_id)
+
+    # Updates
+
+    def updated(self, upserts: Iterable[Any] = (), removed_ids: Iterable[str] = ()) -> 'IOCIndex':
+        """
+        New index with indicators added or replaced and others removed.
+
+        Beyond copying the id and per-type value maps that the update
+        touches, exact and CIDR changes cost O(size of the update). The
+        automaton is rebuilt, in O(total substring length), only when URL
+        or path indicators change; callers applying large feeds can build
+        the new index off the event loop.
+        """
+        index = IOCIndex()
+        index._indicators = dict(self._indicators)
+        index._exact = dict(self._exact)
+        index._networks = dict(self._networks)
+        index._network_count = self._network_count
+        index._substrings = self._substrings
+        index._automaton = self._automaton
+        index.invalid_indicators = self.invalid_indicators
+
+        copied_exact: Set[str] = set()
+        substrings_changed = False
+
+        def exact_map(indicator_type: str) -> Dict[str, FrozenSet[str]]:
+            if indicator_type not in copied_exact:
+                index._exact[indicator_type] = dict(index._exact.get(indicator_type, {}))
+                copied_exact.add(indicator_type)
+            return index._exact[indicator_type]
+
+        def unlink(indicator: Any) -> None:
+            nonlocal substrings_changed
+            indicator_type, value = indicator.indicator_type, indicator.value
+            if indicator_type == "ip":
+                address, network = _ip_key(value)
+                if network is not None:
+                    index._networks[network.version] = _trie_remove(
+                        index._networks.get(network.version), int(network.network_address),
+                        network.prefixlen, network.max_prefixlen, indicator.indicator_id
+                    )
+                    index._network_count -= 1
+                    return
+                if address is None:
+                    index.invalid_indicators -= 1
+                    return
+                value = address
+            elif indicator_type in SUBSTRING_TYPES:
+                if not value:
+                    index.invalid_indicators -= 1
+                    return
+                if not substrings_changed:
+                    index._substrings = dict(index._substrings)
+                    substrings_changed = True
+                ids = index._substrings.get(value, _EMPTY_IDS) - {indicator.indicator_id}
+                if ids:
+                    index._substrings[value] = ids
+                else:
+                    index._substrings.pop(value, None)
+                return
+            values = exact_map(indicator_type)
+            key = _normalize(indicator_type, value)
+            ids = values.get(key, _EMPTY_IDS) - {indicator.indicator_id}
+            if ids:
+                values[key] = ids
+            else:
+                values.pop(key, None)
+
+        def link(indicator: Any) -> None:
+            nonlocal substrings_changed
+            indicator_type, value = indicator.indicator_type, indicator.value
+            if indicator_type == "ip":
+                address, network = _ip_key(value)
+                if network is not None:
+                    index._networks[network.version] = _trie_insert(
+                        index._networks.get(network.version), int(network.network_address),
+                        network.prefixlen, network.max_prefixlen, indicator.indicator_id
+                    )
+                    index._network_count += 1
+                    return
+                if address is None:
+                    index.invalid_indicators += 1
+                    return
+                value = address
+            elif indicator_type in SUBSTRING_TYPES:
+                if not value:
+                    index.invalid_indicators += 1
+                    return
+                if not substrings_changed:
+                    index._substrings = dict(index._substrings)
+                    substrings_changed = True
+                index._substrings[value] = index._substrings.get(value, _EMPTY_IDS) | {indicator.indicator_id}
+                return
+            values = exact_map(indicator_type)
+            key = _normalize(indicator_type, value)
+            values[key] = values.get(key, _EMPTY_IDS) | {indicator.indicator_id}
+
+        for indicator_id in removed_ids:
+            indicator = index._indicators.pop(indicator_id, None)
+            if indicator is not None:
+                unlink(indicator)
+
+        for indicator in upserts:
+            previous = index._indicators.get(indicator.indicator_id)
+            if previous is not None:
+                unlink(previous)
+            index._indicators[indicator.indicator_id] = indicator
+            link(indicator)
+
+        if substrings_changed:
+            index._automaton = SubstringAutomaton(index._substrings) if index._substrings else None
+        return index
+
+    # Lookups
+
+    def _resolve(self, ids: Iterable[str]) -> List[Any]:
+        indicators = self._indicators
+        return [indicators[indicator_id] for indicator_id in sorted(ids)]
+
+    def match_exact(self, indicator_type: str, value: Optional[str]) -> List[Any]:
+        if not value:
+            return []
+        values = self._exact.get(indicator_type)
+        if not values:
+            return []
+        return self._resolve(values.get(_normalize(indicator_type, value), _EMPTY_IDS))
+
+    def match_ip(self, ip: Optional[str]) -> List[Any]:
+        """IP indicators equal to an address or having a range that contains it."""
+        if not ip:
+            return []
+        exact = self._exact.get("ip", {})
+        ids = exact.get(ip, _EMPTY_IDS)
+        if self._network_count or (exact and not ids):
+            try:
+                address = ipaddress.ip_address(ip.strip())
+            except ValueError:
+                return self._resolve(ids)
+            if not ids:
+                ids = exact.get(str(address), _EMPTY_IDS)
+            if self._network_count:
+                ids = ids | _trie_match(self._networks.get(address.version), int(address), address.max_prefixlen)
+        return self._resolve(ids)
+
+    def match_domain(self, domain: Optional[str]) -> List[Any]:
+        return self.match_exact("domain", domain)
+
+    def match_hash(self, file_hash: Optional[str]) -> List[Any]:
+        return self.match_exact("hash", file_hash)
+
+    def match_substrings(self, text: Optional[str], indicator_type: Optional[str] = None) -> List[Any]:
+        """URL and path indicators occurring in a text, optionally of one type only."""
+        if not text or self._automaton is None:
+            return []
+        ids: Set[str] = set()
+        for value in self._automaton.find(text):
+            ids |= self._substrings[value]
+        matches = self._resolve(ids)
+        if indicator_type is not None:
+            matches = [indicator for indicator in matches if indicator.indicator_type == indicator_type]
+        return matches
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "indicators": len(self._indicators),
+            "exact_values": {t: len(values) for t, values in self._exact.items()},
+            "networks": self._network_count,
+            "substrings": len(self._substrings),
+            "automaton_states": len(self._automaton) if self._automaton else 0,
+            "invalid_indicators": self.invalid_indicators
+        }
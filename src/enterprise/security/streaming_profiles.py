@@ -0,0 +1,257 @@
+"""
+Streaming user behaviour profiles for ACSO Enterprise threat detection.
+
+Each profile is updated one event at a time and holds a fixed amount of
+state however many events a user produces: running moments (Welford) for
+numeric features, an hour-of-day histogram summarised with circular
+statistics, a bounded top-k table of resource frequencies (Space-Saving)
+and HyperLogLog sketches for distinct source IPs and user agents.
+"""
+
+import hashlib
+import math
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class RunningStats:
+    """Count, mean and variance of a stream (Welford's algorithm)."""
+
+    __slots__ = ('count', 'mean', '_m2')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    @property
+    def variance(self) -> float:
+        """Population variance, as np.var."""
+        return self._m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+
+class CircularHistogram:
+    """
+    Histogram over a cyclic range, such as hours of the day.
+
+    The mean and spread are circular, so 23:00 and 01:00 average to
+    midnight rather than to noon.
+    """
+
+    __slots__ = ('period', 'counts', '_summary')
+
+    def __init__(self, period: int = 24):
+        self.period = period
+        self.counts = [0] * period
+        self._summary: Optional[Tuple[float, float, int]] = None
+
+    def add(self, value: int) -> None:
+        self.counts[value % self.period] += 1
+        self._summary = None
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts)
+
+    def _resultant(self) -> Tuple[float, float, int]:
+        if self._summary is None:
+            total = cos_sum = sin_sum = 0
+            step = 2 * math.pi / self.period
+            for value, count in enumerate(self.counts):
+                if count:
+                    total += count
+                    cos_sum += count * math.cos(value * step)
+                    sin_sum += count * math.sin(value * step)
+            self._summary = (cos_sum, sin_sum, total)
+        return self._summary
+
+    def mean(self) -> Optional[float]:
+        cos_sum, sin_sum, total = self._resultant()
+        if not total:
+            return None
+        angle = math.atan2(sin_sum, cos_sum) % (2 * math.pi)
+        return angle * self.period / (2 * math.pi)
+
+    def std(self) -> Optional[float]:
+        """Circular standard deviation, sqrt(-2 ln R), in the histogram's units."""
+        cos_sum, sin_sum, total = self._resultant()
+        if not total:
+            return None
+        resultant_length = min(math.hypot(cos_sum, sin_sum) / total, 1.0)
+        if resultant_length <= 0:
+            return self.period / 2
+        return math.sqrt(-2 * math.log(resultant_length)) * self.period / (2 * math.pi)
+
+    def distance(self, a: float, b: float) -> float:
+        """Shortest distance between two points on the cycle."""
+        difference = abs(a - b) % self.period
+        return min(difference, self.period - difference)
+
+    def frequency(self, value: int) -> float:
+        total = self.total
+        return self.counts[value % self.period] / total if total else 0.0
+
+
+class TopKCounter:
+    """
+    Approximate counts of the `capacity` most frequent items (Space-Saving).
+
+    When the table is full a new item replaces the least frequent one and
+    inherits its count, so counts are overestimates by at most the
+    replaced count. Any item occurring more than total / capacity times is
+    guaranteed to be in the table.
+    """
+
+    __slots__ = ('capacity', 'counts', 'total')
+
+    def __init__(self, capacity: int = 32):
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+        self.total = 0
+
+    def add(self, item: str, count: int = 1) -> None:
+        self.total += count
+        counts = self.counts
+        if item in counts:
+            counts[item] += count
+        elif len(counts) < self.capacity:
+            counts[item] = count
+        else:
+            evicted = min(counts, key=counts.__getitem__)
+            counts[item] = counts.pop(evicted) + count
+
+    def __contains__(self, item: str) -> bool:
+        return item in self.counts
+
+    def most_common(self, n: Optional[int] = None) -> List[Tuple[str, int]]:
+        ranked = sorted(self.counts.items(), key=lambda entry: entry[1], reverse=True)
+        return ranked if n is None else ranked[:n]
+
+
+def _hash64(value: str) -> int:
+    # Stable across processes, unlike hash(), so sketches can be persisted and merged
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8', 'surrogatepass'), digest_size=8).digest(), 'big')
+
+
+_INVERSE_POWERS = [2.0 ** -rank for rank in range(65)]
+
+
+class HyperLogLog:
+    """
+    Distinct-count sketch with 2**precision one-byte registers.
+
+    The relative standard error is about 1.04 / sqrt(2**precision), 6.5% at
+    the default precision; small cardinalities use linear counting and are
+    close to exact.
+    """
+
+    __slots__ = ('precision', 'registers', '_count')
+
+    def __init__(self, precision: int = 8):
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+        # Cached estimate; most adds to a warmed-up sketch change no register
+        self._count: Optional[int] = 0
+
+    def add(self, value: str) -> None:
+        hashed = _hash64(value)
+        bits = 64 - self.precision
+        index = hashed >> bits
+        rank = bits - (hashed & ((1 << bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+            self._count = None
+
+    def merge(self, other: 'HyperLogLog') -> None:
+        if other.precision != self.precision:
+            raise ValueError("cannot merge sketches of different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        self._count = None
+
+    def count(self) -> int:
+        if self._count is None:
+            m = len(self.registers)
+            zeros = self.registers.count(0)
+            # Linear counting below 2.5m, where it is the more accurate estimator
+            estimate = m * math.log(m / zeros) if zeros else math.inf
+            if estimate > 2.5 * m:
+                alpha = 0.7213 / (1 + 1.079 / m)
+                estimate = alpha * m * m / sum(map(_INVERSE_POWERS.__getitem__, self.registers))
+            self._count = int(round(estimate))
+        return self._count
+
+
+class StreamingUserProfile:
+    """Behavioural baseline of one user, updated per event in fixed memory."""
+
+    __slots__ = (
+        'events', 'failures', 'login_hours', 'risk_scores', 'session_hours',
+        'resources', 'source_ips', 'user_agents', 'last_seen', '_last_action', '_last_timestamp'
+    )
+
+    def __init__(self, top_resources: int = 32, sketch_precision: int = 8):
+        self.events = 0
+        self.failures = 0
+        self.login_hours = CircularHistogram(24)
+        self.risk_scores = RunningStats()
+        self.session_hours = RunningStats()
+        self.resources = TopKCounter(top_resources)
+        self.source_ips = HyperLogLog(sketch_precision)
+        self.user_agents = HyperLogLog(sketch_precision)
+        self.last_seen: Optional[datetime] = None
+        self._last_action: Optional[str] = None
+        self._last_timestamp: Optional[datetime] = None
+
+    def update(self, event: Any) -> None:
+        """Fold a UserEvent into the profile."""
+        self.events += 1
+        if not event.success:
+            self.failures += 1
+        if event.action == 'login':
+            self.login_hours.add(event.timestamp.hour)
+        elif event.action == 'logout' and self._last_action == 'login':
+            self.session_hours.add((event.timestamp - self._last_timestamp).total_seconds() / 3600)
+        self.risk_scores.add(event.risk_score)
+        self.resources.add(event.resource)
+        self.source_ips.add(event.source_ip)
+        self.user_agents.add(event.user_agent)
+
+        self._last_action = event.action
+        self._last_timestamp = event.timestamp
+        if self.last_seen is None or event.timestamp > self.last_seen:
+            self.last_seen = event.timestamp
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Profile summary in the form used by BehavioralAnalyzer.detect_user_anomalies."""
+        if not self.events:
+            return {}
+        avg_login_hour = self.login_hours.mean()
+        std_login_hour = self.login_hours.std()
+        return {
+            'typical_login_hours': [hour for hour, count in enumerate(self.login_hours.counts) if count],
+            'login_hour_histogram': list(self.login_hours.counts),
+            'avg_login_hour': avg_login_hour if avg_login_hour is not None else 12,
+            'std_login_hour': std_login_hour if std_login_hour is not None else 4,
+            'login_count': self.login_hours.total,
+            'common_resources': dict(self.resources.most_common()),
+            'typical_ip_count': self.source_ips.count(),
+            'typical_user_agents': self.user_agents.count(),
+            'avg_session_duration': self.session_hours.mean if self.session_hours.count else 1.0,
+            'risk_score_baseline': self.risk_scores.mean,
+            'risk_score_std': self.risk_scores.std,
+            'failure_rate': self.failures / self.events,
+            'event_count': self.events,
+            'last_seen': self.last_seen
+        }
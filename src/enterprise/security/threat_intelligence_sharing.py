@@ -22,6 +22,8 @@ from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 
+from .indicator_store import IndicatorStore
+
 class ThreatIntelligenceType(str, Enum):
     """Types of threat intelligence."""
     IOC = "ioc"  # Indicators of Compromise
@@ -366,6 +368,8 @@ class ThreatIntelligenceSharingSystem:
         
         # Core components
         self.indicators: Dict[str, ThreatIndicator] = {}
+        # Partitioned, time-ordered index over self.indicators with a tenant access map
+        self.indicator_store = IndicatorStore()
         self.campaigns: Dict[str, ThreatCampaign] = {}
         self.actors: Dict[str, ThreatActor] = {}
         self.feeds: Dict[str, ThreatIntelligenceFeed] = {}
@@ -399,6 +403,7 @@ class ThreatIntelligenceSharingSystem:
             
             # Load default sharing policies
             await self._load_sharing_policies()
+            self.indicator_store.load_permissions(self.tenant_permissions)
             
             # Initialize threat intelligence feeds
             await self._initialize_feeds()
@@ -457,6 +462,7 @@ class ThreatIntelligenceSharingSystem:
             
             # Store indicator
             self.indicators[indicator.indicator_id] = indicator
+            self.indicator_store.upsert(indicator)
             
             # Queue for enrichment
             await self.enrichment_queue.put({
@@ -487,32 +493,29 @@ class ThreatIntelligenceSharingSystem:
         indicator_types: Optional[List[IndicatorType]] = None,
         threat_levels: Optional[List[ThreatLevel]] = None,
         since: Optional[datetime] = None,
-        limit: int = 1000
+        limit: int = 1000,
+        cursor: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Get threat intelligence for a tenant."""
+        """
+        Get threat intelligence for a tenant as a STIX bundle, newest first.
+        
+        When more indicators match than `limit`, the result has "more" set and
+        a "next_cursor"; passing it back as `cursor` with the same filters
+        returns the following page.
+        """
         try:
-            # Filter indicators based on permissions and criteria
-            filtered_indicators = []
-            
-            for indicator in self.indicators.values():
-                # Check permissions
-                if not self._has_access_to_indicator(tenant_id, indicator):
-                    continue
-                
-                # Apply filters
-                if indicator_types and indicator.indicator_type not in indicator_types:
-                    continue
-                
-                if threat_levels and indicator.threat_level not in threat_levels:
-                    continue
-                
-                if since and indicator.updated_at < since:
-                    continue
-                
-                filtered_indicators.append(indicator)
-            
-            # Sort by updated_at descending and limit
-            filtered_indicators.sort(key=lambda x: x.updated_at, reverse=True)
+            before = IndicatorStore.decode_cursor(cursor) if cursor else None
+            
+            # One extra indicator tells whether another page follows
+            filtered_indicators = self.indicator_store.query(
+                tenant_id,
+                indicator_types=indicator_types,
+                threat_levels=threat_levels,
+                since=since,
+                before=before,
+                limit=limit + 1
+            )
+            more = len(filtered_indicators) > limit
             filtered_indicators = filtered_indicators[:limit]
             
             # Convert to STIX format
@@ -527,6 +530,8 @@ class ThreatIntelligenceSharingSystem:
             return {
                 "bundle": bundle,
                 "total_indicators": len(filtered_indicators),
+                "more": more,
+                "next_cursor": IndicatorStore.encode_cursor(filtered_indicators[-1]) if more and filtered_indicators else None,
                 "tenant_id": tenant_id,
                 "generated_at": datetime.utcnow().isoformat()
             }
@@ -558,6 +563,8 @@ class ThreatIntelligenceSharingSystem:
                 # Update sharing level
                 indicator.sharing_level = sharing_level
                 indicator.updated_at = datetime.utcnow()
+                indicator.stix_object = self.stix_generator.create_indicator(indicator)
+                self.indicator_store.upsert(indicator)
                 
                 # Add to shared objects
                 if indicator.stix_object:
@@ -591,10 +598,7 @@ class ThreatIntelligenceSharingSystem:
             predictions = []
             
             # Get tenant's historical data
-            tenant_indicators = [
-                indicator for indicator in self.indicators.values()
-                if self._has_access_to_indicator(tenant_id, indicator)
-            ]
+            tenant_indicators = self.indicator_store.query(tenant_id)
             
             # Use federated learning models for prediction
             for model in self.federated_models.values():
@@ -718,6 +722,7 @@ class ThreatIntelligenceSharingSystem:
                 },
                 "overview": {
                     "total_indicators": total_indicators,
+                    "indicator_store": self.indicator_store.get_stats(),
                     "active_feeds": len([f for f in self.feeds.values() if f.enabled]),
                     "federated_models": len(self.federated_models),
                     "taxii_connections": len(self.taxii_clients)
@@ -732,10 +737,19 @@ class ThreatIntelligenceSharingSystem:
             
         except Exception as e:
             self.logger.error(f"Failed to get sharing statistics: {e}")
-            return {"error": str(e)}</parameter>
-</invoke>    
- 
-   # Private methods
+            return {"error": str(e)}
+    
+    def grant_tenant_access(self, tenant_id: str, scope: str) -> None:
+        """Grant a tenant access to "community", "organization" or a private indicator id."""
+        self.tenant_permissions[scope].add(tenant_id)
+        self.indicator_store.grant(tenant_id, scope)
+    
+    def revoke_tenant_access(self, tenant_id: str, scope: str) -> None:
+        """Revoke access granted with grant_tenant_access."""
+        self.tenant_permissions[scope].discard(tenant_id)
+        self.indicator_store.revoke(tenant_id, scope)
+    
+    # Private methods
     def _generate_encryption_key(self) -> None:
         """Generate encryption key for privacy-preserving sharing."""
         try:
@@ -863,23 +877,9 @@ class ThreatIntelligenceSharingSystem:
     def _has_access_to_indicator(self, tenant_id: str, indicator: ThreatIndicator) -> bool:
         """Check if a tenant has access to an indicator."""
         try:
-            # Public indicators are accessible to all
-            if indicator.sharing_level == SharingLevel.PUBLIC:
-                return True
-            
-            # Community indicators require community membership
-            if indicator.sharing_level == SharingLevel.COMMUNITY:
-                return tenant_id in self.tenant_permissions.get("community", set())
-            
-            # Organization indicators require organization membership
-            if indicator.sharing_level == SharingLevel.ORGANIZATION:
-                return tenant_id in self.tenant_permissions.get("organization", set())
-            
-            # Private indicators require explicit permission
-            if indicator.sharing_level == SharingLevel.PRIVATE:
-                return tenant_id in self.tenant_permissions.get(indicator.indicator_id, set())
-            
-            return False
+            # Public indicators are accessible to all, community and organization
+            # indicators to members, private indicators by explicit permission
+            return self.indicator_store.has_access(tenant_id, indicator)
             
         except Exception as e:
             self.logger.error(f"Failed to check indicator access: {e}")
@@ -1329,5 +1329,4 @@ class ThreatIntelligenceSharingSystem:
             self.logger.info(f"Coordinated federated training for model: {model.model_id}")
             
         except Exception as e:
-            self.logger.error(f"Failed to coordinate federated training: {e}")</parameter>
-</invoke>
\ No newline at end of file
+            self.logger.error(f"Failed to coordinate federated training: {e}")
@@ -2,6 +2,7 @@
 Enterprise storage package.
 """
 
+from .record_codec import RecordCodec, RecordCodecError
 from .state_persistence import StatePersistenceManager
 
-__all__ = ["StatePersistenceManager"]
\ No newline at end of file
+__all__ = ["RecordCodec", "RecordCodecError", "StatePersistenceManager"]
\ No newline at end of file
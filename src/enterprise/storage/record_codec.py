@@ -0,0 +1,247 @@
+"""
+Record codec for ACSO Enterprise state persistence.
+
+Encodes persisted records as msgpack (JSON when msgpack is not installed)
+behind a small versioned header, compressing by size with zstd or lz4
+(zlib when neither is installed). Datetimes, enums and dataclasses are
+tagged by type name and only rebuilt for registered types, so decoding a
+record never runs arbitrary code the way unpickling does. Bytes are native
+to msgpack and tagged as base64 in JSON.
+
+Record layout: MAGIC, FORMAT_VERSION, flags byte (encoding << 4 | compression), payload.
+"""
+
+import base64
+import dataclasses
+import inspect
+import json
+import zlib
+from datetime import datetime
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+try:
+    import lz4.frame
+    LZ4_AVAILABLE = True
+except ImportError:
+    LZ4_AVAILABLE = False
+
+from ..models import agent_runtime, lifecycle
+
+MAGIC = 0xA5
+FORMAT_VERSION = 1
+
+ENCODING_MSGPACK = 1
+ENCODING_JSON = 2
+
+COMPRESSION_NONE = 0
+COMPRESSION_LZ4 = 1
+COMPRESSION_ZSTD = 2
+COMPRESSION_ZLIB = 3
+
+# Extension type codes, shared by the msgpack ext types and the JSON tags
+EXT_DATETIME = 1
+EXT_ENUM = 2
+EXT_DATACLASS = 3
+EXT_BYTES = 4
+
+_JSON_TAG = "__ext__"
+_NATIVE_TYPES = (str, int, float, bool, type(None))
+
+
+class RecordCodecError(ValueError):
+    """A record could not be encoded or decoded."""
+
+
+def default_record_types() -> Tuple[type, ...]:
+    """Enums and dataclasses of the models persisted by the lifecycle manager."""
+    types = []
+    for module in (lifecycle, agent_runtime):
+        for _, member in inspect.getmembers(module, inspect.isclass):
+            if member.__module__ != module.__name__:
+                continue
+            if issubclass(member, Enum) or dataclasses.is_dataclass(member):
+                types.append(member)
+    return tuple(types)
+
+
+class RecordCodec:
+    """
+    Versioned, compressed encoding of persisted records.
+
+    Records smaller than `compression_threshold` bytes are stored as is;
+    larger ones are compressed with zstd, which keeps its ratio on records
+    of a few kilobytes, and those of at least `large_record_threshold` bytes
+    with lz4, which compresses them several times faster. Pass
+    compression_threshold=None to disable compression.
+    """
+
+    def __init__(self,
+                 types: Optional[Iterable[type]] = None,
+                 compression_threshold: Optional[int] = 512,
+                 large_record_threshold: int = 64 * 1024,
+                 zstd_level: int = 3):
+        self.compression_threshold = compression_threshold
+        self.large_record_threshold = large_record_threshold
+        self.encoding = ENCODING_MSGPACK if MSGPACK_AVAILABLE else ENCODING_JSON
+
+        self._types: Dict[str, type] = {}
+        for record_type in (default_record_types() if types is None else types):
+            self.register(record_type)
+
+        if ZSTD_AVAILABLE:
+            self._zstd_compressor = zstandard.ZstdCompressor(level=zstd_level)
+            self._zstd_decompressor = zstandard.ZstdDecompressor()
+
+    def register(self, record_type: type) -> None:
+        """Allow an enum or dataclass type to be encoded and rebuilt."""
+        if not (issubclass(record_type, Enum) or dataclasses.is_dataclass(record_type)):
+            raise TypeError(f"{record_type.__name__} is neither an enum nor a dataclass")
+        existing = self._types.get(record_type.__name__)
+        if existing is not None and existing is not record_type:
+            raise ValueError(f"Record type name {record_type.__name__} is already registered")
+        self._types[record_type.__name__] = record_type
+
+    # Encoding
+
+    def encode(self, value: Any) -> bytes:
+        if self.encoding == ENCODING_MSGPACK:
+            payload = msgpack.packb(self._tag(value, self._msgpack_ext), use_bin_type=True)
+        else:
+            payload = json.dumps(self._tag(value, self._json_ext), separators=(',', ':')).encode('utf-8')
+
+        compression = self._select_compression(len(payload))
+        if compression == COMPRESSION_LZ4:
+            payload = lz4.frame.compress(payload)
+        elif compression == COMPRESSION_ZSTD:
+            payload = self._zstd_compressor.compress(payload)
+        elif compression == COMPRESSION_ZLIB:
+            payload = zlib.compress(payload, 6)
+
+        return bytes((MAGIC, FORMAT_VERSION, (self.encoding << 4) | compression)) + payload
+
+    def _select_compression(self, size: int) -> int:
+        if self.compression_threshold is None or size < self.compression_threshold:
+            return COMPRESSION_NONE
+        if size >= self.large_record_threshold:
+            preferred = (COMPRESSION_LZ4, COMPRESSION_ZSTD)
+        else:
+            preferred = (COMPRESSION_ZSTD, COMPRESSION_LZ4)
+        available = {COMPRESSION_LZ4: LZ4_AVAILABLE, COMPRESSION_ZSTD: ZSTD_AVAILABLE}
+        for compression in preferred:
+            if available[compression]:
+                return compression
+        return COMPRESSION_ZLIB
+
+    def _tag(self, value: Any, ext: Callable[[int, Any], Any]) -> Any:
+        """
+        Copy a value into natively serializable types, wrapping datetimes,
+        enums and dataclasses with `ext`. Done up front rather than in a
+        serializer default hook, because both serializers write str and int
+        enums as plain values without consulting the hook.
+        """
+        value_type = type(value)
+        if value_type in _NATIVE_TYPES:
+            return value
+        if value_type is bytes:
+            if self.encoding == ENCODING_MSGPACK:
+                return value
+            return ext(EXT_BYTES, base64.b64encode(value).decode('ascii'))
+        if value_type is dict:
+            return {k: self._tag(v, ext) for k, v in value.items()}
+        if value_type in (list, tuple, set, frozenset):
+            return [self._tag(v, ext) for v in value]
+        if isinstance(value, datetime):
+            return ext(EXT_DATETIME, value.isoformat())
+
+        registered = self._types.get(value_type.__name__)
+        if registered is value_type:
+            if isinstance(value, Enum):
+                return ext(EXT_ENUM, [value_type.__name__, value.value])
+            return ext(EXT_DATACLASS, [
+                value_type.__name__,
+                {f.name: self._tag(getattr(value, f.name), ext) for f in dataclasses.fields(value)}
+            ])
+        if isinstance(value, dict):
+            return {k: self._tag(v, ext) for k, v in value.items()}
+        raise RecordCodecError(f"Values of type {value_type.__name__} are not registered for persistence")
+
+    @staticmethod
+    def _msgpack_ext(code: int, payload: Any) -> Any:
+        return msgpack.ExtType(code, msgpack.packb(payload, use_bin_type=True))
+
+    @staticmethod
+    def _json_ext(code: int, payload: Any) -> Any:
+        return {_JSON_TAG: code, "v": payload}
+
+    # Decoding
+
+    def decode(self, data: bytes) -> Any:
+        if len(data) < 3 or data[0] != MAGIC:
+            raise RecordCodecError("Not an encoded record")
+        if data[1] != FORMAT_VERSION:
+            raise RecordCodecError(f"Unsupported record format version {data[1]}")
+
+        encoding, compression = data[2] >> 4, data[2] & 0x0F
+        payload = data[3:]
+        if compression == COMPRESSION_LZ4:
+            if not LZ4_AVAILABLE:
+                raise RecordCodecError("Record is lz4 compressed but lz4 is not installed")
+            payload = lz4.frame.decompress(payload)
+        elif compression == COMPRESSION_ZSTD:
+            if not ZSTD_AVAILABLE:
+                raise RecordCodecError("Record is zstd compressed but zstandard is not installed")
+            payload = self._zstd_decompressor.decompress(payload)
+        elif compression == COMPRESSION_ZLIB:
+            payload = zlib.decompress(payload)
+        elif compression != COMPRESSION_NONE:
+            raise RecordCodecError(f"Unknown record compression {compression}")
+
+        if encoding == ENCODING_MSGPACK:
+            if not MSGPACK_AVAILABLE:
+                raise RecordCodecError("Record is msgpack encoded but msgpack is not installed")
+            return self._msgpack_unpack(payload)
+        if encoding == ENCODING_JSON:
+            return json.loads(payload, object_hook=self._json_object_hook)
+        raise RecordCodecError(f"Unknown record encoding {encoding}")
+
+    def _msgpack_unpack(self, payload: bytes) -> Any:
+        return msgpack.unpackb(payload, ext_hook=self._msgpack_ext_hook, raw=False, strict_map_key=False)
+
+    def _msgpack_ext_hook(self, code: int, data: bytes) -> Any:
+        return self._rebuild(code, self._msgpack_unpack(data))
+
+    def _json_object_hook(self, data: Dict[str, Any]) -> Any:
+        if len(data) == 2 and _JSON_TAG in data and "v" in data:
+            return self._rebuild(data[_JSON_TAG], data["v"])
+        return data
+
+    def _rebuild(self, code: int, payload: Any) -> Any:
+        if code == EXT_DATETIME:
+            return datetime.fromisoformat(payload)
+        if code == EXT_BYTES:
+            return base64.b64decode(payload)
+        if code not in (EXT_ENUM, EXT_DATACLASS):
+            raise RecordCodecError(f"Unknown record extension type {code}")
+
+        type_name, value = payload
+        record_type = self._types.get(type_name)
+        if record_type is None:
+            raise RecordCodecError(f"Record references unregistered type {type_name}")
+        if code == EXT_ENUM:
+            return record_type(value)
+        # Ignore fields dropped from the dataclass since the record was written
+        field_names = {f.name for f in dataclasses.fields(record_type)}
+        return record_type(**{k: v for k, v in value.items() if k in field_names})
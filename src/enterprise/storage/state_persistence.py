@@ -3,27 +3,32 @@ State persistence manager for ACSO Enterprise.
 Handles persistent storage of agent states and recovery data.
 """
 
-import asyncio
-import json
 import logging
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 import aioredis
-import pickle
-import gzip
 
 from ..models.lifecycle import StateSnapshot, RecoveryStrategy
+from .record_codec import RecordCodec
 
 
 class StatePersistenceManager:
     """Manages persistent storage of agent lifecycle states."""
     
+    # Retention of each record type
+    STATE_TTL_SECONDS = 30 * 24 * 3600
+    SNAPSHOT_TTL_SECONDS = 7 * 24 * 3600
+    EVENT_TTL_SECONDS = 30 * 24 * 3600
+    
     def __init__(self, redis_url: str = "redis://localhost:6379", 
-                 compression_enabled: bool = True):
+                 compression_enabled: bool = True,
+                 batch_size: int = 500):
         self.redis_url = redis_url
         self.compression_enabled = compression_enabled
+        self.batch_size = batch_size
         self.logger = logging.getLogger(__name__)
         self.redis_client: Optional[aioredis.Redis] = None
+        self.codec = RecordCodec(compression_threshold=512 if compression_enabled else None)
         
         # Key prefixes for different data types
         self.AGENT_STATE_PREFIX = "acso:agent:state:"
@@ -63,31 +68,52 @@ class StatePersistenceManager:
             self.logger.error(f"Error during persistence manager shutdown: {e}")
     
     def _serialize_data(self, data: Any) -> bytes:
-        """Serialize data with optional compression."""
+        """Encode a record; see RecordCodec."""
         try:
-            serialized = pickle.dumps(data)
-            
-            if self.compression_enabled:
-                serialized = gzip.compress(serialized)
-            
-            return serialized
+            return self.codec.encode(data)
             
         except Exception as e:
             self.logger.error(f"Data serialization failed: {e}")
             raise
     
     def _deserialize_data(self, data: bytes) -> Any:
-        """Deserialize data with optional decompression."""
+        """Decode a record; see RecordCodec."""
         try:
-            if self.compression_enabled:
-                data = gzip.decompress(data)
-            
-            return pickle.loads(data)
+            return self.codec.decode(data)
             
         except Exception as e:
             self.logger.error(f"Data deserialization failed: {e}")
             raise
     
+    def _deserialize_many(self, keys: List[Any], values: List[Optional[bytes]]) -> Dict[Any, Any]:
+        """Decode bulk-loaded records by key, skipping missing and undecodable ones."""
+        records = {}
+        for key, value in zip(keys, values):
+            if not value:
+                continue
+            try:
+                records[key] = self.codec.decode(value)
+            except Exception as e:
+                self.logger.error(f"Skipping undecodable record {key!r}: {e}")
+        return records
+    
+    def _batches(self, items: List[Any]) -> List[List[Any]]:
+        return [items[i:i + self.batch_size] for i in range(0, len(items), self.batch_size)]
+    
+    async def _mget(self, keys: List[Any]) -> List[Optional[bytes]]:
+        """MGET any number of keys in one round trip, batched to bound reply sizes."""
+        if not keys:
+            return []
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            for batch in self._batches(keys):
+                pipe.mget(batch)
+            replies = await pipe.execute()
+        return [value for reply in replies for value in reply]
+    
+    async def _scan_keys(self, pattern: str) -> List[bytes]:
+        """Keys matching a pattern, iterated with SCAN so Redis is never blocked."""
+        return [key async for key in self.redis_client.scan_iter(match=pattern, count=self.batch_size)]
+    
     async def store_agent_state(self, agent_id: str, state_data: Dict[str, Any]) -> bool:
         """Store agent lifecycle state."""
         try:
@@ -97,10 +123,7 @@ class StatePersistenceManager:
             key = f"{self.AGENT_STATE_PREFIX}{agent_id}"
             serialized_data = self._serialize_data(state_data)
             
-            await self.redis_client.set(key, serialized_data)
-            
-            # Set expiration (30 days)
-            await self.redis_client.expire(key, 30 * 24 * 3600)
+            await self.redis_client.set(key, serialized_data, ex=self.STATE_TTL_SECONDS)
             
             return True
             
@@ -108,6 +131,39 @@ class StatePersistenceManager:
             self.logger.error(f"Failed to store agent state for {agent_id}: {e}")
             return False
     
+    async def store_agent_states(self, states: Dict[str, Dict[str, Any]],
+                                 recovery_strategies: Optional[Dict[str, Dict[str, Any]]] = None) -> bool:
+        """
+        Store many agent states, and optionally recovery strategies, in pipelined batches.
+        
+        Records that cannot be encoded are logged and skipped; the rest are still written.
+        """
+        try:
+            if not self.redis_client:
+                return False
+            
+            records = []
+            for prefix, items in ((self.AGENT_STATE_PREFIX, states),
+                                  (self.RECOVERY_STRATEGY_PREFIX, recovery_strategies or {})):
+                for agent_id, data in items.items():
+                    # One unencodable record must not keep the others from being saved
+                    try:
+                        records.append((f"{prefix}{agent_id}", self.codec.encode(data)))
+                    except Exception as e:
+                        self.logger.error(f"Skipping unencodable record {prefix}{agent_id}: {e}")
+            
+            for batch in self._batches(records):
+                async with self.redis_client.pipeline(transaction=False) as pipe:
+                    for key, serialized_data in batch:
+                        pipe.set(key, serialized_data, ex=self.STATE_TTL_SECONDS)
+                    await pipe.execute()
+            
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"Failed to store {len(states)} agent states: {e}")
+            return False
+    
     async def load_agent_state(self, agent_id: str) -> Optional[Dict[str, Any]]:
         """Load agent lifecycle state."""
         try:
@@ -132,17 +188,12 @@ class StatePersistenceManager:
             if not self.redis_client:
                 return {}
             
-            pattern = f"{self.AGENT_STATE_PREFIX}*"
-            keys = await self.redis_client.keys(pattern)
-            
-            states = {}
-            for key in keys:
-                agent_id = key.decode('utf-8').replace(self.AGENT_STATE_PREFIX, '')
-                state_data = await self.load_agent_state(agent_id)
-                if state_data:
-                    states[agent_id] = state_data
+            keys = await self._scan_keys(f"{self.AGENT_STATE_PREFIX}*")
+            records = self._deserialize_many(keys, await self._mget(keys))
             
-            return states
+            prefix_length = len(self.AGENT_STATE_PREFIX)
+            return {key.decode('utf-8')[prefix_length:]: state_data
+                    for key, state_data in records.items()}
             
         except Exception as e:
             self.logger.error(f"Failed to load all agent states: {e}")
@@ -157,8 +208,7 @@ class StatePersistenceManager:
             key = f"{self.RECOVERY_STRATEGY_PREFIX}{agent_id}"
             serialized_data = self._serialize_data(strategy_data)
             
-            await self.redis_client.set(key, serialized_data)
-            await self.redis_client.expire(key, 30 * 24 * 3600)
+            await self.redis_client.set(key, serialized_data, ex=self.STATE_TTL_SECONDS)
             
             return True
             
@@ -184,6 +234,19 @@ class StatePersistenceManager:
             self.logger.error(f"Failed to load recovery strategy for {agent_id}: {e}")
             return None
     
+    async def load_recovery_strategies(self, agent_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Load the recovery strategies of many agents; agents without one are left out."""
+        try:
+            if not self.redis_client:
+                return {}
+            
+            keys = [f"{self.RECOVERY_STRATEGY_PREFIX}{agent_id}" for agent_id in agent_ids]
+            return self._deserialize_many(agent_ids, await self._mget(keys))
+            
+        except Exception as e:
+            self.logger.error(f"Failed to load recovery strategies for {len(agent_ids)} agents: {e}")
+            return {}
+    
     async def store_state_snapshot(self, agent_id: str, snapshot: StateSnapshot) -> bool:
         """Store a state snapshot."""
         try:
@@ -192,16 +255,16 @@ class StatePersistenceManager:
             
             timestamp_str = snapshot.timestamp.isoformat()
             key = f"{self.STATE_SNAPSHOT_PREFIX}{agent_id}:{timestamp_str}"
+            list_key = f"{self.STATE_SNAPSHOT_PREFIX}{agent_id}:list"
             
             serialized_data = self._serialize_data(snapshot.__dict__)
             
-            await self.redis_client.set(key, serialized_data)
-            await self.redis_client.expire(key, 7 * 24 * 3600)  # 7 days retention
-            
-            # Add to sorted set for easy retrieval
-            list_key = f"{self.STATE_SNAPSHOT_PREFIX}{agent_id}:list"
-            await self.redis_client.zadd(list_key, {key: snapshot.timestamp.timestamp()})
-            await self.redis_client.expire(list_key, 7 * 24 * 3600)
+            # Record and its entry in the sorted set used for retrieval, in one round trip
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.set(key, serialized_data, ex=self.SNAPSHOT_TTL_SECONDS)
+                pipe.zadd(list_key, {key: snapshot.timestamp.timestamp()})
+                pipe.expire(list_key, self.SNAPSHOT_TTL_SECONDS)
+                await pipe.execute()
             
             return True
             
@@ -211,28 +274,39 @@ class StatePersistenceManager:
     
     async def load_state_snapshots(self, agent_id: str, limit: int = 10) -> List[StateSnapshot]:
         """Load state snapshots for an agent."""
+        snapshots = await self.load_state_snapshots_for_agents([agent_id], limit)
+        return snapshots.get(agent_id, [])
+    
+    async def load_state_snapshots_for_agents(self, agent_ids: List[str],
+                                              limit: int = 10) -> Dict[str, List[StateSnapshot]]:
+        """Load the most recent state snapshots of many agents in two round trips per batch."""
         try:
             if not self.redis_client:
-                return []
-            
-            list_key = f"{self.STATE_SNAPSHOT_PREFIX}{agent_id}:list"
-            
-            # Get most recent snapshots
-            snapshot_keys = await self.redis_client.zrevrange(list_key, 0, limit - 1)
+                return {}
             
-            snapshots = []
-            for key in snapshot_keys:
-                serialized_data = await self.redis_client.get(key)
-                if serialized_data:
-                    snapshot_data = self._deserialize_data(serialized_data)
-                    snapshot = StateSnapshot(**snapshot_data)
-                    snapshots.append(snapshot)
+            snapshots = {}
+            for batch in self._batches(agent_ids):
+                async with self.redis_client.pipeline(transaction=False) as pipe:
+                    for agent_id in batch:
+                        pipe.zrevrange(f"{self.STATE_SNAPSHOT_PREFIX}{agent_id}:list", 0, limit - 1)
+                    key_lists = await pipe.execute()
+                
+                keys = [key for key_list in key_lists for key in key_list]
+                records = self._deserialize_many(keys, await self._mget(keys))
+                
+                for agent_id, key_list in zip(batch, key_lists):
+                    agent_snapshots = []
+                    for key in key_list:
+                        snapshot_data = records.get(key)
+                        if snapshot_data:
+                            agent_snapshots.append(StateSnapshot(**snapshot_data))
+                    snapshots[agent_id] = agent_snapshots
             
             return snapshots
             
         except Exception as e:
-            self.logger.error(f"Failed to load state snapshots for {agent_id}: {e}")
-            return []
+            self.logger.error(f"Failed to load state snapshots for {len(agent_ids)} agents: {e}")
+            return {}
     
     async def store_lifecycle_event(self, agent_id: str, event: str, event_data: Dict[str, Any]) -> bool:
         """Store a lifecycle event."""
@@ -242,6 +316,7 @@ class StatePersistenceManager:
             
             timestamp = datetime.utcnow()
             key = f"{self.LIFECYCLE_EVENT_PREFIX}{agent_id}:{timestamp.isoformat()}"
+            list_key = f"{self.LIFECYCLE_EVENT_PREFIX}{agent_id}:list"
             
             event_record = {
                 "agent_id": agent_id,
@@ -252,13 +327,12 @@ class StatePersistenceManager:
             
             serialized_data = self._serialize_data(event_record)
             
-            await self.redis_client.set(key, serialized_data)
-            await self.redis_client.expire(key, 30 * 24 * 3600)  # 30 days retention
-            
-            # Add to sorted set for easy retrieval
-            list_key = f"{self.LIFECYCLE_EVENT_PREFIX}{agent_id}:list"
-            await self.redis_client.zadd(list_key, {key: timestamp.timestamp()})
-            await self.redis_client.expire(list_key, 30 * 24 * 3600)
+            # Record and its entry in the sorted set used for retrieval, in one round trip
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.set(key, serialized_data, ex=self.EVENT_TTL_SECONDS)
+                pipe.zadd(list_key, {key: timestamp.timestamp()})
+                pipe.expire(list_key, self.EVENT_TTL_SECONDS)
+                await pipe.execute()
             
             return True
             
@@ -277,8 +351,7 @@ class StatePersistenceManager:
             
             serialized_data = self._serialize_data(redistribution_data)
             
-            await self.redis_client.set(key, serialized_data)
-            await self.redis_client.expire(key, 30 * 24 * 3600)
+            await self.redis_client.set(key, serialized_data, ex=self.EVENT_TTL_SECONDS)
             
             return True
             
@@ -295,16 +368,15 @@ class StatePersistenceManager:
             # Get lifecycle events related to recovery
             list_key = f"{self.LIFECYCLE_EVENT_PREFIX}{agent_id}:list"
             event_keys = await self.redis_client.zrevrange(list_key, 0, limit - 1)
+            records = self._deserialize_many(event_keys, await self._mget(event_keys))
             
             recovery_events = []
             for key in event_keys:
-                serialized_data = await self.redis_client.get(key)
-                if serialized_data:
-                    event_data = self._deserialize_data(serialized_data)
-                    
-                    # Filter for recovery-related events
-                    if event_data.get("event") in ["failed", "recovering", "running"]:
-                        recovery_events.append(event_data)
+                event_data = records.get(key)
+                
+                # Filter for recovery-related events
+                if event_data and event_data.get("event") in ["failed", "recovering", "running"]:
+                    recovery_events.append(event_data)
             
             return recovery_events
             
@@ -333,10 +405,10 @@ class StatePersistenceManager:
             info = await self.redis_client.info()
             
             # Count keys by type
-            agent_states = len(await self.redis_client.keys(f"{self.AGENT_STATE_PREFIX}*"))
-            recovery_strategies = len(await self.redis_client.keys(f"{self.RECOVERY_STRATEGY_PREFIX}*"))
-            snapshots = len(await self.redis_client.keys(f"{self.STATE_SNAPSHOT_PREFIX}*"))
-            events = len(await self.redis_client.keys(f"{self.LIFECYCLE_EVENT_PREFIX}*"))
+            agent_states = len(await self._scan_keys(f"{self.AGENT_STATE_PREFIX}*"))
+            recovery_strategies = len(await self._scan_keys(f"{self.RECOVERY_STRATEGY_PREFIX}*"))
+            snapshots = len(await self._scan_keys(f"{self.STATE_SNAPSHOT_PREFIX}*"))
+            events = len(await self._scan_keys(f"{self.LIFECYCLE_EVENT_PREFIX}*"))
             
             return {
                 "redis_info": {
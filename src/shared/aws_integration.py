@@ -5,10 +5,12 @@ AWS service integrations for ACSO agents.
 import boto3
 import json
 import logging
+import time
 from typing import Dict, Any, Optional, List
 from botocore.exceptions import ClientError, BotoCoreError
 
 from config.settings import settings
+from .cloudwatch_shipping import CloudWatchLogShipper, CloudWatchMetricShipper, run_blocking
 
 
 class BedrockAgentCoreClient:
@@ -83,77 +85,71 @@ class BedrockAgentCoreClient:
 class CloudWatchLogger:
     """CloudWatch logging integration."""
     
-    def __init__(self):
+    def __init__(self, logs_client: Optional[Any] = None):
         self.session = boto3.Session()
-        self.logs_client = self.session.client(
+        self.logs_client = logs_client or self.session.client(
             'logs',
             region_name=settings.aws.region
         )
         self.log_group = settings.aws.cloudwatch_log_group
         self.logger = logging.getLogger(__name__)
         
+        # Events are buffered per stream and shipped in batches off the event loop
+        self.shipper = CloudWatchLogShipper(self.logs_client, self.log_group)
+        
     async def create_log_group_if_not_exists(self):
         """Create CloudWatch log group if it doesn't exist."""
         try:
-            self.logs_client.create_log_group(logGroupName=self.log_group)
+            await run_blocking(self.logs_client.create_log_group, logGroupName=self.log_group)
         except ClientError as e:
             if e.response['Error']['Code'] != 'ResourceAlreadyExistsException':
                 self.logger.error(f"Failed to create log group: {e}")
                 
     async def log_agent_activity(self, agent_id: str, activity: str, details: Dict[str, Any]):
-        """Log agent activity to CloudWatch."""
+        """Queue agent activity for shipping to CloudWatch."""
         try:
             log_stream = f"{agent_id}-{activity}"
-            
-            # Create log stream if it doesn't exist
-            try:
-                self.logs_client.create_log_stream(
-                    logGroupName=self.log_group,
-                    logStreamName=log_stream
-                )
-            except ClientError as e:
-                if e.response['Error']['Code'] != 'ResourceAlreadyExistsException':
-                    raise
-                    
-            # Put log event
-            import time
             timestamp = int(time.time() * 1000)
+            message = json.dumps({
+                'agent_id': agent_id,
+                'activity': activity,
+                'details': details,
+                'level': 'INFO'
+            })
             
-            log_event = {
-                'timestamp': timestamp,
-                'message': json.dumps({
-                    'agent_id': agent_id,
-                    'activity': activity,
-                    'details': details,
-                    'level': 'INFO'
-                })
-            }
-            
-            self.logs_client.put_log_events(
-                logGroupName=self.log_group,
-                logStreamName=log_stream,
-                logEvents=[log_event]
-            )
+            if not self.shipper.enqueue(log_stream, timestamp, message):
+                self.logger.warning(f"CloudWatch log buffer full, dropped event for {log_stream}")
             
         except Exception as e:
             self.logger.error(f"Failed to log to CloudWatch: {e}")
+            
+    async def flush(self) -> None:
+        """Ship all buffered log events now."""
+        await self.shipper.flush()
+        
+    async def shutdown(self) -> None:
+        """Stop background shipping after flushing buffered events."""
+        await self.shipper.stop()
 
 
 class CloudWatchMetrics:
     """CloudWatch metrics integration."""
     
-    def __init__(self):
+    def __init__(self, cloudwatch_client: Optional[Any] = None):
         self.session = boto3.Session()
-        self.cloudwatch = self.session.client(
+        self.cloudwatch = cloudwatch_client or self.session.client(
             'cloudwatch',
             region_name=settings.aws.region
         )
         self.namespace = settings.aws.metrics_namespace
         self.logger = logging.getLogger(__name__)
         
+        # Metrics are buffered and shipped up to 1000 per PutMetricData call
+        self.shipper = CloudWatchMetricShipper(self.cloudwatch, self.namespace)
+        
     async def put_metric(self, metric_name: str, value: float, unit: str = 'Count', 
                         dimensions: Optional[Dict[str, str]] = None):
-        """Put a metric to CloudWatch."""
+        """Queue a metric for shipping to CloudWatch."""
         try:
             metric_data = {
                 'MetricName': metric_name,
@@ -166,10 +162,8 @@ class CloudWatchMetrics:
                     {'Name': k, 'Value': v} for k, v in dimensions.items()
                 ]
                 
-            self.cloudwatch.put_metric_data(
-                Namespace=self.namespace,
-                MetricData=[metric_data]
-            )
+            if not self.shipper.enqueue(metric_data):
+                self.logger.warning(f"CloudWatch metric buffer full, dropped {metric_name}")
             
         except Exception as e:
             self.logger.error(f"Failed to put metric: {e}")
@@ -184,6 +178,14 @@ class CloudWatchMetrics:
                 value=value,
                 dimensions=dimensions
             )
+            
+    async def flush(self) -> None:
+        """Ship all buffered metrics now."""
+        await self.shipper.flush()
+        
+    async def shutdown(self) -> None:
+        """Stop background shipping after flushing buffered metrics."""
+        await self.shipper.stop()
 
 
 class IAMSecurityManager:
@@ -0,0 +1,297 @@
+"""
+Batched, non-blocking shipping of CloudWatch log events and metrics.
+
+boto3 clients are synchronous, so every AWS call made here runs in the
+default thread pool executor and never blocks the agents' event loop.
+"""
+
+import asyncio
+import functools
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+
+# CloudWatch Logs PutLogEvents limits
+MAX_LOG_EVENTS_PER_BATCH = 10000
+MAX_LOG_BATCH_BYTES = 1048576
+LOG_EVENT_OVERHEAD_BYTES = 26
+MAX_LOG_EVENT_BYTES = 262144
+MAX_LOG_BATCH_SPAN_MS = 24 * 60 * 60 * 1000
+
+# CloudWatch PutMetricData limit
+MAX_METRICS_PER_BATCH = 1000
+
+DEFAULT_FLUSH_INTERVAL = 5.0
+DEFAULT_MAX_BUFFERED_LOG_EVENTS = 50000
+DEFAULT_MAX_BUFFERED_METRICS = 20000
+
+
+def _error_code(error: Exception) -> Optional[str]:
+    """Extract the AWS error code from a botocore ClientError, if any."""
+    response = getattr(error, "response", None)
+    if isinstance(response, dict):
+        return response.get("Error", {}).get("Code")
+    return None
+
+
+async def run_blocking(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking boto3 call in the default executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+
+class _BackgroundFlusher(ABC):
+    """Periodic and on-demand flushing shared by the log and metric shippers."""
+
+    def __init__(self, flush_interval: float):
+        self.flush_interval = flush_interval
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_requested: Optional[asyncio.Event] = None
+        self._running = False
+        self.logger = logging.getLogger(__name__)
+
+    def _ensure_started(self) -> None:
+        """Start the background flush task on first use inside a running loop."""
+        if self._flush_task is not None and not self._flush_task.done():
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._running = True
+        self._flush_requested = asyncio.Event()
+        self._flush_task = asyncio.create_task(self._flush_loop())
+
+    def _request_flush(self) -> None:
+        if self._flush_requested is not None:
+            self._flush_requested.set()
+
+    async def _flush_loop(self) -> None:
+        while self._running:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                self.logger.error(f"Background flush failed: {e}")
+
+    @abstractmethod
+    async def flush(self) -> None:
+        """Ship everything currently buffered."""
+
+    async def stop(self) -> None:
+        """Stop the background task and ship everything still buffered."""
+        self._running = False
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
+
+
+class CloudWatchLogShipper(_BackgroundFlusher):
+    """Buffers log events per stream and ships them with batched PutLogEvents calls.
+
+    A stream is flushed when its buffer reaches the PutLogEvents event or byte
+    limit, and every stream is flushed each flush_interval seconds. Messages
+    over the 256 KB per-event limit are truncated, and events beyond
+    max_buffered_events are dropped; both are counted.
+    """
+
+    def __init__(self, logs_client: Any, log_group: str,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 max_buffered_events: int = DEFAULT_MAX_BUFFERED_LOG_EVENTS):
+        super().__init__(flush_interval)
+        self.logs_client = logs_client
+        self.log_group = log_group
+        self.max_buffered_events = max_buffered_events
+
+        # stream name -> [(timestamp ms, message)] and running byte size
+        self._buffers: Dict[str, List[Tuple[int, str]]] = {}
+        self._buffer_bytes: Dict[str, int] = {}
+        self._buffered_events = 0
+        self._known_streams: Set[str] = set()
+        self._flush_lock: Optional[asyncio.Lock] = None
+
+        self.shipped_events = 0
+        self.dropped_events = 0
+        self.truncated_events = 0
+        self.failed_events = 0
+        self.put_calls = 0
+
+    def enqueue(self, log_stream: str, timestamp: int, message: str) -> bool:
+        """Buffer one log event. Returns False if it was dropped."""
+        if self._buffered_events >= self.max_buffered_events:
+            self.dropped_events += 1
+            return False
+
+        encoded = message.encode("utf-8")
+        size = len(encoded) + LOG_EVENT_OVERHEAD_BYTES
+        if size > MAX_LOG_EVENT_BYTES:
+            # PutLogEvents rejects the whole batch if any event is over the limit
+            message = encoded[:MAX_LOG_EVENT_BYTES - LOG_EVENT_OVERHEAD_BYTES].decode("utf-8", "ignore")
+            size = len(message.encode("utf-8")) + LOG_EVENT_OVERHEAD_BYTES
+            self.truncated_events += 1
+
+        self._buffers.setdefault(log_stream, []).append((timestamp, message))
+        self._buffer_bytes[log_stream] = self._buffer_bytes.get(log_stream, 0) + size
+        self._buffered_events += 1
+
+        self._ensure_started()
+        if (len(self._buffers[log_stream]) >= MAX_LOG_EVENTS_PER_BATCH
+                or self._buffer_bytes[log_stream] >= MAX_LOG_BATCH_BYTES):
+            self._request_flush()
+        return True
+
+    async def flush(self) -> None:
+        """Ship every buffered event."""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            buffers, self._buffers = self._buffers, {}
+            self._buffer_bytes = {}
+            self._buffered_events = 0
+            for log_stream, events in buffers.items():
+                await self._ship_stream(log_stream, events)
+
+    async def _ship_stream(self, log_stream: str, events: List[Tuple[int, str]]) -> None:
+        try:
+            await self._ensure_stream(log_stream)
+        except Exception as e:
+            self.logger.error(f"Failed to create log stream {log_stream}: {e}")
+            self.failed_events += len(events)
+            return
+
+        # PutLogEvents requires events in chronological order
+        events.sort(key=lambda event: event[0])
+        for batch in self._split_batches(events):
+            try:
+                await run_blocking(
+                    self.logs_client.put_log_events,
+                    logGroupName=self.log_group,
+                    logStreamName=log_stream,
+                    logEvents=[{"timestamp": ts, "message": msg} for ts, msg in batch]
+                )
+                self.put_calls += 1
+                self.shipped_events += len(batch)
+            except Exception as e:
+                if _error_code(e) == "ResourceNotFoundException":
+                    self._known_streams.discard(log_stream)
+                self.logger.error(f"Failed to ship {len(batch)} events to {log_stream}: {e}")
+                self.failed_events += len(batch)
+
+    def _split_batches(self, events: List[Tuple[int, str]]) -> List[List[Tuple[int, str]]]:
+        """Split sorted events into batches within the PutLogEvents limits."""
+        batches = []
+        batch: List[Tuple[int, str]] = []
+        batch_bytes = 0
+        for timestamp, message in events:
+            size = len(message.encode("utf-8")) + LOG_EVENT_OVERHEAD_BYTES
+            if batch and (
+                len(batch) >= MAX_LOG_EVENTS_PER_BATCH
+                or batch_bytes + size > MAX_LOG_BATCH_BYTES
+                or timestamp - batch[0][0] > MAX_LOG_BATCH_SPAN_MS
+            ):
+                batches.append(batch)
+                batch, batch_bytes = [], 0
+            batch.append((timestamp, message))
+            batch_bytes += size
+        if batch:
+            batches.append(batch)
+        return batches
+
+    async def _ensure_stream(self, log_stream: str) -> None:
+        """Create a log stream once; later calls hit the known-stream cache."""
+        if log_stream in self._known_streams:
+            return
+        try:
+            await run_blocking(
+                self.logs_client.create_log_stream,
+                logGroupName=self.log_group,
+                logStreamName=log_stream
+            )
+        except Exception as e:
+            if _error_code(e) != "ResourceAlreadyExistsException":
+                raise
+        self._known_streams.add(log_stream)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get buffering and delivery counters."""
+        return {
+            "buffered_events": self._buffered_events,
+            "shipped_events": self.shipped_events,
+            "dropped_events": self.dropped_events,
+            "truncated_events": self.truncated_events,
+            "failed_events": self.failed_events,
+            "put_calls": self.put_calls,
+            "known_streams": len(self._known_streams)
+        }
+
+
+class CloudWatchMetricShipper(_BackgroundFlusher):
+    """Buffers metric data and ships it in PutMetricData calls of up to 1000 metrics."""
+
+    def __init__(self, cloudwatch_client: Any, namespace: str,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 max_buffered_metrics: int = DEFAULT_MAX_BUFFERED_METRICS):
+        super().__init__(flush_interval)
+        self.cloudwatch_client = cloudwatch_client
+        self.namespace = namespace
+        self.max_buffered_metrics = max_buffered_metrics
+
+        self._buffer: List[Dict[str, Any]] = []
+        self._flush_lock: Optional[asyncio.Lock] = None
+
+        self.shipped_metrics = 0
+        self.dropped_metrics = 0
+        self.failed_metrics = 0
+        self.put_calls = 0
+
+    def enqueue(self, metric_data: Dict[str, Any]) -> bool:
+        """Buffer one MetricData entry. Returns False if it was dropped."""
+        if len(self._buffer) >= self.max_buffered_metrics:
+            self.dropped_metrics += 1
+            return False
+
+        self._buffer.append(metric_data)
+        self._ensure_started()
+        if len(self._buffer) >= MAX_METRICS_PER_BATCH:
+            self._request_flush()
+        return True
+
+    async def flush(self) -> None:
+        """Ship every buffered metric."""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            buffer, self._buffer = self._buffer, []
+            for start in range(0, len(buffer), MAX_METRICS_PER_BATCH):
+                batch = buffer[start:start + MAX_METRICS_PER_BATCH]
+                try:
+                    await run_blocking(
+                        self.cloudwatch_client.put_metric_data,
+                        Namespace=self.namespace,
+                        MetricData=batch
+                    )
+                    self.put_calls += 1
+                    self.shipped_metrics += len(batch)
+                except Exception as e:
+                    self.logger.error(f"Failed to ship {len(batch)} metrics: {e}")
+                    self.failed_metrics += len(batch)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get buffering and delivery counters."""
+        return {
+            "buffered_metrics": len(self._buffer),
+            "shipped_metrics": self.shipped_metrics,
+            "dropped_metrics": self.dropped_metrics,
+            "failed_metrics": self.failed_metrics,
+            "put_calls": self.put_calls
+        }
@@ -4,15 +4,32 @@ Communication protocols and message handling for ACSO agents.
 
 import asyncio
 import json
+import time
 import uuid
+from collections import deque
 from datetime import datetime
-from typing import Dict, List, Optional, Any, Callable
+from enum import Enum
+from typing import Deque, Dict, List, Optional, Any, Callable, Set, Tuple
 from dataclasses import dataclass, field
 
 from .models import AgentMessage
 from .interfaces import CommunicationProtocol
 
 
+DEFAULT_QUEUE_SIZE = 1000
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_DEAD_LETTER_SIZE = 1000
+# Seconds a sender waits on a full BLOCK mailbox before giving up
+DEFAULT_PUT_TIMEOUT = 30.0
+
+
+class OverflowPolicy(str, Enum):
+    """Behaviour of a mailbox when it is full."""
+    BLOCK = "block"
+    DROP_OLDEST = "drop_oldest"
+    REJECT = "reject"
+
+
 @dataclass
 class MessageHandler:
     """Handler for specific message types."""
@@ -21,40 +38,294 @@ class MessageHandler:
     agent_id: str
 
 
+@dataclass
+class MailboxMetrics:
+    """Queue depth and delivery latency counters for one agent mailbox."""
+    enqueued: int = 0
+    delivered: int = 0
+    dropped: int = 0
+    rejected: int = 0
+    timed_out: int = 0
+    max_depth: int = 0
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+
+    def to_dict(self, depth: int) -> Dict[str, Any]:
+        """Return the metrics as a plain dictionary."""
+        return {
+            "depth": depth,
+            "enqueued": self.enqueued,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "max_depth": self.max_depth,
+            "avg_latency_ms": (self.total_latency / self.delivered * 1000) if self.delivered else 0.0,
+            "max_latency_ms": self.max_latency * 1000
+        }
+
+
+class AgentMailbox:
+    """Bounded per-agent message queue with a configurable overflow policy."""
+
+    def __init__(self, agent_id: str, max_size: int = DEFAULT_QUEUE_SIZE,
+                 overflow_policy: OverflowPolicy = OverflowPolicy.BLOCK,
+                 put_timeout: Optional[float] = DEFAULT_PUT_TIMEOUT):
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+        self.agent_id = agent_id
+        self.max_size = max_size
+        self.overflow_policy = overflow_policy
+        self.put_timeout = put_timeout
+        self.metrics = MailboxMetrics()
+        self.closed = False
+
+        # Entries are (enqueue monotonic time, message) so latency can be measured
+        self._items: Deque[Tuple[float, AgentMessage]] = deque()
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+
+    @property
+    def depth(self) -> int:
+        """Number of messages waiting for delivery."""
+        return len(self._items)
+
+    def full(self) -> bool:
+        """Whether the mailbox has reached its capacity."""
+        return len(self._items) >= self.max_size
+
+    async def put(self, message: AgentMessage) -> bool:
+        """Enqueue a message, applying the overflow policy when full.
+
+        Returns False if the message was rejected, a blocked send timed out
+        after put_timeout seconds, or the mailbox was closed.
+        """
+        deadline = None if self.put_timeout is None else time.monotonic() + self.put_timeout
+        while not self.closed and self.full():
+            if self.overflow_policy == OverflowPolicy.REJECT:
+                self.metrics.rejected += 1
+                return False
+            if self.overflow_policy == OverflowPolicy.DROP_OLDEST:
+                self._items.popleft()
+                self.metrics.dropped += 1
+                break
+            self._not_full.clear()
+            try:
+                if deadline is None:
+                    await self._not_full.wait()
+                else:
+                    await asyncio.wait_for(self._not_full.wait(), timeout=max(deadline - time.monotonic(), 0))
+            except asyncio.TimeoutError:
+                self.metrics.timed_out += 1
+                return False
+
+        if self.closed:
+            return False
+
+        self._items.append((time.monotonic(), message))
+        self.metrics.enqueued += 1
+        if len(self._items) > self.metrics.max_depth:
+            self.metrics.max_depth = len(self._items)
+        self._not_empty.set()
+        return True
+
+    async def get_batch(self, max_items: int = DEFAULT_BATCH_SIZE,
+                        timeout: Optional[float] = None) -> List[AgentMessage]:
+        """Wait for messages and return up to max_items of them.
+
+        Returns an empty list if timeout elapses before anything arrives or
+        the mailbox is closed.
+        """
+        if not self._items:
+            if self.closed:
+                return []
+            self._not_empty.clear()
+            try:
+                if timeout is None:
+                    await self._not_empty.wait()
+                else:
+                    await asyncio.wait_for(self._not_empty.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                return []
+
+        now = time.monotonic()
+        batch = []
+        while self._items and len(batch) < max_items:
+            enqueued_at, message = self._items.popleft()
+            latency = now - enqueued_at
+            self.metrics.total_latency += latency
+            if latency > self.metrics.max_latency:
+                self.metrics.max_latency = latency
+            batch.append(message)
+
+        self.metrics.delivered += len(batch)
+        if not self._items:
+            self._not_empty.clear()
+        self._not_full.set()
+        return batch
+
+    def close(self) -> List[AgentMessage]:
+        """Stop accepting messages and return the undelivered ones.
+
+        Senders blocked on a full mailbox are woken and their put() returns
+        False, as does any later put().
+        """
+        self.closed = True
+        undelivered = [message for _, message in self._items]
+        self._items.clear()
+        self._not_full.set()
+        self._not_empty.set()
+        return undelivered
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get queue depth and latency metrics for this mailbox."""
+        return self.metrics.to_dict(self.depth)
+
+
+class MessageBus:
+    """In-process message bus routing messages to per-agent mailboxes."""
+
+    def __init__(self, default_queue_size: int = DEFAULT_QUEUE_SIZE,
+                 default_overflow_policy: OverflowPolicy = OverflowPolicy.BLOCK,
+                 dead_letter_size: int = DEFAULT_DEAD_LETTER_SIZE,
+                 default_put_timeout: Optional[float] = DEFAULT_PUT_TIMEOUT):
+        self.default_queue_size = default_queue_size
+        self.default_overflow_policy = default_overflow_policy
+        self.default_put_timeout = default_put_timeout
+
+        # Routing table: recipient agent ID -> mailbox
+        self.routes: Dict[str, AgentMailbox] = {}
+        # Owners (e.g. communication managers) reading each mailbox
+        self.owners: Dict[str, Set[Any]] = {}
+
+        # Unroutable messages are parked here once instead of being re-queued
+        self.dead_letters: Deque[AgentMessage] = deque(maxlen=dead_letter_size)
+        self.unroutable_count = 0
+
+    def register_agent(self, agent_id: str, max_queue_size: Optional[int] = None,
+                       overflow_policy: Optional[OverflowPolicy] = None,
+                       owner: Any = None) -> AgentMailbox:
+        """Create (or return the existing) mailbox for an agent.
+
+        An owner keeps the mailbox open until it unregisters, even if other
+        owners of the same agent ID unregister first.
+        """
+        if owner is not None:
+            self.owners.setdefault(agent_id, set()).add(owner)
+        mailbox = self.routes.get(agent_id)
+        if mailbox is None:
+            mailbox = AgentMailbox(
+                agent_id,
+                max_size=max_queue_size or self.default_queue_size,
+                overflow_policy=overflow_policy or self.default_overflow_policy,
+                put_timeout=self.default_put_timeout
+            )
+            self.routes[agent_id] = mailbox
+        return mailbox
+
+    def unregister_agent(self, agent_id: str, owner: Any = None) -> None:
+        """Remove an agent's route.
+
+        With an owner, only that owner's claim is released and the route is
+        kept while other owners remain; without one the route is removed
+        outright. Undelivered messages, including those of senders blocked
+        on the full mailbox, go to the dead letters.
+        """
+        owners = self.owners.get(agent_id)
+        if owner is not None and owners is not None:
+            owners.discard(owner)
+            if owners:
+                return
+        self.owners.pop(agent_id, None)
+        mailbox = self.routes.pop(agent_id, None)
+        if mailbox is not None:
+            self.dead_letters.extend(mailbox.close())
+
+    def registered_agents(self) -> List[str]:
+        """List agent IDs with a registered mailbox."""
+        return list(self.routes.keys())
+
+    async def publish(self, message: AgentMessage) -> bool:
+        """Route a message to its recipient's mailbox.
+
+        Returns False if there is no route or the mailbox rejected it.
+        """
+        mailbox = self.routes.get(message.recipient_id)
+        if mailbox is None:
+            self.unroutable_count += 1
+            self.dead_letters.append(message)
+            return False
+        delivered = await mailbox.put(message)
+        if not delivered and mailbox.closed:
+            # The recipient unregistered while this sender was waiting
+            self.unroutable_count += 1
+            self.dead_letters.append(message)
+        return delivered
+
+    async def publish_many(self, messages: List[AgentMessage]) -> List[bool]:
+        """Route a batch of messages, preserving order per recipient."""
+        return [await self.publish(message) for message in messages]
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get per-agent queue metrics and bus-level counters."""
+        return {
+            "registered_agents": len(self.routes),
+            "unroutable_messages": self.unroutable_count,
+            "dead_letters": len(self.dead_letters),
+            "mailboxes": {
+                agent_id: mailbox.get_metrics()
+                for agent_id, mailbox in self.routes.items()
+            }
+        }
+
+
 class AgentCommunicationManager:
     """Manages communication between agents in the ACSO system."""
     
-    def __init__(self, agent_id: str):
+    def __init__(self, agent_id: str, message_bus: Optional[MessageBus] = None,
+                 max_queue_size: Optional[int] = None,
+                 overflow_policy: Optional[OverflowPolicy] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE):
         self.agent_id = agent_id
         self.message_handlers: Dict[str, MessageHandler] = {}
-        self.message_queue: asyncio.Queue = asyncio.Queue()
         self.connected_agents: Dict[str, bool] = {}
         self.running = False
         
-        # Message routing for multi-agent coordination
-        self.message_router: Dict[str, asyncio.Queue] = {}
-        self.global_message_bus: Optional[asyncio.Queue] = None
+        # Shared in-process bus; agents in the same process route through it
+        self.message_bus = message_bus or global_message_bus
+        self.max_queue_size = max_queue_size
+        self.overflow_policy = overflow_policy
+        self.batch_size = batch_size
+        self.mailbox: Optional[AgentMailbox] = None
+        self._processor_task: Optional[asyncio.Task] = None
         
     async def initialize(self) -> None:
         """Initialize the communication manager."""
         self.running = True
         
-        # Initialize global message bus for coordination
-        if not self.global_message_bus:
-            self.global_message_bus = asyncio.Queue()
-            
-        # Register this agent's message queue
-        self.message_router[self.agent_id] = self.message_queue
+        # Register this agent's mailbox on the bus
+        self.mailbox = self.message_bus.register_agent(
+            self.agent_id,
+            max_queue_size=self.max_queue_size,
+            overflow_policy=self.overflow_policy,
+            owner=self
+        )
         
         # Start message processing loop
-        asyncio.create_task(self._process_messages())
-        
-        # Start coordination message processing
-        asyncio.create_task(self._process_coordination_messages())
+        self._processor_task = asyncio.create_task(self._process_messages())
         
     async def shutdown(self) -> None:
         """Shutdown the communication manager."""
         self.running = False
+        if self._processor_task:
+            self._processor_task.cancel()
+            try:
+                await self._processor_task
+            except asyncio.CancelledError:
+                pass
+            self._processor_task = None
+        self.message_bus.unregister_agent(self.agent_id, owner=self)
         
     def register_handler(self, message_type: str, handler_func: Callable[[AgentMessage], Any]) -> None:
         """Register a handler for a specific message type."""
@@ -77,9 +348,11 @@ class AgentCommunicationManager:
         
         try:
             # In a real implementation, this would use AWS services like SQS or EventBridge
-            # For the prototype, we'll simulate message delivery
-            await self._deliver_message(message)
-            return True
+            # For the prototype, messages are routed through the in-process bus
+            delivered = await self.message_bus.publish(message)
+            if not delivered:
+                print(f"Cannot deliver message to {recipient_id} - no route or queue full")
+            return delivered
         except Exception as e:
             print(f"Failed to send message: {e}")
             return False
@@ -92,34 +365,27 @@ class AgentCommunicationManager:
             results[recipient_id] = success
         return results
         
-    async def receive_message(self) -> Optional[AgentMessage]:
-        """Receive a message from the queue."""
-        try:
-            message = await asyncio.wait_for(self.message_queue.get(), timeout=1.0)
-            return message
-        except asyncio.TimeoutError:
+    async def receive_message(self, timeout: float = 1.0) -> Optional[AgentMessage]:
+        """Receive a single message from this agent's mailbox."""
+        if not self.mailbox:
             return None
-            
-    async def _deliver_message(self, message: AgentMessage) -> None:
-        """Deliver a message to the recipient's queue."""
-        # Route message to appropriate agent queue
-        recipient_queue = self.message_router.get(message.recipient_id)
-        if recipient_queue:
-            await recipient_queue.put(message)
-        else:
-            # If recipient not found locally, use global message bus
-            if self.global_message_bus:
-                await self.global_message_bus.put(message)
-            else:
-                print(f"Cannot deliver message to {message.recipient_id} - no route found")
+        batch = await self.mailbox.get_batch(1, timeout=timeout)
+        return batch[0] if batch else None
         
     async def _process_messages(self) -> None:
-        """Process incoming messages."""
+        """Process incoming messages in batches until the mailbox is closed."""
         while self.running:
+            if self.mailbox.closed:
+                # get_batch returns at once on a closed mailbox; stop instead of spinning
+                print(f"Mailbox for {self.agent_id} was closed, stopping message processing")
+                self.running = False
+                break
             try:
-                message = await self.receive_message()
-                if message:
+                batch = await self.mailbox.get_batch(self.batch_size)
+                for message in batch:
                     await self._handle_message(message)
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 print(f"Error processing message: {e}")
                 await asyncio.sleep(1)
@@ -135,6 +401,25 @@ class AgentCommunicationManager:
         else:
             print(f"No handler for message type: {message.message_type}")
 
+    def get_queue_metrics(self) -> Dict[str, Any]:
+        """Get queue depth and latency metrics for this agent's mailbox."""
+        return self.mailbox.get_metrics() if self.mailbox else {}
+            
+    async def discover_agents(self) -> List[str]:
+        """Discover other agents in the system."""
+        return self.message_bus.registered_agents()
+        
+    async def ping_agent(self, agent_id: str) -> bool:
+        """Ping another agent to check if it's responsive."""
+        try:
+            payload = {"timestamp": datetime.utcnow().isoformat()}
+            success = await self.send_message(agent_id, "ping", payload)
+            return success
+            
+        except Exception as e:
+            print(f"Agent ping failed: {e}")
+            return False
+
 
 class TaskCoordinator:
     """Coordinates task distribution and result aggregation."""
@@ -142,15 +427,26 @@ class TaskCoordinator:
     def __init__(self, communication_manager: AgentCommunicationManager):
         self.comm_manager = communication_manager
         self.pending_tasks: Dict[str, Dict[str, Any]] = {}
-        self.task_results: Dict[str, Dict[str, Any]] = {}
         
-    async def delegate_task(self, task_id: str, agent_id: str, task_data: Dict[str, Any]) -> None:
-        """Delegate a task to a specific agent."""
+        # Completion handles resolved by handle_task_result
+        self.task_futures: Dict[str, asyncio.Future] = {}
+        
+    def track_task(self, task_id: str, agent_id: str, task_data: Dict[str, Any]) -> asyncio.Future:
+        """Start tracking a delegated task and return its completion handle."""
         self.pending_tasks[task_id] = {
             "agent_id": agent_id,
             "task_data": task_data,
             "timestamp": datetime.utcnow()
         }
+        future = self.task_futures.get(task_id)
+        if future is None or future.done():
+            future = asyncio.get_running_loop().create_future()
+            self.task_futures[task_id] = future
+        return future
+        
+    async def delegate_task(self, task_id: str, agent_id: str, task_data: Dict[str, Any]) -> asyncio.Future:
+        """Delegate a task to a specific agent and return its completion handle."""
+        future = self.track_task(task_id, agent_id, task_data)
         
         await self.comm_manager.send_message(
             recipient_id=agent_id,
@@ -160,26 +456,88 @@ class TaskCoordinator:
                 "task_data": task_data
             }
         )
+        return future
         
     async def handle_task_result(self, message: AgentMessage) -> None:
         """Handle task completion results."""
         task_id = message.payload.get("task_id")
         if task_id in self.pending_tasks:
-            self.task_results[task_id] = {
-                "agent_id": message.sender_id,
-                "result": message.payload.get("result"),
-                "timestamp": message.timestamp,
-                "success": message.payload.get("success", True)
-            }
             del self.pending_tasks[task_id]
+            future = self.task_futures.get(task_id)
+            if future and not future.done():
+                future.set_result({
+                    "task_id": task_id,
+                    "agent_id": message.sender_id,
+                    "result": message.payload.get("result"),
+                    "timestamp": message.timestamp,
+                    "success": message.payload.get("success", True)
+                })
+                
+    def cancel_task(self, task_id: str) -> None:
+        """Stop waiting for a task; a late result for it is ignored."""
+        self.pending_tasks.pop(task_id, None)
+        future = self.task_futures.pop(task_id, None)
+        if future and not future.done():
+            future.cancel()
+            
+    def _collect_result(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Pop a completed task's result, or None if it was cancelled."""
+        future = self.task_futures.pop(task_id, None)
+        if future is None or future.cancelled():
+            return None
+        return future.result()
             
     async def get_task_result(self, task_id: str, timeout: float = 30.0) -> Optional[Dict[str, Any]]:
-        """Wait for and retrieve task result."""
-        start_time = datetime.utcnow()
-        while (datetime.utcnow() - start_time).total_seconds() < timeout:
-            if task_id in self.task_results:
-                return self.task_results.pop(task_id)
-            await asyncio.sleep(0.1)
+        """Wait for and retrieve task result, cancelling the task on timeout."""
+        future = self.task_futures.get(task_id)
+        if future is None:
+            return None
+        
+        done, _ = await asyncio.wait({future}, timeout=timeout)
+        if not done:
+            self.cancel_task(task_id)
+            return None
+        return self._collect_result(task_id)
+        
+    async def wait_all(self, task_ids: List[str], timeout: float = 30.0) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Wait for several tasks at once.
+        
+        Returns results keyed by task ID in the order given; tasks that did not
+        finish within the timeout are cancelled and map to None.
+        """
+        futures = {self.task_futures[tid] for tid in task_ids if tid in self.task_futures}
+        if futures:
+            await asyncio.wait(futures, timeout=timeout)
+        
+        results = {}
+        for task_id in task_ids:
+            future = self.task_futures.get(task_id)
+            if future is not None and not future.done():
+                self.cancel_task(task_id)
+            results[task_id] = self._collect_result(task_id)
+        return results
+        
+    async def wait_any(self, task_ids: List[str], timeout: float = 30.0) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Wait for the first of several tasks to complete.
+        
+        Returns (task_id, result) for that task, or None on timeout. Tasks
+        cancelled while waiting are skipped; the remaining tasks keep running
+        and can still be awaited.
+        """
+        futures = {
+            self.task_futures[tid]: tid for tid in task_ids if tid in self.task_futures
+        }
+        deadline = time.monotonic() + timeout
+        pending = set(futures)
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                result = self._collect_result(futures[future])
+                if result is not None:
+                    return futures[future], result
         return None
 
 
@@ -225,60 +583,8 @@ class HumanApprovalManager:
             {"approval_id": aid, **data}
             for aid, data in self.pending_approvals.items()
             if data["status"] == "pending"
-        ]   
- async def _process_coordination_messages(self) -> None:
-        """Process messages from the global coordination bus."""
-        while self.running:
-            try:
-                if self.global_message_bus:
-                    message = await asyncio.wait_for(self.global_message_bus.get(), timeout=1.0)
-                    
-                    # Check if this message is for us
-                    if message.recipient_id == self.agent_id:
-                        await self.message_queue.put(message)
-                    else:
-                        # Route to appropriate agent if we know them
-                        recipient_queue = self.message_router.get(message.recipient_id)
-                        if recipient_queue:
-                            await recipient_queue.put(message)
-                        else:
-                            # Put back on global bus for other agents to handle
-                            await self.global_message_bus.put(message)
-                            
-            except asyncio.TimeoutError:
-                continue
-            except Exception as e:
-                print(f"Coordination message processing error: {e}")
-                await asyncio.sleep(1)
-                
-    def register_agent_queue(self, agent_id: str, queue: asyncio.Queue) -> None:
-        """Register another agent's message queue for direct routing."""
-        self.message_router[agent_id] = queue
-        
-    def unregister_agent_queue(self, agent_id: str) -> None:
-        """Unregister an agent's message queue."""
-        if agent_id in self.message_router:
-            del self.message_router[agent_id]
-            
-    async def discover_agents(self) -> List[str]:
-        """Discover other agents in the system."""
-        return list(self.message_router.keys())
-        
-    async def ping_agent(self, agent_id: str) -> bool:
-        """Ping another agent to check if it's responsive."""
-        try:
-            ping_message = AgentMessage(
-                message_id=str(uuid.uuid4()),
-                sender_id=self.agent_id,
-                recipient_id=agent_id,
-                message_type="ping",
-                payload={"timestamp": datetime.utcnow().isoformat()},
-                timestamp=datetime.utcnow()
-            )
-            
-            success = await self.send_message(agent_id, "ping", ping_message.payload)
-            return success
-            
-        except Exception as e:
-            print(f"Agent ping failed: {e}")
-            return False
\ No newline at end of file
+        ]
+
+
+# Global in-process message bus shared by all agents in this process
+global_message_bus = MessageBus()
@@ -0,0 +1,139 @@
+"""
+Multi-pattern string matching and IP reputation lookups for ACSO detection engines.
+"""
+
+import ipaddress
+from collections import deque
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+
+class AhoCorasickMatcher:
+    """Aho-Corasick automaton matching many substrings in one pass over the text.
+
+    Each keyword is associated with one or more labels; ``find`` returns the
+    set of labels whose keywords occur anywhere in the text.
+    """
+
+    def __init__(self, keywords: Optional[Iterable[Tuple[str, Hashable]]] = None):
+        # State 0 is the root; each state has goto edges, a fail link and outputs
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Set[Hashable]] = [set()]
+        self._built = True
+
+        for keyword, label in keywords or ():
+            self.add(keyword, label)
+        self.build()
+
+    def __len__(self) -> int:
+        return len(self._goto)
+
+    def add(self, keyword: str, label: Hashable) -> None:
+        """Add a keyword; call ``build`` before matching again."""
+        if not keyword:
+            raise ValueError("keyword must be a non-empty string")
+
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(set())
+            state = next_state
+        self._output[state].add(label)
+        self._built = False
+
+    def build(self) -> None:
+        """Compute failure links breadth-first."""
+        queue = deque()
+        for state in self._goto[0].values():
+            self._fail[state] = 0
+            queue.append(state)
+
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] |= self._output[self._fail[next_state]]
+
+        self._built = True
+
+    def find(self, text: str) -> Set[Hashable]:
+        """Return the labels of all keywords occurring in text."""
+        if not self._built:
+            self.build()
+
+        goto, fail, output = self._goto, self._fail, self._output
+        matches: Set[Hashable] = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                matches |= output[state]
+        return matches
+
+
+class IPNetworkSet:
+    """Set of IP addresses and CIDR ranges with hashed membership tests.
+
+    Exact addresses live in a hash set; networks are grouped by prefix length
+    so a lookup costs one masked hash probe per distinct prefix length.
+    """
+
+    def __init__(self, entries: Optional[Iterable[str]] = None):
+        self._addresses: Set[str] = set()
+        # (version, prefix length) -> set of network addresses as integers
+        self._networks: Dict[Tuple[int, int], Set[int]] = {}
+
+        for entry in entries or ():
+            self.add(entry)
+
+    def __len__(self) -> int:
+        return len(self._addresses) + sum(len(nets) for nets in self._networks.values())
+
+    def add(self, entry: str) -> None:
+        """Add an address or a CIDR range. Invalid entries raise ValueError."""
+        if "/" not in entry:
+            self._addresses.add(str(ipaddress.ip_address(entry.strip())))
+            return
+
+        network = ipaddress.ip_network(entry.strip(), strict=False)
+        if network.num_addresses == 1:
+            self._addresses.add(str(network.network_address))
+            return
+        key = (network.version, network.prefixlen)
+        self._networks.setdefault(key, set()).add(int(network.network_address))
+
+    def __contains__(self, ip_address: str) -> bool:
+        if not ip_address:
+            return False
+        if ip_address in self._addresses:
+            return True
+        if not self._networks:
+            return False
+
+        try:
+            address = ipaddress.ip_address(ip_address)
+        except ValueError:
+            return False
+        if str(address) in self._addresses:
+            return True
+
+        value = int(address)
+        bits = address.max_prefixlen
+        for (version, prefix_len), networks in self._networks.items():
+            if version != address.version:
+                continue
+            mask = ((1 << prefix_len) - 1) << (bits - prefix_len)
+            if (value & mask) in networks:
+                return True
+        return False
@@ -0,0 +1,150 @@
+"""
+Sliding-window counters for threshold-based detection in ACSO.
+"""
+
+import heapq
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+
+DEFAULT_MAX_KEYS = 100000
+DEFAULT_BUCKETS_PER_WINDOW = 12
+
+
+class WindowCounter:
+    """Ring buffer of per-bucket counts covering one sliding window."""
+
+    __slots__ = ("bucket_width", "counts", "bucket_ids", "latest_bucket", "last_seen", "expires_at")
+
+    def __init__(self, window_seconds: float, buckets: int):
+        self.bucket_width = window_seconds / buckets
+        self.counts: List[int] = [0] * buckets
+        # Absolute bucket index held in each slot; -1 marks an unused slot
+        self.bucket_ids: List[int] = [-1] * buckets
+        self.latest_bucket = -1
+        self.last_seen = 0.0
+        self.expires_at = 0.0
+
+    def add(self, timestamp: float, window_seconds: float) -> int:
+        """Count one event and return the number of events inside the window."""
+        buckets = len(self.counts)
+        bucket = int(timestamp // self.bucket_width)
+        if bucket > self.latest_bucket:
+            self.latest_bucket = bucket
+            self.last_seen = timestamp
+            self.expires_at = timestamp + window_seconds
+
+        oldest = self.latest_bucket - buckets + 1
+        if bucket >= oldest:
+            slot = bucket % buckets
+            if self.bucket_ids[slot] != bucket:
+                self.bucket_ids[slot] = bucket
+                self.counts[slot] = 0
+            self.counts[slot] += 1
+
+        return sum(
+            count for count, bucket_id in zip(self.counts, self.bucket_ids)
+            if bucket_id >= oldest
+        )
+
+    def reset(self) -> None:
+        """Clear all buckets, e.g. after the threshold has fired."""
+        for slot in range(len(self.counts)):
+            self.counts[slot] = 0
+            self.bucket_ids[slot] = -1
+
+
+class SlidingWindowAggregator:
+    """Keyed sliding-window counters that fire when a count threshold is crossed.
+
+    Counters are evicted once their window has passed with no new events, and
+    the least recently updated key is evicted when max_keys is reached, so
+    memory stays bounded however many distinct keys are seen. Expiry times
+    are kept in a heap, so keys with short windows expire on time even when
+    they sit behind keys with longer windows or events arrive out of order.
+    Expiry is measured against the watermark, the latest event time recorded,
+    so a late event never evicts counters that newer events are still using.
+    """
+
+    def __init__(self, max_keys: int = DEFAULT_MAX_KEYS,
+                 buckets_per_window: int = DEFAULT_BUCKETS_PER_WINDOW):
+        if max_keys <= 0 or buckets_per_window <= 0:
+            raise ValueError("max_keys and buckets_per_window must be positive")
+        self.max_keys = max_keys
+        self.buckets_per_window = buckets_per_window
+        self._counters: "OrderedDict[Hashable, WindowCounter]" = OrderedDict()
+        # (expires_at, sequence, key); entries for evicted or extended counters are skipped lazily
+        self._expiry_heap: List[Tuple[float, int, Hashable]] = []
+        self._sequence = 0
+        self.watermark: Optional[float] = None
+        self.expired_evictions = 0
+        self.capacity_evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._counters)
+
+    def record(self, key: Hashable, timestamp: float, window_seconds: float,
+               threshold: int) -> Optional[int]:
+        """Count an event for key.
+
+        Returns the windowed event count when this event crosses the threshold
+        (the counter is then reset), otherwise None.
+        """
+        if self.watermark is None or timestamp > self.watermark:
+            self.watermark = timestamp
+            self.evict_expired(timestamp)
+
+        counter = self._counters.get(key)
+        if counter is None:
+            if len(self._counters) >= self.max_keys:
+                self._counters.popitem(last=False)
+                self.capacity_evictions += 1
+            counter = WindowCounter(window_seconds, self.buckets_per_window)
+            self._counters[key] = counter
+        else:
+            self._counters.move_to_end(key)
+
+        expires_at = counter.expires_at
+        count = counter.add(timestamp, window_seconds)
+        if counter.expires_at != expires_at:
+            self._push_expiry(key, counter.expires_at)
+        if count >= threshold:
+            counter.reset()
+            return count
+        return None
+
+    def _push_expiry(self, key: Hashable, expires_at: float) -> None:
+        self._sequence += 1
+        heapq.heappush(self._expiry_heap, (expires_at, self._sequence, key))
+        if len(self._expiry_heap) > 4 * len(self._counters) + 64:
+            # Mostly stale entries: rebuild from the live counters
+            self._expiry_heap = [
+                (counter.expires_at, sequence, key)
+                for sequence, (key, counter) in enumerate(self._counters.items())
+            ]
+            heapq.heapify(self._expiry_heap)
+            self._sequence = len(self._expiry_heap)
+
+    def evict_expired(self, now: float) -> int:
+        """Drop counters whose window ended before now, earliest expiry first."""
+        evicted = 0
+        heap = self._expiry_heap
+        while heap and heap[0][0] < now:
+            expires_at, _, key = heapq.heappop(heap)
+            counter = self._counters.get(key)
+            # Skip entries for evicted keys and for counters extended since
+            if counter is not None and counter.expires_at == expires_at:
+                del self._counters[key]
+                evicted += 1
+        self.expired_evictions += evicted
+        return evicted
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get key and eviction counters."""
+        return {
+            "active_keys": len(self._counters),
+            "max_keys": self.max_keys,
+            "watermark": self.watermark,
+            "expired_evictions": self.expired_evictions,
+            "capacity_evictions": self.capacity_evictions
+        }
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+ACSO Agent Selection Microbenchmark
+
+Measures per-request agent selection latency of the load balancer's
+AgentSelector against the linear filter-and-score scan it replaced, for
+growing numbers of endpoints.
+
+Usage:
+    python tests/performance/benchmark_agent_selection.py [--endpoints 100 1000 5000] [--requests 20000]
+"""
+
+import argparse
+import importlib.util
+import random
+import statistics
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+# Loaded by path: the runtime package __init__ pulls in the lifecycle manager
+# and its Kubernetes and Prometheus dependencies
+_spec = importlib.util.spec_from_file_location(
+    "agent_selector", Path(__file__).resolve().parents[2] / "src" / "enterprise" / "runtime" / "agent_selector.py"
+)
+_agent_selector = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(_agent_selector)
+AgentSelector = _agent_selector.AgentSelector
+
+HEALTHY = "healthy"
+DEGRADED = "degraded"
+CAPABILITIES = ["scan", "triage", "remediate", "report", "forensics", "network"]
+TENANTS = ["tenant-a", "tenant-b", "tenant-c", "tenant-d"]
+
+
+def make_endpoints(count, rng):
+    return [
+        SimpleNamespace(
+            agent_id=f"agent-{i}",
+            agent_type="threat_hunter",
+            tenant_id=TENANTS[i % len(TENANTS)],
+            current_connections=0,
+            max_connections=100,
+            response_time_avg=rng.uniform(20, 400),
+            cpu_usage=rng.uniform(5, 80),
+            memory_usage=rng.uniform(5, 80),
+            health_status=HEALTHY if rng.random() < 0.9 else DEGRADED,
+            weight=1.0,
+            capabilities=rng.sample(CAPABILITIES, 3)
+        )
+        for i in range(count)
+    ]
+
+
+def linear_scan(endpoints, tenant_id, capabilities):
+    """Candidate filtering and heuristic scoring as done before the selector."""
+    best, best_score = None, float('-inf')
+    for agent in endpoints:
+        if agent.tenant_id != tenant_id:
+            continue
+        if agent.health_status not in (HEALTHY, DEGRADED):
+            continue
+        if agent.current_connections >= agent.max_connections:
+            continue
+        if capabilities and not all(cap in agent.capabilities for cap in capabilities):
+            continue
+        score = (
+            agent.weight * (1.0 if agent.health_status == HEALTHY else 0.5) *
+            (1.0 - agent.current_connections / max(agent.max_connections, 1)) *
+            (1.0 - agent.cpu_usage / 100.0) *
+            (1.0 - agent.memory_usage / 100.0) *
+            (1.0 - min(agent.response_time_avg / 1000.0, 1.0))
+        )
+        if score > best_score:
+            best, best_score = agent, score
+    return best
+
+
+def run(select, requests, endpoints):
+    """Time each selection, holding and releasing connections like real traffic."""
+    rng = random.Random(1)
+    timings = []
+    in_flight = []
+    for _ in range(requests):
+        tenant_id = rng.choice(TENANTS)
+        capabilities = rng.sample(CAPABILITIES, rng.randint(0, 1))
+        started = time.perf_counter()
+        agent = select(tenant_id, capabilities)
+        timings.append(time.perf_counter() - started)
+        if agent is not None:
+            agent.current_connections += 1
+            in_flight.append(agent)
+        if len(in_flight) > len(endpoints) // 2:
+            in_flight.pop(0).current_connections -= 1
+    for agent in in_flight:
+        agent.current_connections -= 1
+    timings.sort()
+    return {
+        "mean_us": statistics.fmean(timings) * 1e6,
+        "p50_us": timings[len(timings) // 2] * 1e6,
+        "p99_us": timings[int(len(timings) * 0.99)] * 1e6
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--endpoints", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'endpoints':>10} {'method':>18} {'mean us':>10} {'p50 us':>10} {'p99 us':>10}")
+    for count in args.endpoints:
+        endpoints = make_endpoints(count, random.Random(count))
+        methods = {"linear_scan": lambda t, c: linear_scan(endpoints, t, c)}
+        for algorithm in AgentSelector.ALGORITHMS:
+            selector = AgentSelector({HEALTHY: 1.0, DEGRADED: 0.5}, algorithm=algorithm, rng=random.Random(2))
+            for endpoint in endpoints:
+                selector.add(endpoint)
+            selector.set_weights({
+                e.agent_id: (1 - e.cpu_usage / 100) * (1 - e.memory_usage / 100) for e in endpoints
+            })
+            methods[algorithm] = selector.select
+
+        for name, select in methods.items():
+            result = run(select, args.requests, endpoints)
+            print(f"{count:>10} {name:>18} {result['mean_us']:>10.2f} "
+                  f"{result['p50_us']:>10.2f} {result['p99_us']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
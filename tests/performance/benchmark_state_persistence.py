@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+ACSO State Persistence Benchmark
+
+Compares StatePersistenceManager's pipelined writes and bulk loads with
+the previous per-key access pattern (pickle + gzip, SET then EXPIRE, KEYS
+plus one GET per agent) against a local fake Redis that charges a fixed
+latency per round trip, for a control-plane restart with many agents.
+
+Usage:
+    python tests/performance/benchmark_state_persistence.py [--agents 10000] [--rtt-ms 0.2]
+"""
+
+import argparse
+import asyncio
+import fnmatch
+import gzip
+import pickle
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.enterprise.models.lifecycle import (  # noqa: E402
+    AgentLifecycleState, LifecycleEvent, RecoveryStrategy, RecoveryType, StateSnapshot
+)
+from src.enterprise.storage.state_persistence import StatePersistenceManager  # noqa: E402
+
+
+class FakeRedis:
+    """In-process stand-in for the subset of aioredis used by the persistence manager."""
+
+    def __init__(self, rtt: float):
+        self.rtt = rtt
+        self.round_trips = 0
+        self.data = {}
+        self.sorted_sets = {}
+
+    async def _round_trip(self):
+        self.round_trips += 1
+        await asyncio.sleep(self.rtt)
+
+    @staticmethod
+    def _key(key):
+        return key.encode('utf-8') if isinstance(key, str) else key
+
+    # Commands, applied without a round trip; used by both the client and pipelines
+
+    def _set(self, key, value, ex=None):
+        self.data[self._key(key)] = value
+        return True
+
+    def _get(self, key):
+        return self.data.get(self._key(key))
+
+    def _mget(self, keys):
+        return [self.data.get(self._key(key)) for key in keys]
+
+    def _expire(self, key, seconds):
+        return True
+
+    def _zadd(self, key, mapping):
+        members = self.sorted_sets.setdefault(self._key(key), {})
+        members.update({self._key(member): score for member, score in mapping.items()})
+        return len(mapping)
+
+    def _zrevrange(self, key, start, end):
+        members = self.sorted_sets.get(self._key(key), {})
+        ordered = sorted(members, key=members.get, reverse=True)
+        return ordered[start:end + 1]
+
+    def _match(self, pattern):
+        return [key for key in list(self.data) + list(self.sorted_sets)
+                if fnmatch.fnmatchcase(key.decode('utf-8'), pattern)]
+
+    # Client API
+
+    async def set(self, key, value, ex=None):
+        await self._round_trip()
+        return self._set(key, value, ex)
+
+    async def get(self, key):
+        await self._round_trip()
+        return self._get(key)
+
+    async def mget(self, keys):
+        await self._round_trip()
+        return self._mget(keys)
+
+    async def expire(self, key, seconds):
+        await self._round_trip()
+        return self._expire(key, seconds)
+
+    async def zadd(self, key, mapping):
+        await self._round_trip()
+        return self._zadd(key, mapping)
+
+    async def zrevrange(self, key, start, end):
+        await self._round_trip()
+        return self._zrevrange(key, start, end)
+
+    async def keys(self, pattern):
+        await self._round_trip()
+        return self._match(pattern)
+
+    async def scan_iter(self, match, count=10):
+        keys = self._match(match)
+        for i in range(0, len(keys), count):
+            await self._round_trip()
+            for key in keys[i:i + count]:
+                yield key
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.commands = []
+
+    def __getattr__(self, name):
+        command = getattr(self.redis, f"_{name}")
+
+        def queue(*args, **kwargs):
+            self.commands.append((command, args, kwargs))
+            return self
+        return queue
+
+    async def execute(self):
+        await self.redis._round_trip()
+        commands, self.commands = self.commands, []
+        return [command(*args, **kwargs) for command, args, kwargs in commands]
+
+
+def make_agent_data(count):
+    now = datetime.utcnow()
+    states, strategies, snapshots = {}, {}, {}
+    for i in range(count):
+        agent_id = f"agent-{i:06d}"
+        strategy = RecoveryStrategy(strategy_type=RecoveryType.RESTART_IN_PLACE)
+        states[agent_id] = AgentLifecycleState(
+            agent_id=agent_id,
+            agent_type="threat_hunter",
+            tenant_id=f"tenant-{i % 50}",
+            current_state=LifecycleEvent.RUNNING,
+            previous_state=LifecycleEvent.STARTING,
+            state_changed_at=now,
+            deployment_name=f"acso-{agent_id}",
+            namespace="acso-agents",
+            node_name=f"node-{i % 200}",
+            pod_name=f"acso-{agent_id}-7d9f8",
+            last_heartbeat=now,
+            health_status="healthy",
+            current_workload={f"task-{j}": {"priority": j % 3, "progress": j / 10} for j in range(8)},
+            recovery_strategy=strategy,
+            metadata={"labels": {"team": "soc", "tier": str(i % 3)}, "image": "acso/agent:1.4.2"}
+        ).__dict__
+        strategies[agent_id] = strategy.__dict__
+        snapshots[agent_id] = [
+            StateSnapshot(
+                agent_id=agent_id,
+                timestamp=now - timedelta(minutes=n),
+                state_data={"cursor": n, "queue": list(range(20))},
+                workload_data={"tasks": 8},
+                configuration={"scan_interval": 60},
+                metrics={"cpu": 0.4, "memory": 0.6}
+            )
+            for n in range(2)
+        ]
+    return states, strategies, snapshots
+
+
+async def legacy_store(client, manager, states, strategies):
+    for prefix, records in ((manager.AGENT_STATE_PREFIX, states),
+                            (manager.RECOVERY_STRATEGY_PREFIX, strategies)):
+        for agent_id, data in records.items():
+            key = f"{prefix}{agent_id}"
+            await client.set(key, gzip.compress(pickle.dumps(data)))
+            await client.expire(key, 30 * 24 * 3600)
+
+
+async def legacy_restore(client, manager):
+    restored = {}
+    for key in await client.keys(f"{manager.AGENT_STATE_PREFIX}*"):
+        agent_id = key.decode('utf-8').replace(manager.AGENT_STATE_PREFIX, '')
+        state = pickle.loads(gzip.decompress(await client.get(key)))
+        strategy = await client.get(f"{manager.RECOVERY_STRATEGY_PREFIX}{agent_id}")
+        snapshots = []
+        for snapshot_key in await client.zrevrange(f"{manager.STATE_SNAPSHOT_PREFIX}{agent_id}:list", 0, 9):
+            snapshot_data = await client.get(snapshot_key)
+            snapshots.append(StateSnapshot(**pickle.loads(gzip.decompress(snapshot_data))))
+        restored[agent_id] = (state, strategy and pickle.loads(gzip.decompress(strategy)), snapshots)
+    return restored
+
+
+async def pipelined_restore(manager):
+    states = await manager.load_all_agent_states()
+    agent_ids = list(states)
+    strategies = await manager.load_recovery_strategies(agent_ids)
+    snapshots = await manager.load_state_snapshots_for_agents(agent_ids)
+    return {agent_id: (states[agent_id], strategies.get(agent_id), snapshots.get(agent_id, []))
+            for agent_id in agent_ids}
+
+
+async def seed_snapshots(manager, client, snapshots, legacy):
+    for agent_id, agent_snapshots in snapshots.items():
+        for snapshot in agent_snapshots:
+            if legacy:
+                key = f"{manager.STATE_SNAPSHOT_PREFIX}{agent_id}:{snapshot.timestamp.isoformat()}"
+                client._set(key, gzip.compress(pickle.dumps(snapshot.__dict__)))
+                client._zadd(f"{manager.STATE_SNAPSHOT_PREFIX}{agent_id}:list", {key: snapshot.timestamp.timestamp()})
+            else:
+                await manager.store_state_snapshot(agent_id, snapshot)
+
+
+async def run(agents, rtt):
+    states, strategies, snapshots = make_agent_data(agents)
+    results = {}
+
+    for name in ("legacy", "pipelined"):
+        manager = StatePersistenceManager()
+        client = manager.redis_client = FakeRedis(rtt)
+
+        started = time.perf_counter()
+        if name == "legacy":
+            await legacy_store(client, manager, states, strategies)
+        else:
+            await manager.store_agent_states(states, strategies)
+        store_seconds, store_round_trips = time.perf_counter() - started, client.round_trips
+
+        # Snapshots are written over time, not at shutdown; seed them outside the measurement
+        client.rtt = 0
+        await seed_snapshots(manager, client, snapshots, legacy=(name == "legacy"))
+        client.rtt, client.round_trips = rtt, 0
+
+        started = time.perf_counter()
+        if name == "legacy":
+            restored = await legacy_restore(client, manager)
+        else:
+            restored = await pipelined_restore(manager)
+        restore_seconds = time.perf_counter() - started
+
+        assert len(restored) == agents and all(len(r[2]) == 2 for r in restored.values())
+        state_bytes = sum(len(client.data[f"{manager.AGENT_STATE_PREFIX}{a}".encode()]) for a in states)
+        results[name] = {
+            "store_s": store_seconds,
+            "store_round_trips": store_round_trips,
+            "restore_s": restore_seconds,
+            "restore_round_trips": client.round_trips,
+            "avg_state_bytes": state_bytes / agents
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--agents", type=int, default=10000)
+    parser.add_argument("--rtt-ms", type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.agents, args.rtt_ms / 1000))
+
+    print(f"{args.agents} agents, {args.rtt_ms} ms per round trip")
+    print(f"{'':>10} {'store s':>9} {'store RTs':>10} {'restore s':>10} {'restore RTs':>12} {'state bytes':>12}")
+    for name, result in results.items():
+        print(f"{name:>10} {result['store_s']:>9.2f} {result['store_round_trips']:>10} "
+              f"{result['restore_s']:>10.2f} {result['restore_round_trips']:>12} {result['avg_state_bytes']:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Test the load balancer's indexed agent selector.
+"""
+
+import importlib.util
+import random
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Loaded by path: the runtime package __init__ pulls in the lifecycle manager
+# and its Kubernetes and Prometheus dependencies
+_spec = importlib.util.spec_from_file_location(
+    "agent_selector", Path(__file__).resolve().parents[1] / "src" / "enterprise" / "runtime" / "agent_selector.py"
+)
+agent_selector = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(agent_selector)
+AgentSelector = agent_selector.AgentSelector
+
+HEALTH_FACTORS = {"healthy": 1.0, "degraded": 0.5}
+
+
+def endpoint(agent_id, tenant_id="tenant-a", capabilities=("scan",), health_status="healthy",
+             current_connections=0, max_connections=10):
+    return SimpleNamespace(agent_id=agent_id, tenant_id=tenant_id, capabilities=list(capabilities),
+                           health_status=health_status, current_connections=current_connections,
+                           max_connections=max_connections, weight=1.0)
+
+
+class TestAgentSelector:
+    """Test pools, invalidation and skipping of unavailable endpoints."""
+
+    @pytest.mark.parametrize("algorithm", AgentSelector.ALGORITHMS)
+    def test_pools_are_per_tenant_capability_intersections(self, algorithm):
+        """Test that only the tenant's endpoints holding every required capability are chosen."""
+        selector = AgentSelector(HEALTH_FACTORS, algorithm=algorithm, rng=random.Random(1))
+        for agent in [endpoint("a1", capabilities=("scan", "triage")), endpoint("a2", capabilities=("scan",)),
+                      endpoint("a3", capabilities=("triage", "report")),
+                      endpoint("b1", tenant_id="tenant-b", capabilities=("scan", "triage"))]:
+            selector.add(agent)
+
+        assert [agent.agent_id for agent in selector.pool("tenant-a", ["scan", "triage"])] == ["a1"]
+        assert [agent.agent_id for agent in selector.pool("tenant-a", ["triage"])] == ["a1", "a3"]
+        assert selector.pool("tenant-a", ["scan", "report"]) == []
+        assert [agent.agent_id for agent in selector.pool("tenant-b")] == ["b1"]
+        assert selector.pool("tenant-c") == [] and selector.select("tenant-c") is None
+        for _ in range(50):
+            assert selector.select("tenant-a", ["scan"]).agent_id in {"a1", "a2"}
+            assert selector.select("tenant-b", ["triage"]).agent_id == "b1"
+
+    def test_pools_are_rebuilt_after_add_and_remove(self):
+        """Test that cached pools of a tenant are invalidated when its endpoints change."""
+        selector = AgentSelector(HEALTH_FACTORS, rng=random.Random(2))
+        selector.add(endpoint("a1"))
+        selector.add(endpoint("b1", tenant_id="tenant-b"))
+        assert [agent.agent_id for agent in selector.pool("tenant-a", ["scan"])] == ["a1"]
+        selector.pool("tenant-b", ["scan"])
+        builds = selector.pool_builds
+
+        selector.add(endpoint("a2"))
+        assert [agent.agent_id for agent in selector.pool("tenant-a", ["scan"])] == ["a1", "a2"]
+        selector.remove("a1")
+        selector.add(endpoint("a2", capabilities=("report",)))
+        assert selector.pool("tenant-a", ["scan"]) == []
+        assert [agent.agent_id for agent in selector.pool("tenant-a", ["report"])] == ["a2"]
+        # The other tenant's pool stayed cached
+        selector.pool("tenant-b", ["scan"])
+        assert selector.pool_builds == builds + 3
+
+    @pytest.mark.parametrize("algorithm", AgentSelector.ALGORITHMS)
+    def test_unhealthy_and_full_endpoints_are_skipped(self, algorithm):
+        """Test that endpoints without a health factor or at max_connections are never chosen."""
+        selector = AgentSelector(HEALTH_FACTORS, algorithm=algorithm, rng=random.Random(3))
+        agents = [endpoint(f"down-{i}", health_status="unhealthy") for i in range(6)]
+        agents += [endpoint(f"full-{i}", current_connections=10) for i in range(6)]
+        agents.append(endpoint("ok", health_status="degraded"))
+        for agent in agents:
+            selector.add(agent)
+
+        for _ in range(50):
+            assert selector.select("tenant-a", ["scan"]).agent_id == "ok"
+        selector.remove("ok")
+        assert selector.select("tenant-a", ["scan"]) is None
@@ -0,0 +1,54 @@
+"""
+Test the aggregate snapshot stores.
+"""
+
+from datetime import datetime
+
+import pytest
+
+from src.enterprise.integration.aggregate_snapshots import (
+    AggregateSnapshot, FileSnapshotStore, InMemorySnapshotStore
+)
+
+
+def make_snapshot(aggregate_id, version):
+    return AggregateSnapshot(
+        aggregate_id=aggregate_id,
+        aggregate_type="customer",
+        version=version,
+        state={"name": "Acme", "tags": ["a", "b"], "updated_at": datetime(2024, 5, 1, 12, 30)}
+    )
+
+
+class TestSnapshotStores:
+    """Test round trips and replacement of snapshots."""
+
+    @pytest.mark.asyncio
+    async def test_file_store_round_trip(self, tmp_path):
+        """Test that state, including datetimes, survives a round trip and newer snapshots replace older ones."""
+        store = FileSnapshotStore(str(tmp_path))
+
+        await store.save(make_snapshot("tenant/1", 100))
+        await store.save(make_snapshot("tenant/1", 200))
+        loaded = await store.get("tenant/1")
+        missing = await store.get("tenant/2")
+        await store.delete("tenant/1")
+        deleted = await store.get("tenant/1")
+
+        assert loaded.version == 200
+        assert loaded.state == make_snapshot("tenant/1", 200).state
+        assert missing is None and deleted is None
+        assert [p.name for p in tmp_path.iterdir()] == []
+
+    @pytest.mark.asyncio
+    async def test_in_memory_store_evicts_least_recently_used(self):
+        """Test that the store stays bounded and keeps recently read snapshots."""
+        store = InMemorySnapshotStore(max_entries=2)
+
+        await store.save(make_snapshot("a", 1))
+        await store.save(make_snapshot("b", 1))
+        await store.get("a")
+        await store.save(make_snapshot("c", 1))
+
+        assert [await store.get(key) is not None for key in ("a", "b", "c")] == [True, False, True]
+        assert len(store) == 2
@@ -0,0 +1,169 @@
+"""
+Test audit block sealing primitives and the sealing pipeline.
+"""
+
+import asyncio
+import hashlib
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from src.enterprise.compliance.audit_sealing import (
+    AuditBlockSealer, AuditSealingError, GENESIS_HASH, SealingMode, block_header_hash, mine_header,
+    seal_header, verify_seal
+)
+
+
+HEADER = {
+    'block_id': 'block-1',
+    'block_number': 3,
+    'timestamp': '2024-01-01T00:00:00',
+    'previous_hash': 'ab' * 32,
+    'merkle_root': 'cd' * 32
+}
+
+
+class StubEvent:
+    def __init__(self, i):
+        self.i = i
+
+    def to_dict(self):
+        return {'event_id': f'event-{self.i}', 'action': 'read'}
+
+
+class StubStorage:
+    """In-memory block store that can fail its first N writes."""
+
+    def __init__(self, failures=0):
+        self.blocks = []
+        self.failures = failures
+
+    async def get_latest_block(self):
+        return self.blocks[-1] if self.blocks else None
+
+    async def store_block(self, block):
+        if self.failures:
+            self.failures -= 1
+            return False
+        self.blocks.append(block)
+        return True
+
+
+def build_block(events, header, nonce, block_hash, seal):
+    return SimpleNamespace(events=events, nonce=nonce, hash=block_hash, seal=seal, **header)
+
+
+class TestSealingPrimitives:
+    """Test that fast mining and sealing agree with the block hash definition."""
+
+    def test_mine_header_matches_naive_mining(self):
+        """Test that the prefix-reusing miner finds the same nonce as re-serializing."""
+        nonce, block_hash = mine_header(HEADER, 3)
+
+        naive_nonce, naive_hash = 0, ""
+        while not naive_hash.startswith("000"):
+            naive_nonce += 1
+            data = json.dumps(dict(HEADER, nonce=naive_nonce), sort_keys=True)
+            naive_hash = hashlib.sha256(data.encode()).hexdigest()
+
+        assert (nonce, block_hash) == (naive_nonce, naive_hash)
+        assert block_header_hash(HEADER, nonce) == block_hash
+
+    def test_hmac_seal_detects_tampering(self):
+        """Test HMAC sealing without mining."""
+        nonce, block_hash, seal = seal_header(HEADER, SealingMode.HMAC.value, hmac_key=b"secret")
+
+        assert nonce == 0
+        assert verify_seal(block_hash, seal, SealingMode.HMAC.value, hmac_key=b"secret")
+        assert not verify_seal(block_hash, seal, SealingMode.HMAC.value, hmac_key=b"other")
+        tampered = block_header_hash(dict(HEADER, merkle_root='ef' * 32), 0)
+        assert not verify_seal(tampered, seal, SealingMode.HMAC.value, hmac_key=b"secret")
+
+
+class TestAuditBlockSealer:
+    """Test ordering, chaining and retries of the sealing pipeline."""
+
+    async def run_sealer(self, storage, batches, executor_kind="thread"):
+        sealer = AuditBlockSealer(
+            storage, build_block, mode=SealingMode.HMAC, hmac_key=b"secret",
+            executor_kind=executor_kind, max_workers=2
+        )
+        for batch in batches:
+            await sealer.submit(batch)
+        await sealer.close()
+        return sealer
+
+    @pytest.mark.asyncio
+    async def test_blocks_are_chained_in_order(self):
+        """Test that blocks are numbered and linked in submission order."""
+        storage = StubStorage()
+        batches = [[StubEvent(b * 10 + i) for i in range(10)] for b in range(5)]
+
+        sealer = await self.run_sealer(storage, batches, executor_kind="process")
+
+        assert [block.block_number for block in storage.blocks] == [0, 1, 2, 3, 4]
+        assert storage.blocks[0].previous_hash == GENESIS_HASH
+        for previous, block in zip(storage.blocks, storage.blocks[1:]):
+            assert block.previous_hash == previous.hash
+        assert [block.events for block in storage.blocks] == batches
+        assert sealer.chain_tip == (4, storage.blocks[-1].hash)
+
+    @pytest.mark.asyncio
+    async def test_failed_store_is_retried_before_later_batches(self):
+        """Test that a failed write keeps block numbers contiguous."""
+        storage = StubStorage(failures=1)
+        batches = [[StubEvent(1)], [StubEvent(2)]]
+
+        sealer = await self.run_sealer(storage, batches)
+
+        assert [block.block_number for block in storage.blocks] == [0, 1]
+        assert storage.blocks[0].events == batches[0]
+        assert sealer.store_failures == 1
+
+    @pytest.mark.asyncio
+    async def test_submit_waits_for_room_in_the_queue(self):
+        """Test that submit blocks once max_queued_batches are waiting to be stored."""
+        storage = StubStorage()
+        release = asyncio.Event()
+        store_block = storage.store_block
+
+        async def slow_store(block):
+            await release.wait()
+            return await store_block(block)
+
+        storage.store_block = slow_store
+
+        sealer = AuditBlockSealer(storage, build_block, mode=SealingMode.HMAC, hmac_key=b"secret",
+                                  executor_kind="thread", max_queued_batches=2)
+        await sealer.submit([StubEvent(1)])
+        await sealer.submit([StubEvent(2)])
+        third = asyncio.ensure_future(sealer.submit([StubEvent(3)]))
+        await asyncio.sleep(0.05)
+        assert not third.done() and sealer.queued_batches == 2
+
+        release.set()
+        await asyncio.wait_for(third, timeout=1)
+        await sealer.close()
+
+        assert [block.block_number for block in storage.blocks] == [0, 1, 2]
+
+    @pytest.mark.asyncio
+    async def test_persistent_store_failures_are_raised(self):
+        """Test that repeated store failures mark the sealer unhealthy and fail submit and drain."""
+        storage = StubStorage(failures=10 ** 6)
+
+        sealer = AuditBlockSealer(storage, build_block, mode=SealingMode.HMAC, hmac_key=b"secret",
+                                  executor_kind="thread", max_queued_batches=1, max_store_failures=1)
+        await sealer.submit([StubEvent(1)])
+        with pytest.raises(AuditSealingError):
+            await asyncio.wait_for(sealer.drain(), timeout=1)
+        with pytest.raises(AuditSealingError):
+            await asyncio.wait_for(sealer.submit([StubEvent(2)]), timeout=1)
+        stats = sealer.get_stats()
+        with pytest.raises(AuditSealingError):
+            await sealer.close()
+
+        assert stats["healthy"] is False and stats["queued_batches"] == 1
+        assert stats["last_store_error"] == "storage rejected the block"
+        assert storage.blocks == []
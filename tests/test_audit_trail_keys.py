@@ -0,0 +1,115 @@
+"""
+Test that the audit trail loads its sealing keys from configuration.
+"""
+
+from datetime import datetime
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from src.enterprise.compliance.audit_sealing import SealingMode, block_header_hash, mine_header, seal_header
+from src.enterprise.compliance.immutable_audit_trail import (
+    AuditBlock, AuditEvent, AuditEventType, AuditSeverity, FileAuditStorage, ImmutableAuditTrail
+)
+
+
+def trail_config(tmp_path, **overrides):
+    config = {'storage': {'type': 'file', 'path': str(tmp_path / 'audit'), 'fsync': False},
+              'sealing_executor': 'thread'}
+    config.update(overrides)
+    return config
+
+
+def make_event(event_id, action):
+    return AuditEvent(
+        event_id=event_id, event_type=AuditEventType.DATA_ACCESS, timestamp=datetime(2024, 1, 1),
+        user_id="user-1", session_id="session-1", tenant_id="tenant", resource_type="record",
+        resource_id="record-1", action=action, outcome="success", severity=AuditSeverity.LOW,
+        source_ip="10.0.0.1", user_agent="test"
+    )
+
+
+class TestAuditTrailKeys:
+    """Test key loading and refusal of unkeyed sealing modes."""
+
+    def test_keyed_modes_require_configured_keys(self, tmp_path):
+        """Test that HMAC and signature sealing refuse to start without a configured key."""
+        with pytest.raises(ValueError, match="sealing_key"):
+            ImmutableAuditTrail(trail_config(tmp_path, sealing_mode='hmac'))
+        with pytest.raises(ValueError, match="signing_key_path"):
+            ImmutableAuditTrail(trail_config(tmp_path, sealing_mode='signature'))
+
+    @pytest.mark.asyncio
+    async def test_persisted_checkpoints_require_a_configured_key(self, tmp_path):
+        """Test that a checkpoint file needs a stable key and is honoured by the next instance."""
+        checkpoint_path = str(tmp_path / 'checkpoint.json')
+        with pytest.raises(ValueError, match="checkpoint_key"):
+            ImmutableAuditTrail(trail_config(tmp_path, verification={'checkpoint_path': checkpoint_path}))
+
+        config = trail_config(tmp_path, mining_difficulty=1, block_size=1,
+                              verification={'checkpoint_path': checkpoint_path, 'checkpoint_key': 'key'})
+        trail = ImmutableAuditTrail(config)
+        await trail.log_event(make_event("event-0", "read"))
+        await trail.flush()
+        first = await trail.verify_chain_integrity()
+        await trail.close()
+
+        restarted = ImmutableAuditTrail(config)
+        second = await restarted.verify_chain_integrity()
+        await restarted.close()
+
+        assert first['valid'] and second['valid'] and second['resumed_from'] == 0
+
+    def test_signature_seals_verify_across_instances(self, tmp_path):
+        """Test that a block signed by one instance verifies in another loading the same key file."""
+        key_path = tmp_path / 'audit_signing_key.pem'
+        key_path.write_bytes(rsa.generate_private_key(public_exponent=65537, key_size=2048).private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption()
+        ))
+        config = trail_config(tmp_path, sealing_mode='signature', signing_key_path=str(key_path))
+        writer, reader = ImmutableAuditTrail(config), ImmutableAuditTrail(config)
+
+        header = {'block_id': 'b0', 'block_number': 0, 'timestamp': '2024-01-01T00:00:00',
+                  'previous_hash': '0' * 64, 'merkle_root': 'ab' * 32,
+                  'sealing_mode': SealingMode.SIGNATURE.value, 'difficulty': 0}
+        nonce, block_hash, seal = seal_header(
+            header, SealingMode.SIGNATURE.value, signing_key_pem=writer.signer.get_private_key_pem()
+        )
+        block = writer._build_block([], header, nonce, block_hash, seal)
+
+        assert isinstance(block, AuditBlock) and block_hash == block_header_hash(header, 0)
+        assert reader._verify_block_seal(block)
+
+    @pytest.mark.asyncio
+    async def test_keyed_chain_cannot_be_rewritten_as_proof_of_work(self, tmp_path):
+        """Test that a chain forged without the key by switching blocks to proof-of-work is rejected."""
+        config = trail_config(tmp_path, sealing_mode='hmac', sealing_key='secret', block_size=2)
+        trail = ImmutableAuditTrail(config)
+        for i in range(4):
+            await trail.log_event(make_event(f"event-{i}", "read"))
+        await trail.close()
+
+        original = FileAuditStorage(config['storage']['path'], fsync=False)
+        blocks = await original.get_blocks_by_range(0, 1)
+        await original.close()
+        forged_storage = FileAuditStorage(str(tmp_path / 'forged'), fsync=False)
+        previous_hash = blocks[0].previous_hash
+        for block in blocks:
+            block.events = [make_event(event.event_id, "delete") for event in block.events]
+            block.merkle_root = block.calculate_merkle_root()
+            block.previous_hash = previous_hash
+            block.sealing_mode, block.difficulty, block.seal = SealingMode.PROOF_OF_WORK.value, 4, ""
+            block.nonce, block.hash = mine_header(block.header(), 4)
+            previous_hash = block.hash
+            assert await forged_storage.store_block(block)
+        await forged_storage.close()
+
+        reader = ImmutableAuditTrail(dict(config, storage=dict(config['storage'], path=str(tmp_path / 'forged'))))
+        result = await reader.verify_chain_integrity(full=True)
+        await reader.close()
+
+        assert not result['valid']
+        assert result['issues'] == ["Block 0 seal mismatch", "Block 1 seal mismatch"]
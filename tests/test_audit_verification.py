@@ -0,0 +1,107 @@
+"""
+Test incremental, checkpointed audit chain verification.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+import pytest
+
+from src.enterprise.compliance.audit_sealing import (
+    GENESIS_HASH, block_header_hash, event_merkle_root
+)
+from src.enterprise.compliance.audit_verification import ChainVerifier, CheckpointStore
+
+
+@dataclass
+class StubBlock:
+    block_number: int
+    previous_hash: str
+    events: List[Dict[str, Any]]
+    block_id: str = ""
+    timestamp: str = "2024-01-01T00:00:00"
+    nonce: int = 0
+    merkle_root: str = ""
+    hash: str = ""
+    sealing_mode: str = "hmac"
+    difficulty: int = 0
+
+    def header(self):
+        return {
+            'block_id': self.block_id, 'block_number': self.block_number, 'timestamp': self.timestamp,
+            'previous_hash': self.previous_hash, 'merkle_root': self.merkle_root,
+            'sealing_mode': self.sealing_mode, 'difficulty': self.difficulty
+        }
+
+    def to_dict(self):
+        return dict(self.header(), nonce=self.nonce, hash=self.hash, events=self.events)
+
+
+@dataclass
+class StubStorage:
+    blocks: List[StubBlock] = field(default_factory=list)
+    range_reads: int = 0
+
+    def append(self, count):
+        for _ in range(count):
+            n = len(self.blocks)
+            previous_hash = self.blocks[-1].hash if self.blocks else GENESIS_HASH
+            block = StubBlock(n, previous_hash, [{'event_id': f'event-{n}', 'action': 'read'}], block_id=f'block-{n}')
+            block.merkle_root = event_merkle_root(block.events)
+            block.hash = block_header_hash(block.header(), 0)
+            self.blocks.append(block)
+
+    async def get_latest_block(self):
+        return self.blocks[-1] if self.blocks else None
+
+    async def get_blocks_by_range(self, start, end):
+        self.range_reads += 1
+        return [b for b in self.blocks if start <= b.block_number <= end]
+
+
+def make_verifier(storage, checkpoints=None):
+    return ChainVerifier(storage, b"checkpoint-key", checkpoints=checkpoints,
+                         batch_size=4, executor_kind="thread", max_workers=2)
+
+
+class TestChainVerifier:
+    """Test resumption from checkpoints and detection of tampering."""
+
+    @pytest.mark.asyncio
+    async def test_resumes_from_checkpoint(self, tmp_path):
+        """Test that a second run only verifies blocks added since the first."""
+        storage = StubStorage()
+        storage.append(10)
+        checkpoint_path = str(tmp_path / "checkpoint.json")
+
+        first = await make_verifier(storage, CheckpointStore(checkpoint_path)).verify()
+        storage.append(3)
+        storage.range_reads = 0
+        second = await make_verifier(storage, CheckpointStore(checkpoint_path)).verify()
+
+        assert first['valid'] and first['blocks_verified'] == 10 and first['resumed_from'] is None
+        assert second['valid'] and second['blocks_verified'] == 3 and second['resumed_from'] == 9
+        assert second['checkpoint']['block_number'] == 12
+        assert storage.range_reads == 1
+
+    @pytest.mark.asyncio
+    async def test_detects_tampering_and_does_not_advance_checkpoint(self):
+        """Test that modified events, broken links and forged checkpoints are reported."""
+        storage = StubStorage()
+        storage.append(10)
+        verifier = make_verifier(storage)
+
+        await verifier.verify()
+        storage.append(4)
+        storage.blocks[11].events[0]['action'] = 'delete'
+        storage.blocks[13].previous_hash = 'ff' * 32
+        tampered = await verifier.verify()
+        verifier.checkpoints.load().block_number = 13
+        forged = await verifier.verify()
+
+        assert sorted(tampered['issues']) == [
+            "Block 11 Merkle root mismatch", "Block 13 hash mismatch", "Block 13 previous hash mismatch"
+        ]
+        assert 'checkpoint' not in tampered
+        assert forged['issues'][0] == "Verification checkpoint signature mismatch"
+        assert forged['resumed_from'] is None
@@ -0,0 +1,197 @@
+"""
+Test the micro-batching inference service and batched ML threat prediction.
+"""
+
+import ipaddress
+import random
+import threading
+import warnings
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from src.enterprise.security.advanced_threat_detection import FileEvent, MLThreatDetector, NetworkEvent
+from src.enterprise.security.batch_inference import BatchInferenceService
+
+START = datetime(2024, 5, 1)
+
+
+class TestBatchInferenceService:
+    """Test batching, ordering and error propagation."""
+
+    @pytest.mark.asyncio
+    async def test_batches_by_size_and_delay_off_the_loop(self):
+        """Test that a burst is split into full batches plus one flushed by the delay."""
+        batches = []
+        loop_thread = threading.get_ident()
+
+        def predict_batch(items):
+            assert threading.get_ident() != loop_thread
+            batches.append(list(items))
+            return [item * 2 for item in items]
+
+        service = BatchInferenceService(predict_batch, max_batch_size=4, max_delay_ms=20)
+        results = await service.submit_many(list(range(10)))
+        single = await service.submit(21)
+        stats = service.get_stats()
+        await service.stop()
+
+        assert results == [item * 2 for item in range(10)]
+        assert single == 42
+        assert [len(batch) for batch in batches] == [4, 4, 2, 1]
+        assert stats['items'] == 11 and stats['batches'] == 4
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_fails_its_submitters_only(self):
+        """Test that a prediction error reaches the callers of that batch and the service keeps running."""
+        def predict_batch(items):
+            if "bad" in items:
+                raise RuntimeError("model error")
+            return [item.upper() for item in items]
+
+        service = BatchInferenceService(predict_batch, max_batch_size=2, max_delay_ms=1)
+        with pytest.raises(RuntimeError):
+            await service.submit_many(["ok", "bad"])
+        result = await service.submit("fine")
+        await service.stop()
+
+        assert result == "FINE"
+        assert service.get_stats()['failed_batches'] == 1 and service.get_stats()['pending'] == 0
+
+
+def file_features(event):
+    """Per-event file features, as MLThreatDetector extracted them before batching."""
+    extension = event.file_name.split('.')[-1].lower() if '.' in event.file_name else ''
+    return [
+        event.file_size, len(event.file_name), len(event.file_path.split('/')),
+        1.0 if extension in {'exe', 'bat', 'cmd', 'scr', 'com', 'pif', 'vbs', 'js', 'jar'} else 0.0,
+        1.0 if event.file_name.count('.') > 1 else 0.0,
+        1.0 if any(c in event.file_name for c in ['%', '$', '&', '!']) else 0.0,
+        len(event.process_name), len(event.command_line), 1.0 if ' ' in event.command_line else 0.0,
+        event.timestamp.hour, event.timestamp.weekday(), 1.0 if event.timestamp.weekday() >= 5 else 0.0,
+        {'create': 1.0, 'modify': 2.0, 'delete': 3.0, 'execute': 4.0, 'access': 5.0}.get(event.operation, 0.0)
+    ]
+
+
+def network_features(event):
+    """Per-event network features, as MLThreatDetector extracted them before batching."""
+    total = event.bytes_sent + event.bytes_received
+    if event.bytes_received > 0:
+        ratio = event.bytes_sent / event.bytes_received
+    else:
+        ratio = float('inf') if event.bytes_sent > 0 else 0.0
+    try:
+        source, destination = ipaddress.ip_address(event.source_ip), ipaddress.ip_address(event.destination_ip)
+        ip_flags = [float(source.is_private), float(destination.is_private),
+                    float(source.is_loopback), float(destination.is_loopback)]
+    except ValueError:
+        ip_flags = [0.0] * 4
+    hour = event.timestamp.hour
+    return [
+        event.bytes_sent, event.bytes_received, total, event.duration, event.packet_count, event.payload_size,
+        ratio,
+        total / event.duration if event.duration > 0 else 0.0,
+        event.packet_count / event.duration if event.duration > 0 else 0.0,
+        event.source_port, event.destination_port,
+        1.0 if event.destination_port in {80, 443, 22, 21, 25, 53} else 0.0,
+        1.0 if event.destination_port > 1024 else 0.0,
+        {'tcp': 1.0, 'udp': 2.0, 'icmp': 3.0, 'http': 4.0, 'https': 5.0}.get(event.protocol.lower(), 0.0),
+        *ip_flags,
+        hour, event.timestamp.weekday(), 1.0 if 9 <= hour <= 17 else 0.0,
+        {'GET': 1.0, 'POST': 2.0, 'PUT': 3.0, 'DELETE': 4.0, 'HEAD': 5.0}.get(event.http_method, 0.0)
+        if event.http_method else 0.0,
+        event.response_code or 0.0,
+        1.0 if event.response_code and event.response_code >= 400 else 0.0
+    ]
+
+
+def random_file_event(rng, number):
+    name = rng.choice(["report.pdf", "setup.exe", "invoice.pdf.exe", "run$.bat", "notes", "lib.JS"])
+    return FileEvent(
+        event_id=f"f{number}", timestamp=START + timedelta(hours=rng.randint(0, 24 * 14)),
+        file_path="/" + "/".join(rng.choice(["home", "tmp", "usr", "bin"]) for _ in range(rng.randint(0, 4))),
+        file_name=name, file_size=rng.randint(0, 10 ** 7), file_hash="0" * 64,
+        operation=rng.choice(["create", "modify", "delete", "execute", "access", "rename"]),
+        user_id="u1", process_name=rng.choice(["explorer", "powershell", "cmd"]), process_id=rng.randint(1, 9999),
+        parent_process="init", command_line=rng.choice(["", "cmd", "cmd /c whoami", "powershell -enc AAAA"]),
+        file_type="binary", permissions="rw"
+    )
+
+
+def random_network_event(rng, number, finite=True):
+    bytes_received = rng.choice([0, rng.randint(1, 10 ** 6)])
+    return NetworkEvent(
+        event_id=f"n{number}", timestamp=START + timedelta(hours=rng.randint(0, 24 * 14)),
+        source_ip=rng.choice(["10.0.0.5", "8.8.8.8", "127.0.0.1", "not-an-ip"]),
+        destination_ip=rng.choice(["192.168.1.1", "1.1.1.1", "::1"]),
+        source_port=rng.randint(1, 65535), destination_port=rng.choice([22, 80, 443, 3389, 8080, 50000]),
+        protocol=rng.choice(["TCP", "udp", "https", "gre"]),
+        # A send with nothing received has an infinite send/receive ratio, which the models reject
+        bytes_sent=0 if finite and not bytes_received else rng.randint(0, 10 ** 6),
+        bytes_received=bytes_received, duration=rng.choice([0.0, rng.uniform(0.1, 300)]),
+        flags=[], payload_size=rng.randint(0, 1500), packet_count=rng.randint(0, 5000),
+        http_method=rng.choice([None, "GET", "POST", "PATCH"]),
+        response_code=rng.choice([None, 200, 404, 500])
+    )
+
+
+@pytest.fixture(scope="module")
+def trained_detector():
+    rng = random.Random(7)
+    file_events = [random_file_event(rng, i) for i in range(200)]
+    network_events = [random_network_event(rng, i) for i in range(200)]
+    detector = MLThreatDetector()
+    detector.neural_classifier.set_params(max_iter=50)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        assert detector.train_models({
+            'file_events': file_events,
+            'file_labels': [int(event.file_name.endswith(".exe")) for event in file_events],
+            'network_events': network_events,
+            'network_labels': [int(event.destination_port == 3389) for event in network_events]
+        })
+    return detector
+
+
+class TestMLThreatDetectorBatching:
+    """Test the batched feature matrices and predictions against the per-event path."""
+
+    def test_feature_matrices_match_per_event_extraction(self):
+        """Test both feature matrices row by row against per-event extraction, including infinities."""
+        rng = random.Random(11)
+        detector = MLThreatDetector()
+        file_events = [random_file_event(rng, i) for i in range(300)]
+        network_events = [random_network_event(rng, i, finite=False) for i in range(300)]
+
+        np.testing.assert_array_equal(
+            detector.file_feature_matrix(file_events), np.array([file_features(e) for e in file_events], dtype=float)
+        )
+        np.testing.assert_array_equal(
+            detector.network_feature_matrix(network_events),
+            np.array([network_features(e) for e in network_events], dtype=float)
+        )
+
+    def test_batch_predictions_match_per_event_predictions(self, trained_detector):
+        """Test that a mixed batch, with unscorable and unknown events, predicts as its events do one by one."""
+        rng = random.Random(13)
+        batch = [random_file_event(rng, i) for i in range(40)] + [random_network_event(rng, i) for i in range(40)]
+        batch += [random_network_event(rng, 99, finite=False) for _ in range(5)] + [object()]
+        rng.shuffle(batch)
+
+        batched = trained_detector.predict_threats(batch)
+        single = [trained_detector.predict_threat(event) for event in batch]
+
+        assert [p['method'] for p in batched] == [p['method'] for p in single]
+        assert {p['method'] for p in batched} >= {'malware_classifier', 'combined_network_analysis', 'unknown_event_type'}
+        for batched_prediction, single_prediction in zip(batched, single):
+            assert batched_prediction.keys() == single_prediction.keys()
+            for key, value in single_prediction.items():
+                assert batched_prediction[key] == (pytest.approx(value) if isinstance(value, float) else value)
+
+        # File probabilities also match the classifier applied to per-event features
+        for event, prediction in zip(batch, batched):
+            if isinstance(event, FileEvent):
+                scaled = trained_detector.scaler.transform(np.array([file_features(event)], dtype=float))
+                expected = trained_detector.malware_classifier.predict_proba(scaled)[0][1]
+                assert prediction['threat_probability'] == pytest.approx(expected)
@@ -0,0 +1,83 @@
+"""
+Test user behaviour anomaly detection against streaming profiles.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.enterprise.security.advanced_threat_detection import (
+    AdvancedThreatDetectionEngine, BehavioralAnalyzer, UserEvent
+)
+
+START = datetime(2024, 5, 1, 9, 0)
+
+
+def user_event(number, hours, action="login", risk_score=0.2):
+    return UserEvent(
+        event_id=f"e{number}", timestamp=START + timedelta(hours=hours), user_id="u1", username="alice",
+        session_id="s1", action=action, resource="/app", source_ip="10.0.0.1", user_agent="browser",
+        success=True, risk_score=risk_score, geolocation={}, device_info={}, authentication_method="password"
+    )
+
+
+class TestLoginHourAnomalies:
+    """Test the unusual login time check from a cold start."""
+
+    @pytest.mark.asyncio
+    async def test_new_user_events_are_not_flagged(self):
+        """Test that a user's second event, an hour after their first login, is not a detection."""
+        engine = AdvancedThreatDetectionEngine()
+
+        detections = await engine._analyze_user_events([user_event(0, 0), user_event(1, 1)])
+
+        assert detections == []
+
+    @pytest.mark.asyncio
+    async def test_new_user_risk_scores_are_not_flagged(self):
+        """Test that a new user's second login, at a higher risk score than the first, is not a detection."""
+        engine = AdvancedThreatDetectionEngine()
+
+        detections = await engine._analyze_user_events([
+            user_event(0, 0, risk_score=0.1), user_event(1, 1, risk_score=0.5)
+        ])
+
+        assert detections == []
+
+    def test_established_baseline_flags_distant_hours_only(self):
+        """Test that, after the minimum logins, a nearby hour passes and a distant one is flagged."""
+        analyzer = BehavioralAnalyzer()
+        for day in range(BehavioralAnalyzer.MIN_BASELINE_LOGINS - 1):
+            analyzer.update_user_profile(user_event(day, 24 * day))
+
+        # One login short of a baseline
+        assert analyzer.detect_user_anomalies(user_event(98, 240 + 12), analyzer.get_user_profile("u1")) == []
+
+        analyzer.update_user_profile(user_event(99, 240))
+        profile = analyzer.get_user_profile("u1")
+        assert profile['std_login_hour'] == 0
+
+        nearby = analyzer.detect_user_anomalies(user_event(100, 264 + 1), profile)
+        distant = analyzer.detect_user_anomalies(user_event(101, 264 + 12), profile)
+        assert nearby == []
+        assert [anomaly['type'] for anomaly in distant] == ['unusual_login_time']
+        assert distant[0]['score'] > 0.7
+
+
+class TestRiskScoreAnomalies:
+    """Test the elevated risk score check against an established baseline."""
+
+    def test_established_baseline_flags_elevated_risk(self):
+        """Test that, after the minimum events, a risk score well above the baseline is flagged."""
+        analyzer = BehavioralAnalyzer()
+        for number in range(BehavioralAnalyzer.MIN_BASELINE_EVENTS - 1):
+            analyzer.update_user_profile(user_event(number, number, risk_score=0.1))
+
+        # One event short of a baseline
+        elevated = user_event(98, 9, risk_score=0.9)
+        assert analyzer.detect_user_anomalies(elevated, analyzer.get_user_profile("u1")) == []
+
+        analyzer.update_user_profile(user_event(99, 9, risk_score=0.1))
+        anomalies = analyzer.detect_user_anomalies(elevated, analyzer.get_user_profile("u1"))
+        assert [anomaly['type'] for anomaly in anomalies] == ['elevated_risk_score']
+        assert anomalies[0]['score'] > 0.7
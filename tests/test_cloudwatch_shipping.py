@@ -0,0 +1,141 @@
+"""
+Test batched CloudWatch log and metric shipping against a local stub client.
+"""
+
+import threading
+
+import pytest
+
+from src.shared.cloudwatch_shipping import (
+    CloudWatchLogShipper, CloudWatchMetricShipper,
+    MAX_LOG_EVENTS_PER_BATCH, MAX_LOG_BATCH_BYTES, MAX_LOG_EVENT_BYTES, MAX_METRICS_PER_BATCH
+)
+
+
+class StubAlreadyExists(Exception):
+    """Mimics a botocore ClientError for an existing resource."""
+
+    def __init__(self):
+        super().__init__("exists")
+        self.response = {"Error": {"Code": "ResourceAlreadyExistsException"}}
+
+
+class StubCloudWatchClient:
+    """Records calls made by the shippers and the thread they ran on."""
+
+    def __init__(self):
+        self.created_streams = []
+        self.log_batches = []
+        self.metric_batches = []
+        self.call_threads = set()
+
+    def create_log_stream(self, logGroupName, logStreamName):
+        self.call_threads.add(threading.get_ident())
+        if logStreamName in self.created_streams:
+            raise StubAlreadyExists()
+        self.created_streams.append(logStreamName)
+
+    def put_log_events(self, logGroupName, logStreamName, logEvents):
+        self.call_threads.add(threading.get_ident())
+        self.log_batches.append((logStreamName, logEvents))
+
+    def put_metric_data(self, Namespace, MetricData):
+        self.call_threads.add(threading.get_ident())
+        self.metric_batches.append(MetricData)
+
+
+class TestCloudWatchLogShipper:
+    """Test log event buffering and batching."""
+
+    @pytest.mark.asyncio
+    async def test_events_are_batched_per_stream(self):
+        """Test that many events ship in one call per stream with one stream creation."""
+        client = StubCloudWatchClient()
+        shipper = CloudWatchLogShipper(client, "/test/group")
+        for i in range(100):
+            shipper.enqueue("agent-a-task", 1000 + i, f"event {i}")
+            shipper.enqueue("agent-b-task", 1000 + i, f"event {i}")
+        await shipper.stop()
+
+        assert sorted(client.created_streams) == ["agent-a-task", "agent-b-task"]
+        assert len(client.log_batches) == 2
+        assert shipper.get_stats()["shipped_events"] == 200
+        assert threading.get_ident() not in client.call_threads
+
+    @pytest.mark.asyncio
+    async def test_stream_creation_is_cached(self):
+        """Test that a known stream is not created again on later flushes."""
+        client = StubCloudWatchClient()
+        shipper = CloudWatchLogShipper(client, "/test/group")
+        for _ in range(3):
+            shipper.enqueue("agent-a-task", 1000, "event")
+            await shipper.flush()
+        await shipper.stop()
+
+        assert client.created_streams == ["agent-a-task"]
+        assert len(client.log_batches) == 3
+
+    @pytest.mark.asyncio
+    async def test_batches_respect_event_and_byte_limits(self):
+        """Test that oversized buffers are split within PutLogEvents limits."""
+        client = StubCloudWatchClient()
+        message = "x" * 1000
+        shipper = CloudWatchLogShipper(client, "/test/group", max_buffered_events=30000)
+        for i in range(MAX_LOG_EVENTS_PER_BATCH + 500):
+            shipper.enqueue("agent-a-task", 2000 - (i % 7), "e")
+        for i in range(1200):
+            shipper.enqueue("agent-b-task", 1000, message)
+        await shipper.stop()
+
+        for stream, events in client.log_batches:
+            assert len(events) <= MAX_LOG_EVENTS_PER_BATCH
+            assert sum(len(e["message"]) + 26 for e in events) <= MAX_LOG_BATCH_BYTES
+            timestamps = [e["timestamp"] for e in events]
+            assert timestamps == sorted(timestamps)
+        assert sum(len(events) for _, events in client.log_batches) == MAX_LOG_EVENTS_PER_BATCH + 1700
+
+    @pytest.mark.asyncio
+    async def test_buffer_is_bounded(self):
+        """Test that events beyond the buffer limit are dropped and counted."""
+        client = StubCloudWatchClient()
+        shipper = CloudWatchLogShipper(client, "/test/group", max_buffered_events=10)
+        accepted = [shipper.enqueue("agent-a-task", 1000, "event") for _ in range(15)]
+        await shipper.stop()
+        stats = shipper.get_stats()
+
+        assert accepted.count(True) == 10
+        assert stats["dropped_events"] == 5
+        assert stats["shipped_events"] == 10
+
+    @pytest.mark.asyncio
+    async def test_oversized_events_are_truncated(self):
+        """Test that events over the per-event limit are cut at a UTF-8 boundary."""
+        client = StubCloudWatchClient()
+        shipper = CloudWatchLogShipper(client, "/test/group")
+        shipper.enqueue("agent-a-task", 1000, "small")
+        shipper.enqueue("agent-a-task", 1001, "\u00e9" * MAX_LOG_EVENT_BYTES)
+        await shipper.stop()
+        stats = shipper.get_stats()
+
+        events = [event for _, batch in client.log_batches for event in batch]
+        assert [len(event["message"].encode("utf-8")) + 26 <= MAX_LOG_EVENT_BYTES for event in events] == [True, True]
+        assert set(events[1]["message"]) == {"\u00e9"}
+        assert stats["truncated_events"] == 1 and stats["shipped_events"] == 2
+
+
+class TestCloudWatchMetricShipper:
+    """Test metric buffering and batching."""
+
+    @pytest.mark.asyncio
+    async def test_metrics_ship_in_batches_of_1000(self):
+        """Test that buffered metrics are split into PutMetricData batches."""
+        client = StubCloudWatchClient()
+        shipper = CloudWatchMetricShipper(client, "ACSO/Test")
+        for i in range(2500):
+            shipper.enqueue({"MetricName": "TasksCompleted", "Value": float(i), "Unit": "Count"})
+        await shipper.stop()
+        stats = shipper.get_stats()
+
+        assert [len(batch) for batch in client.metric_batches] == [MAX_METRICS_PER_BATCH, MAX_METRICS_PER_BATCH, 500]
+        assert stats["shipped_metrics"] == 2500
+        assert stats["dropped_metrics"] == 0
@@ -0,0 +1,103 @@
+"""
+Test the streaming detection correlator.
+"""
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from src.enterprise.security.detection_correlation import DetectionCorrelator
+
+START = datetime(2024, 5, 1, 12, 0)
+
+
+def detection(detection_id, minutes, assets, vector, confidence=0.5, indicators=()):
+    return SimpleNamespace(
+        detection_id=detection_id,
+        detected_at=START + timedelta(minutes=minutes),
+        affected_assets=list(assets),
+        attack_vector=vector,
+        confidence=confidence,
+        indicators=list(indicators)
+    )
+
+
+class TestDetectionCorrelator:
+    """Test grouping, merging and window eviction."""
+
+    def test_groups_by_asset_or_vector_and_merges_bridged_groups(self):
+        """Test that detections join their neighbours' group and a bridging detection merges groups."""
+        correlator = DetectionCorrelator()
+        ioc = SimpleNamespace(indicator_id="ioc-1")
+
+        first, _ = correlator.add(detection("d1", 0, ["host-a"], "network", 0.4, [ioc]))
+        second, _ = correlator.add(detection("d2", 5, ["host-a"], "file_system", 0.6, [ioc]))
+        other, _ = correlator.add(detection("d3", 10, ["host-b"], "identity"))
+        bridge, merged = correlator.add(detection("d4", 20, ["host-b"], "network"))
+
+        assert first is second
+        assert other is not first
+        assert bridge is first and merged == [other.group_id]
+        assert bridge.detection_ids == ["d1", "d2", "d3", "d4"]
+        assert list(bridge.assets) == ["host-a", "host-b"]
+        assert [indicator.indicator_id for indicator in bridge.indicators] == ["ioc-1"]
+        assert correlator.get_group(other.group_id) is None
+
+    def test_window_slides_and_evicts(self):
+        """Test that detections over an hour apart start a new group and old state is evicted."""
+        correlator = DetectionCorrelator(window_seconds=3600, bucket_seconds=60)
+
+        early, _ = correlator.add(detection("d1", 0, ["host-a"], "network"))
+        late, _ = correlator.add(detection("d2", 61, ["host-a"], "network"))
+        too_late, _ = correlator.add(detection("d3", -5, ["host-c"], "usb"))
+
+        assert late is not early
+        assert too_late is None
+        stats = correlator.get_stats()
+        assert stats['active_groups'] == 1 and stats['indexed_keys'] == 2
+        assert stats['late_detections'] == 1
+
+        assert correlator.evict(START + timedelta(minutes=125)) == 1
+        assert correlator.get_stats()['indexed_keys'] == 0
+
+    def test_continuous_traffic_past_the_window_is_bounded(self):
+        """Test that a vector seen every 30 seconds for two days yields groups within one window and the size cap."""
+        correlator = DetectionCorrelator(window_seconds=3600, bucket_seconds=60, max_group_size=50)
+        groups = {}
+        for step in range(48 * 120):
+            group, _ = correlator.add(detection(f"d{step}", step / 2, [f"host-{step % 7}"], "network"))
+            groups[group.group_id] = group
+            assert correlator.get_stats()['active_groups'] <= 2 * 3600 // (50 * 30) + 2
+
+        members = [detection_id for group in groups.values() for detection_id in group.detection_ids]
+        assert sorted(members) == sorted(f"d{step}" for step in range(48 * 120))
+        assert all(len(group) <= 50 for group in groups.values())
+        assert all(group.last_seen - group.first_seen < timedelta(hours=1) for group in groups.values())
+
+        # Without the cap, groups still close one window after their first detection
+        correlator = DetectionCorrelator(window_seconds=3600, bucket_seconds=60)
+        spans = set()
+        for step in range(48 * 120):
+            group, _ = correlator.add(detection(f"d{step}", step / 2, ["host-a"], "network"))
+            spans.add((group.group_id, group.first_seen))
+        assert len(spans) == 48
+        assert correlator.get_stats()['active_groups'] <= 2
+
+    def test_late_detection_does_not_revive_an_evicted_group(self):
+        """Test that a detection just inside the window does not rejoin a group evicted before its keys."""
+        correlator = DetectionCorrelator(window_seconds=3600, bucket_seconds=60)
+
+        evicted, _ = correlator.add(detection("d1", 0.5, ["host-a"], None))
+        correlator.add(detection("d2", 60.6, ["host-b"], None))
+        assert correlator.get_group(evicted.group_id) is None
+        # host-a's bucket has not expired yet; d3 comes out of order, just inside the window
+        assert correlator.get_stats()['indexed_keys'] == 2
+
+        late, _ = correlator.add(detection("d3", 40 / 60, ["host-a"], None))
+
+        assert late is not evicted and late.detection_ids == ["d3"]
+        assert correlator.get_group(evicted.group_id) is None
+        assert correlator.get_group(late.group_id) is late
+
+        # The new group is evicted in its turn
+        assert correlator.evict(START + timedelta(minutes=125)) == 2
+        assert correlator.get_stats()['active_groups'] == 0
@@ -0,0 +1,91 @@
+"""
+Test handler retries on the enterprise event bus.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+
+import pytest
+
+from src.enterprise.integration.event_driven_architecture import (
+    EnterpriseEventBus, Event, EventHandler, EventMetadata, EventType
+)
+
+
+def make_event(event_id, aggregate_id, event_name):
+    metadata = EventMetadata(
+        event_id=event_id, correlation_id=event_id, causation_id=None, tenant_id="tenant",
+        source_system="test", created_at=datetime(2024, 5, 1)
+    )
+    return Event(metadata=metadata, event_type=EventType.BUSINESS_EVENT, aggregate_id=aggregate_id,
+                 aggregate_type="order", event_name=event_name, payload={})
+
+
+class TestEventBusRetries:
+    """Test that retried events stay on their aggregate's worker."""
+
+    @pytest.mark.asyncio
+    async def test_retry_does_not_overlap_the_aggregates_other_events(self):
+        """Test that a retry waits behind an event of the same aggregate still being handled."""
+        bus = EnterpriseEventBus({'event_store': {'table_name': 'events'}, 'dispatch': {'workers': 2}})
+        bus._calculate_retry_delay = lambda retry_count: 0.01
+        running = set()
+        overlaps = []
+        attempts = {"created": 0}
+
+        async def handle(event):
+            if event.aggregate_id in running:
+                overlaps.append(event.event_name)
+            running.add(event.aggregate_id)
+            try:
+                if event.event_name == "created":
+                    attempts["created"] += 1
+                    if attempts["created"] == 1:
+                        raise RuntimeError("transient")
+                else:
+                    await asyncio.sleep(0.1)
+            finally:
+                running.discard(event.aggregate_id)
+
+        bus.register_handler(EventHandler(handler_id="orders", event_patterns=["*"],
+                                          handler_function=handle, retry_policy={}))
+        bus.is_running = True
+        bus.dispatcher.start()
+        retries = asyncio.create_task(bus._retry_processor())
+
+        await bus.dispatcher.submit(make_event("e1", "order-1", "created"))
+        await bus.dispatcher.submit(make_event("e2", "order-1", "shipped"))
+        await asyncio.sleep(0.3)
+
+        bus.is_running = False
+        await bus.dispatcher.stop(drain_timeout=1)
+        await retries
+        bus.thread_pool.shutdown(wait=True)
+
+        assert overlaps == []
+        assert attempts["created"] == 2 and bus.metrics['events_retried'] == 1
+
+    @pytest.mark.asyncio
+    async def test_stop_cancels_and_reports_pending_retries(self, caplog):
+        """Test that retries still waiting out their delay at shutdown are cancelled and logged."""
+        bus = EnterpriseEventBus({'event_store': {'table_name': 'events'}, 'dispatch': {'workers': 1}})
+        bus._calculate_retry_delay = lambda retry_count: 60
+        released = []
+        bus.retry_queue.put_nowait = released.append
+
+        async def fail(event):
+            raise RuntimeError("transient")
+
+        bus.register_handler(EventHandler(handler_id="orders", event_patterns=["*"],
+                                          handler_function=fail, retry_policy={}))
+        await bus.start()
+        await bus.dispatcher.submit(make_event("e1", "order-1", "created"))
+        await asyncio.sleep(0.05)
+        assert len(bus.pending_retries) == 1
+
+        with caplog.at_level(logging.WARNING):
+            await bus.stop()
+
+        assert bus.pending_retries == set() and released == []
+        assert "Abandoning 1 pending event retries" in caplog.text
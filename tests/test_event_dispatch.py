@@ -0,0 +1,130 @@
+"""
+Test the sharded event dispatcher, handler index and Redis publish batcher.
+"""
+
+import asyncio
+import fnmatch
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from src.enterprise.integration.event_dispatch import HandlerIndex, RedisPublishBatcher, ShardedDispatcher
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def publish(self, channel, message):
+        self.commands.append((channel, message))
+
+    async def execute(self):
+        self.redis.round_trips += 1
+        self.redis.published.extend(self.commands)
+        return [1] * len(self.commands)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.published = []
+        self.round_trips = 0
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class TestShardedDispatcher:
+    """Test per-aggregate ordering and isolation from slow aggregates."""
+
+    @pytest.mark.asyncio
+    async def test_per_aggregate_order_and_slow_shard_isolation(self):
+        """Test that a slow aggregate does not hold up aggregates on other shards."""
+        seen = []
+
+        async def process(event):
+            aggregate_id, sequence = event
+            if aggregate_id == "slow":
+                await asyncio.sleep(0.05)
+            else:
+                await asyncio.sleep(random.random() / 1000)
+            seen.append(event)
+
+        dispatcher = ShardedDispatcher(process, key=lambda event: event[0], workers=4, queue_size=2)
+        dispatcher.start()
+        fast = [f"agg-{i}" for i in range(20)]
+        fast = [a for a in fast if dispatcher.shard_for(a) != dispatcher.shard_for("slow")]
+        for sequence in range(5):
+            await dispatcher.submit(("slow", sequence))
+            for aggregate_id in fast:
+                await dispatcher.submit((aggregate_id, sequence))
+
+        # Fast aggregates finish while the slow one is still being processed
+        await asyncio.wait_for(asyncio.gather(*(
+            dispatcher.queues[shard].join()
+            for shard in {dispatcher.shard_for(a) for a in fast}
+        )), timeout=1)
+        slow_done_when_fast_finished = sum(1 for event in seen if event[0] == "slow")
+        await dispatcher.stop(drain_timeout=1)
+
+        assert slow_done_when_fast_finished < 5
+        for aggregate_id in fast + ["slow"]:
+            assert [s for a, s in seen if a == aggregate_id] == list(range(5))
+
+
+class TestHandlerIndex:
+    """Test that cached matching agrees with fnmatch."""
+
+    def test_matches_fnmatch_scan(self):
+        """Test exact and wildcard patterns, tenant scoping and invalidation."""
+        rng = random.Random(5)
+        names = ["customer.created", "customer.updated", "order.created", "order.shipped", "invoice.paid"]
+        patterns = ["customer.*", "*.created", "order.shipped", "invoice.[pq]aid", "*", "missing"]
+        handlers = {
+            f"h{i}": SimpleNamespace(handler_id=f"h{i}", event_patterns=rng.sample(patterns, 2))
+            for i in range(5)
+        }
+        subscriptions = {
+            f"s{i}": SimpleNamespace(tenant_id=rng.choice(["t1", "t2"]), event_patterns=rng.sample(patterns, 1))
+            for i in range(6)
+        }
+        index = HandlerIndex()
+        index.set_handlers(handlers, subscriptions)
+
+        def expected(name, tenant_id):
+            return (
+                tuple(h for h in handlers.values() if any(fnmatch.fnmatch(name, p) for p in h.event_patterns)),
+                tuple(s for s in subscriptions.values()
+                      if s.tenant_id == tenant_id and any(fnmatch.fnmatch(name, p) for p in s.event_patterns))
+            )
+
+        for _ in range(2):
+            for name in names:
+                for tenant_id in ["t1", "t2"]:
+                    assert index.match(name, tenant_id) == expected(name, tenant_id)
+        assert index.hits == index.misses == len(names) * 2
+
+        del handlers["h0"]
+        index.set_handlers(handlers, subscriptions)
+        assert index.match("order.created", "t1") == expected("order.created", "t1")
+
+
+class TestRedisPublishBatcher:
+    """Test that publishes are pipelined in batches."""
+
+    @pytest.mark.asyncio
+    async def test_publishes_are_batched(self):
+        """Test that queued messages go out in few pipelined round trips, in order."""
+        redis = FakeRedis()
+
+        batcher = RedisPublishBatcher(redis, batch_size=50, flush_interval=0.01)
+        batcher.start()
+        for i in range(120):
+            await batcher.publish(f"events:t{i % 3}", str(i))
+        await batcher.stop(drain_timeout=1)
+        stats = batcher.get_stats()
+
+        assert [message for _, message in redis.published] == [str(i) for i in range(120)]
+        assert redis.round_trips == stats['batches'] <= 5
+        assert stats['published'] == 120
@@ -0,0 +1,169 @@
+"""
+Test snapshot-based loading in the event-sourced repository and projection rebuilds.
+"""
+
+from collections import defaultdict
+
+import pytest
+
+from src.enterprise.integration.aggregate_snapshots import InMemorySnapshotStore
+from src.enterprise.integration.cqrs_implementation import (
+    AggregateRoot, CQRSMediator, EventSourcedRepository, Projection
+)
+from src.enterprise.integration.event_driven_architecture import EnterpriseEventBus, EventStore
+
+
+class InMemoryEventStore(EventStore):
+    """Event store keeping each aggregate's history in a list."""
+
+    def __init__(self):
+        self.events = defaultdict(list)
+        self.appends = 0
+        self.page_reads = []
+        self.full_scans = 0
+
+    async def append_event(self, event):
+        self.appends += 1
+        self.events[event.aggregate_id].append(event)
+        return True
+
+    async def get_events(self, aggregate_id, from_version=None, to_version=None):
+        history = self.events.get(aggregate_id, [])
+        return history[(from_version or 1) - 1:to_version]
+
+    async def get_event_pages(self, aggregate_id, from_version=None, to_version=None, page_size=500):
+        self.page_reads.append(from_version)
+        async for page in super().get_event_pages(aggregate_id, from_version, to_version, page_size):
+            yield page
+
+    async def get_all_event_pages(self, from_timestamp=None, page_size=1000):
+        self.full_scans += 1
+        events = [event for history in self.events.values() for event in history]
+        for start in range(0, len(events), page_size):
+            yield events[start:start + page_size]
+
+    async def get_events_by_correlation_id(self, correlation_id):
+        return [event for history in self.events.values() for event in history
+                if event.metadata.correlation_id == correlation_id]
+
+
+class RecordingSnapshotStore(InMemorySnapshotStore):
+    """Snapshot store remembering the version of every snapshot saved."""
+
+    def __init__(self):
+        super().__init__()
+        self.saved_versions = []
+
+    async def save(self, snapshot):
+        self.saved_versions.append(snapshot.version)
+        await super().save(snapshot)
+
+
+class Account(AggregateRoot):
+    def __init__(self, aggregate_id):
+        super().__init__(aggregate_id, "account")
+        self.balance = 0
+        self.deposits = []
+
+    def _apply_event_internal(self, event):
+        self.balance += event.payload["amount"]
+        self.deposits.append(event.payload["amount"])
+
+
+def make_repository(event_store, snapshot_store=None, snapshot_every=10):
+    bus = EnterpriseEventBus({'event_store': {'table_name': 'events'}})
+    bus.event_store = event_store
+    return EventSourcedRepository(event_store, bus, Account, snapshot_store=snapshot_store,
+                                  snapshot_every=snapshot_every, page_size=3)
+
+
+class TestEventSourcedRepository:
+    """Test snapshot plus tail loading against a full replay."""
+
+    @pytest.mark.asyncio
+    async def test_snapshot_and_tail_equal_full_replay(self):
+        """Test that a load from the latest snapshot matches replaying every event."""
+        event_store = InMemoryEventStore()
+        snapshot_store = RecordingSnapshotStore()
+
+        writer = make_repository(event_store, snapshot_store)
+        account = Account("acct-1")
+        for amount in range(1, 26):
+            account.raise_event("deposited", {"amount": amount}, tenant_id="tenant")
+            assert await writer.save(account)
+
+        from_snapshot = await make_repository(event_store, snapshot_store).get_by_id("acct-1")
+        replayed = await make_repository(event_store).get_by_id("acct-1")
+
+        assert snapshot_store.saved_versions == [10, 20]
+        assert event_store.page_reads == [21, 1]
+        assert (from_snapshot.version, from_snapshot.balance, from_snapshot.deposits) == \
+            (replayed.version, replayed.balance, replayed.deposits) == (25, 325, list(range(1, 26)))
+        # Saving publishes with store=False, so every event is stored exactly once
+        assert event_store.appends == 25
+
+    @pytest.mark.asyncio
+    async def test_snapshots_follow_batched_saves(self):
+        """Test that a snapshot is taken once snapshot_every events have been saved since the last."""
+        event_store = InMemoryEventStore()
+        snapshot_store = RecordingSnapshotStore()
+
+        repository = make_repository(event_store, snapshot_store)
+        account = Account("acct-1")
+        for batch in range(4):
+            for amount in range(7):
+                account.raise_event("deposited", {"amount": amount}, tenant_id="tenant")
+            assert await repository.save(account)
+        loaded = await make_repository(event_store, snapshot_store).get_by_id("acct-1")
+
+        assert snapshot_store.saved_versions == [14, 28]
+        assert loaded.version == 28 and event_store.page_reads == [29]
+        assert event_store.appends == 28
+
+
+class CountingProjection(Projection):
+    def __init__(self, event_types, fail_after=None):
+        self.event_types = event_types
+        self.fail_after = fail_after
+        self.handled = []
+
+    async def reset(self):
+        self.handled = []
+
+    async def handle_event(self, event):
+        if self.fail_after is not None and len(self.handled) >= self.fail_after:
+            raise RuntimeError("projection store unavailable")
+        self.handled.append(event.payload["amount"])
+
+    def get_event_types(self):
+        return self.event_types
+
+
+class TestProjectionRebuild:
+    """Test replaying stored events into projections."""
+
+    @pytest.mark.asyncio
+    async def test_one_scan_feeds_every_projection(self):
+        """Test that projections get their own event types from a single pass and a failure stays isolated."""
+        event_store = InMemoryEventStore()
+        deposits = type("Deposits", (CountingProjection,), {})(["deposited"])
+        everything = type("Everything", (CountingProjection,), {})(["deposited", "withdrawn"])
+        broken = type("Broken", (CountingProjection,), {})(["withdrawn"], fail_after=1)
+
+        repository = make_repository(event_store)
+        account = Account("acct-1")
+        for amount in range(1, 6):
+            account.raise_event("deposited", {"amount": amount}, tenant_id="tenant")
+            account.raise_event("withdrawn", {"amount": -amount}, tenant_id="tenant")
+        assert await repository.save(account)
+
+        mediator = CQRSMediator(repository.event_bus, event_store)
+        for projection in (deposits, everything, broken):
+            mediator.register_projection(projection)
+        results = await mediator.rebuild_projections(page_size=4)
+
+        assert results == {"Deposits": True, "Everything": True, "Broken": False}
+        assert event_store.full_scans == 1
+        assert deposits.handled == [1, 2, 3, 4, 5]
+        assert everything.handled == [1, -1, 2, -2, 3, -3, 4, -4, 5, -5]
+        assert broken.handled == [-1]
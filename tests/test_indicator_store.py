@@ -0,0 +1,136 @@
+"""
+Test the partitioned indicator store and cursor paging of threat intelligence queries.
+"""
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from src.enterprise.security.indicator_store import IndicatorStore
+from src.enterprise.security.threat_intelligence_sharing import (
+    IndicatorType, SharingLevel, ThreatIndicator, ThreatIntelligenceSharingSystem, ThreatLevel
+)
+
+START = datetime(2024, 5, 1)
+
+
+def indicator(indicator_id, minutes, sharing_level="public", indicator_type="ip", threat_level="high"):
+    return SimpleNamespace(
+        indicator_id=indicator_id,
+        sharing_level=sharing_level,
+        indicator_type=indicator_type,
+        threat_level=threat_level,
+        updated_at=START + timedelta(minutes=minutes)
+    )
+
+
+def ids(indicators):
+    return [item.indicator_id for item in indicators]
+
+
+class TestIndicatorStore:
+    """Test access, filtering, ordering and cursors."""
+
+    def test_queries_respect_access_and_filters(self):
+        """Test that a tenant sees public, member and granted private indicators, newest first."""
+        store = IndicatorStore()
+        for item in (
+            indicator("pub-1", 1),
+            indicator("pub-2", 5, indicator_type="domain"),
+            indicator("com-1", 3, sharing_level="community", threat_level="low"),
+            indicator("org-1", 4, sharing_level="organization"),
+            indicator("prv-1", 2, sharing_level="private"),
+            indicator("prv-2", 6, sharing_level="private")
+        ):
+            store.upsert(item)
+        store.load_permissions({"community": {"tenant-a"}, "prv-1": {"tenant-a"}})
+
+        assert ids(store.query("tenant-a")) == ["pub-2", "com-1", "prv-1", "pub-1"]
+        assert ids(store.query("tenant-b")) == ["pub-2", "pub-1"]
+        assert ids(store.query("tenant-a", indicator_types=["ip"], threat_levels=["high"])) == ["prv-1", "pub-1"]
+        assert ids(store.query("tenant-a", since=START + timedelta(minutes=2))) == ["pub-2", "com-1", "prv-1"]
+
+        store.grant("tenant-b", "organization")
+        store.revoke("tenant-a", "prv-1")
+        assert ids(store.query("tenant-b", limit=2)) == ["pub-2", "org-1"]
+        assert ids(store.query("tenant-a")) == ["pub-2", "com-1", "pub-1"]
+
+    def test_refiling_and_cursor_pages(self):
+        """Test that updated indicators move partitions and cursors page through results."""
+        store = IndicatorStore()
+        items = [indicator(f"ind-{i}", i) for i in range(10)]
+        for item in items:
+            store.upsert(item)
+
+        items[0].updated_at = START + timedelta(minutes=30)
+        items[1].sharing_level = "private"
+        store.upsert(items[0])
+        store.upsert(items[1])
+        store.remove("ind-2")
+
+        pages, before = [], None
+        while True:
+            page = store.query("tenant", before=before, limit=3)
+            pages.append(ids(page))
+            if len(page) < 3:
+                break
+            before = IndicatorStore.decode_cursor(IndicatorStore.encode_cursor(page[-1]))
+
+        assert pages == [["ind-0", "ind-9", "ind-8"], ["ind-7", "ind-6", "ind-5"], ["ind-4", "ind-3"]]
+        assert store.get_stats()["indicators"] == 9
+        with pytest.raises(ValueError):
+            IndicatorStore.decode_cursor("not-a-cursor")
+
+
+def threat_indicator(indicator_id, minutes, indicator_type=IndicatorType.IP_ADDRESS,
+                     sharing_level=SharingLevel.PUBLIC):
+    timestamp = START + timedelta(minutes=minutes)
+    return ThreatIndicator(
+        indicator_id=indicator_id, indicator_type=indicator_type, value=f"value-{indicator_id}",
+        pattern=f"[x:value = '{indicator_id}']", confidence=0.8, threat_level=ThreatLevel.HIGH,
+        sharing_level=sharing_level, source="test", created_at=timestamp, updated_at=timestamp,
+        valid_from=timestamp, valid_until=None, labels=[], kill_chain_phases=[], description=""
+    )
+
+
+class TestThreatIntelligencePaging:
+    """Test cursor paging through ThreatIntelligenceSharingSystem.get_threat_intelligence."""
+
+    @pytest.mark.asyncio
+    async def test_pages_through_bundles_with_cursors(self):
+        """Test that following next_cursor returns every visible, matching indicator once, newest first."""
+        system = ThreatIntelligenceSharingSystem()
+        for i in range(7):
+            await system.add_threat_indicator(threat_indicator(f"ip-{i}", i), "tenant-a")
+        await system.add_threat_indicator(threat_indicator("domain-1", 3, IndicatorType.DOMAIN), "tenant-a")
+        await system.add_threat_indicator(threat_indicator("private-1", 4, sharing_level=SharingLevel.PRIVATE),
+                                          "tenant-b")
+
+        pages, cursor = [], None
+        while True:
+            result = await system.get_threat_intelligence(
+                "tenant-a", indicator_types=[IndicatorType.IP_ADDRESS], limit=3, cursor=cursor
+            )
+            pages.append(result)
+            cursor = result["next_cursor"]
+            if not result["more"]:
+                break
+
+        assert [page["more"] for page in pages] == [True, True, False]
+        assert [page["total_indicators"] for page in pages] == [3, 3, 1]
+        assert pages[-1]["next_cursor"] is None
+        assert [obj["id"] for page in pages for obj in page["bundle"]["objects"]] == [
+            f"indicator--ip-{i}" for i in reversed(range(7))
+        ]
+
+    @pytest.mark.asyncio
+    async def test_invalid_cursor_returns_error(self):
+        """Test that a malformed cursor returns the error shape rather than a page."""
+        system = ThreatIntelligenceSharingSystem()
+        await system.add_threat_indicator(threat_indicator("ip-1", 1), "tenant-a")
+
+        result = await system.get_threat_intelligence("tenant-a", limit=1, cursor="not-a-cursor")
+
+        assert set(result) == {"error"}
+        assert "Invalid pagination cursor" in result["error"]
@@ -0,0 +1,67 @@
+"""
+Test the IOC index used by the advanced threat detection engine.
+"""
+
+from types import SimpleNamespace
+
+from src.enterprise.security.ioc_index import IOCIndex
+
+
+def ioc(indicator_id, indicator_type, value):
+    return SimpleNamespace(indicator_id=indicator_id, indicator_type=indicator_type, value=value)
+
+
+def ids(indicators):
+    return [indicator.indicator_id for indicator in indicators]
+
+
+class TestIOCIndex:
+    """Test lookups and copy-on-write updates."""
+
+    def test_matches_by_indicator_type(self):
+        """Test exact, CIDR and substring matching."""
+        index = IOCIndex.build([
+            ioc("ip-1", "ip", "192.168.1.100"),
+            ioc("net-1", "ip", "10.0.0.0/8"),
+            ioc("net-2", "ip", "10.20.0.0/16"),
+            ioc("net-6", "ip", "2001:db8::/32"),
+            ioc("domain-1", "domain", "Evil.Example.com."),
+            ioc("hash-1", "hash", "D41D8CD98F00B204E9800998ECF8427E"),
+            ioc("url-1", "url", "/wp-admin/shell"),
+            ioc("url-2", "url", "shell.php"),
+            ioc("bad-1", "ip", "not-an-ip")
+        ])
+
+        assert ids(index.match_ip("192.168.1.100")) == ["ip-1"]
+        assert ids(index.match_ip("10.20.3.4")) == ["net-1", "net-2"]
+        assert ids(index.match_ip("10.1.1.1")) == ["net-1"]
+        assert ids(index.match_ip("2001:db8:0:0::1")) == ["net-6"]
+        assert index.match_ip("172.16.0.1") == [] and index.match_ip("garbage") == []
+        assert ids(index.match_domain("evil.example.com")) == ["domain-1"]
+        assert ids(index.match_hash("d41d8cd98f00b204e9800998ecf8427e")) == ["hash-1"]
+        assert ids(index.match_substrings("/site/wp-admin/shell.php?x=1")) == ["url-1", "url-2"]
+        assert index.match_substrings("/index.html") == []
+        assert index.get_stats()["invalid_indicators"] == 1
+
+    def test_updates_leave_previous_index_untouched(self):
+        """Test that updates return a new index and readers of the old one see no change."""
+        before = IOCIndex.build([
+            ioc("net-1", "ip", "10.0.0.0/8"),
+            ioc("url-1", "url", "/evil"),
+            ioc("hash-1", "hash", "abc")
+        ])
+
+        after = before.updated(
+            upserts=[ioc("hash-1", "hash", "def"), ioc("url-2", "url", "/worse")],
+            removed_ids=["net-1", "url-1"]
+        )
+
+        assert ids(before.match_ip("10.1.2.3")) == ["net-1"]
+        assert ids(before.match_substrings("/evil/worse")) == ["url-1"]
+        assert ids(before.match_hash("abc")) == ["hash-1"]
+
+        assert after.match_ip("10.1.2.3") == []
+        assert ids(after.match_substrings("/evil/worse")) == ["url-2"]
+        assert after.match_hash("abc") == [] and ids(after.match_hash("DEF")) == ["hash-1"]
+        assert len(before) == 3 and len(after) == 2
+        assert after.get_stats()["networks"] == 0
@@ -0,0 +1,97 @@
+"""
+Test the sequence-numbered agent log buffer and its search index.
+"""
+
+import random
+from datetime import datetime, timedelta
+
+from src.api.services.log_buffer import AgentLogBuffer, LogFilter
+
+
+def make_entry(i, message, component=None, level="INFO"):
+    return {
+        "timestamp": datetime(2024, 1, 1) + timedelta(seconds=i),
+        "level": level,
+        "message": message,
+        "component": component,
+        "task_id": None,
+        "metadata": {}
+    }
+
+
+class TestAgentLogBuffer:
+    """Test ring eviction, cursor resume and indexed search."""
+
+    def test_cursor_resume_after_eviction(self):
+        """Test that since() returns entries after the cursor still held in the ring."""
+        buffer = AgentLogBuffer(capacity=5)
+        entries = [make_entry(i, f"entry {i}") for i in range(8)]
+        assert [buffer.append(entry) for entry in entries] == list(range(1, 9))
+
+        assert [e["message"] for e in buffer] == [f"entry {i}" for i in range(3, 8)]
+        assert [seq for seq, _ in buffer.since(6)] == [7, 8]
+        assert [seq for seq, _ in buffer.since(1)] == [4, 5, 6, 7, 8]
+        assert buffer.since(6)[0][1] is entries[6]
+        # The caller's entries are stored as given
+        assert all("seq" not in entry for entry in entries)
+
+    def test_search_matches_substring_scan(self):
+        """Test that indexed search returns exactly what a substring scan would."""
+        messages = [
+            "Connection timeout to db-01",
+            "Reconnection succeeded",
+            "Login failed for user admin",
+            "Disk full on /var",
+            "connection reset by peer"
+        ]
+        buffer = AgentLogBuffer(capacity=100)
+        for i, message in enumerate(messages):
+            buffer.append(make_entry(i, message, component="net" if i % 2 else "auth"))
+
+        for query in ["connection", "nnection time", "DB-0", "failed for", "auth", "/var", "missing"]:
+            expected = [
+                e for e in buffer
+                if query.lower() in e["message"].lower() or query.lower() in e["component"]
+            ]
+            assert buffer.search(query) == expected
+
+    def test_evict_before_drops_old_entries(self):
+        """Test that retention eviction removes entries from search results."""
+        buffer = AgentLogBuffer(capacity=10)
+        for i in range(6):
+            buffer.append(make_entry(i, "heartbeat ok"))
+
+        buffer.evict_before(datetime(2024, 1, 1) + timedelta(seconds=4))
+
+        assert [e["timestamp"].second for e in buffer.search("heartbeat")] == [4, 5]
+
+    def test_search_matches_substring_scan_under_churn(self):
+        """Test random queries cut at arbitrary offsets against a scan while entries are evicted."""
+        rng = random.Random(9)
+        words = ["timeout", "connection", "reconnect", "db01", "db02", "user", "admin", "io", "a", "disk_full"]
+        buffer = AgentLogBuffer(capacity=50)
+
+        for i in range(400):
+            buffer.append(make_entry(i, " ".join(rng.choice(words) for _ in range(rng.randint(1, 5))),
+                                     component=rng.choice(["net", "auth", None])))
+            if i % 20 == 19:
+                messages = [e["message"] for e in buffer]
+                for _ in range(20):
+                    text = rng.choice(messages)
+                    start = rng.randint(0, len(text) - 1)
+                    query = text[start:rng.randint(start + 1, len(text))]
+                    expected = [
+                        e for e in buffer
+                        if query.lower() in e["message"].lower() or query.lower() in (e["component"] or "")
+                    ]
+                    assert buffer.search(query) == expected
+
+        assert buffer.get_stats()["indexed_tokens"] <= len(words) + 2
+
+    def test_log_filter(self):
+        """Test compiled level, component and time filters."""
+        log_filter = LogFilter({"level": "error", "start_time": "2024-01-01T00:00:02"})
+
+        assert log_filter.matches(make_entry(3, "boom", level="ERROR"))
+        assert not log_filter.matches(make_entry(1, "boom", level="ERROR"))
+        assert not log_filter.matches(make_entry(3, "boom", level="INFO"))
@@ -0,0 +1,110 @@
+"""
+Test the in-process message bus and agent mailboxes.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.shared.communication import AgentCommunicationManager, AgentMailbox, MessageBus, OverflowPolicy
+
+
+def message(recipient_id, number):
+    return SimpleNamespace(recipient_id=recipient_id, message_id=f"m{number}", payload={"n": number})
+
+
+def numbers(messages):
+    return [item.payload["n"] for item in messages]
+
+
+class TestAgentMailbox:
+    """Test the overflow policies of a full mailbox."""
+
+    @pytest.mark.asyncio
+    async def test_reject_and_drop_oldest(self):
+        """Test that REJECT refuses new messages and DROP_OLDEST evicts the oldest."""
+        reject = AgentMailbox("a", max_size=2, overflow_policy=OverflowPolicy.REJECT)
+        drop = AgentMailbox("b", max_size=2, overflow_policy=OverflowPolicy.DROP_OLDEST)
+        accepted = [await reject.put(message("a", n)) for n in range(3)]
+        for n in range(3):
+            await drop.put(message("b", n))
+
+        assert accepted == [True, True, False]
+        assert numbers(await reject.get_batch(10)) == [0, 1] and reject.metrics.rejected == 1
+        assert numbers(await drop.get_batch(10)) == [1, 2] and drop.metrics.dropped == 1
+
+    @pytest.mark.asyncio
+    async def test_block_waits_for_space_and_times_out(self):
+        """Test that BLOCK resumes a sender once space frees up and gives up after put_timeout."""
+        mailbox = AgentMailbox("a", max_size=1, overflow_policy=OverflowPolicy.BLOCK, put_timeout=0.05)
+        await mailbox.put(message("a", 0))
+
+        blocked = asyncio.ensure_future(mailbox.put(message("a", 1)))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+        first = await mailbox.get_batch(10)
+        assert await blocked
+
+        timed_out = await mailbox.put(message("a", 2))
+
+        assert numbers(first) == [0] and numbers(await mailbox.get_batch(10)) == [1]
+        assert timed_out is False and mailbox.metrics.timed_out == 1
+
+
+class TestMessageBus:
+    """Test routing and dead-lettering."""
+
+    @pytest.mark.asyncio
+    async def test_unregister_wakes_blocked_senders_and_dead_letters(self):
+        """Test that unregistering a full mailbox releases its blocked senders into the dead letters."""
+        bus = MessageBus(default_queue_size=1, default_put_timeout=None)
+        bus.register_agent("slow")
+        assert await bus.publish(message("slow", 0))
+
+        senders = [asyncio.ensure_future(bus.publish(message("slow", n))) for n in (1, 2)]
+        await asyncio.sleep(0.01)
+        assert not any(sender.done() for sender in senders)
+
+        bus.unregister_agent("slow")
+        results = await asyncio.wait_for(asyncio.gather(*senders), timeout=1)
+        unroutable = await bus.publish(message("slow", 3))
+
+        assert results == [False, False] and unroutable is False
+        assert sorted(numbers(bus.dead_letters)) == [0, 1, 2, 3]
+        assert bus.get_metrics()["registered_agents"] == 0
+
+    @pytest.mark.asyncio
+    async def test_closed_mailbox_stops_its_manager(self):
+        """Test that a manager whose mailbox is unregistered stops instead of spinning on the event loop."""
+        bus = MessageBus()
+        manager = AgentCommunicationManager("agent-1", message_bus=bus)
+        await manager.initialize()
+
+        bus.unregister_agent("agent-1")
+        await asyncio.wait_for(asyncio.sleep(0.1), timeout=1)
+
+        assert manager.running is False and manager._processor_task.done()
+        await manager.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_shutdown_keeps_mailbox_of_other_owner(self):
+        """Test that an old manager shutting down does not close the mailbox a new one for the same agent reads."""
+        bus = MessageBus()
+        received = []
+
+        async def record(msg):
+            received.append(msg.payload["n"])
+
+        old, new = (AgentCommunicationManager("agent-1", message_bus=bus) for _ in range(2))
+        await old.initialize()
+        await new.initialize()
+        new.register_handler("ping", record)
+        await old.shutdown()
+
+        assert await old.send_message("agent-1", "ping", {"n": 1})
+        await asyncio.sleep(0.05)
+
+        assert received == [1] and new.running and not new.mailbox.closed
+        await new.shutdown()
+        assert bus.registered_agents() == []
@@ -0,0 +1,64 @@
+"""
+Test the multi-pattern matcher and IP reputation set.
+"""
+
+import ipaddress
+import random
+
+import pytest
+
+from src.shared.pattern_matching import AhoCorasickMatcher, IPNetworkSet
+
+
+class TestAhoCorasickMatcher:
+    """Test substring matching against a brute-force scan."""
+
+    def test_overlapping_keywords_and_shared_labels(self):
+        """Test keywords that overlap, nest and share labels."""
+        matcher = AhoCorasickMatcher([("he", 1), ("she", 2), ("his", 3), ("hers", 4), ("login", 1)])
+
+        assert matcher.find("ushers") == {1, 2, 4}
+        assert matcher.find("adminlogin") == {1}
+        assert matcher.find("xyz") == set()
+        with pytest.raises(ValueError):
+            matcher.add("", 5)
+
+    def test_matches_brute_force_after_incremental_adds(self):
+        """Test random texts against a substring scan, including keywords added after build."""
+        rng = random.Random(11)
+        keywords = ["".join(rng.choice("abc") for _ in range(rng.randint(1, 4))) for _ in range(30)]
+        matcher = AhoCorasickMatcher((keyword, index) for index, keyword in enumerate(keywords[:20]))
+        for index, keyword in enumerate(keywords[20:], 20):
+            matcher.add(keyword, index)
+
+        for _ in range(200):
+            text = "".join(rng.choice("abcd") for _ in range(rng.randint(0, 12)))
+            expected = {index for index, keyword in enumerate(keywords) if keyword in text}
+            assert matcher.find(text) == expected
+
+
+class TestIPNetworkSet:
+    """Test address and CIDR membership."""
+
+    def test_addresses_and_networks(self):
+        """Test exact addresses, IPv4 and IPv6 ranges, host routes and invalid input."""
+        networks = IPNetworkSet(["192.168.1.100", "10.0.0.0/8", "172.16.5.0/24", "2001:db8::/32", "8.8.8.8/32"])
+
+        assert "192.168.1.100" in networks and "8.8.8.8" in networks
+        assert "10.255.1.2" in networks and "172.16.5.77" in networks
+        assert "2001:db8:0:1::5" in networks and "2001:0db8::1" in networks
+        assert "172.16.6.1" not in networks and "11.0.0.1" not in networks
+        assert "" not in networks and "not-an-ip" not in networks
+        with pytest.raises(ValueError):
+            networks.add("999.1.1.1")
+
+    def test_matches_ipaddress_module(self):
+        """Test random addresses against ipaddress network containment."""
+        rng = random.Random(5)
+        cidrs = [f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.0.0/{rng.choice([8, 12, 16])}" for _ in range(20)]
+        networks = IPNetworkSet(cidrs)
+        parsed = [ipaddress.ip_network(cidr, strict=False) for cidr in cidrs]
+
+        for _ in range(500):
+            address = ipaddress.ip_address(rng.getrandbits(32))
+            assert (str(address) in networks) == any(address in network for network in parsed)
@@ -0,0 +1,87 @@
+"""
+Test GCRA rate limiting backends.
+"""
+
+import pytest
+
+from src.api.rate_limiting import InMemoryRateLimitBackend, RateLimiter, RedisRateLimitBackend
+
+
+@pytest.fixture
+def redis():
+    """In-process Redis whose embedded Lua interpreter runs the GCRA script."""
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    return fakeredis.FakeAsyncRedis()
+
+
+class FailingRedis:
+    async def eval(self, *args):
+        raise ConnectionError("redis unavailable")
+
+
+async def hit_many(limiter, key, count, calls, period):
+    return [await limiter.hit(key, calls, period) for _ in range(count)]
+
+
+class TestRateLimiting:
+    """Test limits, headers and backend sharing."""
+
+    @pytest.mark.asyncio
+    async def test_memory_backend_allows_burst_then_rejects(self):
+        """Test that exactly `calls` requests pass within one period."""
+        limiter = RateLimiter(InMemoryRateLimitBackend())
+
+        decisions = await hit_many(limiter, "ip:1:default", 7, calls=5, period=60)
+
+        assert [d.allowed for d in decisions] == [True] * 5 + [False] * 2
+        assert [d.remaining for d in decisions[:5]] == [4, 3, 2, 1, 0]
+        assert 11 < decisions[-1].retry_after <= 12
+
+    @pytest.mark.asyncio
+    async def test_keys_are_independent(self):
+        """Test that one client's route limit does not affect another route."""
+        limiter = RateLimiter(InMemoryRateLimitBackend())
+
+        await hit_many(limiter, "user:a:/api/auth/login", 5, calls=5, period=300)
+
+        assert (await limiter.hit("user:a:default", 5, 300)).allowed
+
+    @pytest.mark.asyncio
+    async def test_redis_script_allows_burst_then_rejects(self, redis):
+        """Test that the Lua script admits exactly `calls` requests and reports the same figures as memory."""
+        limiter = RateLimiter(RedisRateLimitBackend(redis))
+
+        decisions = await hit_many(limiter, "ip:1:default", 7, calls=5, period=60)
+
+        assert [d.allowed for d in decisions] == [True] * 5 + [False] * 2
+        assert [d.remaining for d in decisions[:5]] == [4, 3, 2, 1, 0]
+        assert 11 < decisions[-1].retry_after <= 12
+
+        # Rejected requests leave the stored TAT alone, and the key expires once the bucket refills
+        tat = float(await redis.get("acso:ratelimit:ip:1:default"))
+        assert tat == pytest.approx(decisions[4].reset_at, abs=1e-3)
+        assert 59_000 < await redis.pttl("acso:ratelimit:ip:1:default") <= 60_000
+
+    @pytest.mark.asyncio
+    async def test_redis_backend_shares_state_between_workers(self, redis):
+        """Test that two limiters over one Redis enforce a single limit."""
+        worker_a = RateLimiter(RedisRateLimitBackend(redis))
+        worker_b = RateLimiter(RedisRateLimitBackend(redis))
+
+        first = await hit_many(worker_a, "ip:1:default", 3, calls=5, period=60)
+        second = await hit_many(worker_b, "ip:1:default", 3, calls=5, period=60)
+        other = await worker_b.hit("ip:2:default", 5, 60)
+
+        assert [d.allowed for d in first + second] == [True] * 5 + [False]
+        assert other.allowed and other.remaining == 4
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_memory_when_redis_fails(self):
+        """Test that a Redis outage does not reject traffic."""
+        limiter = RateLimiter(RedisRateLimitBackend(FailingRedis()), fallback=InMemoryRateLimitBackend())
+
+        decision = await limiter.hit("ip:1:default", 5, 60)
+
+        assert decision.allowed
+        assert limiter.backend_errors == 1
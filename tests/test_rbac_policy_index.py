@@ -0,0 +1,137 @@
+"""
+Test compiled RBAC policy evaluation and the decision cache.
+"""
+
+import random
+
+import pytest
+
+from src.enterprise.compliance.rbac_policy_index import AddressMatcher, DecisionCache
+from src.enterprise.compliance.rbac_system import PermissionType, PolicyEngine, PolicyRule, ResourceType
+
+
+def reference_decision(policies, resource_type, permission_type, context):
+    """Linear-scan evaluation with list membership, as before compilation."""
+    decision, applied = "DENY", []
+    applicable = [
+        p for p in policies
+        if p.is_active
+        and resource_type in p.conditions.get('resource_types', [resource_type])
+        and permission_type in p.conditions.get('permission_types', [permission_type])
+    ]
+    for policy in sorted(applicable, key=lambda p: p.priority):
+        c = policy.conditions
+        if 'allowed_ips' in c and context.get('source_ip', '') not in c['allowed_ips']:
+            continue
+        if 'users' in c and context.get('user_id', '') not in c['users']:
+            continue
+        if 'roles' in c and not any(r in c['roles'] for r in context.get('user_roles', [])):
+            continue
+        if 'tenants' in c and context.get('tenant_id', '') not in c['tenants']:
+            continue
+        applied.append(policy.rule_id)
+        decision = policy.effect
+        if decision == "DENY":
+            break
+    return decision, applied
+
+
+class TestPolicyIndex:
+    """Test that compiled evaluation matches a linear scan."""
+
+    @pytest.mark.asyncio
+    async def test_matches_reference_evaluation(self):
+        """Test random policies and contexts against the uncompiled algorithm."""
+        rng = random.Random(7)
+        engine = PolicyEngine()
+        policies = []
+        for i in range(60):
+            conditions = {}
+            if rng.random() < 0.5:
+                conditions['resource_types'] = rng.sample(['data', 'agent', 'dashboard'], 2)
+            if rng.random() < 0.5:
+                conditions['permission_types'] = ['read']
+            if rng.random() < 0.4:
+                conditions['users'] = rng.sample(['u1', 'u2', 'u3'], 2)
+            if rng.random() < 0.4:
+                conditions['roles'] = rng.sample(['viewer', 'operator', 'auditor'], 1)
+            if rng.random() < 0.4:
+                conditions['tenants'] = ['t1']
+            if rng.random() < 0.3:
+                conditions['allowed_ips'] = ['10.0.0.1', '10.0.0.2']
+            policy = PolicyRule(f"rule-{i}", f"Rule {i}", "", conditions,
+                                rng.choice(["ALLOW", "ALLOW", "DENY"]), priority=rng.randint(1, 20),
+                                is_active=rng.random() < 0.9)
+            policies.append(policy)
+            engine.add_policy(policy)
+
+        for _ in range(300):
+            resource_type = rng.choice([ResourceType.DATA, ResourceType.AGENT, ResourceType.DASHBOARD])
+            permission_type = rng.choice([PermissionType.READ, PermissionType.WRITE])
+            context = {
+                'user_id': rng.choice(['u1', 'u2', 'u3']),
+                'user_roles': rng.sample(['viewer', 'operator', 'auditor'], rng.randint(0, 2)),
+                'tenant_id': rng.choice(['t1', 't2']),
+                'source_ip': rng.choice(['10.0.0.1', '10.0.0.9'])
+            }
+            result = await engine.evaluate_access(
+                context['user_id'], resource_type, 'resource-1', permission_type, context
+            )
+            expected = reference_decision(policies, resource_type.value, permission_type.value, context)
+            assert (result['decision'], result['applied_policies']) == expected
+
+        assert engine.evaluation_cache.hits > 0
+
+    @pytest.mark.asyncio
+    async def test_cache_key_ignores_unread_attributes(self):
+        """Test that contexts differing only in unread attributes share a decision."""
+        engine = PolicyEngine()
+        engine.add_policy(PolicyRule("tenant-only", "Tenant only", "", {'tenants': ['t1']}, "ALLOW"))
+
+        for user_id in ['u1', 'u2', 'u3']:
+            await engine.evaluate_access(user_id, ResourceType.DATA, user_id, PermissionType.READ,
+                                         {'user_id': user_id, 'tenant_id': 't1'})
+
+        assert (engine.evaluation_cache.misses, engine.evaluation_cache.hits) == (1, 2)
+
+    @pytest.mark.asyncio
+    async def test_cached_decisions_are_not_shared_with_callers(self):
+        """Test that mutating a returned result does not change later decisions, and results carry the context."""
+        engine = PolicyEngine()
+        engine.add_policy(PolicyRule("tenant-only", "Tenant only", "", {'tenants': ['t1']}, "ALLOW"))
+
+        async def evaluate(user_id):
+            context = {'user_id': user_id, 'tenant_id': 't1'}
+            result = await engine.evaluate_access(user_id, ResourceType.DATA, 'resource-1', PermissionType.READ, context)
+            return context, result
+
+        first_context, first = await evaluate('u1')
+        first['decision'] = 'DENY'
+        first['applied_policies'].append('tampered')
+        second_context, second = await evaluate('u2')
+
+        assert first['context'] is first_context and second['context'] is second_context
+        assert (second['decision'], second['applied_policies']) == ('ALLOW', ['tenant-only'])
+        assert engine.evaluation_cache.hits == 1
+
+    def test_address_matcher_cidr(self):
+        """Test exact addresses and IPv4/IPv6 networks."""
+        matcher = AddressMatcher(['192.168.1.10', '10.0.0.0/8', '172.16.4.0/22', '2001:db8::/32'])
+
+        assert '192.168.1.10' in matcher
+        assert '10.200.3.4' in matcher
+        assert '172.16.7.255' in matcher
+        assert '172.16.8.0' not in matcher
+        assert '2001:db8:1::5' in matcher
+        assert 'not-an-ip' not in matcher
+
+    def test_decision_cache_is_bounded_lru(self):
+        """Test that the least recently used entry is evicted first."""
+        cache = DecisionCache(max_entries=2, ttl=60)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+
+        assert (cache.get('a'), cache.get('b'), cache.get('c')) == (1, None, 3)
+        assert len(cache) == 2
@@ -0,0 +1,120 @@
+"""
+Test the materialized role closure and its use by RBACSystem.
+"""
+
+import random
+
+import pytest
+
+from src.enterprise.compliance.advanced_rbac_engine import AdvancedRBACEngine, ResourceType
+from src.enterprise.compliance.rbac_system import RBACSystem, Role, User
+from src.enterprise.compliance.role_closure import RoleClosure
+
+
+def traverse(roles, role_id, visited=None):
+    """Recursive inheritance walk, as RBACSystem did before materialization."""
+    visited = set() if visited is None else visited
+    if role_id in visited or role_id not in roles or not roles[role_id][2]:
+        return set()
+    visited.add(role_id)
+    permissions, parents, _ = roles[role_id]
+    result = set(permissions)
+    for parent_id in parents:
+        result |= traverse(roles, parent_id, visited)
+    return result
+
+
+class TestRoleClosure:
+    """Test that incremental updates match a full traversal."""
+
+    def test_random_edits_match_traversal(self):
+        """Test role edits, deactivations and cycles against recursive traversal."""
+        rng = random.Random(3)
+        closure = RoleClosure()
+        roles = {}
+        role_ids = [f"role-{i}" for i in range(15)]
+
+        for step in range(200):
+            role_id = rng.choice(role_ids)
+            if rng.random() < 0.1:
+                closure.remove_role(role_id)
+                roles.pop(role_id, None)
+            else:
+                permissions = {f"perm-{rng.randint(0, 30)}" for _ in range(2)}
+                parents = set(rng.sample(role_ids, rng.randint(0, 2)))
+                active = rng.random() < 0.9
+                closure.set_role(role_id, permissions, parents, active)
+                roles[role_id] = (permissions, parents, active)
+
+            if step % 10 == 0:
+                user_roles = rng.sample(role_ids, 2)
+                closure.set_user(f"user-{step % 30}", user_roles, {"direct"})
+
+            for checked_id in role_ids:
+                assert closure.role_permissions(checked_id) == traverse(roles, checked_id)
+
+        for user_id, user_roles in closure._user_roles.items():
+            expected = {"direct"}.union(*(traverse(roles, r) for r in user_roles))
+            assert closure.user_permissions(user_id) == expected
+
+    def test_edit_only_touches_dependants(self):
+        """Test that editing a leaf role recomputes neither siblings nor their users."""
+        closure = RoleClosure()
+        closure.set_role("base", {"read"})
+        for i in range(50):
+            closure.set_role(f"team-{i}", {f"team-{i}"}, {"base"})
+            closure.set_user(f"user-{i}", [f"team-{i}"])
+
+        roles_before, users_before = closure.roles_recomputed, closure.users_recomputed
+        affected_users = closure.set_role("team-7", {"team-7", "write"}, {"base"})
+
+        assert affected_users == {"user-7"}
+        assert closure.roles_recomputed - roles_before == 1
+        assert closure.users_recomputed - users_before == 1
+        assert closure.user_permissions("user-7") == {"read", "team-7", "write"}
+
+
+class TestRBACSystemClosure:
+    """Test that role changes reach users without rebuilding caches."""
+
+    @pytest.mark.asyncio
+    async def test_parent_role_change_reaches_users(self):
+        """Test that editing an inherited role updates existing users' permissions."""
+        rbac = RBACSystem({})
+        await rbac.update_role(Role("analyst", "Analyst", "", ["report_read"], parent_roles=["viewer"]))
+        await rbac.create_user(User("u1", "alice", "a@example.com", ["analyst"]))
+        before = await rbac._get_user_permissions("u1")
+
+        viewer = rbac.roles["viewer"]
+        await rbac.update_role(Role("viewer", viewer.name, "", viewer.permissions + ["workflow_read"]))
+        after = await rbac._get_user_permissions("u1")
+
+        await rbac.revoke_role("u1", "analyst")
+        revoked = await rbac._get_user_permissions("u1")
+
+        assert {"report_read", "dashboard_read"} <= before and "workflow_read" not in before
+        assert "workflow_read" in after
+        assert revoked == set()
+
+
+class TestAdvancedRBACEngineDecisionCache:
+    """Test that cached access decisions follow role and assignment changes."""
+
+    @pytest.mark.asyncio
+    async def test_role_and_assignment_changes_invalidate_cached_decisions(self):
+        """Test that a parent role edit revokes a cached grant and a new assignment grants at once."""
+        engine = AdvancedRBACEngine({})
+        viewer = (await engine.create_role("viewer", "", ["read_agent"]))['role_id']
+        analyst = (await engine.create_role("analyst", "", ["write_agent"], [viewer]))['role_id']
+        await engine.assign_role_to_user("u1", analyst)
+
+        async def allowed(user_id, action):
+            return (await engine.check_access(user_id, action, ResourceType.AGENT, "agent-1", {}))['allowed']
+
+        assert await allowed("u1", "read") and not await allowed("u2", "write")
+
+        await engine.update_role(viewer, permissions=[])
+        await engine.assign_role_to_user("u2", analyst)
+
+        assert not await allowed("u1", "read")
+        assert await allowed("u2", "write")
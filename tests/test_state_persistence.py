@@ -0,0 +1,144 @@
+"""
+Test the state persistence record codec and bulk state storage.
+"""
+
+import pickle
+from datetime import datetime
+
+import pytest
+
+from src.enterprise.models.lifecycle import (
+    AgentLifecycleState, LifecycleEvent, RecoveryStrategy, RecoveryType
+)
+from src.enterprise.storage.record_codec import (
+    COMPRESSION_NONE, ENCODING_JSON, FORMAT_VERSION, MAGIC, RecordCodec, RecordCodecError
+)
+from src.enterprise.storage.state_persistence import StatePersistenceManager
+
+
+def make_state(workload_items=2):
+    return AgentLifecycleState(
+        agent_id="agent-1",
+        agent_type="threat_hunter",
+        tenant_id="tenant-1",
+        current_state=LifecycleEvent.RUNNING,
+        previous_state=LifecycleEvent.STARTING,
+        state_changed_at=datetime(2024, 5, 1, 12, 30, 15, 250000),
+        deployment_name="acso-agent-1",
+        namespace="acso-agents",
+        current_workload={f"task-{i}": {"progress": i / 10} for i in range(workload_items)},
+        recovery_strategy=RecoveryStrategy(strategy_type=RecoveryType.MIGRATE_TO_NEW_NODE),
+        metadata={"tags": ("a", "b")}
+    )
+
+
+class TestRecordCodec:
+    """Test encoding of persisted lifecycle records."""
+
+    def test_round_trip_restores_model_types(self):
+        """Test that enums, datetimes and nested dataclasses come back as the same types."""
+        codec = RecordCodec()
+        state = make_state()
+
+        decoded = codec.decode(codec.encode(state.__dict__))
+        restored = AgentLifecycleState(**decoded)
+
+        assert restored.current_state is LifecycleEvent.RUNNING
+        assert restored.state_changed_at == state.state_changed_at
+        assert restored.recovery_strategy == state.recovery_strategy
+        assert restored.recovery_strategy.strategy_type is RecoveryType.MIGRATE_TO_NEW_NODE
+        assert restored.current_workload == state.current_workload
+        assert restored.metadata == {"tags": ["a", "b"]}
+
+    def test_compression_selected_by_size(self):
+        """Test that small records are stored as is and large ones compressed."""
+        codec = RecordCodec()
+
+        small = codec.encode({"agent_id": "agent-1", "event": LifecycleEvent.FAILED})
+        large = codec.encode(make_state(workload_items=500).__dict__)
+
+        assert small[:2] == bytes((MAGIC, FORMAT_VERSION))
+        assert small[2] & 0x0F == COMPRESSION_NONE
+        assert large[2] & 0x0F != COMPRESSION_NONE
+        assert codec.decode(large)["current_workload"]["task-499"] == {"progress": 49.9}
+
+    def test_rejects_unregistered_types_and_pickles(self):
+        """Test that only registered types are written or rebuilt, and pickled data is refused."""
+        class Unregistered:
+            pass
+
+        codec = RecordCodec()
+        with pytest.raises(RecordCodecError):
+            codec.encode({"value": Unregistered()})
+
+        encoded = codec.encode({"strategy": RecoveryStrategy(strategy_type=RecoveryType.RESTART_IN_PLACE)})
+        with pytest.raises(RecordCodecError):
+            RecordCodec(types=[RecoveryType]).decode(encoded)
+
+        with pytest.raises(RecordCodecError):
+            codec.decode(pickle.dumps({"agent_id": "agent-1"}))
+
+    def test_bytes_round_trip_in_json(self):
+        """Test that bytes survive the JSON fallback encoding."""
+        codec = RecordCodec()
+        codec.encoding = ENCODING_JSON
+        record = {"checkpoint": b"\x00\xffstate", "nested": [b""]}
+
+        encoded = codec.encode(record)
+
+        assert encoded[2] >> 4 == ENCODING_JSON
+        assert codec.decode(encoded) == record
+
+
+class FakePipeline:
+    def __init__(self, store):
+        self.store = store
+        self.pending = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def set(self, key, value, ex=None):
+        self.pending[key] = value
+
+    async def execute(self):
+        self.store.update(self.pending)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self.store)
+
+
+class TestStatePersistenceManager:
+    """Test bulk storage of agent states."""
+
+    @pytest.mark.asyncio
+    async def test_unencodable_state_does_not_block_the_others(self):
+        """Test that a state holding an unregistered type is skipped and the rest are written."""
+        class Unregistered:
+            pass
+
+        manager = StatePersistenceManager(batch_size=2)
+        manager.redis_client = FakeRedis()
+        states = {
+            "agent-1": make_state().__dict__,
+            "agent-2": {"agent_id": "agent-2", "metadata": {"handle": Unregistered()}},
+            "agent-3": {"agent_id": "agent-3", "persistent_state": {"blob": b"\x01"}}
+        }
+
+        stored = await manager.store_agent_states(states, {"agent-1": {"max_attempts": 3}})
+
+        assert stored
+        assert sorted(manager.redis_client.store) == [
+            "acso:agent:recovery:agent-1", "acso:agent:state:agent-1", "acso:agent:state:agent-3"
+        ]
+        assert manager.codec.decode(manager.redis_client.store["acso:agent:state:agent-3"])["persistent_state"] == {
+            "blob": b"\x01"
+        }
@@ -0,0 +1,79 @@
+"""
+Test the streaming user profile sketches.
+"""
+
+import random
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from src.enterprise.security.streaming_profiles import (
+    CircularHistogram, HyperLogLog, RunningStats, StreamingUserProfile, TopKCounter
+)
+
+
+class TestSketches:
+    """Test the fixed-size summaries used by profiles."""
+
+    def test_running_stats_and_circular_hours(self):
+        """Test Welford moments and that login hours average across midnight."""
+        values = [0.2, 0.9, 0.4, 0.4, 0.7]
+        stats = RunningStats()
+        for value in values:
+            stats.add(value)
+        mean = sum(values) / len(values)
+        assert stats.mean == pytest.approx(mean)
+        assert stats.variance == pytest.approx(sum((v - mean) ** 2 for v in values) / len(values))
+
+        hours = CircularHistogram(24)
+        for hour in (23, 23, 0, 1, 1):
+            hours.add(hour)
+        assert hours.distance(hours.mean(), 0) < 0.1
+        assert hours.std() < 1.5
+        assert hours.distance(23, 1) == 2
+
+    def test_top_k_and_distinct_counts_stay_bounded(self):
+        """Test that heavy hitters survive a long tail and HyperLogLog estimates distinct values."""
+        rng = random.Random(7)
+        top = TopKCounter(capacity=8)
+        for i in range(5000):
+            top.add("/home" if i % 4 == 0 else "/reports" if i % 4 == 1 else f"/tail/{rng.random()}")
+        assert len(top.counts) == 8
+        assert [item for item, _ in top.most_common(2)] == ["/home", "/reports"]
+
+        small, large = HyperLogLog(), HyperLogLog()
+        for i in range(5):
+            small.add(f"10.0.0.{i}")
+        for i in range(20000):
+            large.add(f"10.{i // 65536}.{i // 256 % 256}.{i % 256}")
+        assert small.count() == 5
+        assert large.count() == pytest.approx(20000, rel=0.2)
+        assert len(large.registers) == 256
+
+
+class TestStreamingUserProfile:
+    """Test per-event profile updates."""
+
+    def test_profile_summary(self):
+        """Test the summary a profile produces from a short event stream."""
+        start = datetime(2024, 5, 1, 22, 30)
+
+        def event(minutes, action, ip="10.0.0.1", success=True, risk=0.2):
+            return SimpleNamespace(
+                timestamp=start + timedelta(minutes=minutes), action=action, resource="/app",
+                source_ip=ip, user_agent="browser", success=success, risk_score=risk
+            )
+
+        profile = StreamingUserProfile()
+        assert profile.to_dict() == {}
+        for item in (event(0, 'login'), event(90, 'logout'), event(120, 'login', "10.0.0.2", False, 0.6)):
+            profile.update(item)
+
+        summary = profile.to_dict()
+        assert summary['typical_login_hours'] == [0, 22]
+        assert summary['avg_session_duration'] == pytest.approx(1.5)
+        assert summary['typical_ip_count'] == 2 and summary['typical_user_agents'] == 1
+        assert summary['failure_rate'] == pytest.approx(1 / 3)
+        assert summary['risk_score_baseline'] == pytest.approx(1.0 / 3)
+        assert summary['common_resources'] == {"/app": 3}
@@ -0,0 +1,60 @@
+"""
+Test task completion handles in the TaskCoordinator.
+"""
+
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from src.shared.communication import TaskCoordinator
+
+
+def result_message(task_id, result):
+    return SimpleNamespace(
+        sender_id="worker", timestamp=datetime(2024, 5, 1),
+        payload={"task_id": task_id, "result": result, "success": True}
+    )
+
+
+class TestTaskCoordinator:
+    """Test waiting on one, all or any delegated tasks."""
+
+    @pytest.mark.asyncio
+    async def test_get_task_result_and_wait_all(self):
+        """Test that results are delivered and unfinished tasks are cancelled on timeout."""
+        coordinator = TaskCoordinator(communication_manager=None)
+        for task_id in ("t1", "t2", "t3"):
+            coordinator.track_task(task_id, "worker", {})
+
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.01, lambda: loop.create_task(coordinator.handle_task_result(result_message("t1", 1))))
+        single = await coordinator.get_task_result("t1", timeout=1)
+
+        await coordinator.handle_task_result(result_message("t2", 2))
+        everything = await coordinator.wait_all(["t2", "t3"], timeout=0.02)
+
+        # A late result for the cancelled task is ignored
+        await coordinator.handle_task_result(result_message("t3", 3))
+
+        assert single["result"] == 1 and single["agent_id"] == "worker"
+        assert everything["t2"]["result"] == 2 and everything["t3"] is None
+        assert not coordinator.pending_tasks and not coordinator.task_futures
+
+    @pytest.mark.asyncio
+    async def test_wait_any_skips_cancelled_tasks_and_times_out(self):
+        """Test that a cancelled task does not end wait_any before another task finishes."""
+        coordinator = TaskCoordinator(communication_manager=None)
+        for task_id in ("t1", "t2", "t3"):
+            coordinator.track_task(task_id, "worker", {})
+
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.01, coordinator.cancel_task, "t1")
+        loop.call_later(0.03, lambda: loop.create_task(coordinator.handle_task_result(result_message("t2", 2))))
+        first = await coordinator.wait_any(["t1", "t2", "t3"], timeout=1)
+        timed_out = await coordinator.wait_any(["t3"], timeout=0.02)
+
+        assert first[0] == "t2" and first[1]["result"] == 2
+        assert timed_out is None
+        assert "t3" in coordinator.task_futures
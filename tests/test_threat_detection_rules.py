@@ -0,0 +1,200 @@
+"""
+Test compiled threat detection rules in the threat hunter's detection engine.
+"""
+
+import random
+
+import pytest
+
+from src.agents.threat_hunter_agent import ThreatDetectionEngine, ThreatIndicator
+
+RULES = [
+    {"rule_id": "console_login", "name": "Console login", "description": "",
+     "conditions": {"event_type": "consolelogin"}, "severity": "low", "enabled": True},
+    {"rule_id": "bad_ip", "name": "Bad IP", "description": "",
+     "conditions": {"source_ip_reputation": "malicious"}, "severity": "high", "enabled": True},
+    {"rule_id": "bad_ip_role", "name": "Bad IP role", "description": "",
+     "conditions": {"event_type": "createrole", "source_ip_reputation": "malicious"}, "severity": "high", "enabled": True},
+    {"rule_id": "disabled", "name": "Disabled", "description": "",
+     "conditions": {"event_type": "consolelogin"}, "severity": "low", "enabled": False},
+    {"rule_id": "any_event", "name": "Any event", "description": "",
+     "conditions": {"destination": "external"}, "severity": "low", "enabled": True}
+]
+
+EVENT_NAMES = ["ConsoleLogin", "CreateRole", "GetObject", "AttachUserPolicy", "DescribeInstances"]
+SOURCE_IPS = ["192.168.1.100", "10.0.0.50", "203.0.113.9", "198.51.100.7", "8.8.8.8"]
+
+
+def reference_rule_ids(engine, entry, malicious):
+    """Linear evaluation of every rule, as before rules were compiled."""
+    matched = []
+    for rule in engine.detection_rules:
+        if not rule.get("enabled", True):
+            continue
+        conditions = rule.get("conditions", {})
+        if "event_type" in conditions and entry["eventName"].lower() != conditions["event_type"]:
+            continue
+        if conditions.get("source_ip_reputation") == "malicious" and entry["sourceIPAddress"] not in malicious:
+            continue
+        matched.append(rule["rule_id"])
+    return matched
+
+
+class TestCompiledRules:
+    """Test that compiled rules match a linear scan and follow rule edits."""
+
+    @pytest.mark.asyncio
+    async def test_compiled_rules_match_linear_evaluation(self):
+        """Test rule and pattern matches on random entries against uncompiled evaluation."""
+        engine = ThreatDetectionEngine()
+        engine.detection_rules = [dict(rule) for rule in RULES]
+        engine.threat_indicators = [ThreatIndicator("cidr", "203.0.113.0/24", 0.9, "feed")]
+        malicious = {"192.168.1.100", "10.0.0.50", "203.0.113.9"}
+        rng = random.Random(3)
+
+        for _ in range(200):
+            entry = {
+                "eventName": rng.choice(EVENT_NAMES),
+                "sourceIPAddress": rng.choice(SOURCE_IPS),
+                "userIdentity": {"userName": "alice"},
+                "errorCode": rng.choice([None, "AccessDenied"])
+            }
+            compiled = engine._get_compiled_rules()
+            rule_ids = [threat["rule_id"] for threat in engine._apply_detection_rules(entry, compiled)]
+            assert rule_ids == reference_rule_ids(engine, entry, malicious)
+
+            event_name = entry["eventName"].lower()
+            patterns = [threat["pattern"] for threat in await engine._check_threat_patterns(entry)]
+            expected = [
+                spec["pattern"] for spec in
+                [{"pattern": "failed_login", "actions": ["signin", "login"], "requires_error": True},
+                 {"pattern": "privilege_escalation", "actions": ["attachuserpolicy", "putuserpolicy", "createrole"]},
+                 {"pattern": "data_access", "actions": ["getobject", "listobjects", "downloadfile"]}]
+                if any(action in event_name for action in spec["actions"])
+                and (entry["errorCode"] or not spec.get("requires_error"))
+            ]
+            assert patterns == expected
+
+    def test_updated_rules_are_recompiled(self):
+        """Test that changing a rule's conditions or enabled flag takes effect, and only then recompiles."""
+        engine = ThreatDetectionEngine()
+        engine.detection_rules = [dict(rule, conditions=dict(rule["conditions"])) for rule in RULES]
+        entry = {"eventName": "GetObject", "sourceIPAddress": "8.8.8.8", "userIdentity": {}}
+
+        def rule_ids():
+            return [threat["rule_id"] for threat in engine._apply_detection_rules(entry, engine._get_compiled_rules())]
+
+        compiled = engine._get_compiled_rules()
+        assert rule_ids() == ["any_event"]
+        assert engine._get_compiled_rules() is compiled
+
+        assert engine.update_detection_rule("console_login", conditions={"event_type": "getobject"})
+        assert engine._get_compiled_rules() is not compiled
+        assert rule_ids() == ["console_login", "any_event"]
+        assert engine.update_detection_rule("any_event", enabled=False)
+        assert rule_ids() == ["console_login"]
+        assert not engine.update_detection_rule("missing", enabled=False)
+
+
+class TestBatchAnalysis:
+    """Test that batch analysis matches per-entry analysis."""
+
+    @pytest.mark.asyncio
+    async def test_batch_matches_entries_on_a_mixed_page(self):
+        """Test a page with regular, irregular and failing rows against analyze_log_entry."""
+        def make_engine():
+            engine = ThreatDetectionEngine()
+            engine.detection_rules = [dict(rule) for rule in RULES] + [
+                # A malformed threshold makes rule evaluation raise for DeleteUser rows only
+                {"rule_id": "broken", "name": "Broken", "description": "",
+                 "conditions": {"event_type": "deleteuser", "count_threshold": "5", "time_window": 60},
+                 "severity": "low", "enabled": True}
+            ]
+            return engine
+
+        page = [
+            {"eventName": "ConsoleLogin", "sourceIPAddress": "8.8.8.8", "eventTime": "2024-05-01T10:00:00Z",
+             "userIdentity": {"userName": "alice"}, "errorCode": "Failed"},
+            {"eventName": "DeleteUser", "sourceIPAddress": "10.0.0.50", "eventTime": "2024-05-01T23:00:00Z",
+             "userIdentity": {"userName": "bob"}},
+            {"eventName": "GetObject", "sourceIPAddress": "203.0.113.9", "eventTime": "2024-05-04T12:00:00",
+             "userIdentity": {"userName": "carol"}},
+            {"eventName": "CreateRole", "sourceIPAddress": None, "eventTime": "not-a-time",
+             "userIdentity": "dave"},
+            {"eventName": "DeleteUser", "sourceIPAddress": "8.8.8.8", "eventTime": "2024-05-01T02:00:00Z",
+             "userIdentity": {"userName": "erin"}},
+            {"eventName": "AttachUserPolicy", "sourceIPAddress": "192.168.1.100", "eventTime": "2024-05-01T03:00:00Z",
+             "userIdentity": {"userName": "frank"}}
+        ]
+
+        def comparable(threats):
+            return [{key: value for key, value in threat.items() if key != "detected_at"} for threat in threats]
+
+        per_entry_engine = make_engine()
+        expected = []
+        for entry in page:
+            expected.extend(await per_entry_engine.analyze_log_entry(entry))
+        batch = await make_engine().analyze_log_batch(page)
+
+        assert comparable(batch) == comparable(expected)
+        assert {threat.get("log_entry", {}).get("eventName") for threat in batch} >= {"ConsoleLogin", "AttachUserPolicy"}
+
+
+class TestWindowedRules:
+    """Test count_threshold/time_window rules through the engine."""
+
+    WINDOWED_RULE = {
+        "rule_id": "login_burst", "name": "Login burst", "description": "",
+        "conditions": {"event_type": "consolelogin", "count_threshold": 3, "time_window": 300},
+        "severity": "medium", "enabled": True
+    }
+
+    @staticmethod
+    def login(seconds, source_ip="203.0.113.9"):
+        minutes, seconds = divmod(seconds, 60)
+        hours, minutes = divmod(minutes, 60)
+        return {"eventName": "ConsoleLogin", "sourceIPAddress": source_ip,
+                "eventTime": f"2024-05-01T{10 + hours:02d}:{minutes:02d}:{seconds:02d}Z",
+                "userIdentity": {"userName": "alice"}}
+
+    async def burst_counts(self, entries):
+        """event_count of each login_burst threat, or None for entries that did not fire."""
+        engine = ThreatDetectionEngine()
+        engine.detection_rules = [dict(self.WINDOWED_RULE)]
+
+        counts = []
+        for entry in entries:
+            fired = [threat for threat in await engine.analyze_log_entry(entry) if threat.get("rule_id") == "login_burst"]
+            assert len(fired) <= 1
+            counts.append(fired[0]["event_count"] if fired else None)
+        return counts
+
+    @pytest.mark.asyncio
+    async def test_fires_once_when_the_count_is_reached_inside_the_window(self):
+        """Test that the rule stays quiet below the threshold, fires on the third login, then starts over."""
+        entries = [self.login(0), self.login(100), self.login(30, "198.51.100.7"), self.login(150),
+                   self.login(200), self.login(210)]
+
+        assert await self.burst_counts(entries) == [None, None, None, 3, None, None]
+
+    @pytest.mark.asyncio
+    async def test_expired_events_stop_counting(self):
+        """Test that logins older than the window no longer count towards the threshold."""
+        entries = [self.login(0), self.login(100), self.login(500), self.login(550), self.login(600)]
+
+        assert await self.burst_counts(entries) == [None, None, None, None, 3]
+
+    @pytest.mark.asyncio
+    async def test_undated_entries_do_not_reset_a_backfilled_window(self):
+        """Test that an undated entry in a batch of historical events keeps the counters in progress."""
+        engine = ThreatDetectionEngine()
+        engine.detection_rules = [dict(self.WINDOWED_RULE)]
+        undated = dict(self.login(120, "198.51.100.7"))
+        del undated["eventTime"]
+
+        threats = await engine.analyze_log_batch([self.login(0), self.login(100), undated, self.login(150)])
+
+        fired = [threat for threat in threats if threat.get("rule_id") == "login_burst"]
+        assert [(threat["log_entry"]["eventTime"], threat["event_count"]) for threat in fired] == [
+            ("2024-05-01T10:02:30Z", 3)
+        ]
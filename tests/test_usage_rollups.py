@@ -0,0 +1,86 @@
+"""
+Test time-bucketed usage rollups against brute-force counts.
+"""
+
+import importlib.util
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Loaded by path: the billing package __init__ pulls in the full billing stack
+_spec = importlib.util.spec_from_file_location(
+    "usage_rollups", Path(__file__).resolve().parents[1] / "src" / "enterprise" / "billing" / "usage_rollups.py"
+)
+usage_rollups = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(usage_rollups)
+
+DAY, HOUR, MINUTE = usage_rollups.DAY, usage_rollups.HOUR, usage_rollups.MINUTE
+UsageRollupStore = usage_rollups.UsageRollupStore
+
+START = datetime(2024, 3, 1)
+
+
+def brute_force_count(events, low, high):
+    """Events with low <= timestamp < high."""
+    return sum(1 for timestamp in events if low <= timestamp < high)
+
+
+def floor_to(timestamp, seconds):
+    offset = int((timestamp - START).total_seconds()) // seconds * seconds
+    return START + timedelta(seconds=offset)
+
+
+class TestUsageRollupStore:
+    """Test range queries, ring wrap-around and late events."""
+
+    def test_queries_match_brute_force_at_minute_and_hour_alignment(self):
+        """Test random ranges, rounded to whole minutes, against a count of the raw events."""
+        rng = random.Random(4)
+        # Minute buckets are held for the whole span, so every query is exact to the minute
+        store = UsageRollupStore(resolutions=((DAY, 10), (HOUR, 10 * 24), (MINUTE, 4 * 24 * 60)))
+        events = sorted(START + timedelta(seconds=rng.randint(0, 3 * DAY)) for _ in range(3000))
+        for timestamp in events:
+            store.record("tenant", "api_call", timestamp, 1.0, 0.5)
+
+        for _ in range(200):
+            start = START + timedelta(seconds=rng.randint(0, 3 * DAY))
+            end = start + timedelta(seconds=rng.randint(0, DAY))
+            if rng.random() < 0.5:
+                start, end = floor_to(start, HOUR), floor_to(end, HOUR) - timedelta(seconds=1)
+            expected = brute_force_count(events, floor_to(start, MINUTE), floor_to(end, MINUTE) + timedelta(minutes=1))
+            totals = store.query("tenant", start, end).get("api_call")
+            assert (totals.count if totals else 0) == expected
+            if totals:
+                assert totals.cost == expected * 0.5
+
+    def test_ring_wrap_rounds_aged_out_minutes_to_hours(self):
+        """Test that wrapped rings stay exact where held and round outward where minutes aged out."""
+        store = UsageRollupStore(resolutions=((DAY, 5), (HOUR, 48), (MINUTE, 30)))
+        events = [START + timedelta(seconds=17 * i) for i in range(10 * HOUR // 17)]
+        for timestamp in events:
+            store.record("tenant", "api_call", timestamp, 1.0, 0.0)
+        last = events[-1]
+
+        def count(start, end):
+            totals = store.query("tenant", start, end).get("api_call")
+            return totals.count if totals else 0
+
+        recent_start = floor_to(last, MINUTE) - timedelta(minutes=20)
+        assert count(recent_start, last) == brute_force_count(events, recent_start, last + timedelta(seconds=1))
+
+        old_start, old_end = START + timedelta(hours=2, minutes=10), START + timedelta(hours=4, minutes=50)
+        assert count(old_start, old_end) == brute_force_count(
+            events, floor_to(old_start, HOUR), floor_to(old_end, HOUR) + timedelta(hours=1)
+        )
+        assert store.get_stats()["buckets"] == 1 + 10 + 30
+
+    def test_late_events_count_where_their_bucket_is_still_held(self):
+        """Test that events older than a ring are counted as late there but kept by coarser rings."""
+        store = UsageRollupStore(resolutions=((DAY, 5), (HOUR, 48), (MINUTE, 30)))
+        store.record("tenant", "api_call", START + timedelta(hours=10), 1.0, 1.0)
+        store.record("tenant", "api_call", START + timedelta(hours=9), 1.0, 1.0)
+        store.record("tenant", "api_call", START - timedelta(days=10), 1.0, 1.0)
+
+        assert store.get_stats()["late_events"] == 1 + 3
+        assert store.query("tenant", START + timedelta(hours=9), START + timedelta(hours=9, minutes=59))["api_call"].count == 1
+        assert store.query("tenant", START - timedelta(days=30), START + timedelta(days=1))["api_call"].count == 2
@@ -0,0 +1,79 @@
+"""
+Test WebSocket broadcast fan-out with slow and failing consumers.
+"""
+
+import asyncio
+
+import pytest
+
+from src.api.websocket.broadcast import BroadcastEngine, SlowConsumerPolicy
+
+
+class StubSocket:
+    """Collects sent text, optionally stalling every send."""
+
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.sent = []
+
+    async def send(self, text: str):
+        if self.fail:
+            raise ConnectionError("closed")
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.sent.append(text)
+
+
+class TestBroadcastEngine:
+    """Test serialize-once fan-out over per-connection queues."""
+
+    @pytest.mark.asyncio
+    async def test_slow_consumer_does_not_delay_others(self):
+        """Test that fast connections receive a broadcast while one client stalls."""
+        disconnected = []
+
+        async def on_slow(connection_id):
+            disconnected.append(connection_id)
+            await engine.detach(connection_id)
+
+        engine = BroadcastEngine(max_queue_size=10, send_timeout=0.05, on_slow_consumer=on_slow)
+        fast = [StubSocket() for _ in range(50)]
+        slow = StubSocket(delay=1.0)
+        for i, socket in enumerate(fast):
+            engine.attach(f"fast-{i}", socket.send)
+        engine.attach("slow", slow.send)
+
+        queued = engine.publish('{"type": "broadcast"}', [f"fast-{i}" for i in range(50)] + ["slow"])
+        await asyncio.sleep(0.2)
+
+        assert queued == 51
+        assert all(socket.sent == ['{"type": "broadcast"}'] for socket in fast)
+        assert disconnected == ["slow"]
+        stats = engine.get_stats()
+        assert stats["slow_consumer_disconnects"] == 1
+        assert stats["fanout_latency_max_ms"] > 0
+
+    @pytest.mark.asyncio
+    async def test_drop_oldest_policy_keeps_newest_messages(self):
+        """Test that a full queue drops its oldest message under DROP_OLDEST."""
+        engine = BroadcastEngine(max_queue_size=3, policy=SlowConsumerPolicy.DROP_OLDEST)
+        socket = StubSocket()
+        engine.attach("conn", socket.send)
+        for i in range(5):
+            engine.publish(str(i), ["conn"])
+        await asyncio.sleep(0.05)
+
+        assert socket.sent == ["2", "3", "4"]
+        assert engine.get_stats()["dropped_messages"] == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_send_disconnects_consumer(self):
+        """Test that a send error closes the connection's queue."""
+        engine = BroadcastEngine()
+        engine.attach("conn", StubSocket(fail=True).send)
+        engine.publish("message", ["conn"])
+        await asyncio.sleep(0.05)
+
+        assert "conn" not in engine.queues
+        assert engine.get_stats()["slow_consumer_disconnects"] == 1
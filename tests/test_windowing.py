@@ -0,0 +1,64 @@
+"""
+Test the keyed sliding-window counters used by threshold detection rules.
+"""
+
+from src.shared.windowing import SlidingWindowAggregator
+
+
+class TestSlidingWindowAggregator:
+    """Test threshold crossing, expiry and the key bound."""
+
+    def test_fires_when_threshold_is_crossed_inside_the_window(self):
+        """Test that events older than the window stop counting and the counter resets after firing."""
+        aggregator = SlidingWindowAggregator(buckets_per_window=12)
+
+        results = [aggregator.record("ip-1", timestamp, 300, 3) for timestamp in (0, 100, 350, 390)]
+        assert results == [None, None, None, 3]
+
+        # Reset after firing: the next two events alone do not cross the threshold
+        assert aggregator.record("ip-1", 395, 300, 3) is None
+        assert aggregator.record("ip-1", 396, 300, 3) is None
+        assert aggregator.record("ip-1", 397, 300, 3) == 3
+
+    def test_short_windows_expire_behind_long_windows_and_late_events(self):
+        """Test TTL eviction with mixed window lengths and out-of-order events."""
+        aggregator = SlidingWindowAggregator()
+        aggregator.record("long", 0, 3600, 100)
+        aggregator.record("short", 10, 300, 100)
+        aggregator.record("late", 50, 300, 100)
+        # An out-of-order event touches "late" without extending its window
+        aggregator.record("late", 20, 300, 100)
+
+        assert aggregator.evict_expired(360) == 2
+        assert len(aggregator) == 1
+        assert aggregator.evict_expired(3601) == 1
+        assert aggregator.get_stats()["expired_evictions"] == 3
+
+    def test_late_events_do_not_evict_newer_counters(self):
+        """Test that expiry follows the latest event time, not the time of each event."""
+        aggregator = SlidingWindowAggregator()
+        aggregator.record("a", 1000, 300, 3)
+        aggregator.record("b", 50, 300, 3)
+        aggregator.record("a", 1100, 300, 3)
+
+        assert aggregator.watermark == 1100 and len(aggregator) == 1
+        assert aggregator.record("a", 1200, 300, 3) == 3
+
+    def test_max_keys_evicts_least_recently_updated(self):
+        """Test that the key count never exceeds max_keys and the stalest key goes first."""
+        aggregator = SlidingWindowAggregator(max_keys=3)
+        for key in ("a", "b", "c"):
+            aggregator.record(key, 0, 3600, 10)
+        aggregator.record("a", 1, 3600, 10)
+        aggregator.record("d", 2, 3600, 10)
+
+        assert len(aggregator) == 3
+        assert aggregator.get_stats()["capacity_evictions"] == 1
+        # "b" was evicted, so it starts counting from scratch
+        assert aggregator.record("b", 3, 3600, 2) is None
+        assert aggregator.record("a", 4, 3600, 3) == 3
+
+        for step in range(1000):
+            aggregator.record(f"key-{step}", 10 + step, 3600, 10)
+        assert len(aggregator) == 3
+        assert len(aggregator._expiry_heap) <= 4 * len(aggregator) + 64
@@ -0,0 +1,144 @@
+"""
+Test the dependency-counting DAG scheduler with stub node runners.
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from src.api.models.workflow import (
+    WorkflowDefinition, WorkflowEdge, WorkflowNode, WorkflowNodeConfig,
+    WorkflowNodePosition, WorkflowNodeType
+)
+from src.api.services.workflow_scheduler import WorkflowDAGScheduler
+
+
+def make_workflow(node_types, edges):
+    """Workflow with nodes keyed by id and edges as (source, target) pairs."""
+    return WorkflowDefinition(
+        id="wf", name="wf", created_at=datetime(2024, 5, 1), created_by="tester",
+        nodes=[
+            WorkflowNode(id=node_id, name=node_id, type=node_type,
+                         position=WorkflowNodePosition(x=0, y=0), config=WorkflowNodeConfig())
+            for node_id, node_type in node_types.items()
+        ],
+        edges=[WorkflowEdge(id=f"{source}-{target}", source_node_id=source, target_node_id=target)
+               for source, target in edges]
+    )
+
+
+# start -> a, b -> join -> end
+DIAMOND = make_workflow(
+    {"start": WorkflowNodeType.START, "a": WorkflowNodeType.TASK, "b": WorkflowNodeType.TASK,
+     "join": WorkflowNodeType.MERGE, "end": WorkflowNodeType.END},
+    [("start", "a"), ("start", "b"), ("a", "join"), ("b", "join"), ("join", "end")]
+)
+
+
+class StubRunner:
+    """Records node runs and the peak number of nodes running at once."""
+
+    def __init__(self, outcomes=None, delay=0.01):
+        self.outcomes = outcomes or {}
+        self.delay = delay
+        self.runs = []
+        self.running = 0
+        self.peak = 0
+
+    async def __call__(self, node):
+        self.runs.append(node.id)
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        await asyncio.sleep(self.delay)
+        self.running -= 1
+        return self.outcomes.get(node.id, True)
+
+
+class TestWorkflowDAGScheduler:
+    """Test ordering, concurrency, failures and pause/resume."""
+
+    @pytest.mark.asyncio
+    async def test_join_runs_once_after_parallel_branches(self):
+        """Test that branches run side by side and the join waits for both."""
+        runner = StubRunner()
+        scheduler = WorkflowDAGScheduler()
+
+        finished = await scheduler.run("ex-1", DIAMOND, runner, lambda: True)
+
+        assert finished and not scheduler.has_state("ex-1")
+        assert runner.runs.count("join") == 1 and len(runner.runs) == 5
+        assert runner.runs[0] == "start" and runner.runs[-2:] == ["join", "end"]
+        assert runner.peak == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_node_does_not_release_successors(self):
+        """Test that a failure stops its descendants but not independent branches."""
+        runner = StubRunner(outcomes={"a": False})
+        raising = StubRunner()
+
+        async def raise_on_b(node):
+            if node.id == "b":
+                raise RuntimeError("boom")
+            return await raising(node)
+
+        first = await WorkflowDAGScheduler().run("ex-1", DIAMOND, runner, lambda: True)
+        second = await WorkflowDAGScheduler().run("ex-2", DIAMOND, raise_on_b, lambda: True)
+
+        assert (first, second) == (True, True)
+        assert sorted(runner.runs) == ["a", "b", "start"]
+        assert sorted(raising.runs) == ["a", "start"]
+
+    @pytest.mark.asyncio
+    async def test_pause_defers_ready_nodes_and_approval_resumes(self):
+        """Test that paused nodes run on the next call and a waiting node resumes its successors."""
+        runner = StubRunner(outcomes={"a": None})
+        scheduler = WorkflowDAGScheduler()
+        paused = {"value": False}
+
+        async def pause_after_start(node):
+            paused["value"] = True
+            return await runner(node)
+
+        first = await scheduler.run("ex-1", DIAMOND, pause_after_start, lambda: not paused["value"])
+        deferred_runs = list(runner.runs)
+        paused["value"] = False
+        second = await scheduler.run("ex-1", DIAMOND, runner, lambda: True)
+        waiting = scheduler.waiting_nodes("ex-1")
+        third = await scheduler.resume_after("ex-1", "a", runner, lambda: True)
+
+        assert (first, second, third) == (False, False, True)
+        assert deferred_runs == ["start"]
+        assert waiting == {"a"}
+        assert runner.runs.count("join") == 1 and runner.runs[-1] == "end"
+
+    @pytest.mark.asyncio
+    async def test_execution_backlog_does_not_hold_global_slots(self):
+        """Test that a busy execution queued on its own limit leaves global slots to others."""
+        wide = make_workflow(
+            {"start": WorkflowNodeType.START, **{f"t{i}": WorkflowNodeType.TASK for i in range(4)}},
+            [("start", f"t{i}") for i in range(4)]
+        )
+        single = make_workflow({"start": WorkflowNodeType.START}, [])
+        scheduler = WorkflowDAGScheduler(max_concurrent_nodes=2, max_concurrent_nodes_per_execution=1)
+        release = asyncio.Event()
+        finished_order = []
+
+        async def slow(node):
+            if node.id != "start":
+                await release.wait()
+            finished_order.append(("wide", node.id))
+            return True
+
+        async def fast(node):
+            finished_order.append(("single", node.id))
+            release.set()
+            return True
+
+        wide_run = asyncio.ensure_future(scheduler.run("wide", wide, slow, lambda: True))
+        await asyncio.sleep(0.01)
+        single_run = await asyncio.wait_for(scheduler.run("single", single, fast, lambda: True), timeout=1)
+
+        assert (single_run, await asyncio.wait_for(wide_run, timeout=1)) == (True, True)
+        assert finished_order[1] == ("single", "start")
+        assert len(finished_order) == 6